@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Daily Briefing Backfill Script
+
+Regenerates daily briefings (markdown + JSON sidecar) for a date range
+directly through CampfireTools, without going through the webhook and one
+agent run per day. Useful after a briefing format change or when onboarding
+a new room set.
+
+- Days are generated on a bounded process pool, each worker holding its own
+  read-only database connection
+- Progress is recorded in briefings/.backfill_progress.json after every day;
+  re-running the same command resumes where it stopped (failed days are retried)
+- Optional model summaries (--summarize) replace the placeholder executive
+  summary; requests are rate-limited with a token bucket and retried on
+  rate-limit/overload errors
+
+Usage:
+    python scripts/backfill_briefings.py --start 2025-01-01 --end 2025-12-31
+    python scripts/backfill_briefings.py --start 2025-10-01 --end 2025-10-31 --rooms 1,2,3 --workers 8
+    python scripts/backfill_briefings.py --start 2025-10-01 --end 2025-10-31 --summarize --rpm 30
+
+Environment:
+    CAMPFIRE_DB_PATH: Campfire SQLite database (default: ./tests/fixtures/test.db)
+    KNOWLEDGE_BASE_DIR: Knowledge base root (default: ./ai-knowledge/company_kb)
+    ANTHROPIC_API_KEY / ANTHROPIC_BASE_URL: Used only with --summarize
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.tools.campfire_tools import CampfireTools  # noqa: E402
+
+PROGRESS_VERSION = 1
+DEFAULT_SUMMARY_MODEL = "claude-haiku-4-5-20251001"
+
+# Per-process CampfireTools (set by _init_worker)
+_worker_tools = None
+
+
+def _init_worker(db_path: str, kb_dir: str, context_dir: str):
+    """Process pool initializer: one CampfireTools (and DB connection) per worker"""
+    global _worker_tools
+    _worker_tools = CampfireTools(db_path=db_path, context_dir=context_dir, knowledge_base_dir=kb_dir)
+
+
+def _generate_day(date: str, room_ids, include_files: bool, summary_length: str) -> dict:
+    """Generate one day's briefing in a worker process"""
+    started = time.perf_counter()
+    try:
+        result = _worker_tools.generate_daily_briefing(
+            date=date,
+            room_ids=room_ids,
+            include_files=include_files,
+            summary_length=summary_length
+        )
+    except Exception as e:
+        return {"date": date, "status": "failed", "error": str(e)}
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    if result.get("success"):
+        return {
+            "date": date,
+            "status": "written",
+            "briefing_path": result["briefing_path"],
+            "message_count": result["message_count"],
+            "elapsed_ms": elapsed_ms,
+        }
+    if str(result.get("error", "")).startswith("No messages found"):
+        return {"date": date, "status": "empty", "elapsed_ms": elapsed_ms}
+    return {"date": date, "status": "failed", "error": result.get("error", "unknown error")}
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate_per_minute` requests, bursts up to `capacity`"""
+
+    def __init__(self, rate_per_minute: float, capacity: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+class Summarizer:
+    """Writes model executive summaries for generated briefings (rate-limited)"""
+
+    SYSTEM_PROMPT = (
+        "你是企业日报助手。根据给定的每日简报数据，写一段2-4句的中文执行摘要："
+        "概括当天最重要的讨论、决策和文件，不要列举统计数字以外的虚构内容。只输出摘要正文。"
+    )
+
+    def __init__(self, tools: CampfireTools, model: str, rpm: float, max_retries: int = 5):
+        try:
+            import anthropic
+        except ImportError:
+            raise SystemExit("[Backfill] ❌ --summarize requires the anthropic package (pip install anthropic)")
+        self.anthropic = anthropic
+        self.client = anthropic.Anthropic()
+        self.tools = tools
+        self.model = model
+        self.bucket = TokenBucket(rpm, capacity=max(1, int(rpm // 30)))
+        self.max_retries = max_retries
+
+    def summarize(self, date: str, briefing_path: str) -> dict:
+        content = (self.tools.knowledge_base_dir / briefing_path).read_text(encoding="utf-8")
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                response = self.client.messages.create(
+                    model=self.model,
+                    max_tokens=400,
+                    system=self.SYSTEM_PROMPT,
+                    messages=[{"role": "user", "content": content[:12000]}],
+                )
+                break
+            except (self.anthropic.RateLimitError, self.anthropic.InternalServerError,
+                    self.anthropic.APIConnectionError) as e:
+                if attempt == self.max_retries:
+                    return {"date": date, "summarized": False, "error": str(e)}
+                time.sleep(min(60, 2 ** attempt))
+            except self.anthropic.APIError as e:
+                return {"date": date, "summarized": False, "error": str(e)}
+
+        text = "".join(block.text for block in response.content if getattr(block, "type", "") == "text")
+        result = self.tools.update_briefing_summary(date, text, model=self.model)
+        return {"date": date, "summarized": result["success"], "error": result.get("error")}
+
+
+class Progress:
+    """Resumable backfill progress (atomic JSON writes after every update)"""
+
+    def __init__(self, path: Path, params: dict, fresh: bool = False):
+        self.path = path
+        self.params = params
+        self.days = {}
+        self.lock = threading.Lock()
+        if not fresh and path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                data = {}
+            if data.get("version") == PROGRESS_VERSION and data.get("params") == params:
+                self.days = data.get("days", {})
+            elif data:
+                print("[Backfill] ⚠️  Options changed since the last run; starting over")
+
+    def done(self, date: str, summarize: bool) -> bool:
+        day = self.days.get(date)
+        if not day or day["status"] == "failed":
+            return False
+        return not (summarize and day["status"] == "written" and not day.get("summarized"))
+
+    def record(self, date: str, **fields):
+        # Called from the main thread and from summary threads
+        with self.lock:
+            self.days.setdefault(date, {}).update(fields)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps({"version": PROGRESS_VERSION, "params": self.params, "days": self.days}, indent=1),
+                encoding="utf-8"
+            )
+            os.replace(tmp_path, self.path)
+
+
+def date_range(start: str, end: str):
+    first = datetime.strptime(start, "%Y-%m-%d")
+    last = datetime.strptime(end, "%Y-%m-%d")
+    return [(first + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((last - first).days + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill daily briefings for a date range")
+    parser.add_argument("--start", required=True, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last date (YYYY-MM-DD). Defaults to yesterday.")
+    parser.add_argument("--rooms", help="Comma-separated room IDs. Defaults to all rooms.")
+    parser.add_argument("--format", choices=["concise", "detailed"], default="concise", help="Briefing length")
+    parser.add_argument("--no-files", action="store_true", help="Do not list file attachments")
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1), help="Worker processes")
+    parser.add_argument("--db", default=os.getenv("CAMPFIRE_DB_PATH", "./tests/fixtures/test.db"))
+    parser.add_argument("--kb", default=os.getenv("KNOWLEDGE_BASE_DIR", "./ai-knowledge/company_kb"))
+    parser.add_argument("--context-dir", default=os.getenv("CONTEXT_DIR", "./user_contexts"))
+    parser.add_argument("--restart", action="store_true", help="Ignore saved progress and regenerate every day")
+    parser.add_argument("--summarize", action="store_true", help="Write executive summaries with a model")
+    parser.add_argument("--model", default=os.getenv("BACKFILL_SUMMARY_MODEL", DEFAULT_SUMMARY_MODEL))
+    parser.add_argument("--rpm", type=float, default=30.0, help="Max summary requests per minute")
+    args = parser.parse_args()
+
+    end = args.end or (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    try:
+        dates = date_range(args.start, end)
+    except ValueError:
+        raise SystemExit("[Backfill] ❌ Dates must be YYYY-MM-DD")
+    room_ids = [int(r) for r in args.rooms.split(",")] if args.rooms else None
+    include_files = not args.no_files
+
+    tools = CampfireTools(db_path=args.db, context_dir=args.context_dir, knowledge_base_dir=args.kb)
+    params = {"rooms": room_ids, "format": args.format, "include_files": include_files}
+    progress = Progress(tools.knowledge_base_dir / "briefings" / ".backfill_progress.json", params, fresh=args.restart)
+
+    pending = [d for d in dates if not progress.done(d, args.summarize)]
+    print(f"[Backfill] {len(dates)} day(s) from {dates[0]} to {dates[-1]}, {len(dates) - len(pending)} already done")
+    print(f"[Backfill]    Workers: {args.workers} | Summaries: {'on (' + args.model + ')' if args.summarize else 'off'}")
+
+    summarizer = Summarizer(tools, args.model, args.rpm) if args.summarize else None
+    summary_pool = ThreadPoolExecutor(max_workers=4) if summarizer else None
+    counts = {"written": 0, "empty": 0, "failed": 0, "summarized": 0}
+    started = time.perf_counter()
+
+    def queue_summary(date: str, briefing_path: str):
+        future = summary_pool.submit(summarizer.summarize, date, briefing_path)
+        future.add_done_callback(finish_summary)
+        summary_futures.add(future)
+
+    def finish_summary(future):
+        result = future.result()
+        progress.record(result["date"], summarized=result["summarized"], summary_error=result.get("error"))
+        if result["summarized"]:
+            counts["summarized"] += 1
+        else:
+            print(f"[Backfill] ⚠️  {result['date']}: summary failed: {result.get('error')}")
+
+    summary_futures = set()
+    # Days already generated but not yet summarized go straight to the summarizer
+    to_generate = []
+    for date in pending:
+        day = progress.days.get(date)
+        if summarizer and day and day["status"] == "written":
+            queue_summary(date, day["briefing_path"])
+        else:
+            to_generate.append(date)
+
+    in_flight = set()
+    queue = iter(to_generate)
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(args.db, args.kb, args.context_dir)
+    ) as pool:
+        # Keep at most 2x workers submitted, so an interrupted run loses little work
+        for date in queue:
+            in_flight.add(pool.submit(_generate_day, date, room_ids, include_files, args.format))
+            if len(in_flight) < args.workers * 2:
+                continue
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                _record_day(future.result(), progress, counts, queue_summary if summarizer else None)
+        for future in wait(in_flight).done:
+            _record_day(future.result(), progress, counts, queue_summary if summarizer else None)
+
+    if summary_pool:
+        summary_pool.shutdown(wait=True)
+
+    # Bring the briefing catalog snapshot and rollup store up to date in one pass
+    tools.briefing_catalog.load_or_build()
+    for date, day in progress.days.items():
+        if day["status"] in ("written", "empty") and date in dates:
+            tools.briefing_rollups.invalidate_day(date)
+    tools.briefing_rollups.save()
+
+    elapsed = time.perf_counter() - started
+    generated = counts["written"] + counts["empty"] + counts["failed"]
+    print(f"[Backfill] ✅ Done in {elapsed:.1f}s ({generated / elapsed:.1f} day(s)/s)" if elapsed else "[Backfill] ✅ Done")
+    print(f"[Backfill]    Written: {counts['written']} | No activity: {counts['empty']} | "
+          f"Failed: {counts['failed']}" + (f" | Summarized: {counts['summarized']}" if summarizer else ""))
+    if counts["failed"]:
+        print("[Backfill]    Re-run the same command to retry failed days")
+        sys.exit(1)
+
+
+def _record_day(result: dict, progress: Progress, counts: dict, queue_summary=None):
+    """Record one generated day and queue its summary"""
+    status = result["status"]
+    counts[status] += 1
+    progress.record(
+        result["date"],
+        status=status,
+        briefing_path=result.get("briefing_path"),
+        message_count=result.get("message_count", 0),
+        error=result.get("error"),
+        summarized=False
+    )
+    if status == "failed":
+        print(f"[Backfill] ❌ {result['date']}: {result['error']}")
+    elif status == "written":
+        print(f"[Backfill]    {result['date']}: {result['message_count']} messages ({result['elapsed_ms']}ms)")
+        if queue_summary:
+            queue_summary(result["date"], result["briefing_path"])
+
+
+if __name__ == "__main__":
+    main()
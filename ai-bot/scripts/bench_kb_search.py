@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Knowledge Base Search Benchmark
+
+Generates a synthetic bilingual knowledge base and compares the inverted
+index (src/tools/kb_index.py) against the previous scan-every-file search.
+
+Measures:
+    - Cold build time and snapshot size
+    - Warm startup (snapshot load + stat-only reconcile)
+    - Query latency p50/p95 for indexed search vs. full scan
+
+Usage:
+    python scripts/bench_kb_search.py [--docs 5000] [--queries 200] [--keep DIR]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.tools.kb_index import KnowledgeBaseIndex  # noqa: E402
+
+
+CATEGORIES = ["policies", "procedures", "technical", "financial", "operations", "briefings/2025/10"]
+
+CN_TERMS = [
+    "报销", "发票", "预算", "成本", "营收", "利润", "库存", "采购", "审批", "合同",
+    "门店", "员工", "培训", "排班", "食品安全", "供应商", "结账", "税务", "现金流", "会员",
+]
+EN_TERMS = [
+    "revenue", "invoice", "budget", "deployment", "database", "backup", "security",
+    "onboarding", "inventory", "forecast", "audit", "compliance", "kpi", "latency",
+]
+
+
+def make_document(rng: random.Random, number: int) -> str:
+    """Build one markdown document of ~1-4KB with mixed Chinese/English text"""
+    title_terms = rng.sample(CN_TERMS, 2) + rng.sample(EN_TERMS, 1)
+    lines = [f"# {''.join(title_terms[:2])} {title_terms[2]} 文档 {number}", "", "**Last Updated:** 2025-10-01", ""]
+    for section in range(rng.randint(3, 8)):
+        lines.append(f"## 第{section + 1}节 {rng.choice(CN_TERMS)}")
+        for _ in range(rng.randint(2, 6)):
+            words = [rng.choice(CN_TERMS) for _ in range(rng.randint(4, 10))]
+            words += [rng.choice(EN_TERMS) for _ in range(rng.randint(1, 4))]
+            rng.shuffle(words)
+            lines.append("，".join(words) + "。")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_kb(root: Path, docs: int, seed: int = 42):
+    rng = random.Random(seed)
+    for number in range(docs):
+        category = CATEGORIES[number % len(CATEGORIES)]
+        path = root / category / f"doc-{number:05d}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(make_document(rng, number), encoding="utf-8")
+
+
+def legacy_scan_search(kb_dir: Path, query: str, max_results: int = 3):
+    """The pre-index implementation: read every file, substring match"""
+    results = []
+    q = query.lower()
+    for md_file in kb_dir.rglob("*.md"):
+        if md_file.name == "README.md":
+            continue
+        content = md_file.read_text(encoding="utf-8")
+        if q in content.lower():
+            results.append((content.lower().count(q), str(md_file)))
+    results.sort(reverse=True)
+    return results[:max_results]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KB inverted index vs. full scan")
+    parser.add_argument("--docs", type=int, default=5000, help="Number of synthetic documents (default 5000)")
+    parser.add_argument("--queries", type=int, default=200, help="Indexed queries to time (default 200)")
+    parser.add_argument("--scan-queries", type=int, default=5, help="Full-scan queries to time (default 5)")
+    parser.add_argument("--keep", type=str, help="Generate the KB in this directory and keep it")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.keep:
+        kb_dir = Path(args.keep)
+        kb_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        kb_dir = Path(tmp.name)
+
+    print(f"[Bench] Generating {args.docs} documents in {kb_dir} ...")
+    _, gen_ms = timed(generate_kb, kb_dir, args.docs)
+    print(f"[Bench]    done in {gen_ms:.0f}ms")
+
+    index = KnowledgeBaseIndex(kb_dir)
+    summary, build_ms = timed(index.load_or_build)
+    snapshot_kb = index.snapshot_path.stat().st_size / 1024
+    print(f"[Bench] Cold build:    {build_ms:8.1f}ms  ({summary['documents']} docs, {index.stats()['terms']} terms, snapshot {snapshot_kb:.0f}KB)")
+
+    warm = KnowledgeBaseIndex(kb_dir)
+    summary, warm_ms = timed(warm.load_or_build)
+    print(f"[Bench] Warm startup:  {warm_ms:8.1f}ms  (snapshot loaded: {summary['loaded_snapshot']}, reindexed: {summary['reindexed']})")
+
+    rng = random.Random(7)
+    queries = []
+    for _ in range(args.queries):
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(rng.choice(CN_TERMS))
+        elif kind < 0.7:
+            queries.append(f"{rng.choice(CN_TERMS)}{rng.choice(CN_TERMS)}")
+        else:
+            queries.append(f"{rng.choice(EN_TERMS)} {rng.choice(CN_TERMS)}")
+
+    index_samples = [timed(warm.search, q, None, 3)[1] for q in queries]
+    category_samples = [timed(warm.search, q, "financial", 3)[1] for q in queries]
+    scan_samples = [timed(legacy_scan_search, kb_dir, q)[1] for q in queries[:args.scan_queries]]
+
+    print(f"[Bench] Indexed search ({len(index_samples)} queries):  p50 {percentile(index_samples, 50):7.2f}ms  p95 {percentile(index_samples, 95):7.2f}ms  mean {statistics.mean(index_samples):7.2f}ms")
+    print(f"[Bench] Indexed + category filter:    p50 {percentile(category_samples, 50):7.2f}ms  p95 {percentile(category_samples, 95):7.2f}ms")
+    print(f"[Bench] Full scan ({len(scan_samples)} queries):          p50 {percentile(scan_samples, 50):7.2f}ms  p95 {percentile(scan_samples, 95):7.2f}ms")
+    print(f"[Bench] Speedup (p50): {percentile(scan_samples, 50) / max(percentile(index_samples, 50), 1e-6):.0f}x")
+
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Operations Summary Benchmark
+
+Runs get_operations_summary over a large tasks table in the PostgREST
+stand-in (scripts/postgrest_stub.py) once per group_count path:
+
+    - rows: every record's status is downloaded and counted in Python
+      (what the summary did before group_count)
+    - aggregate: PostgREST aggregate select (status,count())
+    - rpc: the group_count function
+
+For each it reports the response payload per summary, the median wall time
+in-process, and that time plus the payload's transfer time at a given
+bandwidth (the stand-in has no network, so large payloads only cost JSON
+encoding there).
+
+Usage:
+    python scripts/bench_operations_summary.py [--rows 100000] [--rounds 5] [--bandwidth 10]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+from scripts.postgrest_stub import PostgrestStub  # noqa: E402
+from src.tools.supabase_async import AsyncPostgrestClient  # noqa: E402
+from src.tools.supabase_tools import GROUP_COUNT_PATHS, SupabaseTools  # noqa: E402
+
+STATUSES = ["pending", "in_progress", "blocked", "done", "cancelled"]
+DATE_RANGE = {"start_date": "2025-01-01", "end_date": "2025-12-31"}
+
+
+def make_tables(rows: int):
+    return {
+        "tasks": [{"id": n, "status": STATUSES[n * 7 % len(STATUSES)],
+                   "created_at": f"2025-{1 + n % 12:02d}-{1 + n % 28:02d}"} for n in range(rows)],
+        "projects": [{"id": n, "status": "active", "created_at": "2025-06-01"} for n in range(50)],
+    }
+
+
+async def run_path(path: str, tables, rounds: int):
+    """Median seconds and bytes per summary when group_count lands on `path`"""
+    stub = PostgrestStub(tables=tables, aggregates=path == "aggregate")
+    if path != "rpc":
+        del stub.rpc_handlers["group_count"]
+    client = AsyncPostgrestClient("http://stub", "stub", transport=httpx.ASGITransport(app=stub))
+    tools = SupabaseTools(client=client, mirror=None)
+
+    # First call discovers the path (failed probes are not measured)
+    first = await tools.get_operations_summary(DATE_RANGE)
+    assert first["success"], first["message"]
+
+    timings, payload = [], 0
+    for _ in range(rounds):
+        sent = stub.bytes_sent
+        started = time.perf_counter()
+        result = await tools.get_operations_summary(DATE_RANGE)
+        timings.append(time.perf_counter() - started)
+        payload = stub.bytes_sent - sent
+    await tools.aclose()
+    return statistics.median(timings), payload, result["summary"]
+
+
+async def main_async(args):
+    tables = make_tables(args.rows)
+    print(f"tasks: {args.rows} rows, projects: 50 rows, {args.rounds} round(s), "
+          f"transfer modeled at {args.bandwidth:g} MB/s")
+    summaries = []
+    for path in reversed(GROUP_COUNT_PATHS):
+        wall, payload, summary = await run_path(path, tables, args.rounds)
+        summaries.append(summary)
+        transfer = payload / (args.bandwidth * 1024 * 1024)
+        print(f"  {path:9s}  payload {payload / 1024:10.1f} KB   wall {wall * 1000:8.1f} ms   "
+              f"with transfer {(wall + transfer) * 1000:8.1f} ms")
+    same = all(s["tasks"]["total"] == summaries[0]["tasks"]["total"] for s in summaries)
+    print(f"  totals agree: {'yes' if same else 'NO'} ({summaries[0]['tasks']['total']} tasks)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark server-side status counts for get_operations_summary")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows in the tasks table (default: 100000)")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--bandwidth", type=float, default=10.0, help="MB/s used to model transfer time")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
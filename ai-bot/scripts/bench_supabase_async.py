@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Async Supabase Access Benchmark
+
+Runs the analytics / menu engineering / operations data calls behind all 18
+Supabase-backed tools against the PostgREST stand-in
+(scripts/postgrest_stub.py) with a fixed per-request latency and compares:
+
+    - blocking: each call holds the event loop for the query's latency, as
+      the synchronous supabase client did (emulated with time.sleep)
+    - async: the same calls awaited concurrently through
+      AsyncPostgrestClient's shared pool
+
+For both modes it reports wall time and the worst event-loop stall seen by
+a 10 ms heartbeat task (what every other session in the process feels).
+It also checks that a per-call timeout shorter than the latency fires.
+
+Usage:
+    python scripts/bench_supabase_async.py [--latency 0.5] [--rounds 3]
+    python scripts/bench_supabase_async.py --url http://127.0.0.1:54321   # stub served by uvicorn
+    python scripts/bench_supabase_async.py --pos-days 90   # RPCs computed from generated POS tables
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+from scripts.postgrest_stub import PostgrestStub, demo_pos_tables  # noqa: E402
+from src.tools.pos_mirror import PosMirror  # noqa: E402
+from src.tools.supabase_async import AsyncPostgrestClient, PostgrestTimeout  # noqa: E402
+from src.tools.supabase_tools import SupabaseTools  # noqa: E402
+
+START, END = "2025-10-01", "2025-10-07"
+
+TABLES = {
+    "tasks": [{"id": n, "status": ["pending", "done"][n % 2], "created_at": f"2025-10-0{1 + n % 7}"} for n in range(40)],
+    "projects": [{"id": n, "status": "active", "created_at": "2025-10-02"} for n in range(5)],
+}
+
+
+def tool_calls(tools: SupabaseTools):
+    """One coroutine factory per Supabase-backed tool (18)"""
+    return [
+        lambda: tools.get_daily_revenue(START),
+        lambda: tools.get_revenue_by_zone(START, END),
+        lambda: tools.get_top_dishes(START, END, 5),
+        lambda: tools.get_station_performance(START, END),
+        lambda: tools.get_quick_stats(START),
+        lambda: tools.get_hourly_revenue(START),
+        lambda: tools.get_table_turnover(START, END),
+        lambda: tools.get_return_analysis(START, END),
+        lambda: tools.get_order_type_distribution(START, END),
+        lambda: tools.get_revenue_trend(START, END),
+        lambda: tools.get_menu_profitability(START, END),
+        lambda: tools.get_top_profitable_dishes(START, END),
+        lambda: tools.get_low_profit_dishes(START, END),
+        lambda: tools.get_cost_coverage_rate(START, END),
+        lambda: tools.get_dishes_missing_cost(START, END),
+        lambda: tools.query_operations_data("tasks", {"status": "pending"}, limit=10),
+        lambda: tools.update_operations_data("tasks", 1, {"status": "done"}),
+        lambda: tools.get_operations_summary({"start_date": START, "end_date": END}),
+    ]
+
+
+async def heartbeat(stop: asyncio.Event, stalls: list):
+    """Record how late each 10 ms tick fires"""
+    while not stop.is_set():
+        expected = time.perf_counter() + 0.01
+        await asyncio.sleep(0.01)
+        stalls.append(max(0.0, time.perf_counter() - expected))
+
+
+async def run_mode(tools: SupabaseTools, mode: str, latency: float):
+    stop, stalls = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, stalls))
+    await asyncio.sleep(0.02)
+
+    started = time.perf_counter()
+    if mode == "blocking":
+        results = []
+        for call in tool_calls(tools):
+            time.sleep(latency)  # synchronous client: the loop is frozen for the whole query
+            results.append(await call())
+    else:
+        results = await asyncio.gather(*(call() for call in tool_calls(tools)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await beat
+    ok = sum(1 for r in results if r.get("success"))
+    return elapsed, max(stalls, default=0.0), ok, len(results)
+
+
+async def main_async(args):
+    if args.url:
+        stub = None
+        client = AsyncPostgrestClient(args.url, "stub")
+    else:
+        stub = PostgrestStub(tables=TABLES, latency=args.latency)
+        if args.pos_days:
+            stub.tables = {**TABLES, **demo_pos_tables(days=args.pos_days)}
+            pos = PosMirror()
+            pos.load(stub.tables)
+            stub.rpc_handlers = pos.rpc_handlers()
+        client = AsyncPostgrestClient("http://stub", "stub", transport=httpx.ASGITransport(app=stub))
+    tools = SupabaseTools(client=client)
+
+    print(f"Per-request latency: {args.latency}s, 18 tool calls per round, {args.rounds} round(s)")
+    for mode in ("blocking", "async"):
+        # Blocking mode only sleeps on top of the stub, so the stub itself answers instantly there
+        if stub is not None:
+            stub.latency = 0.0 if mode == "blocking" else args.latency
+        runs = [await run_mode(tools, mode, args.latency) for _ in range(args.rounds)]
+        wall = statistics.median(r[0] for r in runs)
+        stall = max(r[1] for r in runs)
+        print(f"  {mode:8s}  wall {wall * 1000:8.1f} ms   worst loop stall {stall * 1000:8.1f} ms   "
+              f"ok {runs[-1][2]}/{runs[-1][3]}")
+
+    if stub is not None:
+        stub.latency = args.latency
+        print(f"  stand-in peak concurrency: {stub.peak_concurrency}")
+    try:
+        await client.rpc("get_daily_revenue", {"target_date": START}, timeout=args.latency / 10)
+        print("  timeout check: FAILED (call finished)")
+    except PostgrestTimeout as e:
+        print(f"  timeout check: ok ({e})")
+
+    await tools.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark async Supabase access against the PostgREST stand-in")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per request (default: 0.5)")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--url", help="Use a running stand-in/Supabase at this URL instead of the in-process stub")
+    parser.add_argument("--pos-days", type=int, default=0,
+                        help="Compute the stand-in's RPCs from this many days of generated POS tables")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
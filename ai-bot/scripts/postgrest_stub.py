@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Local PostgREST Stand-in
+
+A small ASGI app that answers the PostgREST calls SupabaseTools makes, so
+the async data-access path can be tested and benchmarked without a Supabase
+project:
+
+- POST /rest/v1/rpc/<name>: canned rows for the 16 analytics and menu
+  engineering functions (column names as in supabase/migrations), or any
+  handler registered in rpc_handlers; group_count runs on the in-memory tables
+- GET/PATCH /rest/v1/<table>: in-memory tables with eq/gt/gte/lt/lte/is.null
+  filters, or=(...) logic trees with nested and(...), multi-column order
+  (asc/desc, nullsfirst/nullslast) and limit, and plain column selects; aggregate selects
+  (`status,count()`, `total.sum()`) only with aggregates=True, as PostgREST
+  with db-aggregates-enabled
+- demo_pos_tables() generates rsp_* POS rows; with --pos-days the RPCs are
+  computed from them by the local POS mirror engine (src/tools/pos_mirror.py)
+  instead of returning canned rows
+- latency / rpc_latency add an asyncio.sleep per request to model slow
+  queries; requests, peak_concurrency and response bytes_sent are counted
+
+In-process use: httpx.ASGITransport(app=PostgrestStub(...)).
+Standalone (needs uvicorn):
+
+    python scripts/postgrest_stub.py --port 54321 --latency 0.5
+    python scripts/postgrest_stub.py --port 54321 --pos-days 30
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=stub python ...
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+DISHES = ["酸菜鱼", "麻婆豆腐", "宫保鸡丁", "回锅肉", "水煮牛肉", "蒜蓉西兰花", "扬州炒饭", "红烧肉", "米饭", "酸梅汤"]
+ZONES = ["大厅", "包间", "露台"]
+STATIONS = [("热菜", "hot_kitchen"), ("凉菜", "cold_kitchen"), ("主食", "staples"), ("饮品", "drinks")]
+
+
+def _dates(params: Dict[str, Any]) -> List[str]:
+    start = date.fromisoformat(params.get("start_date") or params.get("target_date") or "2025-10-01")
+    end = date.fromisoformat(params.get("end_date") or start.isoformat())
+    return [(start + timedelta(days=n)).isoformat() for n in range((end - start).days + 1)]
+
+
+def demo_rpc_handlers(seed: int = 7) -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+    """Deterministic canned rows for every analytics / menu engineering RPC"""
+
+    def rng(params):
+        return random.Random(f"{seed}:{sorted(params.items())}")
+
+    def dish_rows(params, n):
+        r = rng(params)
+        rows = []
+        for name in DISHES[:n]:
+            quantity = r.randint(20, 400)
+            price = r.choice([12, 18, 28, 38, 48, 68])
+            cost = round(price * r.uniform(0.25, 0.6), 2)
+            rows.append({"product_name": name, "quantity_sold": quantity, "total_revenue": quantity * price,
+                         "avg_selling_price": price, "total_cost": round(quantity * cost, 2),
+                         "gross_profit": round(quantity * (price - cost), 2),
+                         "profit_margin": round((price - cost) / price * 100, 2)})
+        return sorted(rows, key=lambda row: -row["gross_profit"])
+
+    return {
+        "get_daily_revenue": lambda p: [{
+            "total_revenue": 18650.5, "order_count": 212, "avg_order_value": 87.97,
+            "completed_orders": 201, "pending_orders": 6, "cancelled_orders": 5}],
+        "get_revenue_by_zone": lambda p: [
+            {"zone": zone, "total_revenue": 9000 - 2500 * i, "order_count": 100 - 30 * i,
+             "avg_order_value": round((9000 - 2500 * i) / (100 - 30 * i), 2)} for i, zone in enumerate(ZONES)],
+        "get_top_dishes": lambda p: [
+            {"item_name": row["product_name"], "total_quantity": row["quantity_sold"],
+             "total_revenue": row["total_revenue"], "order_count": row["quantity_sold"] // 2,
+             "avg_price": row["avg_selling_price"]}
+            for row in dish_rows(p, len(DISHES))[:int(p.get("top_n", 10))]],
+        "get_station_performance": lambda p: [
+            {"station_name": name, "station_name_english": english, "total_items": 300 - 50 * i,
+             "total_revenue": 12000 - 2500 * i, "avg_item_price": 40 - 5 * i, "order_count": 150 - 20 * i}
+            for i, (name, english) in enumerate(STATIONS)],
+        "get_hourly_revenue": lambda p: [
+            {"hour_of_day": hour, "order_count": 10 + (hour % 5) * 6, "total_revenue": 800 + (hour % 5) * 450,
+             "avg_order_value": 80.0} for hour in range(10, 22)],
+        "get_table_turnover": lambda p: [
+            {"zone": ZONES[i % 3], "table_no": f"A{i + 1:02d}", "order_count": 9 - i % 4,
+             "total_revenue": 900 - 60 * i, "avg_order_value": 95.0, "capacity": 4} for i in range(8)],
+        "get_return_analysis": lambda p: [
+            {"item_name": DISHES[i], "return_count": 4 - i, "return_quantity": 5 - i,
+             "return_revenue_loss": 150.0 - 40 * i, "total_orders_with_item": 80, "return_rate": 5.0 - i}
+            for i in range(3)],
+        "get_order_type_distribution": lambda p: [
+            {"order_type": "dine_in", "order_count": 160, "total_revenue": 15200, "avg_order_value": 95.0,
+             "percentage_of_total": 75.47},
+            {"order_type": "takeaway", "order_count": 52, "total_revenue": 3450.5, "avg_order_value": 66.36,
+             "percentage_of_total": 24.53}],
+        "get_revenue_trend": lambda p: [
+            {"date": day, "total_revenue": 15000 + rng({"d": day}).randint(0, 6000), "order_count": 200,
+             "avg_order_value": 88.0, "completed_orders": 190} for day in _dates(p)],
+        "get_quick_stats": lambda p: [
+            {"metric": "total_revenue", "value": "18650.50", "description": "今日营收"},
+            {"metric": "order_count", "value": "212", "description": "订单数"},
+            {"metric": "top_dish", "value": DISHES[0], "description": "最畅销菜品"}],
+        "get_menu_profitability": lambda p: [
+            {**row, "estimated_cost": row["total_cost"], "popularity_score": 1.0, "profitability_score": 1.0,
+             "category": "Star" if i < 3 else "Plowhorse", "rank_by_profit": i + 1, "rank_by_quantity": i + 1}
+            for i, row in enumerate(dish_rows(p, len(DISHES)))
+            if row["quantity_sold"] >= int(p.get("min_quantity", 10))],
+        "get_top_profitable_dishes": lambda p: dish_rows(p, len(DISHES))[:int(p.get("top_n", 10))],
+        "get_low_profit_dishes": lambda p: [
+            {**row, "recommendation": "考虑提价或优化成本"}
+            for row in reversed(dish_rows(p, len(DISHES)))][:int(p.get("bottom_n", 10))],
+        "get_dish_profit": lambda p: [
+            {**row, "unit_cost": round(row["total_cost"] / row["quantity_sold"], 2)}
+            for row in dish_rows(p, len(DISHES))],
+        "get_cost_coverage_rate": lambda p: [{
+            "total_dishes": len(DISHES), "dishes_with_cost_data": 8, "coverage_rate": 80.0,
+            "total_revenue_covered": 52000.0, "total_revenue_uncovered": 3100.0, "revenue_coverage_rate": 94.37}],
+        "get_dishes_missing_cost": lambda p: [
+            {"product_name": name, "quantity_sold": 40, "total_revenue": 720.0, "avg_selling_price": 18.0,
+             "order_count": 35} for name in DISHES[8:]][:int(p.get("top_n", 20))],
+    }
+
+
+def demo_pos_tables(
+    start: str = "2025-10-01",
+    days: int = 7,
+    orders_per_day: int = 40,
+    seed: int = 7
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Deterministic rsp_* POS rows (ids increase with ordered_at, timestamps in UTC).
+
+    12 tables in three zones (one inactive), one station per dish group, cost
+    data for all dishes but the last two, ~3% returned items and some
+    takeaway orders without a table.
+    """
+    r = random.Random(seed)
+    shanghai = timezone(timedelta(hours=8))
+    prices = {dish: r.choice([12, 18, 28, 38, 48, 68]) for dish in DISHES}
+    tables = [{"id": n + 1, "zone": ZONES[n % 3], "table_no": f"{'ABC'[n % 3]}{n + 1:02d}",
+               "capacity": (4, 8, 2)[n % 3], "active": n != 11} for n in range(12)]
+    stations = [{"id": n + 1, "name": name, "name_english": english} for n, (name, english) in enumerate(STATIONS)]
+    costs = [{"product_name": dish, "total_ingredient_cost": round(prices[dish] * r.uniform(0.25, 0.6), 2),
+              "margin_percentage": None} for dish in DISHES[:-2]]
+    for row in costs:
+        row["margin_percentage"] = round((1 - row["total_ingredient_cost"] / prices[row["product_name"]]) * 100, 2)
+
+    orders, items = [], []
+    for offset in range(days):
+        day = date.fromisoformat(start) + timedelta(days=offset)
+        times = sorted(datetime(day.year, day.month, day.day, r.randint(10, 21), r.randint(0, 59), tzinfo=shanghai)
+                       for _ in range(orders_per_day))
+        for moment in times:
+            order_id = len(orders) + 1
+            dine_in = r.random() < 0.8
+            total = 0.0
+            for _ in range(r.randint(1, 4)):
+                dish = r.choice(DISHES)
+                quantity = r.randint(1, 3)
+                is_return = r.random() < 0.03
+                items.append({"id": len(items) + 1, "order_id": order_id, "item_name": dish, "quantity": quantity,
+                              "unit_price": prices[dish], "total_price": quantity * prices[dish],
+                              "station_id": DISHES.index(dish) % len(STATIONS) + 1, "is_return": is_return})
+                total += 0 if is_return else quantity * prices[dish]
+            orders.append({"id": order_id, "order_type": "dine_in" if dine_in else "takeaway",
+                           "status": r.choices(["completed", "pending", "cancelled"], [6, 3, 1])[0],
+                           "total": total, "table_id": r.randint(1, 11) if dine_in else None,
+                           "ordered_at": moment.astimezone(timezone.utc).isoformat()})
+    return {"rsp_orders": orders, "rsp_order_items": items, "rsp_tables": tables,
+            "rsp_stations": stations, "product_cost_analysis": costs}
+
+
+def _matches(row: Dict[str, Any], column: str, expression: str) -> bool:
+    operator, _, value = expression.partition(".")
+    actual = row.get(column)
+    if operator == "is" and value == "null":
+        return actual is None
+    if actual is None:
+        return False
+    text = str(actual).lower() if isinstance(actual, bool) else str(actual)
+    if operator == "eq":
+        return text == value
+    if operator == "gt":
+        return text > value if isinstance(actual, str) else float(actual) > float(value)
+    if operator == "gte":
+        return text >= value if isinstance(actual, str) else float(actual) >= float(value)
+    if operator == "lt":
+        return text < value if isinstance(actual, str) else float(actual) < float(value)
+    if operator == "lte":
+        return text <= value if isinstance(actual, str) else float(actual) <= float(value)
+    raise ValueError(f"unsupported operator: {operator}")
+
+
+def _split(text: str) -> List[str]:
+    """Split a logic tree's items at top-level commas (outside quotes and parentheses)"""
+    items, depth, quoted, start, i = [], 0, False, 0, 0
+    while i < len(text):
+        char = text[i]
+        if quoted and char == "\\":
+            i += 1
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            items.append(text[start:i])
+            start = i + 1
+        i += 1
+    items.append(text[start:])
+    return items
+
+
+def _logic(row: Dict[str, Any], operator: str, items: str) -> bool:
+    """or=(...) / and(...) logic tree, e.g. `a.gt."1",and(a.eq."1",id.gt."5")`"""
+    results = []
+    for item in _split(items):
+        nested = item.split("(", 1)[0]
+        if nested in ("and", "or") and item.endswith(")"):
+            results.append(_logic(row, nested, item[len(nested) + 1:-1]))
+            continue
+        column, _, expression = item.partition(".")
+        op, _, value = expression.partition(".")
+        if value.startswith('"') and value.endswith('"'):
+            value = value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+        results.append(_matches(row, column, f"{op}.{value}"))
+    return any(results) if operator == "or" else all(results)
+
+
+def _sort(rows: List[Dict[str, Any]], order: str) -> List[Dict[str, Any]]:
+    """order=col.desc.nullslast,id.asc (NULLs last ascending and first descending by default)"""
+    for term in reversed(order.split(",")):
+        column, *modifiers = term.split(".")
+        desc = "desc" in modifiers
+        nulls_last = "nullslast" in modifiers or ("nullsfirst" not in modifiers and not desc)
+        present = sorted((row for row in rows if row.get(column) is not None),
+                         key=lambda row: row[column], reverse=desc)
+        missing = [row for row in rows if row.get(column) is None]
+        rows = present + missing if nulls_last else missing + present
+    return rows
+
+
+def _aggregate(rows: List[Dict[str, Any]], names: List[str]) -> List[Dict[str, Any]]:
+    """PostgREST aggregate select: plain columns group, `count()` / `col.sum()` etc. aggregate"""
+    keys = [name for name in names if "(" not in name]
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(tuple(row.get(key) for key in keys), []).append(row)
+    result = []
+    for group, members in groups.items():
+        out = dict(zip(keys, group))
+        for name in names:
+            if "(" not in name:
+                continue
+            column, _, function = name[:name.index("(")].rpartition(".")
+            values = [m[column] for m in members if m.get(column) is not None] if column else members
+            if function == "count":
+                out["count"] = len(values)
+            elif values:
+                out[function] = {"sum": sum, "min": min, "max": max,
+                                 "avg": lambda v: sum(v) / len(v)}[function](values)
+            else:
+                out[function] = None
+        result.append(out)
+    return result
+
+
+class PostgrestStub:
+    """ASGI app standing in for PostgREST (see module docstring)"""
+
+    def __init__(
+        self,
+        tables: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        rpc_handlers: Optional[Dict[str, Callable[[Dict[str, Any]], Any]]] = None,
+        latency: float = 0.0,
+        rpc_latency: Optional[Dict[str, float]] = None,
+        aggregates: bool = False
+    ):
+        """
+        Args:
+            tables: Table name -> list of row dicts (mutated by PATCH)
+            rpc_handlers: Function name -> handler(params) -> JSON-able result
+                          (default: demo_rpc_handlers(); group_count is added)
+            latency: Seconds every request sleeps before answering
+            rpc_latency: Per-function latency overriding `latency`
+            aggregates: Accept aggregate selects (otherwise rejected with PGRST123)
+        """
+        self.tables = tables if tables is not None else {}
+        self.rpc_handlers = rpc_handlers if rpc_handlers is not None else demo_rpc_handlers()
+        self.rpc_handlers.setdefault("group_count", self._group_count)
+        self.latency = latency
+        self.rpc_latency = rpc_latency or {}
+        self.aggregates = aggregates
+        self.bytes_sent = 0
+        self.requests = 0
+        self.active = 0
+        self.peak_concurrency = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        self.requests += 1
+        self.active += 1
+        self.peak_concurrency = max(self.peak_concurrency, self.active)
+        try:
+            status, payload = await self._handle(
+                scope["method"], scope["path"], scope.get("query_string", b"").decode(), body
+            )
+        finally:
+            self.active -= 1
+
+        data = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.bytes_sent += len(data)
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json; charset=utf-8")]})
+        await send({"type": "http.response.body", "body": data})
+
+    async def _handle(self, method: str, path: str, query: str, body: bytes):
+        if not path.startswith("/rest/v1/"):
+            return 404, {"message": f"Not found: {path}"}
+        resource = path[len("/rest/v1/"):]
+        try:
+            params = json.loads(body) if body else {}
+        except ValueError:
+            return 400, {"code": "PGRST102", "message": "Invalid JSON body"}
+
+        if resource.startswith("rpc/"):
+            name = resource[len("rpc/"):]
+            await asyncio.sleep(self.rpc_latency.get(name, self.latency))
+            handler = self.rpc_handlers.get(name)
+            if handler is None:
+                return 404, {"code": "PGRST202", "message": f"Could not find the function public.{name}"}
+            return 200, handler(params)
+
+        await asyncio.sleep(self.latency)
+        if resource not in self.tables:
+            return 404, {"code": "42P01", "message": f'relation "public.{resource}" does not exist'}
+        return self._table(method, self.tables[resource], parse_qsl(query, keep_blank_values=True), params)
+
+    def _group_count(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """group_count RPC (supabase/migrations/20261019_create_group_count_rpc.sql) over the in-memory tables"""
+        date_field, start, end = params.get("date_field"), params.get("start_date"), params.get("end_date")
+        counts: Dict[Any, int] = {}
+        for row in self.tables.get(params["table_name"], []):
+            if date_field and ((start and not _matches(row, date_field, f"gte.{start}"))
+                               or (end and not _matches(row, date_field, f"lte.{end}"))):
+                continue
+            value = row.get(params["group_field"])
+            value = None if value is None else str(value)
+            counts[value] = counts.get(value, 0) + 1
+        return [{"group_value": value, "row_count": count}
+                for value, count in sorted(counts.items(), key=lambda item: -item[1])]
+
+    def _table(self, method: str, rows: List[Dict[str, Any]], query: List, body: Dict[str, Any]):
+        columns, order, limit, filters = "*", None, None, []
+        for key, value in query:
+            if key == "select":
+                columns = value
+            elif key == "order":
+                order = value
+            elif key == "limit":
+                limit = int(value)
+            else:
+                filters.append((key, value))
+
+        try:
+            selected = [row for row in rows
+                        if all(_logic(row, c, e[1:-1]) if c in ("or", "and") else _matches(row, c, e)
+                               for c, e in filters)]
+        except ValueError as e:
+            return 400, {"code": "PGRST100", "message": str(e)}
+
+        if method == "PATCH":
+            for row in selected:
+                row.update(body)
+            return 200, selected
+        if method != "GET":
+            return 405, {"message": f"Method {method} not supported"}
+
+        names = [c.strip() for c in columns.split(",")]
+        if any("(" in name for name in names):
+            if not self.aggregates:
+                return 400, {"code": "PGRST123", "message": "Use of aggregate functions is not allowed"}
+            selected = _aggregate(selected, names)
+            return 200, selected[:limit] if limit is not None else selected
+
+        if order:
+            selected = _sort(selected, order)
+        if limit is not None:
+            selected = selected[:limit]
+        if columns != "*":
+            selected = [{name: row.get(name) for name in names} for row in selected]
+        return 200, selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the PostgREST stand-in over HTTP (requires uvicorn)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--pos-days", type=int, default=0,
+                        help="Serve this many days of demo POS tables and compute the RPCs from them")
+    args = parser.parse_args()
+
+    stub = PostgrestStub(latency=args.latency)
+    if args.pos_days:
+        from src.tools.pos_mirror import PosMirror
+
+        stub.tables = demo_pos_tables(days=args.pos_days)
+        mirror = PosMirror()
+        mirror.load(stub.tables)
+        stub.rpc_handlers = mirror.rpc_handlers()
+
+    import uvicorn
+    uvicorn.run(stub, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+POS Mirror Sync
+
+Pulls new POS rows from Supabase into the local mirror (src/tools/pos_mirror.py)
+that SupabaseTools answers analytics RPCs from while it is fresh. Orders and
+order items are fetched past their id watermark; tables, stations and product
+costs are replaced in full.
+
+Usage:
+    python scripts/sync_pos_mirror.py [--db PATH] [--loop SECONDS]
+
+Options:
+    --db: Mirror database (defaults to POS_MIRROR_PATH)
+    --loop: Keep syncing every SECONDS instead of once
+
+Cron setup (every 5 minutes, with POS_MIRROR_MAX_AGE_SECONDS above 300):
+    */5 * * * * cd /root/ai-service && /usr/bin/python3 scripts/sync_pos_mirror.py >> /var/lib/docker/volumes/ai-service_ai-knowledge/_data/logs/pos-mirror.log 2>&1
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.tools.pos_mirror import PosMirror  # noqa: E402
+from src.tools.supabase_async import AsyncPostgrestClient  # noqa: E402
+
+
+async def sync_once(mirror: PosMirror, client: AsyncPostgrestClient) -> bool:
+    try:
+        result = await mirror.sync(client)
+    except Exception as e:
+        print(f"[POS Mirror] ❌ Sync failed: {e}")
+        return False
+    print(f"[POS Mirror] ✅ Synced in {result['elapsed_ms']}ms: {result['fetched']}")
+    return True
+
+
+async def main_async(args) -> int:
+    url, key = os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_KEY")
+    if not url or not key:
+        print("[POS Mirror] ❌ SUPABASE_URL and SUPABASE_KEY must be set")
+        return 1
+
+    mirror = PosMirror(args.db)
+    client = AsyncPostgrestClient(url, key)
+    try:
+        ok = await sync_once(mirror, client)
+        while args.loop:
+            await asyncio.sleep(args.loop)
+            ok = await sync_once(mirror, client)
+    finally:
+        await client.aclose()
+        mirror.close()
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the local POS mirror from Supabase")
+    parser.add_argument("--db", default=os.environ.get("POS_MIRROR_PATH"),
+                        help="Mirror database (default: POS_MIRROR_PATH)")
+    parser.add_argument("--loop", type=float, default=0, help="Sync every SECONDS instead of once")
+    args = parser.parse_args()
+    if not args.db:
+        parser.error("--db or POS_MIRROR_PATH is required")
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,15 @@ Agent SDK Tool Wrappers for Campfire
 Imports and re-exports all tools from modular decorator files
 
 NOTE: This file has been refactored in v0.3.3 to split 2,418 lines into modular files:
-- src/tools/campfire_decorators.py (7 tools)
-- src/tools/briefing_decorators.py (2 tools)
+- src/tools/campfire_decorators.py (8 tools)
+- src/tools/briefing_decorators.py (3 tools)
 - src/tools/personal_decorators.py (4 tools)
 - src/tools/operations_decorators.py (3 tools)
-- src/tools/analytics_decorators.py (10 tools)
+- src/tools/analytics_decorators.py (11 tools)
 - src/tools/menu_engineering_decorators.py (5 tools)
 - src/tools/file_saving_tools.py (1 tool) - v0.4.1
 
-Total: 32 tools across 7 modular files
+Total: 35 tools across 7 modular files
 
 v0.4.0 Changes:
 - Removed process_image_tool (use Read tool - Claude Vision API)
@@ -43,23 +43,30 @@ def initialize_tools(campfire_tools: CampfireTools):
     global _campfire_tools, _supabase_tools
     _campfire_tools = campfire_tools
 
-    # Initialize Supabase tools if available and credentials are present
-    if SupabaseTools and os.environ.get("SUPABASE_URL") and os.environ.get("SUPABASE_KEY"):
-        try:
-            _supabase_tools = SupabaseTools()
-            print("[Supabase] ✅ Supabase tools initialized")
-        except Exception as e:
-            print(f"[Supabase] ⚠️  Failed to initialize Supabase tools: {e}")
-            _supabase_tools = None
-    else:
-        if not SupabaseTools:
+    # Initialize Supabase tools if available and credentials are present. The
+    # instance is created once and shared by every agent (and subagent), so its
+    # connection pool and RPC cache persist across sessions.
+    if _supabase_tools is None:
+        if SupabaseTools and os.environ.get("SUPABASE_URL") and os.environ.get("SUPABASE_KEY"):
+            try:
+                _supabase_tools = SupabaseTools()
+                print("[Supabase] ✅ Supabase tools initialized")
+            except Exception as e:
+                print(f"[Supabase] ⚠️  Failed to initialize Supabase tools: {e}")
+                _supabase_tools = None
+        elif not SupabaseTools:
             print("[Supabase] ℹ️  Supabase package not installed")
         else:
             print("[Supabase] ℹ️  Supabase credentials not found - operations tools disabled")
 
     # Initialize all decorator modules
     initialize_decorator_tools(_campfire_tools, _supabase_tools)
-    print("[Tools] ✅ All 32 tool decorators initialized across 7 modules")
+    print("[Tools] ✅ All 35 tool decorators initialized across 7 modules")
+
+
+def get_supabase_tools() -> Optional[SupabaseTools]:
+    """Return the shared SupabaseTools instance (None if Supabase is not configured)"""
+    return _supabase_tools
 
 
 # Re-export all tool functions from decorator modules
@@ -70,12 +77,14 @@ from src.tools.campfire_decorators import (
     search_knowledge_base_tool,
     read_knowledge_document_tool,
     list_knowledge_documents_tool,
-    store_knowledge_document_tool
+    store_knowledge_document_tool,
+    get_attachment_content_tool
 )
 
 from src.tools.briefing_decorators import (
     generate_daily_briefing_tool,
-    search_briefings_tool
+    search_briefings_tool,
+    summarize_briefing_range_tool
 )
 
 from src.tools.personal_decorators import (
@@ -101,7 +110,8 @@ from src.tools.analytics_decorators import (
     get_table_turnover_tool,
     get_return_analysis_tool,
     get_order_type_distribution_tool,
-    get_revenue_trend_tool
+    get_revenue_trend_tool,
+    get_operations_snapshot_tool
 )
 
 from src.tools.menu_engineering_decorators import (
@@ -119,7 +129,7 @@ from src.tools.file_saving_tools import (
 
 # Aggregate all tools into AGENT_TOOLS list (for SDK MCP server creation)
 AGENT_TOOLS = [
-    # Campfire tools (7)
+    # Campfire tools (8)
     search_conversations_tool,
     get_user_context_tool,
     save_user_preference_tool,
@@ -127,9 +137,11 @@ AGENT_TOOLS = [
     read_knowledge_document_tool,
     list_knowledge_documents_tool,
     store_knowledge_document_tool,
-    # Briefing tools (2)
+    get_attachment_content_tool,
+    # Briefing tools (3)
     generate_daily_briefing_tool,
     search_briefings_tool,
+    summarize_briefing_range_tool,
     # Personal tools (4)
     manage_personal_tasks_tool,
     set_reminder_tool,
@@ -139,7 +151,7 @@ AGENT_TOOLS = [
     query_operations_data_tool,
     update_operations_data_tool,
     get_operations_summary_tool,
-    # Analytics tools (10)
+    # Analytics tools (11)
     get_daily_revenue_tool,
     get_revenue_by_zone_tool,
     get_top_dishes_tool,
@@ -150,6 +162,7 @@ AGENT_TOOLS = [
     get_return_analysis_tool,
     get_order_type_distribution_tool,
     get_revenue_trend_tool,
+    get_operations_snapshot_tool,
     # Menu engineering tools (5)
     get_menu_profitability_tool,
     get_top_profitable_dishes_tool,
@@ -165,7 +178,7 @@ AGENT_TOOLS = [
 __all__ = [
     'initialize_tools',
     'AGENT_TOOLS',
-    # Campfire tools (7)
+    # Campfire tools (8)
     'search_conversations_tool',
     'get_user_context_tool',
     'save_user_preference_tool',
@@ -173,9 +186,11 @@ __all__ = [
     'read_knowledge_document_tool',
     'list_knowledge_documents_tool',
     'store_knowledge_document_tool',
-    # Briefing tools (2)
+    'get_attachment_content_tool',
+    # Briefing tools (3)
     'generate_daily_briefing_tool',
     'search_briefings_tool',
+    'summarize_briefing_range_tool',
     # Personal tools (4)
     'manage_personal_tasks_tool',
     'set_reminder_tool',
@@ -185,7 +200,7 @@ __all__ = [
     'query_operations_data_tool',
     'update_operations_data_tool',
     'get_operations_summary_tool',
-    # Analytics tools (10)
+    # Analytics tools (11)
     'get_daily_revenue_tool',
     'get_revenue_by_zone_tool',
     'get_top_dishes_tool',
@@ -196,6 +211,7 @@ __all__ = [
     'get_return_analysis_tool',
     'get_order_type_distribution_tool',
     'get_revenue_trend_tool',
+    'get_operations_snapshot_tool',
     # Menu engineering tools (5)
     'get_menu_profitability_tool',
     'get_top_profitable_dishes_tool',
@@ -79,13 +79,16 @@ from fastapi.responses import JSONResponse, FileResponse
 from dotenv import load_dotenv
 
 from src.tools.campfire_tools import CampfireTools
+from src.tools.kb_watcher import KnowledgeBaseWatcher
 from src.bot_manager import BotManager
 from src.session_manager import SessionManager
 from src.request_queue import get_request_queue
 from src.file_registry import file_registry
+from src.attachment_extractor import get_attachment_extractor
+from src.context_prefetch import get_context_prefetcher
 from src.exceptions import SessionRecoveryError
 from src.reminder_scheduler import create_scheduler
-from apscheduler.schedulers.background import BackgroundScheduler
+from src.agent_tools import get_supabase_tools
 
 
 # Load environment variables
@@ -248,6 +251,19 @@ async def lifespan(app: FastAPI):
     print(f"[Startup] ✅ CampfireTools initialized")
     print(f"[Startup]    knowledge_base_dir: {knowledge_base_dir}")
 
+    # Load persisted KB search index (only files changed since the last snapshot are re-read)
+    kb_index_summary = await asyncio.to_thread(app.state.tools.load_knowledge_index)
+    print(f"[Startup] ✅ KB index ready: {kb_index_summary['documents']} docs "
+          f"({kb_index_summary['reindexed']} reindexed, {kb_index_summary['elapsed_ms']}ms)")
+    print(f"[Startup] ✅ Briefing catalog ready: {kb_index_summary['briefings']['briefings']} briefings "
+          f"({kb_index_summary['briefings']['parsed']} parsed, {kb_index_summary['briefings']['elapsed_ms']}ms)")
+
+    # Keep the KB index current as documents are written, deployed or removed
+    app.state.kb_watcher = KnowledgeBaseWatcher(app.state.tools.kb_index)
+    app.state.kb_watcher.add_listener(app.state.tools.briefing_catalog.on_change, save=app.state.tools.briefing_catalog.save)
+    kb_watch_mode = app.state.kb_watcher.start()
+    print(f"[Startup] ✅ KB watcher started ({kb_watch_mode})")
+
     # Initialize bot manager (loads all bot configurations)
     # v0.4.1: Support multiple bot directories (JSON + YAML)
     bots_dirs = os.getenv('BOTS_DIRS', './bots,prompts/configs').split(',')
@@ -280,6 +296,10 @@ async def lifespan(app: FastAPI):
     app.state.request_queue = get_request_queue()
     print(f"[Startup] ✅ RequestQueue initialized")
 
+    # Initialize attachment pre-extraction (process pool starts on first upload)
+    app.state.attachment_extractor = get_attachment_extractor()
+    print(f"[Startup] ✅ Attachment extractor initialized (workers: {app.state.attachment_extractor.max_workers}, cache: {app.state.attachment_extractor.cache_dir})")
+
     # Start background cleanup task for file registry (v0.4.1)
     cleanup_task = asyncio.create_task(cleanup_expired_files_task())
     print(f"[Startup] ✅ File registry cleanup task started (runs every 5 minutes)")
@@ -293,22 +313,14 @@ async def lifespan(app: FastAPI):
         context_dir=config['CONTEXT_DIR'],
         campfire_url=config['CAMPFIRE_URL'],
         bot_key=reminder_bot_key,
-        testing=os.getenv('TESTING', '').lower() == 'true'
+        testing=os.getenv('TESTING', '').lower() == 'true',
+        personal_store=app.state.tools.personal_store
     )
 
-    # Start APScheduler (runs check_and_send_reminders every 1 minute)
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(
-        reminder_scheduler.check_and_send_reminders,
-        'interval',
-        minutes=1,
-        id='reminder_check',
-        name='Check and send due reminders'
-    )
-    scheduler.start()
-    app.state.scheduler = scheduler
+    # Start scheduler task on this event loop (sleeps until the next due reminder, woken on new ones)
+    reminder_scheduler.start()
     app.state.reminder_scheduler = reminder_scheduler
-    print(f"[Startup] ✅ Reminder scheduler started (checks every 1 minute)")
+    print(f"[Startup] ✅ Reminder scheduler started (async, wakes at next due reminder)")
 
     # Start background session cleanup task (v0.5.2 - Critical memory leak fix)
     async def cleanup_sessions_task():
@@ -367,10 +379,16 @@ async def lifespan(app: FastAPI):
     print("=" * 60)
 
     # Stop reminder scheduler
-    if hasattr(app.state, 'scheduler'):
-        app.state.scheduler.shutdown(wait=False)
+    if hasattr(app.state, 'reminder_scheduler'):
+        await app.state.reminder_scheduler.stop()
         print("[Shutdown] ✅ Reminder scheduler stopped")
 
+    app.state.attachment_extractor.shutdown()
+    print("[Shutdown] ✅ Attachment extractor stopped")
+
+    await asyncio.to_thread(app.state.kb_watcher.stop)
+    print("[Shutdown] ✅ KB watcher stopped (index snapshot saved)")
+
     await app.state.session_manager.shutdown_all()
 
     print("[Shutdown] ✅ Shutdown complete")
@@ -424,6 +442,114 @@ async def queue_stats(request: Request):
     return request.app.state.request_queue.get_stats()
 
 
+@app.get("/cache/stats")
+async def cache_stats(request: Request):
+    """
+    Get in-memory cache statistics for Campfire and Supabase tools.
+
+    Returns:
+        JSON keyed by cache name, e.g.:
+        - user_context: entries, hits/misses, evictions, hit_rate
+        - supabase_rpc: entries, disk_dir, per-function hits/disk_hits/misses/hit_rate
+        - supabase_range: cached days, per-function day_hits/day_misses/rpc_calls/bypassed
+        - query_cursors: open paging cursors, opened/resumed/expired/evicted/closed
+          (supabase_* and query_cursors only when Supabase is configured)
+        - pos_mirror: freshness, per-table rows/watermark, local queries, stale fallbacks
+          (only when POS_MIRROR_PATH is set)
+    """
+    stats = request.app.state.tools.get_cache_stats()
+    supabase_tools = get_supabase_tools()
+    if supabase_tools is not None:
+        stats["supabase_rpc"] = supabase_tools.rpc_cache.stats()
+        stats["supabase_range"] = supabase_tools.range_cache.stats()
+        stats["query_cursors"] = supabase_tools.query_cursors.stats()
+        if supabase_tools.mirror is not None:
+            stats["pos_mirror"] = supabase_tools.mirror.stats()
+    return stats
+
+
+@app.get("/kb/stats")
+async def kb_stats(request: Request):
+    """
+    Get knowledge base index and watcher statistics.
+
+    Returns:
+        JSON with:
+        - index: documents, terms, searches, avg_search_ms
+        - catalog: documents, lists, listing_cache_hits
+        - briefings: briefings, first/last date, searches, avg_search_ms
+        - watcher: mode (inotify/polling), pending, batches, apply lag
+    """
+    return {
+        "index": request.app.state.tools.kb_index.stats(),
+        "catalog": request.app.state.tools.kb_catalog.stats(),
+        "briefings": request.app.state.tools.briefing_catalog.stats(),
+        "watcher": request.app.state.kb_watcher.get_stats(),
+    }
+
+
+@app.get("/attachments/stats")
+async def attachment_stats(request: Request):
+    """
+    Get attachment pre-extraction statistics.
+
+    Returns:
+        JSON with extractor metrics:
+        - scheduled / extracted / failed: Extraction job counts
+        - cache_hits / cache_misses: Lookups served from the blob_key cache
+        - inflight: Extractions currently running
+    """
+    return request.app.state.attachment_extractor.get_stats()
+
+
+@app.get("/reminders/stats")
+async def reminder_stats(request: Request):
+    """
+    Get reminder delivery statistics.
+
+    Returns:
+        JSON with delivery metrics:
+        - delivered / failed / ambiguous / skipped / deferred: Delivery outcomes
+        - retries / gave_up: POST retries and reminders marked failed
+        - lag_seconds: avg/p50/p95/max delay between due_at and delivery
+        - next_due_at: When the scheduler wakes next
+    """
+    return await asyncio.to_thread(request.app.state.reminder_scheduler.stats)
+
+
+@app.get("/prefetch/stats")
+async def prefetch_stats():
+    """
+    Get context prefetch statistics.
+
+    Returns:
+        JSON with prefetch metrics:
+        - prefetches / avg_prefetch_ms: Volume and latency of prefetches
+        - items: Per prefetched item (user_context, recent_messages, room_files)
+          served / re_requested counts and re_request_rate (agent asked again anyway)
+    """
+    return get_context_prefetcher().get_stats()
+
+
+@app.get("/singleflight/stats")
+async def single_flight_stats(request: Request):
+    """
+    Get request coalescing statistics for the data tools.
+
+    Returns:
+        JSON keyed by tool set (campfire searches, supabase RPCs; the latter
+        only when Supabase is configured), each with:
+        - inflight: Calls currently executing
+        - calls: Per search/RPC executions, coalesced (shared another caller's
+          in-flight result), errors and coalesce_rate
+    """
+    stats = {"campfire": request.app.state.tools.single_flight.stats()}
+    supabase_tools = get_supabase_tools()
+    if supabase_tools is not None:
+        stats["supabase"] = supabase_tools.single_flight.stats()
+    return stats
+
+
 @app.post("/session/clear/room/{room_id}")
 async def clear_room_session(room_id: int, request: Request):
     """
@@ -658,6 +784,13 @@ async def webhook(
     print(f"[WEBHOOK DATA] Content: {content[:100]}...")
     print(f"[WEBHOOK DATA] Bot: {bot_config.display_name}")
 
+    # Start extracting new room attachments first so it overlaps with agent startup
+    background_tasks.add_task(
+        request.app.state.attachment_extractor.schedule_room,
+        request.app.state.tools,
+        room_id
+    )
+
     # Add background task (runs in SAME event loop)
     background_tasks.add_task(
         process_message_async,
@@ -728,6 +861,12 @@ async def process_message_async(
 
     print(f"[Queue] Acquired lock for room {room_id}, bot {bot_config.bot_id}")
 
+    # Prefetch user profile, recent messages and room files concurrently;
+    # overlaps with the acknowledgment post and session acquisition below
+    prefetch_task = asyncio.create_task(
+        get_context_prefetcher().prefetch(campfire_tools, user_id, room_id, query=content)
+    )
+
     try:
         # Send immediate acknowledgment
         acknowledgment = "努力工作ing"
@@ -751,6 +890,15 @@ async def process_message_async(
 
             print(f"[Background] Calling Claude Agent SDK with model: {bot_config.model}")
 
+            message_context = {
+                'user_id': user_id,
+                'user_name': user_name,
+                'room_id': room_id,
+                'room_name': room_name,
+                'message_id': message_id,
+                'prefetched': await prefetch_task
+            }
+
             # Track milestone messages and timing
             import time
             milestone_messages = []
@@ -784,13 +932,7 @@ async def process_message_async(
             try:
                 response_text, new_session_id = await agent.process_message(
                     content=content,
-                    context={
-                        'user_id': user_id,
-                        'user_name': user_name,
-                        'room_id': room_id,
-                        'room_name': room_name,
-                        'message_id': message_id
-                    },
+                    context=message_context,
                     on_milestone=post_milestone  # NEW: Smart milestone updates
                 )
             except SessionRecoveryError as e:
@@ -807,19 +949,13 @@ async def process_message_async(
                 print(f"[Session Recovery] 🔄 Creating fresh session and retrying...")
                 client, agent = await session_manager.get_or_create_client(
                     room_id, bot_config.bot_id, bot_config,
-                    request.app.state.tools, request.app.state.bot_manager
+                    campfire_tools, bot_manager
                 )
 
                 # Retry with fresh session
                 response_text, new_session_id = await agent.process_message(
                     content=content,
-                    context={
-                        'user_id': user_id,
-                        'user_name': user_name,
-                        'room_id': room_id,
-                        'room_name': room_name,
-                        'message_id': message_id
-                    },
+                    context=message_context,
                     on_milestone=post_milestone
                 )
                 print(f"[Session Recovery] ✅ Retry succeeded with fresh session")
@@ -852,6 +988,10 @@ async def process_message_async(
             bot_key=bot_config.bot_key
         )
     finally:
+        # Testing/error paths may never consume the prefetch
+        if not prefetch_task.done():
+            prefetch_task.cancel()
+
         # Release the lock - CRITICAL to allow next request
         print(f"[Queue] Releasing lock for room {room_id}, bot {bot_config.bot_id}")
         request_queue.release(room_id, bot_config.bot_id)
@@ -0,0 +1,585 @@
+"""
+Attachment Extractor - Background pre-extraction of uploaded documents
+
+When a webhook arrives, the room's recent attachments are looked up with
+get_recent_room_files and every supported document that has not been seen
+before (PDF, DOCX, PPTX, XLSX) is handed to a process pool. Workers extract
+plain text, tables and a slide/heading outline; results are cached on disk
+content-addressed by the ActiveStorage blob_key (blobs are immutable, so a
+cached extraction never goes stale).
+
+By the time the agent looks at a file, get_attachment_content can usually
+answer from the cache in milliseconds instead of the agent shelling out to
+a converter mid-conversation.
+
+Extraction is dependency-free for Office formats (they are zipped XML) and
+uses poppler's pdftotext for PDFs (installed in the Docker image).
+"""
+
+import json
+import multiprocessing
+import os
+import subprocess
+import threading
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+# Limits keep cached payloads bounded for very large workbooks/decks
+MAX_TEXT_CHARS = 200_000
+MAX_TABLE_ROWS = 200
+MAX_TABLES = 50
+PDF_TIMEOUT_SECONDS = 60
+
+SUPPORTED_EXTENSIONS = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".pptx": "pptx",
+    ".xlsx": "xlsx",
+}
+
+SUPPORTED_CONTENT_TYPES = {
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": "pptx",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+}
+
+_NS = {
+    "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+
+
+def detect_kind(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """
+    Return the document kind ('pdf', 'docx', 'pptx', 'xlsx') or None if unsupported.
+
+    Args:
+        filename: Original filename
+        content_type: MIME type from ActiveStorage
+
+    Returns:
+        Kind string or None
+    """
+    if content_type in SUPPORTED_CONTENT_TYPES:
+        return SUPPORTED_CONTENT_TYPES[content_type]
+    if filename:
+        return SUPPORTED_EXTENSIONS.get(Path(filename).suffix.lower())
+    return None
+
+
+def blob_path(blob_key: str, files_base_path: str) -> str:
+    """Campfire hash-partitioned storage path for a blob key"""
+    if len(blob_key) >= 4:
+        return f"{files_base_path}/{blob_key[0:2]}/{blob_key[2:4]}/{blob_key}"
+    return f"{files_base_path}/{blob_key}"
+
+
+# ====================
+# Format extractors (run inside worker processes)
+# ====================
+
+def _rows_to_text(rows: List[List[str]]) -> str:
+    return "\n".join(" | ".join(cell for cell in row) for row in rows)
+
+
+def _extract_docx(path: str) -> Dict[str, Any]:
+    w = _NS["w"]
+    with zipfile.ZipFile(path) as zf:
+        root = ET.fromstring(zf.read("word/document.xml"))
+
+    body = root.find(f"{{{w}}}body")
+    lines, tables, outline = [], [], []
+
+    for child in (body if body is not None else []):
+        if child.tag == f"{{{w}}}p":
+            text = "".join(t.text or "" for t in child.iter(f"{{{w}}}t")).strip()
+            if not text:
+                continue
+            style = child.find(f"{{{w}}}pPr/{{{w}}}pStyle")
+            style_name = style.get(f"{{{w}}}val", "") if style is not None else ""
+            if style_name == "Title" or style_name.startswith("Heading"):
+                level = style_name[7:] if style_name.startswith("Heading") else "1"
+                outline.append(f"{'#' * int(level) if level.isdigit() else '#'} {text}")
+            lines.append(text)
+        elif child.tag == f"{{{w}}}tbl":
+            rows = []
+            for tr in child.iter(f"{{{w}}}tr"):
+                rows.append([
+                    "".join(t.text or "" for t in tc.iter(f"{{{w}}}t")).strip()
+                    for tc in tr.findall(f"{{{w}}}tc")
+                ])
+            if rows:
+                tables.append({"name": f"Table {len(tables) + 1}", "rows": rows[:MAX_TABLE_ROWS]})
+                lines.append(_rows_to_text(rows))
+
+    return {"text": "\n".join(lines), "tables": tables, "outline": outline}
+
+
+def _extract_pptx(path: str) -> Dict[str, Any]:
+    a, p = _NS["a"], _NS["p"]
+    with zipfile.ZipFile(path) as zf:
+        slide_names = sorted(
+            (n for n in zf.namelist() if n.startswith("ppt/slides/slide") and n.endswith(".xml")),
+            key=lambda n: int("".join(ch for ch in n.rsplit("/", 1)[-1] if ch.isdigit()) or 0)
+        )
+        slides = [ET.fromstring(zf.read(n)) for n in slide_names]
+
+    lines, tables, outline = [], [], []
+    for number, slide in enumerate(slides, 1):
+        title = ""
+        for sp in slide.iter(f"{{{p}}}sp"):
+            ph = sp.find(f"{{{p}}}nvSpPr/{{{p}}}nvPr/{{{p}}}ph")
+            if ph is not None and ph.get("type") in ("title", "ctrTitle"):
+                title = " ".join(
+                    "".join(t.text or "" for t in para.iter(f"{{{a}}}t"))
+                    for para in sp.iter(f"{{{a}}}p")
+                ).strip()
+                break
+        outline.append(f"Slide {number}: {title}" if title else f"Slide {number}")
+
+        lines.append(f"--- Slide {number}{': ' + title if title else ''} ---")
+        for para in slide.iter(f"{{{a}}}p"):
+            text = "".join(t.text or "" for t in para.iter(f"{{{a}}}t")).strip()
+            if text and text != title:
+                lines.append(text)
+
+        for tbl in slide.iter(f"{{{a}}}tbl"):
+            rows = [
+                ["".join(t.text or "" for t in tc.iter(f"{{{a}}}t")).strip() for tc in tr.findall(f"{{{a}}}tc")]
+                for tr in tbl.findall(f"{{{a}}}tr")
+            ]
+            if rows:
+                tables.append({"name": f"Slide {number} table", "rows": rows[:MAX_TABLE_ROWS]})
+
+    return {"text": "\n".join(lines), "tables": tables, "outline": outline}
+
+
+def _column_index(cell_ref: str) -> int:
+    index = 0
+    for ch in cell_ref:
+        if not ch.isalpha():
+            break
+        index = index * 26 + (ord(ch.upper()) - ord("A") + 1)
+    return max(index - 1, 0)
+
+
+def _extract_xlsx(path: str) -> Dict[str, Any]:
+    s, r, rel = _NS["s"], _NS["r"], _NS["rel"]
+    with zipfile.ZipFile(path) as zf:
+        names = set(zf.namelist())
+
+        shared: List[str] = []
+        if "xl/sharedStrings.xml" in names:
+            for si in ET.fromstring(zf.read("xl/sharedStrings.xml")).findall(f"{{{s}}}si"):
+                shared.append("".join(t.text or "" for t in si.iter(f"{{{s}}}t")))
+
+        targets = {}
+        if "xl/_rels/workbook.xml.rels" in names:
+            for node in ET.fromstring(zf.read("xl/_rels/workbook.xml.rels")).findall(f"{{{rel}}}Relationship"):
+                target = node.get("Target", "").lstrip("/")
+                targets[node.get("Id")] = target if target.startswith("xl/") else f"xl/{target}"
+
+        sheets = []
+        workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+        for sheet in workbook.iter(f"{{{s}}}sheet"):
+            target = targets.get(sheet.get(f"{{{r}}}id"))
+            if target in names:
+                sheets.append((sheet.get("name", target), ET.fromstring(zf.read(target))))
+
+    lines, tables, outline = [], [], []
+    for sheet_name, root in sheets:
+        rows = []
+        for row in root.iter(f"{{{s}}}row"):
+            values: Dict[int, str] = {}
+            for c in row.findall(f"{{{s}}}c"):
+                cell_type = c.get("t")
+                if cell_type == "inlineStr":
+                    value = "".join(t.text or "" for t in c.iter(f"{{{s}}}t"))
+                else:
+                    v = c.find(f"{{{s}}}v")
+                    value = v.text if v is not None and v.text is not None else ""
+                    if cell_type == "s" and value.isdigit() and int(value) < len(shared):
+                        value = shared[int(value)]
+                if value != "":
+                    values[_column_index(c.get("r", "A"))] = value
+            if values:
+                width = max(values) + 1
+                rows.append([values.get(i, "") for i in range(width)])
+            if len(rows) >= MAX_TABLE_ROWS:
+                break
+
+        outline.append(f"Sheet: {sheet_name} ({len(rows)} rows extracted)")
+        if rows:
+            tables.append({"name": sheet_name, "rows": rows})
+            lines.append(f"--- Sheet: {sheet_name} ---")
+            lines.append(_rows_to_text(rows))
+
+    return {"text": "\n".join(lines), "tables": tables, "outline": outline}
+
+
+def _extract_pdf(path: str) -> Dict[str, Any]:
+    try:
+        completed = subprocess.run(
+            ["pdftotext", "-layout", "-enc", "UTF-8", path, "-"],
+            capture_output=True,
+            timeout=PDF_TIMEOUT_SECONDS,
+        )
+    except FileNotFoundError:
+        raise RuntimeError("pdftotext not available (install poppler-utils)")
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.decode("utf-8", "replace").strip() or "pdftotext failed")
+
+    text = completed.stdout.decode("utf-8", "replace")
+    outline = []
+    for number, page in enumerate(text.split("\f"), 1):
+        first_line = next((ln.strip() for ln in page.splitlines() if ln.strip()), "")
+        if first_line:
+            outline.append(f"Page {number}: {first_line[:80]}")
+
+    return {"text": text, "tables": [], "outline": outline}
+
+
+_EXTRACTORS = {
+    "pdf": _extract_pdf,
+    "docx": _extract_docx,
+    "pptx": _extract_pptx,
+    "xlsx": _extract_xlsx,
+}
+
+
+def extract_document(path: str, kind: str) -> Dict[str, Any]:
+    """
+    Extract text, tables and outline from a document.
+
+    Runs in a worker process; must stay a picklable module-level function.
+
+    Args:
+        path: File path on disk
+        kind: One of 'pdf', 'docx', 'pptx', 'xlsx'
+
+    Returns:
+        Dict with text, tables, outline, char_count, truncated, extract_ms
+        (or error if extraction failed)
+    """
+    started = time.perf_counter()
+    try:
+        result = _EXTRACTORS[kind](path)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}", "extract_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    text = result["text"]
+    result["char_count"] = len(text)
+    result["truncated"] = len(text) > MAX_TEXT_CHARS
+    result["text"] = text[:MAX_TEXT_CHARS]
+    result["tables"] = result["tables"][:MAX_TABLES]
+    result["extract_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+# ====================
+# Pipeline
+# ====================
+
+class AttachmentExtractor:
+    """
+    Schedules document extraction in a process pool and caches results by blob_key.
+
+    Thread-safe: schedule_room() is called from webhook background tasks while
+    tools read results from the event loop.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "./attachment_cache",
+        files_base_path: str = "/campfire-files",
+        max_workers: int = 2,
+        memory_entries: int = 64
+    ):
+        """
+        Initialize attachment extractor.
+
+        Args:
+            cache_dir: Directory for content-addressed extraction results
+            files_base_path: Base path where Campfire stores blobs
+            max_workers: Process pool size (default: 2)
+            memory_entries: Recently used results kept in memory (default: 64)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.files_base_path = files_base_path
+        self.max_workers = max_workers
+        self.memory_entries = memory_entries
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, Future] = {}
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "scheduled": 0,
+            "extracted": 0,
+            "failed": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "unsupported": 0,
+            "extract_ms_total": 0.0,
+        }
+
+    # ---------- cache ----------
+
+    def _cache_path(self, blob_key: str) -> Path:
+        return self.cache_dir / blob_key[:2] / f"{blob_key}.json"
+
+    def _remember(self, blob_key: str, result: Dict[str, Any]):
+        self._memory[blob_key] = result
+        self._memory.move_to_end(blob_key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, blob_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a cached extraction result without triggering extraction.
+
+        Args:
+            blob_key: ActiveStorage blob key
+
+        Returns:
+            Extraction dict or None if not extracted yet
+        """
+        with self._lock:
+            if blob_key in self._memory:
+                self._memory.move_to_end(blob_key)
+                self._stats["cache_hits"] += 1
+                return self._memory[blob_key]
+
+        path = self._cache_path(blob_key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self._stats["cache_misses"] += 1
+            return None
+
+        with self._lock:
+            self._stats["cache_hits"] += 1
+            self._remember(blob_key, result)
+        return result
+
+    def is_cached(self, blob_key: str) -> bool:
+        """Check whether an extraction result exists (memory or disk)"""
+        with self._lock:
+            if blob_key in self._memory:
+                return True
+        return self._cache_path(blob_key).exists()
+
+    def status(self, blob_key: str) -> str:
+        """Return 'ready', 'pending' or 'missing' for a blob"""
+        with self._lock:
+            if blob_key in self._inflight:
+                return "pending"
+        return "ready" if self.is_cached(blob_key) else "missing"
+
+    def _store(self, blob_key: str, result: Dict[str, Any]):
+        path = self._cache_path(blob_key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    # ---------- scheduling ----------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a threaded server process is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def schedule(self, file_info: Dict[str, Any]) -> Optional[Future]:
+        """
+        Schedule extraction for one attachment if supported and not cached.
+
+        Args:
+            file_info: Dict with blob_key, filename, content_type
+                       (shape returned by get_recent_room_files)
+
+        Returns:
+            Future for the extraction, or None if unsupported/already cached
+        """
+        blob_key = file_info.get("blob_key")
+        kind = detect_kind(file_info.get("filename"), file_info.get("content_type"))
+        if not blob_key or not kind:
+            with self._lock:
+                self._stats["unsupported"] += 1
+            return None
+
+        with self._lock:
+            if blob_key in self._inflight:
+                return self._inflight[blob_key]
+        if self.is_cached(blob_key):
+            return None
+
+        meta = {
+            "blob_key": blob_key,
+            "filename": file_info.get("filename"),
+            "content_type": file_info.get("content_type"),
+            "kind": kind,
+        }
+        path = blob_path(blob_key, self.files_base_path)
+
+        # The returned future resolves only after the result has been cached
+        done: Future = Future()
+        with self._lock:
+            if blob_key in self._inflight:
+                return self._inflight[blob_key]
+            worker = self._get_executor().submit(extract_document, path, kind)
+            self._inflight[blob_key] = done
+            self._stats["scheduled"] += 1
+
+        worker.add_done_callback(lambda f: self._on_done(meta, f, done))
+        return done
+
+    def _on_done(self, meta: Dict[str, Any], worker: Future, done: Future):
+        blob_key = meta["blob_key"]
+        try:
+            result = {**meta, **worker.result(), "extracted_at": datetime.now().isoformat()}
+        except Exception as e:
+            result = {**meta, "error": f"{type(e).__name__}: {e}"}
+
+        try:
+            if "error" not in result:
+                self._store(blob_key, result)
+        except OSError as e:
+            print(f"[Attachments] ⚠️  Could not cache extraction for {blob_key}: {e}")
+
+        with self._lock:
+            self._inflight.pop(blob_key, None)
+            if "error" in result:
+                self._stats["failed"] += 1
+                print(f"[Attachments] ❌ {meta['filename']}: {result['error']}")
+            else:
+                self._stats["extracted"] += 1
+                self._stats["extract_ms_total"] += result.get("extract_ms", 0.0)
+                self._remember(blob_key, result)
+                print(f"[Attachments] ✅ Extracted {meta['filename']} ({result.get('char_count', 0)} chars, {result.get('extract_ms')}ms)")
+
+        done.set_result(result)
+
+    def schedule_room(self, campfire_tools, room_id: int, limit: int = 10) -> int:
+        """
+        Schedule extraction for a room's recent attachments.
+
+        Called from the webhook so extraction overlaps with agent startup.
+
+        Args:
+            campfire_tools: CampfireTools instance (for get_recent_room_files)
+            room_id: Room ID
+            limit: Number of recent files to consider
+
+        Returns:
+            Number of newly scheduled extractions
+        """
+        try:
+            files = campfire_tools.get_recent_room_files(room_id=room_id, limit=limit)
+        except Exception as e:
+            print(f"[Attachments] ⚠️  Could not list files for room {room_id}: {e}")
+            return 0
+
+        scheduled = 0
+        for file_info in files:
+            with self._lock:
+                already_running = file_info.get("blob_key") in self._inflight
+            if self.schedule(file_info) is not None and not already_running:
+                scheduled += 1
+
+        if scheduled:
+            print(f"[Attachments] 📄 Scheduled {scheduled} extraction(s) for room {room_id}")
+        return scheduled
+
+    def extract(self, file_info: Dict[str, Any], timeout: float = 30.0) -> Optional[Dict[str, Any]]:
+        """
+        Return the extraction for an attachment, waiting for it if needed.
+
+        Args:
+            file_info: Dict with blob_key, filename, content_type
+            timeout: Seconds to wait for a pending extraction
+
+        Returns:
+            Extraction dict (may contain 'error'), or None if unsupported or timed out
+        """
+        blob_key = file_info.get("blob_key")
+        cached = self.get(blob_key) if blob_key else None
+        if cached is not None:
+            return cached
+
+        future = self.schedule(file_info)
+        if future is None:
+            return self.get(blob_key) if blob_key else None
+
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            return None
+
+    def get_stats(self) -> dict:
+        """
+        Get extractor statistics.
+
+        Returns:
+            Dict with scheduled/extracted/failed counts, cache hits, inflight jobs
+        """
+        with self._lock:
+            s = dict(self._stats)
+            extracted = s["extracted"]
+            return {
+                **{k: v for k, v in s.items() if k != "extract_ms_total"},
+                "inflight": len(self._inflight),
+                "memory_entries": len(self._memory),
+                "avg_extract_ms": round(s["extract_ms_total"] / extracted, 1) if extracted else 0.0,
+                "cache_dir": str(self.cache_dir),
+                "max_workers": self.max_workers,
+            }
+
+    def shutdown(self):
+        """Stop the worker pool (pending jobs are cancelled)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global singleton instance
+_attachment_extractor: Optional[AttachmentExtractor] = None
+
+
+def get_attachment_extractor() -> AttachmentExtractor:
+    """
+    Get global attachment extractor instance (singleton pattern).
+
+    Configured from ATTACHMENT_CACHE_DIR, CAMPFIRE_FILES_DIR and
+    ATTACHMENT_EXTRACT_WORKERS environment variables.
+
+    Returns:
+        AttachmentExtractor instance
+    """
+    global _attachment_extractor
+    if _attachment_extractor is None:
+        _attachment_extractor = AttachmentExtractor(
+            cache_dir=os.getenv("ATTACHMENT_CACHE_DIR", "./attachment_cache"),
+            files_base_path=os.getenv("CAMPFIRE_FILES_DIR", "/campfire-files"),
+            max_workers=int(os.getenv("ATTACHMENT_EXTRACT_WORKERS", "2"))
+        )
+    return _attachment_extractor
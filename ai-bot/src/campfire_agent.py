@@ -9,6 +9,8 @@ from claude_agent_sdk import ClaudeSDKClient, ClaudeAgentOptions, create_sdk_mcp
 from src.bot_manager import BotConfig, BotManager
 from src.agent_tools import AGENT_TOOLS, initialize_tools
 from src.tools.campfire_tools import CampfireTools
+from src.attachment_extractor import get_attachment_extractor, detect_kind
+from src.context_prefetch import get_context_prefetcher
 from src.progress_classifier import ProgressClassifier
 from src.exceptions import SessionRecoveryError
 from src.prompt_loader import PromptLoader  # v0.4.1: File-based prompts
@@ -128,7 +130,8 @@ class CampfireAgent:
             "mcp__campfire__search_knowledge_base",
             "mcp__campfire__read_knowledge_document",
             "mcp__campfire__list_knowledge_documents",
-            "mcp__campfire__store_knowledge_document"
+            "mcp__campfire__store_knowledge_document",
+            "mcp__campfire__get_attachment_content"
         ]
 
         # Add base tools if not already included
@@ -174,6 +177,7 @@ class CampfireAgent:
             "mcp__campfire__read_knowledge_document",
             "mcp__campfire__list_knowledge_documents",
             "mcp__campfire__store_knowledge_document",
+            "mcp__campfire__get_attachment_content",
             "mcp__campfire__process_image"
         ]
 
@@ -219,7 +223,8 @@ class CampfireAgent:
                 "mcp__campfire__get_return_analysis",
                 "mcp__campfire__get_order_type_distribution",
                 "mcp__campfire__get_revenue_trend",
-                "mcp__campfire__get_quick_stats"
+                "mcp__campfire__get_quick_stats",
+                "mcp__campfire__get_operations_snapshot"
             ])
         elif bot_config.bot_id == "menu_engineer":
             # Menu engineering RPC tools
@@ -245,7 +250,8 @@ class CampfireAgent:
             # Briefing tools
             tools.extend([
                 "mcp__campfire__generate_daily_briefing",
-                "mcp__campfire__search_briefings"
+                "mcp__campfire__search_briefings",
+                "mcp__campfire__summarize_briefing_range"
             ])
 
         return tools
@@ -657,6 +663,7 @@ When users ask about "today", "this week", "this month", use the date above.
                 - room_id: Room ID
                 - room_name: Room name
                 - message_id: Message ID (optional)
+                - prefetched: PrefetchedContext from ContextPrefetcher (optional)
             on_text_block: Optional callback function called for each text block
                 as it streams in. Useful for posting intermediate messages.
             on_milestone: Optional callback for significant progress milestones
@@ -805,6 +812,11 @@ When users ask about "today", "this week", "this month", use the date above.
                             print(f"[Agent Tool Call] 🔧 Tool: {tool_name}")
                             print(f"[Agent Tool Call]    Input: {tool_input}")
 
+                            # Measure whether prefetched context was ignored
+                            get_context_prefetcher().record_tool_call(
+                                context.get('prefetched'), tool_name, tool_input
+                            )
+
                             # Milestone posting disabled - only show initial "working" message
                             pass
 
@@ -846,11 +858,17 @@ When users ask about "today", "this week", "this month", use the date above.
         Returns:
             Formatted prompt string
         """
+        # Context preloaded by ContextPrefetcher while the session was acquired
+        prefetched = context.get('prefetched')
+
         # Get recent conversation history from current room
         recent_messages = []
         try:
             room_id = context.get('room_id')
-            if room_id:
+            if prefetched is not None and prefetched.recent_messages is not None:
+                recent_messages = prefetched.recent_messages
+                print(f"[Context] Using {len(recent_messages)} prefetched messages from room {room_id}")
+            elif room_id:
                 # Search for recent messages (empty query returns all)
                 messages = self.campfire_tools.search_conversations(
                     query="",  # Empty query to get all recent messages
@@ -869,6 +887,12 @@ When users ask about "today", "this week", "this month", use the date above.
 You are responding in room: {context.get('room_name', 'Unknown')} (Room ID: {context.get('room_id', 'unknown')})
 User: {context.get('user_name', 'Unknown')} (User ID: {context.get('user_id', 'unknown')})"""
 
+        # Add preloaded user profile (size-bounded)
+        if prefetched is not None:
+            profile_block = prefetched.render_profile_block()
+            if profile_block:
+                prompt += f"\n\n{profile_block}"
+
         # Add recent conversation history
         if recent_messages:
             prompt += f"\n\nRECENT CONVERSATION HISTORY ({len(recent_messages)} recent messages):"
@@ -893,7 +917,9 @@ User: {context.get('user_name', 'Unknown')} (User ID: {context.get('user_id', 'u
         room_files = []
         try:
             room_id = context.get('room_id')
-            if room_id:
+            if prefetched is not None and prefetched.room_files is not None:
+                room_files = prefetched.room_files
+            elif room_id:
                 room_files = self.campfire_tools.get_recent_room_files(
                     room_id=room_id,
                     limit=10  # Last 10 files uploaded in room
@@ -908,8 +934,13 @@ User: {context.get('user_name', 'Unknown')} (User ID: {context.get('user_id', 'u
             prompt += f"\n\nFILES AVAILABLE IN THIS ROOM:"
             prompt += f"\nWorking directory: /campfire-files"
             prompt += f"\nRecently uploaded files ({len(room_files)}):"
+            extractor = get_attachment_extractor()
             for f in room_files:
                 prompt += f"\n  📎 {f['filename']} - {f['file_path']}"
+                if detect_kind(f['filename'], f.get('content_type')):
+                    status = extractor.status(f['blob_key'])
+                    label = "已预提取" if status == "ready" else "提取中" if status == "pending" else "可提取"
+                    prompt += f" [{label}: get_attachment_content(blob_key=\"{f['blob_key']}\")]"
 
         # Add guidelines
         prompt += f"""
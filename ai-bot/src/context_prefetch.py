@@ -0,0 +1,238 @@
+"""
+Context Prefetch - Load per-request context while the session is acquired
+
+Every request needs the user's profile, the room's recent messages and the
+room's recent files. Previously these were fetched one after another inside
+_build_prompt, after the agent client had been acquired. The prefetcher runs
+all three lookups concurrently (in worker threads, since CampfireTools is
+synchronous) as soon as the request lock is held, so they overlap with the
+acknowledgment post and session acquisition.
+
+It also measures whether prefetching pays off: tool calls the agent makes
+that re-request data already in the prompt are counted per item, so the
+re-request rate shows which prefetched items the agent ignores.
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+# Upper bound for the user profile block injected into the prompt
+PROFILE_BLOCK_MAX_CHARS = 1200
+
+PREFETCH_ITEMS = ("user_context", "recent_messages", "room_files")
+
+
+@dataclass
+class PrefetchedContext:
+    """Result of one prefetch; items are None when their lookup failed."""
+    user_id: Optional[int]
+    room_id: Optional[int]
+    user_context: Optional[Dict[str, Any]] = None
+    recent_messages: Optional[List[Dict[str, Any]]] = None
+    room_files: Optional[List[Dict[str, Any]]] = None
+    elapsed_ms: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def render_profile_block(self, max_chars: int = PROFILE_BLOCK_MAX_CHARS) -> str:
+        """
+        Render the user profile as a compact prompt block.
+
+        Lines are added in priority order and the block stops before it
+        would exceed max_chars, so a large conversation_memory cannot
+        crowd out the rest of the prompt.
+
+        Args:
+            max_chars: Maximum block size in characters
+
+        Returns:
+            Block text, or "" when no profile was loaded
+        """
+        ctx = self.user_context
+        if not ctx:
+            return ""
+
+        lines = ["USER PROFILE (preloaded - no need to call get_user_context):"]
+        if ctx.get("user_name"):
+            lines.append(f"- Name: {ctx['user_name']}" + (f" <{ctx['email']}>" if ctx.get("email") else ""))
+        if ctx.get("expertise"):
+            lines.append(f"- Expertise: {', '.join(ctx['expertise'])}")
+        if ctx.get("preferences"):
+            prefs = ", ".join(f"{k}={v}" for k, v in ctx["preferences"].items())
+            lines.append(f"- Preferences: {prefs}")
+        if ctx.get("rooms"):
+            names = [r.get("room_name") or f"#{r.get('room_id')}" for r in ctx["rooms"]]
+            lines.append(f"- Rooms ({len(names)}): {', '.join(names[:15])}" + (" ..." if len(names) > 15 else ""))
+        for memory in reversed(ctx.get("conversation_memory") or []):
+            lines.append(f"- Memory: {memory}")
+
+        block = lines[0]
+        for line in lines[1:]:
+            if len(block) + 1 + len(line) > max_chars:
+                break
+            block += "\n" + line
+        return block
+
+
+class ContextPrefetcher:
+    """
+    Runs per-request context lookups concurrently and tracks their usefulness.
+
+    Thread-safe: stats are updated from the event loop and read by the
+    /prefetch/stats endpoint.
+    """
+
+    def __init__(self, message_limit: int = 10, file_limit: int = 10):
+        """
+        Initialize context prefetcher.
+
+        Args:
+            message_limit: Recent room messages to preload (default: 10)
+            file_limit: Recent room files to preload (default: 10)
+        """
+        self.message_limit = message_limit
+        self.file_limit = file_limit
+        self._lock = threading.Lock()
+        self._prefetches = 0
+        self._elapsed_ms_total = 0.0
+        self._served = {item: 0 for item in PREFETCH_ITEMS}
+        self._re_requested = {item: 0 for item in PREFETCH_ITEMS}
+        self._errors = {item: 0 for item in PREFETCH_ITEMS}
+
+    async def prefetch(self, campfire_tools, user_id: Optional[int], room_id: Optional[int],
+                       query: Optional[str] = None) -> PrefetchedContext:
+        """
+        Load user profile, recent messages and recent files concurrently.
+
+        Failures are recorded per item and never raise, so a broken lookup
+        only means the prompt falls back to fetching that item itself.
+
+        Args:
+            campfire_tools: CampfireTools instance
+            user_id: Requesting user ID
+            room_id: Room ID
+            query: Current message, used to rank the user's conversation memories
+
+        Returns:
+            PrefetchedContext
+        """
+        started = time.perf_counter()
+        result = PrefetchedContext(user_id=user_id, room_id=room_id)
+
+        lookups = {}
+        if user_id is not None:
+            lookups["user_context"] = asyncio.to_thread(campfire_tools.get_user_context, user_id, query)
+        if room_id is not None:
+            lookups["recent_messages"] = asyncio.to_thread(
+                campfire_tools.search_conversations, "", room_id, self.message_limit
+            )
+            lookups["room_files"] = asyncio.to_thread(
+                campfire_tools.get_recent_room_files, room_id, self.file_limit
+            )
+
+        values = await asyncio.gather(*lookups.values(), return_exceptions=True)
+
+        for item, value in zip(lookups, values):
+            if isinstance(value, BaseException):
+                result.errors[item] = str(value)
+            else:
+                setattr(result, item, value)
+
+        result.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        with self._lock:
+            self._prefetches += 1
+            self._elapsed_ms_total += result.elapsed_ms
+            for item in lookups:
+                if item in result.errors:
+                    self._errors[item] += 1
+                else:
+                    self._served[item] += 1
+
+        print(f"[Prefetch] ⚡ Loaded context for room {room_id} in {result.elapsed_ms}ms"
+              + (f" (errors: {list(result.errors)})" if result.errors else ""))
+        return result
+
+    @staticmethod
+    def _re_requested_item(prefetched: PrefetchedContext, tool_name: str, tool_input: Dict[str, Any]) -> Optional[str]:
+        """Map a tool call to the prefetched item it duplicates, if any"""
+        tool_input = tool_input or {}
+
+        if tool_name.endswith("__get_user_context"):
+            if prefetched.user_context is not None and tool_input.get("user_id") in (None, prefetched.user_id):
+                return "user_context"
+
+        elif tool_name.endswith("__search_conversations"):
+            # Only an unfiltered listing of this room duplicates the preload;
+            # keyword searches ask for something new
+            if (prefetched.recent_messages is not None
+                    and not tool_input.get("query")
+                    and tool_input.get("room_id") in (None, prefetched.room_id)):
+                return "recent_messages"
+
+        elif tool_name in ("Glob", "Grep"):
+            if prefetched.room_files is not None and str(tool_input.get("path", "")).startswith("/campfire-files"):
+                return "room_files"
+
+        return None
+
+    def record_tool_call(self, prefetched: Optional[PrefetchedContext], tool_name: str, tool_input: Dict[str, Any]):
+        """
+        Count a tool call that re-requests data already prefetched.
+
+        Args:
+            prefetched: PrefetchedContext of the current request (None if not prefetched)
+            tool_name: Tool name as reported by the SDK (e.g. mcp__campfire__get_user_context)
+            tool_input: Tool input dict
+        """
+        if prefetched is None:
+            return
+        item = self._re_requested_item(prefetched, tool_name, tool_input)
+        if item:
+            with self._lock:
+                self._re_requested[item] += 1
+            print(f"[Prefetch] 🔁 Agent re-requested prefetched {item} via {tool_name}")
+
+    def get_stats(self) -> dict:
+        """
+        Get prefetch statistics.
+
+        Returns:
+            Dict with prefetch count, average latency and, per item,
+            served / re_requested / errors counts and re_request_rate
+        """
+        with self._lock:
+            return {
+                "prefetches": self._prefetches,
+                "avg_prefetch_ms": round(self._elapsed_ms_total / self._prefetches, 1) if self._prefetches else 0.0,
+                "items": {
+                    item: {
+                        "served": self._served[item],
+                        "re_requested": self._re_requested[item],
+                        "errors": self._errors[item],
+                        "re_request_rate": round(self._re_requested[item] / self._served[item], 4)
+                        if self._served[item] else 0.0,
+                    }
+                    for item in PREFETCH_ITEMS
+                },
+            }
+
+
+# Global singleton instance
+_context_prefetcher: Optional[ContextPrefetcher] = None
+
+
+def get_context_prefetcher() -> ContextPrefetcher:
+    """
+    Get global context prefetcher instance (singleton pattern).
+
+    Returns:
+        ContextPrefetcher instance
+    """
+    global _context_prefetcher
+    if _context_prefetcher is None:
+        _context_prefetcher = ContextPrefetcher()
+    return _context_prefetcher
@@ -1,40 +1,62 @@
 """
 Automated Reminder Delivery System
 
-This module provides background task functionality to check and deliver
-reminders at scheduled times. Reminders are stored in user-specific JSON files
-and delivered via Campfire API when they become due.
+This module delivers reminders at their scheduled times. Reminders are
+stored in the personal SQLite store (user_contexts/personal.db) and posted
+to Campfire when they become due.
 
 Architecture:
-- APScheduler runs check_and_send_reminders() every 1 minute
-- Scans all user reminder files for pending reminders
-- Posts notifications to Campfire when reminders are due
-- Marks reminders as triggered to prevent duplicates
+- set_reminder normalizes remind_at to an absolute due_at when the reminder
+  is created, stored under the (status, due_at) index
+- A task on the application event loop fetches only due reminders, then
+  sleeps until the next due_at; creating a reminder wakes it early through a
+  store listener, and it re-checks at least every max_sleep_seconds in case
+  another process wrote to the store
+- Due reminders are posted concurrently through one pooled httpx.AsyncClient,
+  one sequence per room so a room's reminders arrive in due order
+- Each delivery claims its reminder first (pending -> sending with a
+  delivery_id); connect errors and 429/502/503/504 are retried with
+  backoff, and a reminder is only released for resending when the POST
+  certainly did not arrive, so it is never sent twice; an unexpected error
+  after the POST started parks it as 'ambiguous' instead
+- Delivery lag (sent time - due_at) is tracked for /reminders/stats
+- Legacy user_N/reminders.json files are imported into the store once at startup
 
 Author: Claude (AI Assistant)
 Created: 2025-11-02
-Version: 0.5.1
+Version: 0.5.3
 """
 
-import os
-import json
+import asyncio
 import logging
+import uuid
 import httpx
+from collections import defaultdict, deque
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from dateutil import parser as dateutil_parser
-from dateutil.relativedelta import relativedelta
+
+from src.tools.personal_store import STORE_FILENAME, PersonalStore
 
 logger = logging.getLogger(__name__)
 
+# Responses meaning "not processed, try again later"
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+# Delivery outcomes
+DELIVERED = "delivered"
+FAILED = "failed"          # Certainly not delivered: safe to send again
+AMBIGUOUS = "ambiguous"    # Request may have reached Campfire: never resent
+SKIPPED = "skipped"        # Claimed by another scheduler
+
 
 class ReminderScheduler:
     """
     Manages automated reminder delivery.
 
-    Scans user reminder files periodically and sends notifications
-    for reminders that are due.
+    Runs on the application event loop: sleeps until the next pending
+    reminder is due and sends the reminders that are due when it wakes.
     """
 
     def __init__(
@@ -42,7 +64,15 @@ class ReminderScheduler:
         context_dir: str,
         campfire_url: str,
         bot_key: str,
-        testing: bool = False
+        testing: bool = False,
+        personal_store: Optional[PersonalStore] = None,
+        max_sleep_seconds: float = 60.0,
+        retry_seconds: float = 30.0,
+        max_concurrency: int = 10,
+        send_attempts: int = 3,
+        backoff_seconds: float = 0.5,
+        max_attempts: int = 5,
+        claim_timeout_seconds: float = 600.0
     ):
         """
         Initialize reminder scheduler.
@@ -52,209 +82,331 @@ class ReminderScheduler:
             campfire_url: Campfire base URL (e.g., https://chat.smartice.ai)
             bot_key: Bot authentication key
             testing: If True, skip actual HTTP requests
+            personal_store: Shared PersonalStore (default: opens context_dir/personal.db)
+            max_sleep_seconds: Longest sleep between checks (catches other processes' writes)
+            retry_seconds: First wait before a cycle with failed deliveries is retried (doubles per failing cycle)
+            max_concurrency: Rooms posted to at the same time (also the connection pool size)
+            send_attempts: POST attempts per delivery on connect errors / retryable status
+            backoff_seconds: First backoff between POST attempts (doubles, Retry-After wins)
+            max_attempts: Failed deliveries before a reminder is marked 'failed'
+            claim_timeout_seconds: Age after which a 'sending' claim left by a crash is released at start
         """
         self.context_dir = Path(context_dir)
         self.campfire_url = campfire_url
         self.bot_key = bot_key
         self.testing = testing
+        self.max_sleep_seconds = max_sleep_seconds
+        self.retry_seconds = retry_seconds
+        self.max_concurrency = max_concurrency
+        self.send_attempts = send_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_attempts = max_attempts
+        self.claim_timeout_seconds = claim_timeout_seconds
+        self.store = personal_store or PersonalStore(self.context_dir / STORE_FILENAME)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake_event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._owns_client = False
+        self._lags: deque = deque(maxlen=1000)
+        self._stats = {
+            "cycles": 0,
+            "delivered": 0,
+            "failed": 0,
+            "ambiguous": 0,
+            "skipped": 0,
+            "deferred": 0,
+            "retries": 0,
+            "gave_up": 0,
+        }
+
+        # One-time import of legacy user_N/reminders.json (and tasks/notes) files
+        migrated = self.store.migrate_context_dir(self.context_dir)
+        if migrated["users"]:
+            logger.info(f"[ReminderScheduler] Migrated legacy personal data: {migrated}")
+
+        self.store.add_listener(self.wake)
 
         logger.info(f"[ReminderScheduler] Initialized")
         logger.info(f"[ReminderScheduler] Context dir: {self.context_dir}")
         logger.info(f"[ReminderScheduler] Campfire URL: {self.campfire_url}")
         logger.info(f"[ReminderScheduler] Testing mode: {self.testing}")
 
-    def check_and_send_reminders(self):
-        """
-        Main check loop: scan all user reminders and send notifications for due reminders.
-
-        This function is called by APScheduler every 1 minute.
-        """
-        logger.debug("[ReminderScheduler] Starting reminder check cycle")
-
-        try:
-            # Find all user directories
-            if not self.context_dir.exists():
-                logger.warning(f"[ReminderScheduler] Context directory does not exist: {self.context_dir}")
-                return
-
-            user_dirs = [d for d in self.context_dir.iterdir() if d.is_dir() and d.name.startswith('user_')]
-            logger.debug(f"[ReminderScheduler] Found {len(user_dirs)} user directories")
-
-            for user_dir in user_dirs:
-                reminders_file = user_dir / "reminders.json"
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        )
 
-                if not reminders_file.exists():
-                    continue
-
-                # Process reminders for this user
-                self._process_user_reminders(reminders_file)
-
-        except Exception as e:
-            logger.error(f"[ReminderScheduler] Error in check cycle: {e}", exc_info=True)
-
-    def _process_user_reminders(self, reminders_file: Path):
+    def start(self, client: Optional[httpx.AsyncClient] = None):
         """
-        Process reminders for a single user.
+        Start the scheduler task on the running event loop (no-op if running).
 
         Args:
-            reminders_file: Path to user's reminders.json file
+            client: Shared AsyncClient to post with (default: a pooled client owned by the scheduler)
         """
+        if self._task and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake_event = asyncio.Event()
+        self._owns_client = client is None
+        self._client = client or self._new_client()
+
+        released = self.store.release_stale_claims(timedelta(seconds=self.claim_timeout_seconds))
+        if released:
+            logger.warning(f"[ReminderScheduler] Released {released} stale delivery claims")
+
+        self._task = self._loop.create_task(self._run(), name="reminder-scheduler")
+        logger.info("[ReminderScheduler] Started")
+
+    async def stop(self):
+        """Stop the scheduler task and close its HTTP client"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client and self._owns_client:
+            await self._client.aclose()
+        self._client = None
+        logger.info("[ReminderScheduler] Stopped")
+
+    def wake(self):
+        """Re-check now (called by the store, from any thread, when a reminder is added)"""
+        loop, event = self._loop, self._wake_event
+        if loop is not None and event is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(event.set)
+
+    async def _run(self):
+        failing_cycles = 0
+        while True:
+            # Clear before checking so a reminder added mid-cycle still wakes the next wait
+            self._wake_event.clear()
+            result = await self.deliver_due(self._client)
+            delay = await asyncio.to_thread(self.seconds_until_next)
+            if result[FAILED]:
+                failing_cycles += 1
+                backoff = self.retry_seconds * 2 ** (failing_cycles - 1)
+                delay = max(delay, min(backoff, self.max_sleep_seconds))
+            else:
+                failing_cycles = 0
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def seconds_until_next(self) -> float:
+        """Seconds until the next pending reminder is due (capped at max_sleep_seconds)"""
         try:
-            # Load reminders
-            with open(reminders_file, 'r') as f:
-                data = json.load(f)
-
-            reminders = data.get("reminders", [])
-            pending_reminders = [r for r in reminders if r.get("status") == "pending"]
-
-            if not pending_reminders:
-                return
-
-            logger.debug(f"[ReminderScheduler] Processing {len(pending_reminders)} pending reminders from {reminders_file}")
-
-            # Check each pending reminder
-            modified = False
-            for reminder in pending_reminders:
-                if self._is_reminder_due(reminder):
-                    # Send notification
-                    success = self._send_reminder_notification(reminder, reminders_file)
-
-                    if success:
-                        # Mark as triggered
-                        reminder["status"] = "triggered"
-                        reminder["triggered_at"] = datetime.now().isoformat()
-                        modified = True
-                        logger.info(f"[ReminderScheduler] Reminder #{reminder['id']} delivered successfully")
-                    else:
-                        logger.error(f"[ReminderScheduler] Failed to deliver reminder #{reminder['id']}")
-
-            # Save if modified
-            if modified:
-                with open(reminders_file, 'w') as f:
-                    json.dump(data, f, indent=2)
-                logger.info(f"[ReminderScheduler] Updated {reminders_file}")
-
+            next_due = self.store.next_due_at()
         except Exception as e:
-            logger.error(f"[ReminderScheduler] Error processing {reminders_file}: {e}", exc_info=True)
+            logger.error(f"[ReminderScheduler] Error reading next due time: {e}")
+            return self.max_sleep_seconds
+        if next_due is None:
+            return self.max_sleep_seconds
+        return min(max((next_due - datetime.now()).total_seconds(), 0.0), self.max_sleep_seconds)
 
-    def _is_reminder_due(self, reminder: Dict[str, Any]) -> bool:
+    def check_and_send_reminders(self) -> int:
         """
-        Check if a reminder is due to be sent.
-
-        Args:
-            reminder: Reminder dictionary
+        Send due reminders once, outside the scheduler task (scripts, tests).
 
         Returns:
-            True if reminder should be sent now
+            Number of reminders delivered
         """
-        try:
-            remind_at_str = reminder.get("remind_at", "")
-            remind_time = self._parse_remind_time(remind_at_str)
-
-            if remind_time is None:
-                logger.warning(f"[ReminderScheduler] Could not parse remind_at: {remind_at_str}")
-                return False
-
-            # Reminder is due if remind_time <= now
-            now = datetime.now()
-            is_due = remind_time <= now
+        return asyncio.run(self.deliver_due())[DELIVERED]
 
-            if is_due:
-                logger.debug(f"[ReminderScheduler] Reminder #{reminder['id']} is due (scheduled: {remind_time}, now: {now})")
-
-            return is_due
-
-        except Exception as e:
-            logger.error(f"[ReminderScheduler] Error checking if reminder is due: {e}", exc_info=True)
-            return False
-
-    def _parse_remind_time(self, remind_at: str) -> Optional[datetime]:
+    async def deliver_due(self, client: Optional[httpx.AsyncClient] = None) -> Dict[str, int]:
         """
-        Parse remind_at string to datetime.
+        Send every due pending reminder.
 
-        Supports:
-        - ISO 8601: "2025-11-02T14:30:00"
-        - Standard formats: "2025-11-02 14:30", "2025-11-02 14:30:00"
-        - Natural language: "明天上午10点", "2小时后", "下周一" (basic support)
+        Rooms are posted to concurrently (up to max_concurrency); within a
+        room reminders go out one at a time in due order, and a failure
+        defers the rest of that room to the next cycle.
 
         Args:
-            remind_at: Time string
+            client: AsyncClient to post with (default: a temporary client)
 
         Returns:
-            datetime object or None if parsing fails
+            Counts of delivered / failed / ambiguous / skipped / deferred reminders
         """
-        if not remind_at:
-            return None
-
-        try:
-            # Try ISO 8601 / standard datetime formats first
-            return dateutil_parser.parse(remind_at)
-        except:
-            pass
+        logger.debug("[ReminderScheduler] Starting reminder check cycle")
+        self._stats["cycles"] += 1
+        counts = {DELIVERED: 0, FAILED: 0, AMBIGUOUS: 0, SKIPPED: 0, "deferred": 0}
 
-        # Try natural language parsing (basic Chinese support)
         try:
-            now = datetime.now()
-            remind_at_lower = remind_at.lower()
+            due_reminders = await asyncio.to_thread(self.store.due_reminders, datetime.now())
+        except Exception as e:
+            logger.error(f"[ReminderScheduler] Error reading due reminders: {e}", exc_info=True)
+            return counts
+        if not due_reminders:
+            return counts
 
-            # "X小时后" / "X hours later"
-            if "小时后" in remind_at or "hours later" in remind_at_lower:
-                hours = int(''.join(filter(str.isdigit, remind_at)))
-                return now + timedelta(hours=hours)
+        logger.debug(f"[ReminderScheduler] Processing {len(due_reminders)} due reminders")
 
-            # "X分钟后" / "X minutes later"
-            if "分钟后" in remind_at or "minutes later" in remind_at_lower:
-                minutes = int(''.join(filter(str.isdigit, remind_at)))
-                return now + timedelta(minutes=minutes)
+        by_room: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for reminder in due_reminders:
+            by_room[self._room_id(reminder)].append(reminder)
 
-            # "明天" / "tomorrow"
-            if "明天" in remind_at or "tomorrow" in remind_at_lower:
-                tomorrow = now + timedelta(days=1)
-                # Default to 9:00 AM tomorrow if no time specified
-                return tomorrow.replace(hour=9, minute=0, second=0, microsecond=0)
+        owns_client = client is None
+        client = client or self._new_client()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            results = await asyncio.gather(*(
+                self._deliver_room(client, semaphore, room_id, reminders)
+                for room_id, reminders in by_room.items()
+            ))
+        finally:
+            if owns_client:
+                await client.aclose()
+
+        for room_counts in results:
+            for key, value in room_counts.items():
+                counts[key] += value
+        for key in (DELIVERED, FAILED, AMBIGUOUS, SKIPPED, "deferred"):
+            self._stats[key] += counts[key]
+        return counts
+
+    @staticmethod
+    def _room_id(reminder: Dict[str, Any]) -> int:
+        # Default to room 1 if not specified
+        return reminder.get("room_id") or 1
+
+    async def _deliver_room(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                            room_id: int, reminders: List[Dict[str, Any]]) -> Dict[str, int]:
+        counts = {DELIVERED: 0, FAILED: 0, AMBIGUOUS: 0, SKIPPED: 0, "deferred": 0}
+        async with semaphore:
+            for index, reminder in enumerate(reminders):
+                outcome = await self._deliver(client, room_id, reminder)
+                counts[outcome] += 1
+                if outcome == FAILED:
+                    # Keep the room's order: later reminders wait for this one
+                    counts["deferred"] += len(reminders) - index - 1
+                    break
+        return counts
+
+    async def _deliver(self, client: httpx.AsyncClient, room_id: int, reminder: Dict[str, Any]) -> str:
+        """Claim, post and confirm (or release) one reminder"""
+        store_id = reminder["store_id"]
+        delivery_id = uuid.uuid4().hex
+        claimed = posting = False
+        try:
+            if not await asyncio.to_thread(self.store.claim_reminder, store_id, delivery_id):
+                return SKIPPED
+            claimed = True
 
-            # "下周" / "next week"
-            if "下周" in remind_at or "next week" in remind_at_lower:
-                next_week = now + timedelta(days=7)
-                return next_week.replace(hour=9, minute=0, second=0, microsecond=0)
+            message = self._format_reminder_message(reminder)
+            posting = True
+            outcome = await self._post_with_retry(client, room_id, message)
+
+            if outcome == FAILED:
+                status = await asyncio.to_thread(self.store.release_reminder, store_id, delivery_id, self.max_attempts)
+                if status == "failed":
+                    self._stats["gave_up"] += 1
+                    logger.error(f"[ReminderScheduler] Giving up on reminder #{reminder['id']} (user {reminder['user_id']}) after {self.max_attempts} attempts")
+                else:
+                    logger.error(f"[ReminderScheduler] Failed to deliver reminder #{reminder['id']} (user {reminder['user_id']})")
+                return FAILED
 
-            # If all else fails, try dateutil's fuzzy parsing
-            return dateutil_parser.parse(remind_at, fuzzy=True)
+            # Delivered, or possibly delivered: either way it must not be sent again
+            await asyncio.to_thread(self.store.complete_delivery, store_id, delivery_id)
+            lag = (datetime.now() - datetime.fromisoformat(reminder["due_at"])).total_seconds()
+            self._lags.append(lag)
+            logger.info(f"[ReminderScheduler] Reminder #{reminder['id']} (user {reminder['user_id']}) {outcome} ({lag:.1f}s after due)")
+            return outcome
 
         except Exception as e:
-            logger.error(f"[ReminderScheduler] Failed to parse remind_at '{remind_at}': {e}")
-            return None
+            logger.error(f"[ReminderScheduler] Error delivering reminder #{reminder['id']}: {e}", exc_info=True)
+            if claimed:
+                await self._settle_claim(reminder, delivery_id, posting)
+            return AMBIGUOUS if posting else FAILED
 
-    def _send_reminder_notification(self, reminder: Dict[str, Any], reminders_file: Path) -> bool:
+    async def _settle_claim(self, reminder: Dict[str, Any], delivery_id: str, posting: bool):
         """
-        Send reminder notification to Campfire.
+        Settle a claim after an unexpected error.
 
-        Args:
-            reminder: Reminder dictionary
-            reminders_file: Path to reminders file (used to extract user_id)
+        Once the POST was started the reminder may have arrived, so it is
+        parked as 'ambiguous' (never released for resending); before that it
+        is released like a failed delivery.
+        """
+        store_id = reminder["store_id"]
+        try:
+            if posting:
+                await asyncio.to_thread(self.store.mark_delivery_ambiguous, store_id, delivery_id)
+            else:
+                await asyncio.to_thread(self.store.release_reminder, store_id, delivery_id, self.max_attempts)
+        except Exception as e:
+            logger.error(f"[ReminderScheduler] Could not settle claim on reminder #{reminder['id']}, left in 'sending': {e}")
+
+    async def _post_with_retry(self, client: httpx.AsyncClient, room_id: int, message: str) -> str:
+        """
+        Post message to a Campfire room, retrying when it certainly did not arrive.
 
         Returns:
-            True if notification sent successfully
+            DELIVERED, FAILED (not delivered) or AMBIGUOUS (sent, outcome unknown)
         """
-        try:
-            # Extract user_id from reminders_file path
-            # Path format: /path/to/user_contexts/user_{user_id}/reminders.json
-            user_id = int(reminders_file.parent.name.replace('user_', ''))
+        # Skip in testing mode
+        if self.testing:
+            logger.info(f"[ReminderScheduler] [TEST MODE] Would post to room {room_id}: {message[:100]}...")
+            return DELIVERED
 
-            # Get room_id from reminder (if available) or use default
-            # Note: In v0.5.1, we assume reminders are sent to the room where they were created
-            # Future enhancement: Store room_id in reminder data
-            room_id = reminder.get("room_id", 1)  # Default to room 1 if not specified
+        url = f"{self.campfire_url}/rooms/{room_id}/{self.bot_key}/messages"
 
-            # Format reminder message
-            message = self._format_reminder_message(reminder)
+        for attempt in range(1, self.send_attempts + 1):
+            retry_after = None
+            try:
+                response = await client.post(
+                    url,
+                    content=message.encode('utf-8'),
+                    headers={
+                        'Content-Type': 'text/html; charset=utf-8'
+                    }
+                )
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # Never reached Campfire
+                logger.warning(f"[ReminderScheduler] Connect to Campfire failed (attempt {attempt}): {e}")
+            except httpx.HTTPError as e:
+                logger.error(f"[ReminderScheduler] Campfire request failed after sending, not resending: {e}")
+                return AMBIGUOUS
+            else:
+                if response.status_code in [200, 201]:
+                    return DELIVERED
+                if response.status_code not in RETRYABLE_STATUS:
+                    logger.error(f"[ReminderScheduler] Campfire returned status {response.status_code}: {response.text}")
+                    return FAILED
+                logger.warning(f"[ReminderScheduler] Campfire returned status {response.status_code} (attempt {attempt})")
+                retry_after = _retry_after_seconds(response)
 
-            # Send to Campfire
-            return self._post_to_campfire(room_id, message)
+            if attempt < self.send_attempts:
+                self._stats["retries"] += 1
+                await asyncio.sleep(retry_after if retry_after is not None else self.backoff_seconds * 2 ** (attempt - 1))
 
-        except Exception as e:
-            logger.error(f"[ReminderScheduler] Error sending notification: {e}", exc_info=True)
-            return False
+        return FAILED
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Dict with delivery counts, retries, delivery lag (seconds after
+            due_at, over the last 1000 deliveries) and the next due time
+        """
+        lags = sorted(self._lags)
+        next_due = self.store.next_due_at()
+        return {
+            "running": bool(self._task and not self._task.done()),
+            **self._stats,
+            "lag_seconds": {
+                "count": len(lags),
+                "avg": round(sum(lags) / len(lags), 3) if lags else None,
+                "p50": round(lags[len(lags) // 2], 3) if lags else None,
+                "p95": round(lags[min(len(lags) - 1, int(len(lags) * 0.95))], 3) if lags else None,
+                "max": round(lags[-1], 3) if lags else None,
+            },
+            "next_due_at": next_due.isoformat() if next_due else None,
+        }
 
     def _format_reminder_message(self, reminder: Dict[str, Any]) -> str:
         """
@@ -288,54 +440,21 @@ class ReminderScheduler:
 """
         return html.strip()
 
-    def _post_to_campfire(self, room_id: int, message: str) -> bool:
-        """
-        Post message to Campfire room (synchronous version for background task).
-
-        Args:
-            room_id: Room ID to post to
-            message: HTML formatted message
-
-        Returns:
-            True if post succeeded
-        """
-        # Skip in testing mode
-        if self.testing:
-            logger.info(f"[ReminderScheduler] [TEST MODE] Would post to room {room_id}: {message[:100]}...")
-            return True
 
-        try:
-            url = f"{self.campfire_url}/rooms/{room_id}/{self.bot_key}/messages"
-
-            logger.info(f"[ReminderScheduler] Posting reminder to {url}")
-
-            # Use synchronous httpx client (APScheduler background thread)
-            with httpx.Client(timeout=10.0) as client:
-                response = client.post(
-                    url,
-                    content=message.encode('utf-8'),
-                    headers={
-                        'Content-Type': 'text/html; charset=utf-8'
-                    }
-                )
-
-                if response.status_code in [200, 201]:
-                    logger.info(f"[ReminderScheduler] Successfully posted to Campfire (status: {response.status_code})")
-                    return True
-                else:
-                    logger.error(f"[ReminderScheduler] Campfire returned status {response.status_code}: {response.text}")
-                    return False
-
-        except Exception as e:
-            logger.error(f"[ReminderScheduler] Error posting to Campfire: {e}", exc_info=True)
-            return False
+def _retry_after_seconds(response: httpx.Response, cap: float = 30.0) -> Optional[float]:
+    """Retry-After header in seconds (numeric form only), capped"""
+    try:
+        return min(max(float(response.headers.get("Retry-After", "")), 0.0), cap)
+    except ValueError:
+        return None
 
 
 def create_scheduler(
     context_dir: str,
     campfire_url: str,
     bot_key: str,
-    testing: bool = False
+    testing: bool = False,
+    personal_store: Optional[PersonalStore] = None
 ) -> ReminderScheduler:
     """
     Factory function to create ReminderScheduler instance.
@@ -345,6 +464,7 @@ def create_scheduler(
         campfire_url: Campfire base URL
         bot_key: Bot authentication key
         testing: If True, skip actual HTTP requests
+        personal_store: Shared PersonalStore (optional)
 
     Returns:
         ReminderScheduler instance
@@ -353,5 +473,6 @@ def create_scheduler(
         context_dir=context_dir,
         campfire_url=campfire_url,
         bot_key=bot_key,
-        testing=testing
+        testing=testing,
+        personal_store=personal_store
     )
@@ -46,12 +46,14 @@ from src.tools.campfire_decorators import (
     search_knowledge_base_tool,
     read_knowledge_document_tool,
     list_knowledge_documents_tool,
-    store_knowledge_document_tool
+    store_knowledge_document_tool,
+    get_attachment_content_tool
 )
 
 from src.tools.briefing_decorators import (
     generate_daily_briefing_tool,
-    search_briefings_tool
+    search_briefings_tool,
+    summarize_briefing_range_tool
 )
 
 from src.tools.personal_decorators import (
@@ -77,7 +79,8 @@ from src.tools.analytics_decorators import (
     get_table_turnover_tool,
     get_return_analysis_tool,
     get_order_type_distribution_tool,
-    get_revenue_trend_tool
+    get_revenue_trend_tool,
+    get_operations_snapshot_tool
 )
 
 from src.tools.menu_engineering_decorators import (
@@ -111,10 +114,12 @@ __all__ = [
     'read_knowledge_document_tool',
     'list_knowledge_documents_tool',
     'store_knowledge_document_tool',
+    'get_attachment_content_tool',
 
     # Briefing tools
     'generate_daily_briefing_tool',
     'search_briefings_tool',
+    'summarize_briefing_range_tool',
 
     # Personal tools
     'manage_personal_tasks_tool',
@@ -138,6 +143,7 @@ __all__ = [
     'get_return_analysis_tool',
     'get_order_type_distribution_tool',
     'get_revenue_trend_tool',
+    'get_operations_snapshot_tool',
 
     # Menu engineering tools
     'get_menu_profitability_tool',
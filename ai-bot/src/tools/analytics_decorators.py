@@ -55,7 +55,7 @@ async def get_daily_revenue_tool(args):
         target_date = args.get('target_date')
 
         # Call underlying implementation
-        result = _supabase_tools.get_daily_revenue(target_date=target_date)
+        result = await _supabase_tools.get_daily_revenue(target_date=target_date)
 
         # Format response
         if result.get('success') and result.get('data'):
@@ -128,7 +128,7 @@ async def get_revenue_by_zone_tool(args):
         end_date = args.get('end_date')
 
         # Call underlying implementation
-        result = _supabase_tools.get_revenue_by_zone(
+        result = await _supabase_tools.get_revenue_by_zone(
             start_date=start_date,
             end_date=end_date
         )
@@ -203,7 +203,7 @@ async def get_top_dishes_tool(args):
         top_n = args.get('top_n', 10)
 
         # Call underlying implementation
-        result = _supabase_tools.get_top_dishes(
+        result = await _supabase_tools.get_top_dishes(
             start_date=start_date,
             end_date=end_date,
             top_n=top_n
@@ -278,7 +278,7 @@ async def get_station_performance_tool(args):
         end_date = args.get('end_date')
 
         # Call underlying implementation
-        result = _supabase_tools.get_station_performance(
+        result = await _supabase_tools.get_station_performance(
             start_date=start_date,
             end_date=end_date
         )
@@ -349,7 +349,7 @@ async def get_quick_stats_tool(args):
         target_date = args.get('target_date')
 
         # Call underlying implementation
-        result = _supabase_tools.get_quick_stats(target_date=target_date)
+        result = await _supabase_tools.get_quick_stats(target_date=target_date)
 
         # Format response
         if result.get('success') and result.get('data'):
@@ -416,7 +416,7 @@ async def get_hourly_revenue_tool(args):
         target_date = args.get('target_date')
 
         # Call underlying implementation
-        result = _supabase_tools.get_hourly_revenue(target_date=target_date)
+        result = await _supabase_tools.get_hourly_revenue(target_date=target_date)
 
         # Format response
         if result.get('success') and result.get('data'):
@@ -487,7 +487,7 @@ async def get_table_turnover_tool(args):
         end_date = args.get('end_date')
 
         # Call underlying implementation
-        result = _supabase_tools.get_table_turnover(
+        result = await _supabase_tools.get_table_turnover(
             start_date=start_date,
             end_date=end_date
         )
@@ -563,7 +563,7 @@ async def get_return_analysis_tool(args):
         end_date = args.get('end_date')
 
         # Call underlying implementation
-        result = _supabase_tools.get_return_analysis(
+        result = await _supabase_tools.get_return_analysis(
             start_date=start_date,
             end_date=end_date
         )
@@ -637,7 +637,7 @@ async def get_order_type_distribution_tool(args):
         end_date = args.get('end_date')
 
         # Call underlying implementation
-        result = _supabase_tools.get_order_type_distribution(
+        result = await _supabase_tools.get_order_type_distribution(
             start_date=start_date,
             end_date=end_date
         )
@@ -722,7 +722,7 @@ async def get_revenue_trend_tool(args):
             }
 
         # Call underlying implementation
-        result = _supabase_tools.get_revenue_trend(
+        result = await _supabase_tools.get_revenue_trend(
             start_date=start_date,
             end_date=end_date
         )
@@ -765,3 +765,154 @@ async def get_revenue_trend_tool(args):
         }
 
 
+
+
+def _num(value) -> float:
+    """RPC numerics may arrive as strings (Postgres NUMERIC)"""
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _format_snapshot_section(name: str, data) -> str:
+    """One compact block of the operations snapshot report"""
+    rows = data if isinstance(data, list) else [data] if data else []
+    if name == "quick_stats":
+        lines = [f"- {row.get('description') or row.get('metric')}: {row.get('value')}" for row in rows]
+        return "⚡ **概况**\n" + "\n".join(lines)
+    if name == "daily_revenue":
+        row = rows[0] if rows else {}
+        return (f"💰 **营业额** ¥{_num(row.get('total_revenue')):,.2f} | "
+                f"订单 {row.get('order_count', 0)} 单 | 客单价 ¥{_num(row.get('avg_order_value')):,.2f} | "
+                f"取消 {row.get('cancelled_orders', 0)} 单")
+    if name == "hourly_revenue":
+        peaks = sorted(rows, key=lambda row: -_num(row.get('total_revenue')))[:3]
+        return "🔥 **高峰时段** " + "，".join(
+            f"{row.get('hour_of_day')}:00 ¥{_num(row.get('total_revenue')):,.0f}" for row in peaks)
+    if name == "top_dishes":
+        return "🍜 **热销菜品** " + "，".join(
+            f"{row.get('item_name')} {row.get('total_quantity')}份" for row in rows)
+    if name == "station_performance":
+        return "👨‍🍳 **工作站** " + "，".join(
+            f"{row.get('station_name')} {row.get('total_items')}道/¥{_num(row.get('total_revenue')):,.0f}" for row in rows)
+    if name == "revenue_by_zone":
+        return "📍 **区域** " + "，".join(
+            f"{row.get('zone')} ¥{_num(row.get('total_revenue')):,.0f}" for row in rows)
+    if name == "order_type_distribution":
+        return "🥡 **订单类型** " + "，".join(
+            f"{row.get('order_type')} {_num(row.get('percentage_of_total')):.1f}%" for row in rows)
+    if name == "table_turnover":
+        busiest = sorted(rows, key=lambda row: -_num(row.get('order_count')))[:3]
+        return "🪑 **翻台最多** " + "，".join(
+            f"{row.get('table_no')} {row.get('order_count')}次" for row in busiest)
+    if name == "return_analysis":
+        if not rows:
+            return "↩️ **退菜** 无"
+        return "↩️ **退菜** " + "，".join(
+            f"{row.get('item_name')} {row.get('return_count')}次(¥{_num(row.get('return_revenue_loss')):,.0f})"
+            for row in rows[:3])
+    if name == "revenue_trend":
+        total = sum(_num(row.get('total_revenue')) for row in rows)
+        orders = sum(int(_num(row.get('order_count'))) for row in rows)
+        best = max(rows, key=lambda row: _num(row.get('total_revenue')), default={})
+        return (f"📈 **区间营业额** ¥{total:,.2f} | 订单 {orders} 单 | {len(rows)} 天 | "
+                f"最高 {best.get('date', 'N/A')} ¥{_num(best.get('total_revenue')):,.0f}")
+    return f"**{name}**: {data}"
+
+
+@tool(
+    name="get_operations_snapshot",
+    description="""Get an operations snapshot: several analytics metrics fetched in parallel in ONE call.
+
+Use this tool FIRST when:
+- User asks "今天怎么样？" / "昨天生意如何？" / "这周表现怎么样？"
+- User wants an overview combining revenue, peak hours, top dishes and stations
+- You would otherwise call get_quick_stats, get_daily_revenue, get_hourly_revenue,
+  get_top_dishes and get_station_performance one after another
+
+Sections (comma-separated, default: quick_stats,daily_revenue,hourly_revenue,top_dishes,station_performance):
+quick_stats, daily_revenue, hourly_revenue, top_dishes, station_performance,
+revenue_by_zone, order_type_distribution, table_turnover, return_analysis, revenue_trend
+
+For a multi-day range, single-day sections (quick_stats, daily_revenue, hourly_revenue)
+are replaced by revenue_trend. Sections that fail or time out are listed in the report;
+the other sections are still returned. Use the single-metric tools only for drill-downs.
+
+Example queries:
+- "今天怎么样？"
+- "昨天的整体运营情况"
+- "本周概况，包括区域和订单类型"
+
+Returns: Compact combined report with one block per section.""",
+    input_schema={
+        "target_date": str,  # Optional: Single date in YYYY-MM-DD format (default: today)
+        "start_date": str,  # Optional: Range start in YYYY-MM-DD format
+        "end_date": str,  # Optional: Range end in YYYY-MM-DD format
+        "sections": str,  # Optional: Comma-separated section names
+        "top_n": int  # Optional: Number of top dishes (default: 5)
+    }
+)
+async def get_operations_snapshot_tool(args):
+    """Get a combined operations snapshot"""
+    if not _supabase_tools:
+        return {
+            "content": [{
+                "type": "text",
+                "text": "⚠️ **Supabase tools not available**"
+            }]
+        }
+
+    try:
+        # Extract parameters
+        start_date = args.get('start_date') or args.get('target_date')
+        end_date = args.get('end_date') or args.get('target_date')
+        sections = args.get('sections')
+        if isinstance(sections, str):
+            sections = [s.strip() for s in sections.split(',') if s.strip()]
+        top_n = args.get('top_n', 5)
+
+        # Call underlying implementation (sections run concurrently)
+        result = await _supabase_tools.get_operations_snapshot(
+            start_date=start_date,
+            end_date=end_date,
+            sections=sections,
+            top_n=top_n
+        )
+
+        # Format response
+        period = start_date or '今天'
+        if end_date and end_date != start_date:
+            period = f"{start_date} 至 {end_date}"
+        if result.get('data'):
+            response_text = f"📊 **{period}运营快照**\n\n"
+            response_text += "\n\n".join(
+                _format_snapshot_section(name, data) for name, data in result['data'].items()
+            )
+        else:
+            response_text = f"未找到 {period} 的运营数据。"
+
+        notes = []
+        if result.get('timed_out'):
+            notes.append(f"⏱️ 超时未返回: {', '.join(result['timed_out'])}")
+        if result.get('errors'):
+            notes.append("❌ 查询失败: " + ", ".join(f"{name} ({message})" for name, message in result['errors'].items()))
+        if result.get('skipped'):
+            notes.append(f"ℹ️ 已跳过（仅支持单日）: {', '.join(result['skipped'])}")
+        if notes:
+            response_text += "\n\n**部分结果：**\n" + "\n".join(notes)
+
+        return {
+            "content": [{
+                "type": "text",
+                "text": response_text
+            }]
+        }
+
+    except Exception as e:
+        return {
+            "content": [{
+                "type": "text",
+                "text": f"查询运营快照失败：{str(e)}"
+            }]
+        }
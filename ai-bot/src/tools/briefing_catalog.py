@@ -0,0 +1,477 @@
+"""
+Briefing Catalog - Date-indexed archive of daily briefings
+
+search_briefings used to rglob briefings/, read every daily-briefing-*.md
+to apply the keyword filter and re-parse the header counts with string
+splitting on each call. The catalog keeps one entry per date instead:
+
+- Entries come from the JSON sidecar (daily-briefing-YYYY-MM-DD.json) that
+  generate_daily_briefing writes next to each markdown file; briefings
+  generated before sidecars existed are parsed from markdown once
+- Dates are kept sorted, so a date range is a bisect
+- A full-text index (same CJK bigram / Latin word tokenizer as the KB
+  index) maps terms to dates, so keyword filters are set intersections
+- Revalidated by (mtime_ns, size) and persisted as a snapshot in briefings/
+"""
+
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .kb_index import term_variants, tokenize
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 2
+CATALOG_FILENAME = ".briefing_catalog.json"
+SIDECAR_VERSION = 1
+
+_FILENAME_RE = re.compile(r"^daily-briefing-(\d{4}-\d{2}-\d{2})\.md$")
+_HEADER_RE = re.compile(r"^\*\*(Total Messages|Files Uploaded|Rooms Covered|Active Participants):\*\*\s*(\d+)")
+_ROOM_RE = re.compile(r"^### (?:💬 )?(.+) \(Room #(\d+)\)\s*$")
+_ROOM_STATS_RE = re.compile(r"^\*\*Messages:\*\*\s*(\d+)\s*\|\s*\*\*Participants:\*\*\s*(.*)$")
+_PARTICIPANT_RE = re.compile(r"^- (.+): (\d+) message\(s\)$")
+_FILE_ROOM_RE = re.compile(r"^\s+- Room: (.+)$")
+
+
+def sidecar_path(markdown_path: Path) -> Path:
+    """JSON sidecar location for a briefing markdown file"""
+    return markdown_path.with_suffix(".json")
+
+
+def parse_briefing_markdown(content: str) -> Dict[str, Any]:
+    """
+    Rebuild sidecar fields from a briefing's markdown (legacy briefings).
+
+    Args:
+        content: Briefing markdown as written by generate_daily_briefing
+
+    Returns:
+        Dict with message_count, file_count, rooms_count, participants_count,
+        rooms, participants and executive_summary
+    """
+    header = {}
+    rooms = []
+    participants = []
+    summary_lines = []
+    file_rooms: Dict[str, int] = {}
+    section = None
+
+    for line in content.split("\n"):
+        if line.startswith("## "):
+            section = line[3:].strip()
+            continue
+        if line.startswith("---"):
+            if section == "Executive Summary":
+                section = None
+            continue
+
+        match = _HEADER_RE.match(line)
+        if match and section is None:
+            header[match.group(1)] = int(match.group(2))
+        elif section == "Executive Summary" and line.strip():
+            summary_lines.append(line.strip())
+        elif section == "By Room Activity":
+            room = _ROOM_RE.match(line)
+            if room:
+                rooms.append({
+                    "room_id": int(room.group(2)),
+                    "room_name": room.group(1).strip(),
+                    "message_count": 0,
+                    "participants": [],
+                    "file_count": 0,
+                })
+            stats = _ROOM_STATS_RE.match(line)
+            if stats and rooms:
+                rooms[-1]["message_count"] = int(stats.group(1))
+                rooms[-1]["participants"] = [p.strip() for p in stats.group(2).split(",") if p.strip()]
+        elif section == "Files & Attachments":
+            file_room = _FILE_ROOM_RE.match(line)
+            if file_room:
+                name = file_room.group(1).strip()
+                file_rooms[name] = file_rooms.get(name, 0) + 1
+        elif section == "Participant Summary":
+            participant = _PARTICIPANT_RE.match(line)
+            if participant:
+                participants.append({"name": participant.group(1), "message_count": int(participant.group(2))})
+
+    for room in rooms:
+        room["file_count"] = file_rooms.get(room["room_name"], 0)
+
+    return {
+        "message_count": header.get("Total Messages", 0),
+        "file_count": header.get("Files Uploaded", 0),
+        "rooms_count": header.get("Rooms Covered", len(rooms)),
+        "participants_count": header.get("Active Participants", len(participants)),
+        "rooms": rooms,
+        "participants": participants,
+        "executive_summary": " ".join(summary_lines),
+    }
+
+
+class BriefingCatalog:
+    """
+    Thread-safe catalog of daily briefings keyed by date (YYYY-MM-DD).
+
+    Each entry holds path, counts, rooms, participants and the executive
+    summary; a term -> dates map backs keyword search.
+    """
+
+    def __init__(self, kb_dir, snapshot_path=None):
+        """
+        Initialize briefing catalog.
+
+        Args:
+            kb_dir: Knowledge base root (briefings live in <kb_dir>/briefings)
+            snapshot_path: JSON snapshot location (default: <kb_dir>/briefings/.briefing_catalog.json)
+        """
+        self.kb_dir = Path(kb_dir)
+        self.briefings_dir = self.kb_dir / "briefings"
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else self.briefings_dir / CATALOG_FILENAME
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dates: List[str] = []
+        self._postings: Dict[str, set] = {}
+        self._lock = threading.RLock()
+        self._ready = False
+        self._dirty = False
+        self._stats = {"searches": 0, "search_ms_total": 0.0, "files_parsed": 0, "legacy_parsed": 0}
+
+    @property
+    def ready(self) -> bool:
+        """True once the catalog has been loaded or built"""
+        return self._ready
+
+    # ---------- updates ----------
+
+    def _remove(self, date: str) -> bool:
+        entry = self._entries.pop(date, None)
+        if entry is None:
+            return False
+        for term in entry["terms"]:
+            dates = self._postings.get(term)
+            if dates is not None:
+                dates.discard(date)
+                if not dates:
+                    del self._postings[term]
+        index = bisect.bisect_left(self._dates, date)
+        if index < len(self._dates) and self._dates[index] == date:
+            del self._dates[index]
+        return True
+
+    def update_file(self, path) -> bool:
+        """
+        (Re)catalog one briefing markdown file, or drop it if it is gone.
+
+        Args:
+            path: Absolute path, or path relative to the KB root
+
+        Returns:
+            True if the catalog changed
+        """
+        path = Path(path)
+        if not path.is_absolute():
+            path = self.kb_dir / path
+        match = _FILENAME_RE.match(path.name)
+        if not match:
+            return False
+        date = match.group(1)
+
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return self.remove_date(date)
+        sidecar = sidecar_path(path)
+        try:
+            sidecar_mtime_ns = sidecar.stat().st_mtime_ns
+        except FileNotFoundError:
+            sidecar_mtime_ns = None
+
+        with self._lock:
+            entry = self._entries.get(date)
+            if (entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size
+                    and entry["sidecar_mtime_ns"] == sidecar_mtime_ns):
+                return False
+
+        try:
+            content = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"[Briefing Catalog] Skipping unreadable briefing {path}: {e}")
+            return False
+
+        summary = None
+        if sidecar_mtime_ns is not None:
+            try:
+                summary = json.loads(sidecar.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"[Briefing Catalog] Ignoring unreadable sidecar {sidecar}: {e}")
+        legacy = summary is None
+        if legacy:
+            summary = parse_briefing_markdown(content)
+
+        entry = {
+            "date": date,
+            "path": path.relative_to(self.kb_dir).as_posix(),
+            "message_count": summary.get("message_count", 0),
+            "file_count": summary.get("file_count", 0),
+            "rooms_count": summary.get("rooms_count", 0),
+            "participants_count": summary.get("participants_count", 0),
+            "rooms": summary.get("rooms", []),
+            "participants": summary.get("participants", []),
+            "executive_summary": summary.get("executive_summary", ""),
+            "room_filter": summary.get("room_filter"),
+            "include_files": summary.get("include_files", True),
+            "has_sidecar": not legacy,
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "sidecar_mtime_ns": sidecar_mtime_ns,
+            "terms": sorted(set(tokenize(content))),
+        }
+
+        with self._lock:
+            self._remove(date)
+            self._entries[date] = entry
+            bisect.insort(self._dates, date)
+            for term in entry["terms"]:
+                self._postings.setdefault(term, set()).add(date)
+            self._dirty = True
+            self._stats["files_parsed"] += 1
+            self._stats["legacy_parsed"] += legacy
+        return True
+
+    def remove_date(self, date: str) -> bool:
+        """Drop the briefing for a date; returns True if it was catalogued"""
+        with self._lock:
+            removed = self._remove(date)
+            if removed:
+                self._dirty = True
+        return removed
+
+    def on_change(self, rel: str, exists: bool):
+        """KnowledgeBaseWatcher listener: apply one changed KB document"""
+        if rel.startswith("briefings/"):
+            self.update_file(rel)
+
+    # ---------- build / persistence ----------
+
+    def refresh(self) -> Tuple[int, int]:
+        """
+        Reconcile the catalog with briefings/ using stat() only.
+
+        Returns:
+            Tuple of (files parsed, dates removed)
+        """
+        seen = set()
+        parsed = 0
+        if self.briefings_dir.exists():
+            for path in self.briefings_dir.rglob("daily-briefing-*.md"):
+                match = _FILENAME_RE.match(path.name)
+                if not match:
+                    continue
+                seen.add(match.group(1))
+                if self.update_file(path):
+                    parsed += 1
+
+        with self._lock:
+            stale = [date for date in self._entries if date not in seen]
+        for date in stale:
+            self.remove_date(date)
+
+        with self._lock:
+            self._ready = True
+        return parsed, len(stale)
+
+    def load(self) -> bool:
+        """
+        Load the JSON snapshot if present and compatible.
+
+        Returns:
+            True if a snapshot was loaded
+        """
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"[Briefing Catalog] Ignoring unreadable snapshot {self.snapshot_path}: {e}")
+            return False
+
+        if snapshot.get("version") != CATALOG_VERSION:
+            return False
+
+        with self._lock:
+            self._entries = snapshot["entries"]
+            self._dates = sorted(self._entries)
+            self._postings = {}
+            for date, entry in self._entries.items():
+                for term in entry["terms"]:
+                    self._postings.setdefault(term, set()).add(date)
+            self._dirty = False
+        return True
+
+    def save(self) -> bool:
+        """
+        Write the catalog snapshot atomically (no-op when unchanged).
+
+        Returns:
+            True if a snapshot was written
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            payload = json.dumps(
+                {"version": CATALOG_VERSION, "entries": self._entries},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            self._dirty = False
+
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            tmp_path.write_text(payload, encoding="utf-8")
+            os.replace(tmp_path, self.snapshot_path)
+            return True
+        except OSError as e:
+            logger.warning(f"[Briefing Catalog] Could not persist snapshot {self.snapshot_path}: {e}")
+            with self._lock:
+                self._dirty = True
+            return False
+
+    def load_or_build(self) -> Dict[str, Any]:
+        """
+        Load the snapshot (if any), reconcile it with disk and persist changes.
+
+        Returns:
+            Dict with briefings, loaded_snapshot, parsed, removed, elapsed_ms
+        """
+        started = time.perf_counter()
+        loaded = self.load()
+        parsed, removed = self.refresh()
+        self.save()
+        return {
+            "briefings": len(self._entries),
+            "loaded_snapshot": loaded,
+            "parsed": parsed,
+            "removed": removed,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    # ---------- queries ----------
+
+    def dates_in_range(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[str]:
+        """
+        Catalogued dates within [start_date, end_date], ascending.
+
+        Args:
+            start_date: Optional inclusive lower bound (YYYY-MM-DD)
+            end_date: Optional inclusive upper bound (YYYY-MM-DD)
+
+        Returns:
+            List of dates
+        """
+        with self._lock:
+            lo = bisect.bisect_left(self._dates, start_date) if start_date else 0
+            hi = bisect.bisect_right(self._dates, end_date) if end_date else len(self._dates)
+            return self._dates[lo:hi]
+
+    def _matching_dates(self, query: str) -> Optional[set]:
+        """Dates whose briefing contains every query term (None = no filter)"""
+        terms = set(tokenize(query))
+        if not terms:
+            return None
+        matched = None
+        for term in terms:
+            dates = set()
+            for variant in term_variants(term, self._postings):
+                dates |= self._postings.get(variant, set())
+            matched = dates if matched is None else matched & dates
+            if not matched:
+                return set()
+        return matched
+
+    def search(self, query: Optional[str] = None, start_date: Optional[str] = None,
+               end_date: Optional[str] = None, max_results: int = 5) -> List[Dict[str, Any]]:
+        """
+        Find briefings by date range and/or keywords, most recent first.
+
+        Keywords match briefings containing all of their terms (CJK bigrams /
+        Latin words), which approximates the previous substring filter.
+
+        Args:
+            query: Optional search keywords
+            start_date: Optional start date (YYYY-MM-DD)
+            end_date: Optional end date (YYYY-MM-DD)
+            max_results: Maximum results to return
+
+        Returns:
+            List of dicts with keys: path, date, excerpt, message_count,
+            file_count, rooms_count, participants_count
+        """
+        started = time.perf_counter()
+        results = []
+        with self._lock:
+            matched = self._matching_dates(query) if query else None
+            for date in reversed(self.dates_in_range(start_date, end_date)):
+                if matched is not None and date not in matched:
+                    continue
+                entry = self._entries[date]
+                results.append({
+                    "path": entry["path"],
+                    "date": date,
+                    "excerpt": entry["executive_summary"],
+                    "message_count": entry["message_count"],
+                    "file_count": entry["file_count"],
+                    "rooms_count": entry["rooms_count"],
+                    "participants_count": entry["participants_count"],
+                })
+                if len(results) >= max_results:
+                    break
+            self._stats["searches"] += 1
+            self._stats["search_ms_total"] += (time.perf_counter() - started) * 1000
+        return results
+
+    def get(self, date: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the catalog entry for a date (without its term list).
+
+        Args:
+            date: Date (YYYY-MM-DD)
+
+        Returns:
+            Entry dict or None
+        """
+        with self._lock:
+            entry = self._entries.get(date)
+            if entry is None:
+                return None
+            return {k: v for k, v in entry.items() if k != "terms"}
+
+    def stats(self) -> dict:
+        """
+        Get catalog statistics.
+
+        Returns:
+            Dict with briefing/term counts and search latency
+        """
+        with self._lock:
+            searches = self._stats["searches"]
+            return {
+                "ready": self._ready,
+                "briefings": len(self._entries),
+                "terms": len(self._postings),
+                "first_date": self._dates[0] if self._dates else None,
+                "last_date": self._dates[-1] if self._dates else None,
+                "searches": searches,
+                "avg_search_ms": round(self._stats["search_ms_total"] / searches, 3) if searches else 0.0,
+                "files_parsed": self._stats["files_parsed"],
+                "legacy_parsed": self._stats["legacy_parsed"],
+                "snapshot_path": str(self.snapshot_path),
+            }
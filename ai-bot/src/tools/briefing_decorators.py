@@ -3,6 +3,7 @@ Daily briefing generation and search tools
 Agent SDK Tool Decorators
 """
 
+import asyncio
 from claude_agent_sdk import tool
 from typing import Optional
 
@@ -70,17 +71,12 @@ async def generate_daily_briefing_tool(args):
         # Format response
         if result.get('success'):
             response_text = f"📊 日报生成成功\n\n"
-            response_text += f"日期: {result.get('date', 'N/A')}\n"
-            response_text += f"路径: {result.get('path', 'N/A')}\n"
-
-            # Add statistics if available
-            stats = result.get('statistics', {})
-            if stats:
-                response_text += f"\n**统计信息:**\n"
-                response_text += f"- 消息数量: {stats.get('message_count', 0)}\n"
-                response_text += f"- 房间数量: {stats.get('room_count', 0)}\n"
-                if include_files:
-                    response_text += f"- 文件数量: {stats.get('file_count', 0)}\n"
+            response_text += f"路径: {result.get('briefing_path', 'N/A')}\n"
+            response_text += f"\n**统计信息:**\n"
+            response_text += f"- 消息数量: {result.get('message_count', 0)}\n"
+            response_text += f"- 房间数量: {result.get('rooms_covered', 0)}\n"
+            if include_files:
+                response_text += f"- 文件数量: {result.get('file_count', 0)}\n"
         else:
             response_text = f"生成日报失败：{result.get('error', '未知错误')}"
 
@@ -135,8 +131,10 @@ async def search_briefings_tool(args):
         end_date = args.get('end_date')
         max_results = args.get('max_results', 5)
 
-        # Call underlying implementation
-        briefings = _campfire_tools.search_briefings(
+        # Call underlying implementation in a worker thread; identical
+        # concurrent searches share one execution (CampfireTools.single_flight)
+        briefings = await asyncio.to_thread(
+            _campfire_tools.search_briefings,
             query=query,
             start_date=start_date,
             end_date=end_date,
@@ -165,13 +163,14 @@ async def search_briefings_tool(args):
                 response_text += f"路径: {briefing.get('path', 'N/A')}\n"
 
                 # Add statistics if available
-                stats = briefing.get('statistics', {})
-                if stats:
+                if briefing.get('message_count'):
                     response_text += f"统计: "
-                    response_text += f"{stats.get('message_count', 0)} 条消息, "
-                    response_text += f"{stats.get('room_count', 0)} 个房间"
-                    if stats.get('file_count'):
-                        response_text += f", {stats.get('file_count')} 个文件"
+                    response_text += f"{briefing.get('message_count', 0)} 条消息, "
+                    response_text += f"{briefing.get('rooms_count', 0)} 个房间"
+                    if briefing.get('participants_count'):
+                        response_text += f", {briefing.get('participants_count')} 位参与者"
+                    if briefing.get('file_count'):
+                        response_text += f", {briefing.get('file_count')} 个文件"
                     response_text += "\n"
 
                 # Add excerpt if available
@@ -197,3 +196,105 @@ async def search_briefings_tool(args):
         }
 
 
+
+
+@tool(
+    name="summarize_briefing_range",
+    description="""Summarize Campfire activity for a week, month or any date range.
+
+Use this tool when:
+- User asks "本周活动总结" / "上个月的团队动态" / "summarize last week"
+- User wants weekly or monthly message volume, most active rooms or people
+- User asks how activity changed compared to the previous week/month
+- Prefer this over calling generate_daily_briefing once per day
+
+Returns: Totals (messages, files, active days), top rooms, top participants,
+per-day/week/month breakdown and change vs. the preceding period of equal length.""",
+    input_schema={
+        "range_name": str,  # Optional: "this_week", "last_week", "this_month", "last_month", "last_7_days", "last_30_days"
+        "start_date": str,  # Optional: YYYY-MM-DD (used when range_name is not given)
+        "end_date": str,  # Optional: YYYY-MM-DD, defaults to start_date or today
+        "period": str,  # Optional: "day", "week", "month" or "auto" (default)
+        "top_n": int  # Optional: default 5
+    }
+)
+async def summarize_briefing_range_tool(args):
+    """Summarize activity over a date range from daily aggregates"""
+    if not _campfire_tools:
+        return {
+            "content": [{
+                "type": "text",
+                "text": "错误：Campfire工具未初始化。请检查数据库连接。"
+            }]
+        }
+
+    try:
+        result = _campfire_tools.summarize_briefing_range(
+            start_date=args.get('start_date'),
+            end_date=args.get('end_date'),
+            range_name=args.get('range_name'),
+            period=args.get('period', 'auto'),
+            top_n=args.get('top_n', 5)
+        )
+
+        if not result.get('success'):
+            return {
+                "content": [{
+                    "type": "text",
+                    "text": f"活动汇总失败：{result.get('error', '未知错误')}"
+                }]
+            }
+
+        totals = result['totals']
+        response_text = f"📈 **活动汇总 {result['start_date']} 至 {result['end_date']}**（{result['days']} 天）\n\n"
+        response_text += f"- 消息数量: {totals['message_count']}\n"
+        response_text += f"- 文件数量: {totals['file_count']}\n"
+        response_text += f"- 活跃天数: {totals['active_days']}（日均 {totals['avg_messages_per_active_day']} 条）\n"
+        response_text += f"- 参与者: {totals['participants_count']} 人，房间: {totals['rooms_count']} 个\n"
+        if totals.get('busiest_day'):
+            busiest = totals['busiest_day']
+            response_text += f"- 最活跃日: {busiest['date']}（{busiest['message_count']} 条）\n"
+
+        previous = result.get('previous')
+        if previous:
+            change = result['change_pct']['message_count']
+            trend = f"{change:+.1f}%" if change is not None else "无可比数据"
+            response_text += (f"\n**对比上一周期** ({previous['start_date']} 至 {previous['end_date']}): "
+                              f"{previous['message_count']} 条消息，变化 {trend}\n")
+
+        if result['top_rooms']:
+            response_text += "\n**最活跃房间:**\n"
+            for room in result['top_rooms']:
+                response_text += f"- {room['room_name']}: {room['message_count']} 条消息"
+                if room['file_count']:
+                    response_text += f", {room['file_count']} 个文件"
+                response_text += "\n"
+
+        if result['top_participants']:
+            response_text += "\n**最活跃成员:**\n"
+            for participant in result['top_participants']:
+                response_text += f"- {participant['name']}: {participant['message_count']} 条消息\n"
+
+        period_labels = {"day": "按日", "week": "按周", "month": "按月"}
+        response_text += f"\n**{period_labels[result['period']]}分布:**\n"
+        for item in result['periods']:
+            label = item['period'] if item['start'] == item['end'] else f"{item['period']} ({item['start']} 至 {item['end']})"
+            response_text += f"- {label}: {item['message_count']} 条消息, {item['file_count']} 个文件"
+            if item['top_room']:
+                response_text += f", 最活跃: {item['top_room']}"
+            response_text += "\n"
+
+        return {
+            "content": [{
+                "type": "text",
+                "text": response_text
+            }]
+        }
+
+    except Exception as e:
+        return {
+            "content": [{
+                "type": "text",
+                "text": f"活动汇总失败：{str(e)}"
+            }]
+        }
@@ -0,0 +1,474 @@
+"""
+Briefing Rollups - Weekly and monthly summaries from daily aggregates
+
+Questions like "this week" or "last month" used to mean one
+generate_daily_briefing call (and one full messages query) per day. The
+rollup engine answers them from per-day aggregates instead:
+
+- A day's aggregate comes from its briefing sidecar when one exists (full
+  days only - briefings generated for a room subset are skipped), otherwise
+  from one grouped query covering every missing day of the request
+- Aggregates of closed days (before today) from the database are stored,
+  so each past day is queried at most once
+- Week (ISO, Monday-Sunday) and month rollups are cached with a fingerprint
+  of their days' versions; regenerating a day's briefing changes its
+  version, so only the week and month containing it are recomputed
+- summarize() merges period rollups into totals, top rooms/participants,
+  file counts and a comparison with the preceding range of equal length
+"""
+
+import calendar
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .briefing_catalog import BriefingCatalog
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 1
+STORE_FILENAME = ".briefing_rollups.json"
+
+
+def _parse(day: str) -> date:
+    return datetime.strptime(day, "%Y-%m-%d").date()
+
+
+def _days_between(start: str, end: str) -> List[str]:
+    first, last = _parse(start), _parse(end)
+    return [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+
+def period_bounds(kind: str, day: str) -> Tuple[str, str, str]:
+    """
+    Period containing a day.
+
+    Args:
+        kind: 'day', 'week' (ISO week, Monday start) or 'month'
+        day: Date (YYYY-MM-DD)
+
+    Returns:
+        Tuple of (period key, first day, last day), e.g. ('2025-W41', '2025-10-06', '2025-10-12')
+    """
+    d = _parse(day)
+    if kind == "week":
+        year, week, weekday = d.isocalendar()
+        first = d - timedelta(days=weekday - 1)
+        return f"{year}-W{week:02d}", first.isoformat(), (first + timedelta(days=6)).isoformat()
+    if kind == "month":
+        last_day = calendar.monthrange(d.year, d.month)[1]
+        return f"{d.year}-{d.month:02d}", d.replace(day=1).isoformat(), d.replace(day=last_day).isoformat()
+    return day, day, day
+
+
+def _empty_rollup() -> Dict[str, Any]:
+    return {"message_count": 0, "file_count": 0, "active_days": 0, "rooms": {}, "participants": {}, "days": {}}
+
+
+def _merge(target: Dict[str, Any], day_or_rollup: Dict[str, Any]):
+    """Add a day aggregate or another rollup into target (in place)"""
+    target["message_count"] += day_or_rollup["message_count"]
+    target["file_count"] += day_or_rollup["file_count"]
+    for room_id, room in day_or_rollup["rooms"].items():
+        merged = target["rooms"].setdefault(room_id, {"room_name": room["room_name"], "message_count": 0, "file_count": 0})
+        merged["message_count"] += room["message_count"]
+        merged["file_count"] += room["file_count"]
+    for name, count in day_or_rollup["participants"].items():
+        target["participants"][name] = target["participants"].get(name, 0) + count
+    if "days" in day_or_rollup:
+        target["days"].update(day_or_rollup["days"])
+        target["active_days"] += day_or_rollup["active_days"]
+    else:
+        target["days"][day_or_rollup["date"]] = day_or_rollup["message_count"]
+        target["active_days"] += 1 if day_or_rollup["message_count"] else 0
+
+
+class BriefingRollups:
+    """
+    Range summaries of Campfire activity built from per-day aggregates.
+    """
+
+    def __init__(
+        self,
+        briefing_catalog: BriefingCatalog,
+        connection_factory: Callable[[], Any],
+        store_path=None,
+        today: Optional[Callable[[], str]] = None,
+    ):
+        """
+        Initialize rollup engine.
+
+        Args:
+            briefing_catalog: Catalog providing per-day sidecar data
+            connection_factory: Returns a sqlite3 connection to the Campfire database
+            store_path: JSON store for day aggregates and period rollups
+                        (default: <kb>/briefings/.briefing_rollups.json)
+            today: Returns today's date (YYYY-MM-DD); days before it are closed
+        """
+        self.catalog = briefing_catalog
+        self.connection_factory = connection_factory
+        self.store_path = Path(store_path) if store_path else briefing_catalog.briefings_dir / STORE_FILENAME
+        self.today = today or (lambda: datetime.now().strftime("%Y-%m-%d"))
+
+        self._days: Dict[str, Dict[str, Any]] = {}
+        self._periods: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty = False
+        self._stats = {
+            "summaries": 0,
+            "days_from_sidecar": 0,
+            "days_from_store": 0,
+            "days_queried": 0,
+            "db_queries": 0,
+            "period_hits": 0,
+            "period_recomputes": 0,
+        }
+
+    # ---------- persistence ----------
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.store_path, "r", encoding="utf-8") as f:
+                store = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"[Rollups] Ignoring unreadable store {self.store_path}: {e}")
+            return
+        if store.get("version") == STORE_VERSION:
+            self._days = store.get("days", {})
+            self._periods = store.get("periods", {})
+
+    def save(self) -> bool:
+        """
+        Persist stored day aggregates and period rollups (no-op when unchanged).
+
+        Returns:
+            True if the store was written
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            payload = json.dumps(
+                {"version": STORE_VERSION, "days": self._days, "periods": self._periods},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            self._dirty = False
+        try:
+            self.store_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.store_path.with_suffix(".tmp")
+            tmp_path.write_text(payload, encoding="utf-8")
+            os.replace(tmp_path, self.store_path)
+            return True
+        except OSError as e:
+            logger.warning(f"[Rollups] Could not persist store {self.store_path}: {e}")
+            with self._lock:
+                self._dirty = True
+            return False
+
+    def invalidate_day(self, day: str):
+        """
+        Forget everything derived from one day (call when it is regenerated).
+
+        Args:
+            day: Date (YYYY-MM-DD)
+        """
+        with self._lock:
+            self._load()
+            self._days.pop(day, None)
+            for kind in ("week", "month"):
+                self._periods.pop(f"{kind}:{period_bounds(kind, day)[0]}", None)
+            self._dirty = True
+
+    # ---------- day aggregates ----------
+
+    def _sidecar_day(self, day: str) -> Optional[Dict[str, Any]]:
+        entry = self.catalog.get(day)
+        # Only full-day sidecars are authoritative: legacy markdown, room subsets and
+        # briefings generated without files fall back to the database
+        if (entry is None or not entry.get("has_sidecar") or entry.get("room_filter")
+                or entry.get("include_files") is False):
+            return None
+        return {
+            "date": day,
+            "source": "sidecar",
+            "version": f"sidecar:{entry.get('sidecar_mtime_ns') or entry['mtime_ns']}",
+            "message_count": entry["message_count"],
+            "file_count": entry["file_count"],
+            "rooms": {
+                str(room["room_id"]): {
+                    "room_name": room["room_name"] or f"Room {room['room_id']}",
+                    "message_count": room["message_count"],
+                    "file_count": room.get("file_count", 0),
+                }
+                for room in entry.get("rooms", [])
+            },
+            "participants": {p["name"]: p["message_count"] for p in entry.get("participants", [])},
+        }
+
+    def _query_days(self, days: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Aggregate messages and files for the given days with one grouped query each"""
+        first = days[0]
+        after_last = (_parse(days[-1]) + timedelta(days=1)).isoformat()
+        result = {
+            day: {"date": day, "source": "database", "version": "db", "message_count": 0,
+                  "file_count": 0, "rooms": {}, "participants": {}}
+            for day in days
+        }
+
+        conn = self.connection_factory()
+        cursor = conn.cursor()
+        # Range on the raw column (both "2025-10-04 06:13" and "2025-10-04T06:13" sort correctly)
+        cursor.execute("""
+            SELECT DATE(m.created_at) AS day, m.room_id, COALESCE(r.name, 'Room ' || m.room_id) AS room_name,
+                   u.name AS creator_name, COUNT(*) AS message_count
+            FROM messages m
+            JOIN rooms r ON m.room_id = r.id
+            JOIN users u ON m.creator_id = u.id
+            WHERE m.created_at >= ? AND m.created_at < ?
+            GROUP BY day, m.room_id, u.name
+        """, (first, after_last))
+        for row in cursor.fetchall():
+            aggregate = result.get(row["day"])
+            if aggregate is None:
+                continue
+            room = aggregate["rooms"].setdefault(
+                str(row["room_id"]), {"room_name": row["room_name"], "message_count": 0, "file_count": 0}
+            )
+            room["message_count"] += row["message_count"]
+            aggregate["message_count"] += row["message_count"]
+            name = row["creator_name"]
+            aggregate["participants"][name] = aggregate["participants"].get(name, 0) + row["message_count"]
+
+        cursor.execute("""
+            SELECT DATE(m.created_at) AS day, m.room_id, COALESCE(r.name, 'Room ' || m.room_id) AS room_name, COUNT(*) AS file_count
+            FROM messages m
+            JOIN active_storage_attachments a
+                ON a.record_type = 'Message' AND a.record_id = m.id
+            JOIN active_storage_blobs b ON a.blob_id = b.id
+            JOIN rooms r ON m.room_id = r.id
+            WHERE m.created_at >= ? AND m.created_at < ?
+            GROUP BY day, m.room_id
+        """, (first, after_last))
+        for row in cursor.fetchall():
+            aggregate = result.get(row["day"])
+            if aggregate is None:
+                continue
+            room = aggregate["rooms"].setdefault(
+                str(row["room_id"]), {"room_name": row["room_name"], "message_count": 0, "file_count": 0}
+            )
+            room["file_count"] += row["file_count"]
+            aggregate["file_count"] += row["file_count"]
+
+        with self._lock:
+            self._stats["db_queries"] += 1
+            self._stats["days_queried"] += len(days)
+        return result
+
+    def day_aggregates(self, start_date: str, end_date: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-day aggregates for every day in [start_date, end_date].
+
+        Args:
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD)
+
+        Returns:
+            Dict of date -> aggregate (message_count, file_count, rooms, participants, source, version)
+        """
+        today = self.today()
+        result = {}
+        missing = []
+        with self._lock:
+            self._load()
+            for day in _days_between(start_date, end_date):
+                sidecar = self._sidecar_day(day)
+                if sidecar is not None:
+                    result[day] = sidecar
+                    self._stats["days_from_sidecar"] += 1
+                elif day in self._days and day < today:
+                    result[day] = self._days[day]
+                    self._stats["days_from_store"] += 1
+                elif day <= today:
+                    missing.append(day)
+                else:
+                    result[day] = {"date": day, "source": "future", "version": "future", "message_count": 0,
+                                   "file_count": 0, "rooms": {}, "participants": {}}
+
+        if missing:
+            queried = self._query_days(missing)
+            with self._lock:
+                for day, aggregate in queried.items():
+                    result[day] = aggregate
+                    if day < today:
+                        self._days[day] = aggregate
+                        self._dirty = True
+        return result
+
+    # ---------- period rollups ----------
+
+    def _rollup(self, kind: str, key: str, first: str, last: str,
+                days: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Roll up one period; whole closed weeks/months are cached by day fingerprint"""
+        cacheable = kind != "day" and last < self.today()
+        fingerprint = hashlib.sha1(
+            "|".join(f"{d}={days[d]['version']}" for d in _days_between(first, last)).encode()
+        ).hexdigest()[:16]
+        cache_key = f"{kind}:{key}"
+
+        with self._lock:
+            cached = self._periods.get(cache_key) if cacheable else None
+            if cached and cached["fingerprint"] == fingerprint:
+                self._stats["period_hits"] += 1
+                return cached["rollup"]
+
+        rollup = _empty_rollup()
+        for day in _days_between(first, last):
+            _merge(rollup, days[day])
+
+        with self._lock:
+            self._stats["period_recomputes"] += 1
+            if cacheable:
+                self._periods[cache_key] = {"fingerprint": fingerprint, "rollup": rollup}
+                self._dirty = True
+        return rollup
+
+    def _range_rollup(self, start_date: str, end_date: str, kind: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Totals for a range plus the per-period breakdown (periods clipped to the range)"""
+        days = self.day_aggregates(start_date, end_date)
+        totals = _empty_rollup()
+        periods = []
+        cursor = start_date
+        while cursor <= end_date:
+            key, first, last = period_bounds(kind, cursor)
+            clipped_first, clipped_last = max(first, start_date), min(last, end_date)
+            if (clipped_first, clipped_last) == (first, last):
+                rollup = self._rollup(kind, key, first, last, days)
+            else:
+                rollup = self._rollup("day", f"{clipped_first}..{clipped_last}", clipped_first, clipped_last, days)
+            _merge(totals, rollup)
+            periods.append({"period": key, "start": clipped_first, "end": clipped_last, **rollup})
+            cursor = (_parse(last) + timedelta(days=1)).isoformat()
+        return totals, periods
+
+    # ---------- public API ----------
+
+    def summarize(self, start_date: str, end_date: str, period: str = "auto",
+                  top_n: int = 5, compare: bool = True) -> Dict[str, Any]:
+        """
+        Summarize Campfire activity over a date range.
+
+        Args:
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD)
+            period: Breakdown granularity: 'day', 'week', 'month' or 'auto'
+                    (day up to 14 days, week up to ~3 months, else month)
+            top_n: Number of top rooms/participants to return
+            compare: Include the preceding range of equal length for trends
+
+        Returns:
+            Dict with start_date, end_date, period, totals (message_count,
+            file_count, active_days, avg_messages_per_active_day, busiest_day),
+            top_rooms, top_participants, periods (per-period counts and top
+            room), previous (totals of the preceding range) and change_pct
+        """
+        if start_date > end_date:
+            start_date, end_date = end_date, start_date
+        span = (_parse(end_date) - _parse(start_date)).days + 1
+        if period not in ("day", "week", "month"):
+            period = "day" if span <= 14 else "week" if span <= 92 else "month"
+
+        totals, periods = self._range_rollup(start_date, end_date, period)
+
+        def top(mapping: Dict[str, Any], key: Callable) -> List:
+            return sorted(mapping.items(), key=key, reverse=True)[:top_n]
+
+        busiest = max(totals["days"].items(), key=lambda item: item[1], default=(None, 0))
+        summary = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "days": span,
+            "period": period,
+            "totals": {
+                "message_count": totals["message_count"],
+                "file_count": totals["file_count"],
+                "active_days": totals["active_days"],
+                "participants_count": len(totals["participants"]),
+                "rooms_count": len(totals["rooms"]),
+                "avg_messages_per_active_day": round(totals["message_count"] / totals["active_days"], 1)
+                if totals["active_days"] else 0.0,
+                "busiest_day": {"date": busiest[0], "message_count": busiest[1]} if busiest[1] else None,
+            },
+            "top_rooms": [
+                {"room_id": int(room_id), **room}
+                for room_id, room in top(totals["rooms"], lambda item: item[1]["message_count"])
+            ],
+            "top_participants": [
+                {"name": name, "message_count": count}
+                for name, count in top(totals["participants"], lambda item: item[1])
+            ],
+            "periods": [
+                {
+                    "period": p["period"],
+                    "start": p["start"],
+                    "end": p["end"],
+                    "message_count": p["message_count"],
+                    "file_count": p["file_count"],
+                    "active_days": p["active_days"],
+                    "top_room": max(p["rooms"].values(), key=lambda r: r["message_count"])["room_name"]
+                    if p["rooms"] else None,
+                }
+                for p in periods
+            ],
+        }
+
+        if compare:
+            previous_end = (_parse(start_date) - timedelta(days=1)).isoformat()
+            previous_start = (_parse(start_date) - timedelta(days=span)).isoformat()
+            previous, _ = self._range_rollup(previous_start, previous_end, period)
+            summary["previous"] = {
+                "start_date": previous_start,
+                "end_date": previous_end,
+                "message_count": previous["message_count"],
+                "file_count": previous["file_count"],
+                "active_days": previous["active_days"],
+                "participants_count": len(previous["participants"]),
+            }
+
+            def change(current: int, before: int) -> Optional[float]:
+                return round((current - before) / before * 100, 1) if before else None
+
+            summary["change_pct"] = {
+                "message_count": change(totals["message_count"], previous["message_count"]),
+                "file_count": change(totals["file_count"], previous["file_count"]),
+                "participants_count": change(len(totals["participants"]), len(previous["participants"])),
+            }
+
+        with self._lock:
+            self._stats["summaries"] += 1
+        self.save()
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get rollup statistics.
+
+        Returns:
+            Dict with day source counts, database queries and period cache hits
+        """
+        with self._lock:
+            return {
+                "stored_days": len(self._days),
+                "cached_periods": len(self._periods),
+                **self._stats,
+            }
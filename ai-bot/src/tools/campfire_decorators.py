@@ -3,9 +3,12 @@ Campfire conversation and knowledge base tools
 Agent SDK Tool Decorators
 """
 
+import asyncio
 from claude_agent_sdk import tool
 from typing import Optional
 
+from src.attachment_extractor import get_attachment_extractor
+
 # Global instances (will be initialized by app)
 _campfire_tools: Optional = None
 _supabase_tools: Optional = None
@@ -51,8 +54,10 @@ async def search_conversations_tool(args):
         room_id = args.get('room_id')
         limit = args.get('limit', 10)
 
-        # Call underlying implementation
-        results = _campfire_tools.search_conversations(
+        # Call underlying implementation in a worker thread; identical
+        # concurrent searches share one execution (CampfireTools.single_flight)
+        results = await asyncio.to_thread(
+            _campfire_tools.search_conversations,
             query=query,
             room_id=room_id,
             limit=limit
@@ -262,8 +267,10 @@ async def search_knowledge_base_tool(args):
         category = args.get('category')
         max_results = args.get('max_results', 3)
 
-        # Call underlying implementation
-        results = _campfire_tools.search_knowledge_base(
+        # Call underlying implementation in a worker thread; identical
+        # concurrent searches share one execution (CampfireTools.single_flight)
+        results = await asyncio.to_thread(
+            _campfire_tools.search_knowledge_base,
             query=query,
             category=category,
             max_results=max_results
@@ -304,21 +311,30 @@ async def search_knowledge_base_tool(args):
 
 @tool(
     name="read_knowledge_document",
-    description="""Read the full content of a specific knowledge base document.
+    description="""Read a knowledge base document - the whole file, or only the sections you need.
 
 Use this tool when:
 - User asks for complete details from a policy or procedure
-- Need to read the full document after finding it via search
+- Need to read the document after finding it via search
 - User asks "what does the [document name] say about..."
-- Need to reference the complete document content
+- Need to reference the document content
+
+For long documents, prefer reading less:
+- outline_only=true: see the heading outline first (cheap)
+- sections=["报销流程", "Installation"]: return only those sections (with subsections)
+- query="差旅报销标准": return the max_sections most relevant sections
 
-Returns: Full document content in markdown format with metadata.""",
+Returns: Document content in markdown format with metadata, outline and a token estimate.""",
     input_schema={
-        "path": str  # Relative path like 'policies/financial-reporting-standards.md'
+        "path": str,  # Relative path like 'policies/financial-reporting-standards.md'
+        "sections": list,  # Optional: heading titles to return
+        "query": str,  # Optional: return only the sections relevant to this question
+        "max_sections": int,  # Optional: sections returned in query mode (default: 3)
+        "outline_only": bool  # Optional: return only the heading outline (default: false)
     }
 )
 async def read_knowledge_document_tool(args):
-    """Read full knowledge base document"""
+    """Read a knowledge base document (full or selected sections)"""
     if not _campfire_tools:
         return {
             "content": [{
@@ -330,12 +346,21 @@ async def read_knowledge_document_tool(args):
     try:
         # Extract parameters
         path = args.get('path', '')
+        sections = args.get('sections') or None
+        if isinstance(sections, str):
+            sections = [part for part in sections.split('|') if part.strip()]
 
         # Call underlying implementation
-        doc = _campfire_tools.read_knowledge_document(path=path)
+        doc = _campfire_tools.read_knowledge_document(
+            path=path,
+            sections=sections,
+            query=args.get('query') or None,
+            max_sections=args.get('max_sections') or 3,
+            outline_only=bool(args.get('outline_only', False))
+        )
 
         # Format response
-        if not doc:
+        if not doc or not doc.get('success'):
             response_text = f"未找到文档：{path}"
         else:
             response_text = f"**{doc.get('title', 'Untitled')}**\n\n"
@@ -343,10 +368,18 @@ async def read_knowledge_document_tool(args):
             response_text += f"分类: {doc.get('category', 'N/A')}\n"
 
             # Add metadata if available
-            if doc.get('author'):
-                response_text += f"作者: {doc.get('author')}\n"
-            if doc.get('created_at'):
-                response_text += f"创建时间: {doc.get('created_at')}\n"
+            if doc.get('last_updated'):
+                response_text += f"更新: {doc.get('last_updated')}\n"
+            response_text += f"大小: {doc.get('size', 0)} 字节 | 本次返回约 {doc.get('token_estimate', 0)} tokens\n"
+
+            mode = doc.get('mode')
+            if mode in ('sections', 'query'):
+                response_text += f"返回章节: {', '.join(doc.get('sections', []))}\n"
+            elif (args.get('sections') or args.get('query')) and mode == 'full':
+                response_text += "（未找到匹配章节，返回全文）\n"
+
+            if mode == 'outline' or (mode != 'full' and doc.get('outline')):
+                response_text += "\n**目录:**\n" + "\n".join(doc.get('outline', [])) + "\n"
 
             response_text += "\n---\n\n"
 
@@ -354,7 +387,7 @@ async def read_knowledge_document_tool(args):
             content = doc.get('content', '')
             if content:
                 response_text += content
-            else:
+            elif mode != 'outline':
                 response_text += "（文档内容为空）"
 
         return {
@@ -431,6 +464,8 @@ async def list_knowledge_documents_tool(args):
                 for doc in cat_docs:
                     response_text += f"- {doc.get('title', 'Untitled')}\n"
                     response_text += f"  路径: {doc.get('path', 'N/A')}\n"
+                    if doc.get('last_updated'):
+                        response_text += f"  更新: {doc['last_updated']}\n"
                 response_text += "\n"
 
         return {
@@ -524,3 +559,110 @@ async def store_knowledge_document_tool(args):
         }
 
 
+
+
+@tool(
+    name="get_attachment_content",
+    description="""Get the pre-extracted text, tables and outline of an uploaded file.
+
+Supported formats: PDF, DOCX, PPTX, XLSX. Files uploaded to a room are
+extracted in the background as soon as the message arrives, so this is
+usually instant - prefer it over reading/converting the raw file yourself.
+
+Use this tool when:
+- User asks about the contents of an uploaded document, deck or spreadsheet
+- You need the slide titles / headings / sheet names of a file
+- You need table data from a document
+
+Identify the file by blob_key (shown in the room file list), or by filename + room_id.
+
+Returns: Extracted content for the requested part ('text', 'tables', 'outline' or 'all').""",
+    input_schema={
+        "blob_key": str,  # Blob key from the room file list
+        "filename": str,  # Optional: filename (used with room_id when blob_key unknown)
+        "room_id": int,  # Optional: room to look up filename in
+        "part": str,  # Optional: 'text', 'tables', 'outline', 'all' (default 'all')
+        "max_chars": int  # Optional: maximum characters to return (default 8000)
+    }
+)
+async def get_attachment_content_tool(args):
+    """Return pre-extracted attachment content"""
+    if not _campfire_tools:
+        return {
+            "content": [{
+                "type": "text",
+                "text": "错误：Campfire工具未初始化。请检查数据库连接。"
+            }]
+        }
+
+    try:
+        # Extract parameters
+        blob_key = args.get('blob_key')
+        filename = args.get('filename')
+        room_id = args.get('room_id')
+        part = args.get('part', 'all')
+        max_chars = args.get('max_chars', 8000)
+
+        # Resolve file info
+        file_info = None
+        if blob_key:
+            file_info = _campfire_tools.get_blob_info(blob_key)
+        elif filename and room_id:
+            for f in _campfire_tools.get_recent_room_files(room_id=room_id, limit=50):
+                if f['filename'] == filename:
+                    file_info = f
+                    break
+
+        if not file_info:
+            return {
+                "content": [{
+                    "type": "text",
+                    "text": f"未找到文件：{blob_key or filename}"
+                }]
+            }
+
+        # Cached result returns immediately; otherwise wait for the worker
+        extractor = get_attachment_extractor()
+        result = await asyncio.to_thread(extractor.extract, file_info, 30.0)
+
+        # Format response
+        if result is None:
+            response_text = f"无法提取文件内容：{file_info['filename']}（不支持的格式或提取超时）"
+        elif result.get('error'):
+            response_text = f"提取文件内容失败：{file_info['filename']}\n错误：{result['error']}"
+        else:
+            response_text = f"📄 **{file_info['filename']}** ({result.get('kind', '').upper()}, {result.get('char_count', 0)} 字符)\n\n"
+
+            if part in ('outline', 'all') and result.get('outline'):
+                response_text += "**结构:**\n"
+                for entry in result['outline']:
+                    response_text += f"- {entry}\n"
+                response_text += "\n"
+
+            if part == 'tables':
+                for table in result.get('tables', []):
+                    response_text += f"**{table['name']}**\n"
+                    for row in table['rows']:
+                        response_text += " | ".join(row) + "\n"
+                    response_text += "\n"
+            elif part in ('text', 'all'):
+                response_text += "**内容:**\n"
+                response_text += result.get('text', '')
+
+            if len(response_text) > max_chars:
+                response_text = response_text[:max_chars] + f"\n\n...（已截断，共 {result.get('char_count', 0)} 字符，可增大 max_chars）"
+
+        return {
+            "content": [{
+                "type": "text",
+                "text": response_text
+            }]
+        }
+
+    except Exception as e:
+        return {
+            "content": [{
+                "type": "text",
+                "text": f"读取附件内容失败：{str(e)}"
+            }]
+        }
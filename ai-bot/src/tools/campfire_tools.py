@@ -5,12 +5,24 @@ Provides consolidated tools for conversation search, user context, and knowledge
 
 import sqlite3
 import json
+import os
 import logging
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional, Any
 import re
 
+from src.tools.user_context_cache import UserContextCache
+from src.tools.memory_store import MEMORY_BUDGET_CHARS, MemoryStore
+from src.tools.briefing_catalog import SIDECAR_VERSION, BriefingCatalog, sidecar_path
+from src.tools.briefing_rollups import BriefingRollups
+from src.tools.kb_catalog import DocumentCatalog
+from src.tools.kb_index import KnowledgeBaseIndex
+from src.tools.kb_sections import SectionReader
+from src.tools.personal_store import STORE_FILENAME as PERSONAL_STORE_FILENAME, PersonalStore, parse_remind_time
+from src.tools.single_flight import SingleFlight, coalesce
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +43,17 @@ class CampfireTools:
         self.context_dir.mkdir(parents=True, exist_ok=True)
         self.knowledge_base_dir = Path(knowledge_base_dir)
         self._db_conn = None
+        self.user_context_cache = UserContextCache()
+        self.memory_store = MemoryStore()
+        self.kb_index = KnowledgeBaseIndex(self.knowledge_base_dir)
+        self.kb_catalog = DocumentCatalog(self.kb_index)
+        self.kb_sections = SectionReader(self.kb_catalog)
+        self.briefing_catalog = BriefingCatalog(self.knowledge_base_dir)
+        self.briefing_rollups = BriefingRollups(self.briefing_catalog, self._get_db_connection)
+        self._personal_store: Optional[PersonalStore] = None
+        self._personal_store_lock = threading.Lock()
+        # Identical concurrent searches (from worker threads) share one execution
+        self.single_flight = SingleFlight()
 
     def _get_db_connection(self) -> sqlite3.Connection:
         """Get read-only database connection"""
@@ -57,6 +80,7 @@ class CampfireTools:
         text = re.sub(r'\s+', ' ', text).strip()
         return text
 
+    @coalesce("search_conversations")
     def search_conversations(
         self,
         query: str,
@@ -127,16 +151,57 @@ class CampfireTools:
 
         return results
 
-    def get_user_context(self, user_id: int) -> Dict[str, Any]:
+    def get_user_context(
+        self,
+        user_id: int,
+        memory_query: Optional[str] = None,
+        memory_budget_chars: int = MEMORY_BUDGET_CHARS
+    ) -> Dict[str, Any]:
         """
         Get user context (from DB + saved JSON file)
 
+        Both parts are served from user_context_cache. The DB part is
+        revalidated against a cheap directory version probe, the JSON part
+        against the context file's mtime, so edits made elsewhere are
+        picked up on the next call.
+
+        conversation_memory is not returned whole: memory_store picks the
+        most recent/relevant memories that fit memory_budget_chars.
+
         Args:
             user_id: User ID
+            memory_query: Text to rank memories against (e.g. the current message)
+            memory_budget_chars: Character budget for returned memories
 
         Returns:
-            Dictionary with user info, rooms, preferences, expertise, etc.
+            Dictionary with user info, rooms, preferences, expertise,
+            conversation_memory (list of strings, oldest first) and
+            memory_total (stored entries)
         """
+        cache = self.user_context_cache
+
+        version = cache.directory_version(self._get_db_connection())
+        context = cache.get_db_part(
+            user_id, version, lambda: self._load_user_directory_context(user_id)
+        )
+
+        context_file = self.context_dir / f"user_{user_id}.json"
+        saved_context = cache.get_json_part(
+            user_id, cache.file_version(context_file),
+            lambda: self._load_saved_context(context_file)
+        )
+        context.update(saved_context)
+
+        if "conversation_memory" in context:
+            entries = self.memory_store.normalize(context["conversation_memory"], context.get("last_updated"))
+            selected = self.memory_store.select(entries, query=memory_query, budget_chars=memory_budget_chars)
+            context["conversation_memory"] = [entry["text"] for entry in selected]
+            context["memory_total"] = len(entries)
+
+        return context
+
+    def _load_user_directory_context(self, user_id: int) -> Dict[str, Any]:
+        """Query user info and room memberships from the Campfire DB"""
         conn = self._get_db_connection()
         cursor = conn.cursor()
 
@@ -179,19 +244,21 @@ class CampfireTools:
             })
 
         context["rooms"] = rooms
+        return context
 
-        # Load saved context from JSON file
-        context_file = self.context_dir / f"user_{user_id}.json"
-        if context_file.exists():
-            with open(context_file, 'r') as f:
-                saved_context = json.load(f)
+    def _load_saved_context(self, context_file: Path) -> Dict[str, Any]:
+        """Load the mergeable keys from a saved user context JSON file"""
+        if not context_file.exists():
+            return {}
 
-            # Merge saved context
-            for key in ["preferences", "expertise", "conversation_memory", "last_updated"]:
-                if key in saved_context:
-                    context[key] = saved_context[key]
+        with open(context_file, 'r', encoding='utf-8') as f:
+            saved_context = json.load(f)
 
-        return context
+        return {
+            key: saved_context[key]
+            for key in ["preferences", "expertise", "conversation_memory", "last_updated"]
+            if key in saved_context
+        }
 
     def save_user_context(
         self,
@@ -203,17 +270,21 @@ class CampfireTools:
         """
         Save user context to JSON file
 
+        New memories go through memory_store: near-duplicates are merged and
+        the list is compacted to its cap. The file is written compactly and
+        atomically (temp file + rename).
+
         Args:
             user_id: User ID
             preferences: User preferences dict
             expertise: List of expertise areas
-            conversation_memory: List of conversation memories
+            conversation_memory: List of conversation memories to add
         """
         context_file = self.context_dir / f"user_{user_id}.json"
 
         # Load existing context
         if context_file.exists():
-            with open(context_file, 'r') as f:
+            with open(context_file, 'r', encoding='utf-8') as f:
                 context = json.load(f)
         else:
             context = {
@@ -231,17 +302,20 @@ class CampfireTools:
             context["expertise"] = expertise
 
         if conversation_memory is not None:
-            # Append new memories
-            if "conversation_memory" not in context:
-                context["conversation_memory"] = []
-            context["conversation_memory"].extend(conversation_memory)
+            # Merge new memories into the bounded list
+            entries = self.memory_store.normalize(context.get("conversation_memory"), context.get("last_updated"))
+            context["conversation_memory"] = self.memory_store.add(entries, conversation_memory)
 
         # Update timestamp
         context["last_updated"] = datetime.now().isoformat()
 
         # Save to file
-        with open(context_file, 'w') as f:
-            json.dump(context, f, indent=2)
+        tmp_file = context_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(context, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_file, context_file)
+
+        self.user_context_cache.invalidate_user(user_id)
 
     def get_message_attachments(self, message_id: int, files_base_path: str = "/campfire-files") -> List[Dict[str, Any]]:
         """
@@ -357,10 +431,65 @@ class CampfireTools:
 
         return files
 
+    def get_blob_info(self, blob_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an uploaded file by its ActiveStorage blob key
+
+        Args:
+            blob_key: Blob key (as returned by get_recent_room_files)
+
+        Returns:
+            File dictionary with keys filename, content_type, byte_size, blob_key,
+            or None if no such blob exists
+        """
+        conn = self._get_db_connection()
+        row = conn.execute("""
+            SELECT filename, content_type, byte_size, key as blob_key
+            FROM active_storage_blobs
+            WHERE key = ?
+        """, (blob_key,)).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            "filename": row["filename"],
+            "content_type": row["content_type"],
+            "byte_size": row["byte_size"],
+            "blob_key": row["blob_key"]
+        }
+
     # ====================
     # Knowledge Base Methods
     # ====================
 
+    def load_knowledge_index(self) -> Dict[str, Any]:
+        """
+        Load the persisted knowledge base index (which also backs the document
+        catalog) and briefing catalog and reconcile them with disk.
+
+        Called once at startup; only files changed since the last snapshots
+        are re-read.
+
+        Returns:
+            Dict with documents, loaded_snapshot, reindexed, removed, elapsed_ms
+            (search index and document catalog) and briefings (briefing
+            catalog summary)
+        """
+        summary = self.kb_index.load_or_build()
+        summary["briefings"] = self.briefing_catalog.load_or_build()
+        return summary
+
+    def _index_kb_file(self, path: Path):
+        """Keep the KB index and catalogs current after this process writes a document"""
+        if self.kb_index.ready:
+            self.kb_index.update_file(path)
+            self.kb_index.save()
+        if self.briefing_catalog.ready:
+            self.briefing_catalog.update_file(path)
+            self.briefing_catalog.save()
+
+    @coalesce("search_knowledge_base")
     def search_knowledge_base(
         self,
         query: str,
@@ -368,11 +497,12 @@ class CampfireTools:
         max_results: int = 3
     ) -> List[Dict[str, Any]]:
         """
-        Search company knowledge base using keyword search (agentic approach).
+        Search company knowledge base using the inverted index (BM25 ranking).
 
-        Following Anthropic's recommendation: simple file system search is
-        often more effective than semantic/vector search for small-medium
-        knowledge bases.
+        Chinese text is matched by character bigrams and English by words, so
+        natural language questions match documents sharing any of their terms,
+        ranked by relevance. The index is built on first use if it was not
+        loaded at startup.
 
         Args:
             query: Search keywords or natural language question
@@ -380,215 +510,91 @@ class CampfireTools:
             max_results: Maximum number of results to return
 
         Returns:
-            List of result dicts with keys: path, title, excerpt, relevance_score
+            List of result dicts with keys: path, title, category, excerpt, relevance_score
         """
         if not self.knowledge_base_dir.exists():
             return []
 
-        # Determine search path based on category
-        if category and category != "all":
-            search_path = self.knowledge_base_dir / category
-            if not search_path.exists():
-                return []
-        else:
-            search_path = self.knowledge_base_dir
-
-        # Search for markdown files
-        results = []
-        query_lower = query.lower()
+        if not self.kb_index.ready:
+            self.load_knowledge_index()
 
-        for md_file in search_path.rglob("*.md"):
-            # Skip README files
-            if md_file.name == "README.md":
-                continue
+        return self.kb_index.search(query, category=category, max_results=max_results)
 
-            try:
-                content = md_file.read_text(encoding="utf-8")
-
-                # Check if query appears in content
-                if query_lower in content.lower():
-                    # Extract title (first H1 heading)
-                    title = "Untitled"
-                    for line in content.split("\n"):
-                        if line.startswith("# "):
-                            title = line[2:].strip()
-                            break
-
-                    # Find relevant excerpt (3 lines around first match)
-                    lines = content.split("\n")
-                    excerpt_lines = []
-                    relevance_score = 0
-
-                    for i, line in enumerate(lines):
-                        if query_lower in line.lower():
-                            # Count occurrences for relevance scoring
-                            relevance_score += line.lower().count(query_lower)
-
-                            # Extract context (1 line before, match line, 1 line after)
-                            start = max(0, i - 1)
-                            end = min(len(lines), i + 2)
-                            context = "\n".join(lines[start:end])
-
-                            if context not in excerpt_lines:
-                                excerpt_lines.append(context)
-
-                            # Only get first few matches
-                            if len(excerpt_lines) >= 2:
-                                break
-
-                    excerpt = "\n...\n".join(excerpt_lines)
-                    if not excerpt:
-                        # If no excerpt found, use first 200 chars
-                        excerpt = content[:200] + "..."
-
-                    # Get relative path from knowledge base root
-                    relative_path = md_file.relative_to(self.knowledge_base_dir)
-
-                    results.append({
-                        "path": str(relative_path),
-                        "title": title,
-                        "excerpt": excerpt,
-                        "relevance_score": relevance_score
-                    })
-
-            except Exception as e:
-                # Skip files that can't be read
-                continue
-
-        # Sort by relevance score (descending)
-        results.sort(key=lambda x: x["relevance_score"], reverse=True)
-
-        # Return top N results
-        return results[:max_results]
-
-    def read_knowledge_document(self, path: str) -> Dict[str, Any]:
+    def read_knowledge_document(
+        self,
+        path: str,
+        sections: Optional[List[str]] = None,
+        query: Optional[str] = None,
+        max_sections: int = 3,
+        outline_only: bool = False
+    ) -> Dict[str, Any]:
         """
-        Read full content of a knowledge base document.
+        Read a knowledge base document, or only the parts of it that are needed.
+
+        With no options the full document is returned. Otherwise the heading
+        outline from the document catalog is used to read just the requested
+        byte ranges from disk.
 
         Args:
             path: Relative path to document (e.g., 'policies/financial-reporting-standards.md')
+            sections: Optional heading titles to return (each with its subsections)
+            query: Optional question; returns the max_sections most relevant sections
+            max_sections: Section budget for query mode (default: 3)
+            outline_only: Return the heading outline without content
 
         Returns:
-            Dict with keys: path, title, content, last_updated, category, success
+            Dict with keys: path, title, content, last_updated, category, success,
+            mode ('full' | 'sections' | 'query' | 'outline'), sections, outline,
+            size, token_estimate
         """
-        doc_path = self.knowledge_base_dir / path
-
-        if not doc_path.exists():
+        try:
+            doc = self.kb_sections.read(
+                path,
+                sections=sections,
+                query=query,
+                max_sections=max_sections,
+                outline_only=outline_only
+            )
+        except Exception as e:
             return {
                 "success": False,
-                "error": f"Document not found: {path}",
+                "error": f"Error reading document: {str(e)}",
                 "path": path
             }
 
-        try:
-            content = doc_path.read_text(encoding="utf-8")
-
-            # Extract title (first H1 heading)
-            title = "Untitled"
-            for line in content.split("\n"):
-                if line.startswith("# "):
-                    title = line[2:].strip()
-                    break
-
-            # Extract last updated date if present
-            last_updated = None
-            for line in content.split("\n")[:20]:  # Check first 20 lines
-                if "Last Updated:" in line or "last updated:" in line.lower():
-                    # Extract date (format: YYYY-MM-DD)
-                    parts = line.split(":")
-                    if len(parts) >= 2:
-                        date_str = parts[1].strip().split()[0]  # Get first word after colon
-                        last_updated = date_str
-                    break
-
-            # Determine category from path
-            category = str(Path(path).parent) if "/" in path else "root"
-
-            return {
-                "success": True,
-                "path": path,
-                "title": title,
-                "content": content,
-                "last_updated": last_updated,
-                "category": category
-            }
-
-        except Exception as e:
+        if doc is None:
             return {
                 "success": False,
-                "error": f"Error reading document: {str(e)}",
+                "error": f"Document not found: {path}",
                 "path": path
             }
 
+        return {"success": True, "path": path, **doc}
+
     def list_knowledge_documents(
         self,
         category: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
-        List available knowledge base documents.
+        List available knowledge base documents from the document catalog.
+
+        The catalog is built on first use if it was not loaded at startup;
+        after that listing never touches the filesystem.
 
         Args:
             category: Optional category filter ('policies', 'procedures', 'technical', 'financial')
 
         Returns:
-            List of document metadata dicts with keys: path, title, category, last_updated
+            List of document metadata dicts with keys: path, title, category,
+            last_updated, size, outline
         """
         if not self.knowledge_base_dir.exists():
             return []
 
-        # Determine search path
-        if category and category != "all":
-            search_path = self.knowledge_base_dir / category
-            if not search_path.exists():
-                return []
-        else:
-            search_path = self.knowledge_base_dir
-
-        documents = []
-
-        for md_file in search_path.rglob("*.md"):
-            # Skip README files
-            if md_file.name == "README.md":
-                continue
-
-            try:
-                content = md_file.read_text(encoding="utf-8")
-
-                # Extract title
-                title = "Untitled"
-                for line in content.split("\n"):
-                    if line.startswith("# "):
-                        title = line[2:].strip()
-                        break
-
-                # Extract last updated
-                last_updated = None
-                for line in content.split("\n")[:20]:
-                    if "Last Updated:" in line or "last updated:" in line.lower():
-                        parts = line.split(":")
-                        if len(parts) >= 2:
-                            date_str = parts[1].strip().split()[0]
-                            last_updated = date_str
-                        break
-
-                # Get relative path and category
-                relative_path = md_file.relative_to(self.knowledge_base_dir)
-                doc_category = str(relative_path.parent) if "/" in str(relative_path) else "root"
-
-                documents.append({
-                    "path": str(relative_path),
-                    "title": title,
-                    "category": doc_category,
-                    "last_updated": last_updated
-                })
-
-            except Exception:
-                continue
+        if not self.kb_catalog.ready:
+            self.kb_catalog.load_or_build()
 
-        # Sort by category, then title
-        documents.sort(key=lambda x: (x["category"], x["title"]))
-
-        return documents
+        return self.kb_catalog.list_documents(category)
 
     def store_knowledge_document(
         self,
@@ -670,6 +676,7 @@ class CampfireTools:
 
         try:
             file_path.write_text(full_content, encoding="utf-8")
+            self._index_kb_file(file_path)
             logger.info(f"[KB] ✅ Document created: {normalized_category}/{filename} (original category: '{category}')")
 
             return {
@@ -724,14 +731,16 @@ class CampfireTools:
 
         # Format dates for database query
         date_str = target_date.strftime("%Y-%m-%d")
+        next_date_str = (target_date + timedelta(days=1)).strftime("%Y-%m-%d")
 
         # Get database connection
         conn = self._get_db_connection()
         cursor = conn.cursor()
 
         # Query 1: Get all messages for the day
-        # Use DATE() function to handle both ISO timestamps (2025-10-04T06:13:00.711524)
-        # and space-separated timestamps (2025-10-04 06:13:00)
+        # A [day, next day) range on the raw column matches both ISO timestamps
+        # (2025-10-04T06:13:00.711524) and space-separated ones (2025-10-04 06:13:00),
+        # and unlike DATE(created_at) = ? it can use an index on created_at
         sql = """
             SELECT
                 m.id as message_id,
@@ -746,10 +755,10 @@ class CampfireTools:
             JOIN users u ON m.creator_id = u.id
             LEFT JOIN action_text_rich_texts art
                 ON art.record_type = 'Message' AND art.record_id = m.id
-            WHERE DATE(m.created_at) = ?
+            WHERE m.created_at >= ? AND m.created_at < ?
         """
 
-        params = [date_str]
+        params = [date_str, next_date_str]
 
         # Add room filter if specified
         if room_ids:
@@ -808,9 +817,9 @@ class CampfireTools:
                     ON a.blob_id = b.id
                 JOIN rooms r ON m.room_id = r.id
                 JOIN users u ON m.creator_id = u.id
-                WHERE DATE(m.created_at) = ?
+                WHERE m.created_at >= ? AND m.created_at < ?
                 ORDER BY m.created_at
-            """, (date_str,))
+            """, (date_str, next_date_str))
 
             for row in cursor.fetchall():
                 files_list.append({
@@ -818,6 +827,7 @@ class CampfireTools:
                     "content_type": row["content_type"],
                     "byte_size": row["byte_size"],
                     "message_id": row["message_id"],
+                    "room_id": row["room_id"],
                     "room_name": row["room_name"],
                     "uploader_name": row["uploader_name"],
                     "created_at": row["created_at"]
@@ -839,10 +849,25 @@ class CampfireTools:
 
         briefing_filename = f"daily-briefing-{date_str}.md"
         briefing_path = briefing_dir / briefing_filename
-        briefing_path.write_text(briefing_content, encoding="utf-8")
-
         relative_path = f"briefings/{year}/{month}/{briefing_filename}"
 
+        # Structured sidecar first, so the briefing catalog sees both when the markdown appears
+        sidecar = self._briefing_sidecar(
+            date_str=date_str,
+            rooms_data=rooms_data,
+            files_list=files_list,
+            summary_length=summary_length,
+            room_ids=room_ids,
+            include_files=include_files,
+            briefing_path=relative_path
+        )
+        sidecar_path(briefing_path).write_text(
+            json.dumps(sidecar, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        briefing_path.write_text(briefing_content, encoding="utf-8")
+        self._index_kb_file(briefing_path)
+        self.briefing_rollups.invalidate_day(date_str)
+
         return {
             "success": True,
             "briefing_path": relative_path,
@@ -852,6 +877,84 @@ class CampfireTools:
             "rooms_covered": len(rooms_data)
         }
 
+    def _executive_summary(self, total_messages: int, rooms_count: int, file_count: int) -> str:
+        """Executive summary paragraph of a daily briefing (AI-friendly placeholder for now)"""
+        if total_messages == 0:
+            summary = "No significant activity recorded for this day.\n"
+        elif total_messages < 10:
+            summary = f"Light activity day with {total_messages} messages across {rooms_count} room(s). "
+        elif total_messages < 50:
+            summary = f"Moderate activity with {total_messages} messages across {rooms_count} room(s). "
+        else:
+            summary = f"Active day with {total_messages} messages across {rooms_count} room(s). "
+
+        if file_count:
+            summary += f"{file_count} file(s) were uploaded and discussed.\n"
+        return summary
+
+    def _briefing_sidecar(
+        self,
+        date_str: str,
+        rooms_data: Dict[int, Dict],
+        files_list: List[Dict],
+        summary_length: str,
+        room_ids: Optional[List[int]],
+        include_files: bool,
+        briefing_path: str
+    ) -> Dict[str, Any]:
+        """
+        Structured summary of a daily briefing, written next to the markdown
+        as daily-briefing-YYYY-MM-DD.json for the briefing catalog.
+        """
+        from datetime import datetime
+
+        total_messages = sum(len(r["messages"]) for r in rooms_data.values())
+        participant_counts: Dict[str, int] = {}
+        for room_data in rooms_data.values():
+            for msg in room_data["messages"]:
+                participant_counts[msg["creator_name"]] = participant_counts.get(msg["creator_name"], 0) + 1
+
+        rooms = [
+            {
+                "room_id": room_id,
+                "room_name": room_data["room_name"],
+                "message_count": len(room_data["messages"]),
+                "participants": sorted(room_data["participants"]),
+                "file_count": sum(1 for f in files_list if f["room_id"] == room_id),
+            }
+            for room_id, room_data in sorted(rooms_data.items(), key=lambda x: len(x[1]["messages"]), reverse=True)
+        ]
+
+        return {
+            "version": SIDECAR_VERSION,
+            "date": date_str,
+            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "summary_length": summary_length,
+            "room_filter": room_ids,
+            "include_files": include_files,
+            "briefing_path": briefing_path,
+            "message_count": total_messages,
+            "file_count": len(files_list),
+            "rooms_count": len(rooms_data),
+            "participants_count": len(participant_counts),
+            "rooms": rooms,
+            "participants": [
+                {"name": name, "message_count": count}
+                for name, count in sorted(participant_counts.items(), key=lambda x: x[1], reverse=True)
+            ],
+            "files": [
+                {
+                    "filename": f["filename"],
+                    "content_type": f["content_type"],
+                    "byte_size": f["byte_size"],
+                    "room_name": f["room_name"],
+                    "uploader_name": f["uploader_name"],
+                }
+                for f in files_list
+            ],
+            "executive_summary": self._executive_summary(total_messages, len(rooms_data), len(files_list)).strip(),
+        }
+
     def _format_briefing(
         self,
         date_str: str,
@@ -884,18 +987,7 @@ class CampfireTools:
 
 """
 
-        # Generate executive summary (AI-friendly placeholder for now)
-        if total_messages == 0:
-            content += "No significant activity recorded for this day.\n"
-        elif total_messages < 10:
-            content += f"Light activity day with {total_messages} messages across {len(rooms_data)} room(s). "
-        elif total_messages < 50:
-            content += f"Moderate activity with {total_messages} messages across {len(rooms_data)} room(s). "
-        else:
-            content += f"Active day with {total_messages} messages across {len(rooms_data)} room(s). "
-
-        if files_list:
-            content += f"{len(files_list)} file(s) were uploaded and discussed.\n"
+        content += self._executive_summary(total_messages, len(rooms_data), len(files_list))
 
         content += "\n---\n\n## By Room Activity\n\n"
 
@@ -978,6 +1070,7 @@ class CampfireTools:
 
         return content
 
+    @coalesce("search_briefings")
     def search_briefings(
         self,
         query: Optional[str] = None,
@@ -988,6 +1081,9 @@ class CampfireTools:
         """
         Search historical briefings by date range or keywords.
 
+        Served from the date-indexed briefing catalog (built on first use if it
+        was not loaded at startup); no briefing files are read per search.
+
         Args:
             query: Optional search keywords
             start_date: Optional start date (YYYY-MM-DD)
@@ -995,95 +1091,147 @@ class CampfireTools:
             max_results: Maximum results to return (default: 5)
 
         Returns:
-            List of briefing dicts with keys: path, date, excerpt, message_count
+            List of briefing dicts with keys: path, date, excerpt, message_count,
+            file_count, rooms_count, participants_count
         """
-        briefings_dir = self.knowledge_base_dir / "briefings"
-
-        if not briefings_dir.exists():
+        if not (self.knowledge_base_dir / "briefings").exists():
             return []
 
-        results = []
+        if not self.briefing_catalog.ready:
+            self.briefing_catalog.load_or_build()
+
+        return self.briefing_catalog.search(
+            query=query,
+            start_date=start_date,
+            end_date=end_date,
+            max_results=max_results
+        )
+
+    def summarize_briefing_range(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        range_name: Optional[str] = None,
+        period: str = "auto",
+        top_n: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Summarize Campfire activity over a week, month or any date range.
+
+        Built from per-day aggregates (briefing sidecars, else one grouped
+        database query for the missing days), with week/month rollups cached
+        until one of their days is regenerated.
+
+        Args:
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD), defaults to start_date or today
+            range_name: Instead of dates: "this_week", "last_week", "this_month",
+                        "last_month", "last_7_days" or "last_30_days"
+            period: Breakdown: "day", "week", "month" or "auto" (default)
+            top_n: Number of top rooms/participants (default: 5)
+
+        Returns:
+            Dict with keys: success, start_date, end_date, period, totals,
+            top_rooms, top_participants, periods, previous, change_pct
+        """
+        from datetime import datetime, timedelta
 
-        # Search all briefing markdown files
-        for md_file in briefings_dir.rglob("daily-briefing-*.md"):
+        today = datetime.now().date()
+        if range_name:
+            first_of_month = today.replace(day=1)
+            ranges = {
+                "this_week": (today - timedelta(days=today.weekday()), today),
+                "last_week": (today - timedelta(days=today.weekday() + 7), today - timedelta(days=today.weekday() + 1)),
+                "this_month": (first_of_month, today),
+                "last_month": ((first_of_month - timedelta(days=1)).replace(day=1), first_of_month - timedelta(days=1)),
+                "last_7_days": (today - timedelta(days=6), today),
+                "last_30_days": (today - timedelta(days=29), today),
+            }
+            if range_name not in ranges:
+                return {
+                    "success": False,
+                    "error": f"Unknown range: {range_name}. Use one of: {', '.join(ranges)}"
+                }
+            start, end = (d.isoformat() for d in ranges[range_name])
+        else:
+            start = start_date or today.isoformat()
+            end = end_date or (start_date and start) or today.isoformat()
             try:
-                # Extract date from filename
-                filename = md_file.name
-                if filename.startswith("daily-briefing-") and filename.endswith(".md"):
-                    date_str = filename.replace("daily-briefing-", "").replace(".md", "")
-
-                    # Filter by date range
-                    if start_date and date_str < start_date:
-                        continue
-                    if end_date and date_str > end_date:
-                        continue
-
-                    content = md_file.read_text(encoding="utf-8")
-
-                    # Filter by query keyword
-                    if query and query.lower() not in content.lower():
-                        continue
-
-                    # Extract metadata
-                    message_count = 0
-                    file_count = 0
-                    rooms_count = 0
-
-                    for line in content.split("\n")[:20]:
-                        if "Total Messages:" in line:
-                            try:
-                                message_count = int(line.split(":")[1].strip().split()[0])
-                            except:
-                                pass
-                        if "Files Uploaded:" in line:
-                            try:
-                                file_count = int(line.split(":")[1].strip().split()[0])
-                            except:
-                                pass
-                        if "Rooms Covered:" in line:
-                            try:
-                                rooms_count = int(line.split(":")[1].strip().split()[0])
-                            except:
-                                pass
-
-                    # Extract excerpt from executive summary
-                    excerpt = ""
-                    in_summary = False
-                    for line in content.split("\n"):
-                        if "## Executive Summary" in line:
-                            in_summary = True
-                            continue
-                        if in_summary:
-                            if line.startswith("##") or line.startswith("---"):
-                                break
-                            if line.strip():
-                                excerpt = line.strip()
-                                break
-
-                    # Get relative path
-                    relative_path = md_file.relative_to(self.knowledge_base_dir)
-
-                    results.append({
-                        "path": str(relative_path),
-                        "date": date_str,
-                        "excerpt": excerpt,
-                        "message_count": message_count,
-                        "file_count": file_count,
-                        "rooms_count": rooms_count
-                    })
-
-            except Exception:
-                continue
-
-        # Sort by date (most recent first)
-        results.sort(key=lambda x: x["date"], reverse=True)
-
-        return results[:max_results]
+                datetime.strptime(start, "%Y-%m-%d")
+                datetime.strptime(end, "%Y-%m-%d")
+            except ValueError:
+                return {
+                    "success": False,
+                    "error": f"Invalid date format: {start} / {end}. Use YYYY-MM-DD"
+                }
+
+        if not self.briefing_catalog.ready:
+            self.briefing_catalog.load_or_build()
+
+        summary = self.briefing_rollups.summarize(start, end, period=period, top_n=top_n)
+        return {"success": True, **summary}
+
+    def update_briefing_summary(self, date: str, executive_summary: str, model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Replace the executive summary of an existing daily briefing.
+
+        Used by the backfill script to swap the placeholder summary for a
+        model-written one; the markdown section and the sidecar are kept in sync.
+
+        Args:
+            date: Briefing date (YYYY-MM-DD)
+            executive_summary: New summary text
+            model: Model that wrote the summary (recorded in the sidecar)
+
+        Returns:
+            Dict with keys: success, briefing_path (or error)
+        """
+        relative_path = f"briefings/{date[:4]}/{date[5:7]}/daily-briefing-{date}.md"
+        briefing_path = self.knowledge_base_dir / relative_path
+        if not briefing_path.exists():
+            return {"success": False, "error": f"Briefing not found: {relative_path}"}
+
+        content = briefing_path.read_text(encoding="utf-8")
+        new_content, replaced = re.subn(
+            r"(## Executive Summary\n\n).*?(\n---\n)",
+            lambda m: m.group(1) + executive_summary.strip() + "\n" + m.group(2),
+            content,
+            count=1,
+            flags=re.DOTALL
+        )
+        if not replaced:
+            return {"success": False, "error": f"No executive summary section in {relative_path}"}
+
+        sidecar = sidecar_path(briefing_path)
+        if sidecar.exists():
+            data = json.loads(sidecar.read_text(encoding="utf-8"))
+            data["executive_summary"] = executive_summary.strip()
+            data["summary_model"] = model
+            sidecar.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        briefing_path.write_text(new_content, encoding="utf-8")
+        self._index_kb_file(briefing_path)
+
+        return {"success": True, "briefing_path": relative_path}
 
     # ====================
     # Personal Productivity Methods
     # ====================
 
+    @property
+    def personal_store(self) -> PersonalStore:
+        """Personal tasks/reminders/notes store (user_contexts/personal.db), opened on first use"""
+        if self._personal_store is None:
+            # Searches run in worker threads; open the store only once
+            with self._personal_store_lock:
+                if self._personal_store is None:
+                    self._personal_store = PersonalStore(self.context_dir / PERSONAL_STORE_FILENAME)
+        return self._personal_store
+
+    def _personal(self, user_id: int) -> PersonalStore:
+        """Personal store, with this user's legacy JSON/Markdown data imported on first use"""
+        self.personal_store.migrate_user(user_id, self.context_dir / f"user_{user_id}")
+        return self.personal_store
+
     def manage_personal_tasks(
         self,
         user_id: int,
@@ -1093,6 +1241,10 @@ class CampfireTools:
         """
         Manage personal tasks (create, list, complete, delete).
 
+        Backed by the personal SQLite store; each action is one indexed
+        query/transaction, so concurrent runs for the same user cannot
+        overwrite each other's changes.
+
         Args:
             user_id: User ID
             action: Action to perform ('create', 'list', 'complete', 'delete')
@@ -1102,23 +1254,9 @@ class CampfireTools:
                 - For list: {status} ('pending', 'completed', 'all')
 
         Returns:
-            Dict with keys: success, message, tasks (for list), task (for create)
+            Dict with keys: success, message, tasks (for list), task (for create/complete)
         """
-        # Ensure user directory exists
-        user_dir = self.context_dir / f"user_{user_id}"
-        user_dir.mkdir(parents=True, exist_ok=True)
-
-        tasks_file = user_dir / "tasks.json"
-
-        # Load existing tasks
-        if tasks_file.exists():
-            with open(tasks_file, 'r') as f:
-                all_tasks = json.load(f)
-        else:
-            all_tasks = {
-                "tasks": [],
-                "next_id": 1
-            }
+        store = self._personal(user_id)
 
         if action == "create":
             # Create new task
@@ -1128,23 +1266,13 @@ class CampfireTools:
                     "message": "Task title is required"
                 }
 
-            task = {
-                "id": all_tasks["next_id"],
-                "title": task_data["title"],
-                "description": task_data.get("description", ""),
-                "priority": task_data.get("priority", "medium"),
-                "due_date": task_data.get("due_date", None),
-                "status": "pending",
-                "created_at": datetime.now().isoformat(),
-                "completed_at": None
-            }
-
-            all_tasks["tasks"].append(task)
-            all_tasks["next_id"] += 1
-
-            # Save
-            with open(tasks_file, 'w') as f:
-                json.dump(all_tasks, f, indent=2)
+            task = store.create_task(
+                user_id,
+                title=task_data["title"],
+                description=task_data.get("description", ""),
+                priority=task_data.get("priority", "medium"),
+                due_date=task_data.get("due_date", None)
+            )
 
             return {
                 "success": True,
@@ -1155,16 +1283,12 @@ class CampfireTools:
         elif action == "list":
             # List tasks
             status_filter = task_data.get("status", "pending") if task_data else "pending"
-
-            if status_filter == "all":
-                filtered_tasks = all_tasks["tasks"]
-            else:
-                filtered_tasks = [t for t in all_tasks["tasks"] if t["status"] == status_filter]
+            tasks = store.list_tasks(user_id, status=status_filter)
 
             return {
                 "success": True,
-                "message": f"Found {len(filtered_tasks)} task(s)",
-                "tasks": filtered_tasks
+                "message": f"Found {len(tasks)} task(s)",
+                "tasks": tasks
             }
 
         elif action == "complete":
@@ -1176,28 +1300,18 @@ class CampfireTools:
                 }
 
             task_id = task_data["task_id"]
-            task_found = False
+            task = store.complete_task(user_id, task_id)
 
-            for task in all_tasks["tasks"]:
-                if task["id"] == task_id:
-                    task["status"] = "completed"
-                    task["completed_at"] = datetime.now().isoformat()
-                    task_found = True
-                    break
-
-            if not task_found:
+            if task is None:
                 return {
                     "success": False,
                     "message": f"Task #{task_id} not found"
                 }
 
-            # Save
-            with open(tasks_file, 'w') as f:
-                json.dump(all_tasks, f, indent=2)
-
             return {
                 "success": True,
-                "message": f"Task #{task_id} marked as completed"
+                "message": f"Task #{task_id} marked as completed",
+                "task": task
             }
 
         elif action == "delete":
@@ -1209,19 +1323,12 @@ class CampfireTools:
                 }
 
             task_id = task_data["task_id"]
-            initial_count = len(all_tasks["tasks"])
-            all_tasks["tasks"] = [t for t in all_tasks["tasks"] if t["id"] != task_id]
-
-            if len(all_tasks["tasks"]) == initial_count:
+            if not store.delete_task(user_id, task_id):
                 return {
                     "success": False,
                     "message": f"Task #{task_id} not found"
                 }
 
-            # Save
-            with open(tasks_file, 'w') as f:
-                json.dump(all_tasks, f, indent=2)
-
             return {
                 "success": True,
                 "message": f"Task #{task_id} deleted successfully"
@@ -1237,7 +1344,8 @@ class CampfireTools:
         self,
         user_id: int,
         reminder_text: str,
-        remind_at: str
+        remind_at: str,
+        room_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Set a personal reminder.
@@ -1246,47 +1354,27 @@ class CampfireTools:
             user_id: User ID
             reminder_text: Reminder content
             remind_at: When to remind (YYYY-MM-DD HH:MM or natural language)
+            room_id: Room to deliver the reminder to (scheduler default if None)
 
         Returns:
-            Dict with keys: success, message, reminder
+            Dict with keys: success, message, reminder (due_at is the absolute
+            delivery time; relative phrases are resolved against now)
         """
-        # Ensure user directory exists
-        user_dir = self.context_dir / f"user_{user_id}"
-        user_dir.mkdir(parents=True, exist_ok=True)
-
-        reminders_file = user_dir / "reminders.json"
-
-        # Load existing reminders
-        if reminders_file.exists():
-            with open(reminders_file, 'r') as f:
-                all_reminders = json.load(f)
-        else:
-            all_reminders = {
-                "reminders": [],
-                "next_id": 1
+        due_at = parse_remind_time(remind_at)
+        if due_at is None:
+            return {
+                "success": False,
+                "error": f"Could not understand reminder time: {remind_at}. Use YYYY-MM-DD HH:MM",
+                "remind_at": remind_at
             }
 
-        # Parse remind_at (basic parsing, can be enhanced)
-        # For now, store as-is and note it's a placeholder for actual scheduling
-        reminder = {
-            "id": all_reminders["next_id"],
-            "text": reminder_text,
-            "remind_at": remind_at,
-            "status": "pending",
-            "created_at": datetime.now().isoformat(),
-            "triggered_at": None
-        }
-
-        all_reminders["reminders"].append(reminder)
-        all_reminders["next_id"] += 1
-
-        # Save
-        with open(reminders_file, 'w') as f:
-            json.dump(all_reminders, f, indent=2)
+        reminder = self._personal(user_id).create_reminder(
+            user_id, text=reminder_text, remind_at=remind_at, room_id=room_id, due_at=due_at
+        )
 
         return {
             "success": True,
-            "message": f"Reminder #{reminder['id']} set for {remind_at}",
+            "message": f"Reminder #{reminder['id']} set for {reminder['due_at']}",
             "reminder": reminder,
             "note": "✅ Reminder will be automatically delivered at the scheduled time (v0.5.1)"
         }
@@ -1306,50 +1394,17 @@ class CampfireTools:
             content: Note content (supports Markdown)
 
         Returns:
-            Dict with keys: success, message, note_path
+            Dict with keys: success, message, note_id, title, created_at
         """
-        # Ensure user notes directory exists
-        user_dir = self.context_dir / f"user_{user_id}"
-        notes_dir = user_dir / "notes"
-        notes_dir.mkdir(parents=True, exist_ok=True)
-
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
-        # Clean title for filename
-        clean_title = re.sub(r'[^\w\s-]', '', title)
-        clean_title = re.sub(r'[-\s]+', '-', clean_title).strip('-')
-        filename = f"{timestamp}_{clean_title[:30]}.md"
-
-        note_path = notes_dir / filename
-
-        # Create note content
-        note_content = f"""# {title}
-
-**Created:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-**User:** user_{user_id}
-
----
-
-{content}
-
----
-
-**Tags:** #personal-note #{datetime.now().strftime("%Y-%m")}
-"""
-
-        # Save note
-        note_path.write_text(note_content, encoding="utf-8")
-
-        relative_path = f"user_{user_id}/notes/{filename}"
+        note = self._personal(user_id).add_note(user_id, title=title, content=content)
 
         return {
             "success": True,
             "message": f"Note saved successfully",
-            "note_path": relative_path,
-            "title": title,
-            "created_at": datetime.now().isoformat()
+            **note
         }
 
+    @coalesce("search_personal_notes")
     def search_personal_notes(
         self,
         user_id: int,
@@ -1359,72 +1414,36 @@ class CampfireTools:
         """
         Search user's personal notes.
 
+        Uses the store's full-text index (every query term must match the
+        title or body); without a query, lists the most recent notes.
+
         Args:
             user_id: User ID
             query: Optional search keywords (if None, list all notes)
             max_results: Maximum results to return
 
         Returns:
-            List of note dicts with keys: path, title, excerpt, created_at
+            List of note dicts with keys: note_id, path, title, excerpt, created_at
         """
-        user_dir = self.context_dir / f"user_{user_id}"
-        notes_dir = user_dir / "notes"
+        return self._personal(user_id).search_notes(user_id, query=query, max_results=max_results)
 
-        if not notes_dir.exists():
-            return []
-
-        results = []
-
-        for note_file in notes_dir.glob("*.md"):
-            try:
-                content = note_file.read_text(encoding="utf-8")
-
-                # If query provided, filter by keyword
-                if query and query.lower() not in content.lower():
-                    continue
-
-                # Extract title (first H1 heading)
-                title = "Untitled"
-                for line in content.split("\n"):
-                    if line.startswith("# "):
-                        title = line[2:].strip()
-                        break
-
-                # Extract created date
-                created_at = None
-                for line in content.split("\n")[:10]:
-                    if "**Created:**" in line:
-                        created_at = line.split("**Created:**")[1].strip()
-                        break
-
-                # Extract excerpt (first paragraph after metadata)
-                lines = content.split("\n")
-                excerpt = ""
-                in_content = False
-                for line in lines:
-                    if line.startswith("---") and in_content:
-                        break
-                    if in_content and line.strip() and not line.startswith("#") and not line.startswith("**"):
-                        excerpt = line.strip()[:200]
-                        break
-                    if line.startswith("---"):
-                        in_content = True
-
-                results.append({
-                    "path": f"user_{user_id}/notes/{note_file.name}",
-                    "title": title,
-                    "excerpt": excerpt,
-                    "created_at": created_at,
-                    "filename": note_file.name
-                })
-
-            except Exception:
-                continue
-
-        # Sort by creation time (most recent first)
-        results.sort(key=lambda x: x["filename"], reverse=True)
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics for the in-memory caches held by this instance
 
-        return results[:max_results]
+        Returns:
+            Dictionary keyed by cache name with each cache's stats
+        """
+        return {
+            "user_context": self.user_context_cache.stats(),
+            "conversation_memory": self.memory_store.stats(),
+            "kb_index": self.kb_index.stats(),
+            "kb_catalog": self.kb_catalog.stats(),
+            "kb_sections": self.kb_sections.stats(),
+            "briefing_catalog": self.briefing_catalog.stats(),
+            "briefing_rollups": self.briefing_rollups.stats(),
+            "personal_store": self._personal_store.stats() if self._personal_store else None
+        }
 
     def __del__(self):
         """Close database connection on cleanup"""
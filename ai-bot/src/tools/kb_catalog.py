@@ -0,0 +1,140 @@
+"""
+Knowledge Base Catalog - Cached document metadata for list_knowledge_documents
+
+list_knowledge_documents used to read every markdown file on each call just
+to find the H1 title and the "Last Updated" line. The catalog serves that
+metadata from the KnowledgeBaseIndex's per-document records, together with
+size and a heading outline (with byte offsets, so sections can be read
+without loading the whole file):
+
+- The index parses each document once when it (re)indexes it, and its
+  snapshot and (mtime_ns, size) revalidation cover the catalog too - there
+  is no second snapshot or refresh path to drift apart
+- Listing is an in-memory filter; results per category are memoized until
+  the index changes
+"""
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .kb_index import KnowledgeBaseIndex
+
+
+class DocumentCatalog:
+    """
+    Thread-safe document listing over a KnowledgeBaseIndex.
+
+    Entries are keyed by path relative to the KB root and hold path, title,
+    category, last_updated, size, mtime_ns and outline.
+    """
+
+    def __init__(self, index: KnowledgeBaseIndex):
+        """
+        Initialize document catalog.
+
+        Args:
+            index: Knowledge base index whose document records back the catalog
+        """
+        self.index = index
+        self.kb_dir = index.kb_dir
+
+        self._listings: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        self._listings_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stats = {"lists": 0, "listing_cache_hits": 0}
+
+    @property
+    def ready(self) -> bool:
+        """True once the index has been loaded or built"""
+        return self.index.ready
+
+    def update_file(self, path) -> bool:
+        """
+        (Re)index a single markdown file, or drop it if it no longer exists.
+
+        Args:
+            path: Absolute path, or path relative to the KB root
+
+        Returns:
+            True if the index changed
+        """
+        return self.index.update_file(path)
+
+    def load_or_build(self) -> Dict[str, Any]:
+        """
+        Load and reconcile the underlying index (see KnowledgeBaseIndex.load_or_build).
+
+        Returns:
+            Dict with documents, loaded_snapshot, reindexed, removed, elapsed_ms
+        """
+        return self.index.load_or_build()
+
+    # ---------- queries ----------
+
+    def list_documents(self, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List catalogued documents, sorted by category then title.
+
+        Args:
+            category: Optional category (directory, including subdirectories);
+                      'all' or None for everything
+
+        Returns:
+            List of dicts with keys: path, title, category, last_updated, size,
+            outline (heading titles prefixed with '#' per level). The dicts are
+            shared between calls and must not be modified.
+        """
+        key = None if not category or category == "all" else category.strip("/")
+        with self._lock:
+            self._stats["lists"] += 1
+            if self._listings_version != self.index.version:
+                self._listings = {}
+                self._listings_version = self.index.version
+            listing = self._listings.get(key)
+            if listing is not None:
+                self._stats["listing_cache_hits"] += 1
+                return list(listing)
+
+            prefix = key + "/" if key else ""
+            listing = [
+                {
+                    "path": rel,
+                    "title": doc["title"],
+                    "category": doc["category"],
+                    "last_updated": doc["last_updated"],
+                    "size": doc["size"],
+                    "outline": [f"{'#' * h['level']} {h['title']}" for h in doc["outline"]],
+                }
+                for rel, doc in self.index.documents().items()
+                if rel.startswith(prefix)
+            ]
+            listing.sort(key=lambda doc: (doc["category"], doc["title"]))
+            self._listings[key] = listing
+            return list(listing)
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the full catalog entry (including outline byte offsets) for a document.
+
+        Args:
+            path: Path relative to the KB root
+
+        Returns:
+            Copy of the entry, or None if not catalogued
+        """
+        return self.index.document(Path(path).as_posix())
+
+    def stats(self) -> dict:
+        """
+        Get catalog statistics.
+
+        Returns:
+            Dict with document count and listing cache counters
+        """
+        with self._lock:
+            return {
+                "ready": self.index.ready,
+                "documents": self.index.stats()["documents"],
+                **self._stats,
+            }
@@ -0,0 +1,575 @@
+"""
+Knowledge Base Index - Persistent inverted index with BM25 ranking
+
+search_knowledge_base used to rglob and read every markdown file on every
+query. This module keeps an inverted index over knowledge_base_dir instead:
+
+- Tokenization: CJK text is split into overlapping character bigrams (the
+  usual approach for Chinese without a segmenter), Latin text into
+  lowercase alphanumeric words.
+- Ranking: Okapi BM25 (k1=1.2, b=0.75).
+- Category filter: path prefix, matching the old directory-scoped search.
+- Snippets: only the top results are read back from disk, with matched
+  query terms highlighted.
+- Persistence: the index is saved as a JSON snapshot next to the documents
+  and revalidated at startup by (mtime_ns, size), so only changed files are
+  re-read.
+- Document records also hold the catalog metadata (title, Last Updated
+  date, heading outline with byte offsets) that DocumentCatalog lists, so
+  one snapshot and one refresh path serve search, listing and section reads.
+"""
+
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_FILENAME = ".kb_index.json"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_CJK = r"\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"([{_CJK}]+)|([a-z0-9]+)")
+_CJK_CHAR_RE = re.compile(rf"[{_CJK}]")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_LAST_UPDATED_RE = re.compile(r"last updated\s*:\s*[*_]*\s*(\S+)", re.IGNORECASE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms.
+
+    CJK runs become overlapping bigrams ("财务报表" -> 财务, 务报, 报表); a
+    single isolated CJK character is kept as a unigram. Latin/digit runs
+    become lowercase words.
+
+    Args:
+        text: Input text
+
+    Returns:
+        List of terms (with repetitions, in order)
+    """
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        cjk, word = match.groups()
+        if cjk:
+            if len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+        elif len(word) <= 64:
+            tokens.append(word)
+    return tokens
+
+
+def query_phrases(query: str) -> List[str]:
+    """Return the CJK runs and Latin words of a query (used for highlighting)"""
+    return [cjk or word for cjk, word in _TOKEN_RE.findall(query.lower())]
+
+
+def term_variants(term: str, vocabulary: Iterable[str]) -> List[str]:
+    """
+    Map a lone CJK character query term onto the bigrams that contain it.
+
+    Documents are indexed by bigrams, so a one-character query such as
+    "税" would otherwise only match isolated occurrences.
+
+    Args:
+        term: Query term from tokenize()
+        vocabulary: Indexed terms
+
+    Returns:
+        The term itself plus, for a single CJK character, every indexed term containing it
+    """
+    if len(term) == 1 and _CJK_CHAR_RE.match(term):
+        return [term] + [t for t in vocabulary if term in t and t != term]
+    return [term]
+
+
+def parse_document(content: str) -> Dict[str, Any]:
+    """
+    Extract catalog metadata from markdown text.
+
+    Headings inside fenced code blocks are ignored. Outline offsets are byte
+    offsets (UTF-8) of the start of each heading line, so content must be
+    decoded without newline translation.
+
+    Args:
+        content: Markdown document text
+
+    Returns:
+        Dict with title, last_updated and outline (list of {level, title, offset})
+    """
+    title = None
+    last_updated = None
+    outline = []
+    offset = 0
+    in_fence = False
+
+    for line_number, line in enumerate(content.split("\n")):
+        stripped = line.strip()
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = _HEADING_RE.match(line)
+            if match:
+                level = len(match.group(1))
+                heading = match.group(2).strip()
+                outline.append({"level": level, "title": heading, "offset": offset})
+                if title is None and level == 1:
+                    title = heading
+            if last_updated is None and line_number < 20:
+                updated = _LAST_UPDATED_RE.search(line)
+                if updated:
+                    last_updated = updated.group(1).strip("*_")
+        offset += len(line.encode("utf-8")) + 1
+
+    return {"title": title or "Untitled", "last_updated": last_updated, "outline": outline}
+
+
+def category_for(relative_path: str) -> str:
+    """Category of a document: its parent directory relative to the KB root"""
+    parent = str(Path(relative_path).parent)
+    return "root" if parent == "." else parent
+
+
+class KnowledgeBaseIndex:
+    """
+    Thread-safe inverted index over the markdown files of a knowledge base.
+
+    Documents are keyed by their path relative to the KB root. Each document
+    entry stores title, category, last_updated, outline, size, mtime_ns,
+    length and its distinct terms, so updating or removing a single file
+    touches only that file's postings.
+    """
+
+    def __init__(self, kb_dir, snapshot_path=None):
+        """
+        Initialize knowledge base index.
+
+        Args:
+            kb_dir: Knowledge base root directory
+            snapshot_path: JSON snapshot location (default: <kb_dir>/.kb_index.json)
+        """
+        self.kb_dir = Path(kb_dir)
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else self.kb_dir / SNAPSHOT_FILENAME
+
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+        self._ready = False
+        self._dirty = False
+        self._version = 0
+
+        self._stats = {"searches": 0, "search_ms_total": 0.0, "files_indexed": 0, "files_removed": 0}
+
+    @property
+    def ready(self) -> bool:
+        """True once the index has been loaded or built"""
+        return self._ready
+
+    @property
+    def version(self) -> int:
+        """Counter bumped on every change to the indexed documents"""
+        return self._version
+
+    # ---------- document indexing ----------
+
+    def _iter_files(self) -> Iterable[Path]:
+        if not self.kb_dir.exists():
+            return []
+        return (p for p in self.kb_dir.rglob("*.md") if p.name != "README.md")
+
+    def _relative(self, path: Path) -> str:
+        return path.relative_to(self.kb_dir).as_posix()
+
+    def _add(self, rel: str, content: str, st: os.stat_result):
+        terms = tokenize(content)
+        tf: Dict[str, int] = {}
+        for term in terms:
+            tf[term] = tf.get(term, 0) + 1
+
+        for term, count in tf.items():
+            self._postings.setdefault(term, {})[rel] = count
+
+        parsed = parse_document(content)
+        self._docs[rel] = {
+            "title": parsed["title"],
+            "category": category_for(rel),
+            "last_updated": parsed["last_updated"],
+            "outline": parsed["outline"],
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "length": len(terms),
+            "terms": list(tf),
+        }
+        self._total_length += len(terms)
+        self._version += 1
+
+    def _remove(self, rel: str) -> bool:
+        doc = self._docs.pop(rel, None)
+        if doc is None:
+            return False
+        for term in doc["terms"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(rel, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= doc["length"]
+        self._version += 1
+        return True
+
+    def update_file(self, path) -> bool:
+        """
+        (Re)index a single markdown file, or drop it if it no longer exists.
+
+        Args:
+            path: Absolute path, or path relative to the KB root
+
+        Returns:
+            True if the index changed
+        """
+        path = Path(path)
+        if not path.is_absolute():
+            path = self.kb_dir / path
+        try:
+            rel = self._relative(path)
+        except ValueError:
+            return False
+        if path.suffix != ".md" or path.name == "README.md":
+            return False
+
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return self.remove_file(rel)
+
+        with self._lock:
+            doc = self._docs.get(rel)
+            if doc and doc["mtime_ns"] == st.st_mtime_ns and doc["size"] == st.st_size:
+                return False
+
+        try:
+            # Decode the raw bytes (no newline translation): outline offsets must match CRLF files on disk
+            content = path.read_bytes().decode("utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"[KB Index] Skipping unreadable file {rel}: {e}")
+            return False
+
+        with self._lock:
+            self._remove(rel)
+            self._add(rel, content, st)
+            self._dirty = True
+            self._stats["files_indexed"] += 1
+        return True
+
+    def remove_file(self, path) -> bool:
+        """
+        Drop a document from the index.
+
+        Args:
+            path: Path relative to the KB root (or absolute path inside it)
+
+        Returns:
+            True if the document was indexed
+        """
+        rel = str(path)
+        if Path(rel).is_absolute():
+            try:
+                rel = self._relative(Path(rel))
+            except ValueError:
+                return False
+        with self._lock:
+            removed = self._remove(rel)
+            if removed:
+                self._dirty = True
+                self._stats["files_removed"] += 1
+        return removed
+
+    def remove_prefix(self, prefix: str) -> int:
+        """Drop every document under a directory (relative prefix)"""
+        prefix = prefix.rstrip("/") + "/"
+        with self._lock:
+            doomed = [rel for rel in self._docs if rel.startswith(prefix)]
+            for rel in doomed:
+                self.remove_file(rel)
+        return len(doomed)
+
+    # ---------- build / refresh / persistence ----------
+
+    def scan_changes(self) -> Tuple[List[str], List[str]]:
+        """
+        Compare the filesystem with the index using stat() only.
+
+        Returns:
+            Tuple of (relative paths new or modified on disk, relative paths
+            indexed but no longer on disk)
+        """
+        seen = set()
+        changed = []
+        for path in self._iter_files():
+            rel = self._relative(path)
+            seen.add(rel)
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            with self._lock:
+                doc = self._docs.get(rel)
+            if not doc or doc["mtime_ns"] != st.st_mtime_ns or doc["size"] != st.st_size:
+                changed.append(rel)
+
+        with self._lock:
+            stale = [rel for rel in self._docs if rel not in seen]
+        return changed, stale
+
+    def refresh(self) -> Tuple[int, int]:
+        """
+        Reconcile the index with the filesystem using stat() only.
+
+        Files whose (mtime_ns, size) changed are re-read; deleted files are
+        dropped. Unchanged files are never opened.
+
+        Returns:
+            Tuple of (files reindexed, files removed)
+        """
+        changed, stale = self.scan_changes()
+        reindexed = sum(1 for rel in changed if self.update_file(rel))
+        for rel in stale:
+            self.remove_file(rel)
+
+        with self._lock:
+            self._ready = True
+        return reindexed, len(stale)
+
+    def load(self) -> bool:
+        """
+        Load the JSON snapshot if it exists and matches this KB.
+
+        Returns:
+            True if a snapshot was loaded
+        """
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"[KB Index] Ignoring unreadable snapshot {self.snapshot_path}: {e}")
+            return False
+
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return False
+
+        with self._lock:
+            self._docs = snapshot["docs"]
+            self._postings = snapshot["postings"]
+            self._total_length = sum(doc["length"] for doc in self._docs.values())
+            self._dirty = False
+            self._version += 1
+        return True
+
+    def save(self) -> bool:
+        """
+        Write the index snapshot atomically (no-op when unchanged).
+
+        Returns:
+            True if a snapshot was written
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            payload = json.dumps(
+                {"version": SNAPSHOT_VERSION, "docs": self._docs, "postings": self._postings},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            self._dirty = False
+
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            tmp_path.write_text(payload, encoding="utf-8")
+            os.replace(tmp_path, self.snapshot_path)
+            return True
+        except OSError as e:
+            logger.warning(f"[KB Index] Could not persist snapshot {self.snapshot_path}: {e}")
+            with self._lock:
+                self._dirty = True
+            return False
+
+    def load_or_build(self) -> Dict[str, Any]:
+        """
+        Load the snapshot (if any), reconcile it with disk and persist changes.
+
+        Returns:
+            Dict with documents, loaded_snapshot, reindexed, removed, elapsed_ms
+        """
+        started = time.perf_counter()
+        loaded = self.load()
+        reindexed, removed = self.refresh()
+        self.save()
+        summary = {
+            "documents": len(self._docs),
+            "loaded_snapshot": loaded,
+            "reindexed": reindexed,
+            "removed": removed,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        logger.info(f"[KB Index] Ready: {summary}")
+        return summary
+
+    # ---------- search ----------
+
+    def search(self, query: str, category: Optional[str] = None, max_results: int = 3) -> List[Dict[str, Any]]:
+        """
+        Rank documents for a query with BM25.
+
+        Args:
+            query: Search keywords or natural language question
+            category: Optional category (directory) filter; 'all' or None for everything
+            max_results: Maximum number of results
+
+        Returns:
+            List of dicts with keys: path, title, category, excerpt, relevance_score
+        """
+        started = time.perf_counter()
+        terms = set(tokenize(query))
+        prefix = None if not category or category == "all" else category.strip("/") + "/"
+
+        with self._lock:
+            n_docs = len(self._docs)
+            if not terms or not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+
+            docs = self._docs
+            k1_plus = BM25_K1 + 1
+            length_scale = BM25_K1 * BM25_B / avg_length
+            length_base = BM25_K1 * (1 - BM25_B)
+            scores: Dict[str, float] = {}
+            for term in self._expand(terms):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for rel, tf in postings.items():
+                    if prefix and not rel.startswith(prefix):
+                        continue
+                    norm = tf + length_base + length_scale * docs[rel]["length"]
+                    scores[rel] = scores.get(rel, 0.0) + idf * tf * k1_plus / norm
+
+            top = heapq.nsmallest(max_results, scores.items(), key=lambda item: (-item[1], item[0]))
+            hits = [(rel, score, docs[rel]["title"], docs[rel]["category"]) for rel, score in top]
+
+        phrases = query_phrases(query)
+        results = []
+        for rel, score, title, doc_category in hits:
+            results.append({
+                "path": rel,
+                "title": title,
+                "category": doc_category,
+                "excerpt": self._snippet(rel, phrases),
+                "relevance_score": round(score, 3),
+            })
+
+        with self._lock:
+            self._stats["searches"] += 1
+            self._stats["search_ms_total"] += (time.perf_counter() - started) * 1000
+        return results
+
+    def _expand(self, terms) -> set:
+        """Expand query terms against the index vocabulary (see term_variants)"""
+        expanded = set()
+        for term in terms:
+            expanded.update(term_variants(term, self._postings))
+        return expanded
+
+    def _snippet(self, rel: str, phrases: List[str], max_excerpts: int = 2) -> str:
+        """Excerpt up to two matching passages (1 line of context) with highlights"""
+        try:
+            lines = (self.kb_dir / rel).read_text(encoding="utf-8").split("\n")
+        except (OSError, UnicodeDecodeError):
+            return ""
+
+        pattern = None
+        if phrases:
+            pattern = re.compile("|".join(re.escape(p) for p in sorted(set(phrases), key=len, reverse=True)), re.IGNORECASE)
+
+        excerpts, used = [], set()
+        if pattern:
+            for i, line in enumerate(lines):
+                if i in used or not pattern.search(line):
+                    continue
+                window = range(max(0, i - 1), min(len(lines), i + 2))
+                used.update(window)
+                excerpts.append("\n".join(pattern.sub(lambda m: f"**{m.group(0)}**", lines[j]) for j in window))
+                if len(excerpts) >= max_excerpts:
+                    break
+
+        if not excerpts:
+            # Matched only on bigrams spanning words; fall back to the opening
+            return "\n".join(lines)[:200] + "..."
+        return "\n...\n".join(excerpts)
+
+    # ---------- introspection ----------
+
+    def documents(self) -> Dict[str, Dict[str, Any]]:
+        """Return a copy of the per-document metadata (without term lists)"""
+        with self._lock:
+            return {
+                rel: {k: v for k, v in doc.items() if k != "terms"}
+                for rel, doc in self._docs.items()
+            }
+
+    def document(self, rel: str) -> Optional[Dict[str, Any]]:
+        """
+        Get one document's metadata (without term list).
+
+        Args:
+            rel: Path relative to the KB root
+
+        Returns:
+            Copy of the record with path added, or None if not indexed
+        """
+        with self._lock:
+            doc = self._docs.get(Path(rel).as_posix())
+            if doc is None:
+                return None
+            return {
+                **{k: v for k, v in doc.items() if k != "terms"},
+                "path": Path(rel).as_posix(),
+                "outline": [dict(h) for h in doc["outline"]],
+            }
+
+    def stats(self) -> dict:
+        """
+        Get index statistics.
+
+        Returns:
+            Dict with document/term counts and search latency
+        """
+        with self._lock:
+            searches = self._stats["searches"]
+            return {
+                "ready": self._ready,
+                "documents": len(self._docs),
+                "terms": len(self._postings),
+                "searches": searches,
+                "avg_search_ms": round(self._stats["search_ms_total"] / searches, 3) if searches else 0.0,
+                "files_indexed": self._stats["files_indexed"],
+                "files_removed": self._stats["files_removed"],
+                "snapshot_path": str(self.snapshot_path),
+            }
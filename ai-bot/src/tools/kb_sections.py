@@ -0,0 +1,359 @@
+"""
+Knowledge Base Sections - Section-addressable document reads
+
+read_knowledge_document used to return whole files, so long policies and
+tutorials inflated every follow-up turn. Using the heading outline kept in
+the index records and served by DocumentCatalog (byte offsets per heading),
+this module reads only what is asked for:
+
+- Named sections: a heading and everything below it up to the next heading
+  of the same or higher level
+- Query mode: the top-k sections ranked by BM25 over each section's own
+  text, returned in document order
+- Byte-range reads from disk; files above MMAP_THRESHOLD_BYTES are
+  memory-mapped instead of loaded fully
+- Every read reports a token estimate of what it returns
+"""
+
+import logging
+import math
+import mmap
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .kb_catalog import DocumentCatalog
+from .kb_index import BM25_B, BM25_K1, category_for, parse_document, tokenize
+
+logger = logging.getLogger(__name__)
+
+MMAP_THRESHOLD_BYTES = 256 * 1024
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for model context budgeting.
+
+    CJK characters (and full-width punctuation) count as ~1 token each,
+    other text as ~4 characters per token.
+
+    Args:
+        text: Text to estimate
+
+    Returns:
+        Estimated token count
+    """
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def section_spans(outline: Sequence[Dict[str, Any]], size: int) -> List[Dict[str, Any]]:
+    """
+    Turn a heading outline into byte ranges.
+
+    Args:
+        outline: Catalog outline entries ({level, title, offset}) in document order
+        size: File size in bytes
+
+    Returns:
+        List of dicts with index, level, title, start, end (end of the section
+        including its subsections) and body_end (end of the section's own text,
+        i.e. the next heading of any level)
+    """
+    spans = []
+    for i, heading in enumerate(outline):
+        end = size
+        for later in outline[i + 1:]:
+            if later["level"] <= heading["level"]:
+                end = later["offset"]
+                break
+        body_end = outline[i + 1]["offset"] if i + 1 < len(outline) else size
+        spans.append({
+            "index": i,
+            "level": heading["level"],
+            "title": heading["title"],
+            "start": heading["offset"],
+            "end": end,
+            "body_end": body_end,
+        })
+    return spans
+
+
+def read_ranges(path: Path, ranges: Sequence[Tuple[int, int]],
+                mmap_threshold: int = MMAP_THRESHOLD_BYTES) -> List[str]:
+    """
+    Read byte ranges [start, end) of a UTF-8 file with a single open.
+
+    Args:
+        path: File path
+        ranges: (start, end) byte offsets; end is exclusive
+        mmap_threshold: Files at least this large are memory-mapped
+
+    Returns:
+        Decoded text for each range
+    """
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        if not size:
+            return ["" for _ in ranges]
+        if size >= mmap_threshold:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                chunks = [mapped[start:min(end, size)] for start, end in ranges]
+        else:
+            chunks = []
+            for start, end in ranges:
+                f.seek(start)
+                chunks.append(f.read(max(0, min(end, size) - start)))
+    return [chunk.decode("utf-8", errors="replace") for chunk in chunks]
+
+
+def read_range(path: Path, start: int, end: int, mmap_threshold: int = MMAP_THRESHOLD_BYTES) -> str:
+    """Read bytes [start, end) of a UTF-8 file (see read_ranges)"""
+    return read_ranges(path, [(start, end)], mmap_threshold)[0]
+
+
+class SectionReader:
+    """
+    Read sections of knowledge base documents via the catalog outline.
+
+    Per-section term frequencies for query mode are kept in a small LRU keyed
+    by (path, mtime_ns), so repeated queries against the same document do not
+    re-read or re-tokenize it.
+    """
+
+    def __init__(self, catalog: DocumentCatalog, cache_size: int = 64):
+        """
+        Initialize section reader.
+
+        Args:
+            catalog: Document catalog providing outlines and byte offsets
+            cache_size: Number of documents whose section terms are cached
+        """
+        self.catalog = catalog
+        self.kb_dir = catalog.kb_dir
+        self.cache_size = cache_size
+        self._terms: "OrderedDict[tuple, List[Dict[str, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"reads": 0, "section_reads": 0, "query_reads": 0, "bytes_returned": 0, "bytes_total": 0}
+
+    def entry(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the catalog entry for a document, re-cataloguing it if it changed on disk.
+
+        Args:
+            path: Path relative to the KB root
+
+        Returns:
+            Catalog entry (with outline byte offsets) or None if not found or
+            outside the KB root
+        """
+        kb_root = self.kb_dir.resolve()
+        doc_path = (self.kb_dir / path).resolve()
+        if not doc_path.is_relative_to(kb_root):
+            return None
+        path = doc_path.relative_to(kb_root).as_posix()
+        try:
+            st = doc_path.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not doc_path.is_file():
+            return None
+        entry = self.catalog.get(path)
+        if entry is None or entry["mtime_ns"] != st.st_mtime_ns or entry["size"] != st.st_size:
+            self.catalog.update_file(path)
+            entry = self.catalog.get(path)
+        if entry is None:
+            # Not catalogued (README.md, non-markdown): parse on the fly
+            parsed = parse_document(read_range(doc_path, 0, st.st_size))
+            entry = {
+                "path": path,
+                "category": category_for(path),
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                **parsed,
+            }
+        return entry
+
+    def _section_terms(self, path: str, entry: Dict[str, Any], spans: List[Dict[str, Any]]) -> List[Dict[str, int]]:
+        key = (path, entry["mtime_ns"])
+        with self._lock:
+            cached = self._terms.get(key)
+            if cached is not None:
+                self._terms.move_to_end(key)
+                return cached
+
+        bodies = read_ranges(self.kb_dir / entry["path"], [(span["start"], span["body_end"]) for span in spans])
+        terms = []
+        for body in bodies:
+            tf: Dict[str, int] = {}
+            for term in tokenize(body):
+                tf[term] = tf.get(term, 0) + 1
+            terms.append(tf)
+
+        with self._lock:
+            self._terms[key] = terms
+            while len(self._terms) > self.cache_size:
+                self._terms.popitem(last=False)
+        return terms
+
+    def match_sections(self, spans: List[Dict[str, Any]], names: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Resolve requested section names to spans.
+
+        Exact (case-insensitive) heading matches win; otherwise a heading
+        containing the name matches. Sections nested inside an already
+        selected section are dropped.
+
+        Args:
+            spans: Output of section_spans()
+            names: Requested heading titles
+
+        Returns:
+            Selected spans in document order
+        """
+        selected = {}
+        for name in names:
+            wanted = name.strip().lstrip("#").strip().lower()
+            if not wanted:
+                continue
+            exact = [s for s in spans if s["title"].lower() == wanted]
+            for span in exact or [s for s in spans if wanted in s["title"].lower()]:
+                selected[span["index"]] = span
+        return self._outermost(selected.values())
+
+    def rank_sections(self, path: str, entry: Dict[str, Any], spans: List[Dict[str, Any]],
+                      query: str, max_sections: int) -> List[Dict[str, Any]]:
+        """
+        Pick the sections most relevant to a query (BM25 over section text).
+
+        Args:
+            path: Path relative to the KB root
+            entry: Catalog entry of the document
+            spans: Output of section_spans()
+            query: Natural language query
+            max_sections: Number of sections to return
+
+        Returns:
+            Selected spans in document order (empty if nothing matches)
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms or not spans:
+            return []
+
+        section_terms = self._section_terms(path, entry, spans)
+        lengths = [sum(tf.values()) for tf in section_terms]
+        avg_length = (sum(lengths) / len(lengths)) or 1.0
+        n_sections = len(spans)
+
+        scores = []
+        for i, tf in enumerate(section_terms):
+            score = 0.0
+            for term in query_terms:
+                count = tf.get(term)
+                if not count:
+                    continue
+                df = sum(1 for other in section_terms if term in other)
+                idf = math.log(1 + (n_sections - df + 0.5) / (df + 0.5))
+                norm = count + BM25_K1 * (1 - BM25_B + BM25_B * lengths[i] / avg_length)
+                score += idf * count * (BM25_K1 + 1) / norm
+            if score > 0:
+                scores.append((score, i))
+
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        chosen = [dict(spans[i], body_only=True, score=round(score, 3)) for score, i in scores[:max_sections]]
+        return sorted(chosen, key=lambda s: s["start"])
+
+    @staticmethod
+    def _outermost(spans) -> List[Dict[str, Any]]:
+        result = []
+        for span in sorted(spans, key=lambda s: (s["start"], -s["end"])):
+            if result and span["start"] < result[-1]["end"]:
+                continue
+            result.append(span)
+        return result
+
+    def read(self, path: str, sections: Optional[Sequence[str]] = None, query: Optional[str] = None,
+             max_sections: int = 3, outline_only: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Read a document, or only selected sections of it.
+
+        Args:
+            path: Path relative to the KB root
+            sections: Heading titles to return (each with its subsections)
+            query: Return the top max_sections sections relevant to this query
+            max_sections: Section budget for query mode
+            outline_only: Return only the outline, no content
+
+        Returns:
+            Dict with title, category, last_updated, size, outline, mode
+            ('full' | 'sections' | 'query' | 'outline'), sections (returned
+            headings), content and token_estimate; None if the document
+            does not exist
+        """
+        entry = self.entry(path)
+        if entry is None:
+            return None
+
+        path = entry["path"]
+        doc_path = self.kb_dir / path
+        spans = section_spans(entry["outline"], entry["size"])
+
+        mode = "full"
+        selected: List[Dict[str, Any]] = []
+        if outline_only:
+            mode = "outline"
+        elif sections:
+            mode = "sections"
+            selected = self.match_sections(spans, sections)
+        elif query:
+            mode = "query"
+            selected = self.rank_sections(path, entry, spans, query, max(1, max_sections))
+
+        if mode == "outline":
+            content = ""
+        elif mode == "full" or not selected:
+            # Nothing matched: fall back to the whole document rather than an empty answer
+            mode = "full"
+            content = read_range(doc_path, 0, entry["size"])
+        else:
+            ranges = [(s["start"], s["body_end"] if s.get("body_only") else s["end"]) for s in selected]
+            content = "\n\n...\n\n".join(part.rstrip("\r\n") for part in read_ranges(doc_path, ranges))
+
+        returned = len(content.encode("utf-8"))
+        with self._lock:
+            self._stats["reads"] += 1
+            self._stats["section_reads"] += mode == "sections"
+            self._stats["query_reads"] += mode == "query"
+            self._stats["bytes_returned"] += returned
+            self._stats["bytes_total"] += entry["size"]
+
+        return {
+            "title": entry["title"],
+            "category": entry["category"],
+            "last_updated": entry["last_updated"],
+            "size": entry["size"],
+            "outline": [f"{'#' * h['level']} {h['title']}" for h in entry["outline"]],
+            "mode": mode,
+            "sections": [s["title"] for s in selected] if mode in ("sections", "query") else [],
+            "content": content,
+            "token_estimate": estimate_tokens(content),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get reader statistics.
+
+        Returns:
+            Dict with read counts and the fraction of document bytes returned
+        """
+        with self._lock:
+            total = self._stats["bytes_total"]
+            return {
+                **self._stats,
+                "cached_documents": len(self._terms),
+                "returned_ratio": round(self._stats["bytes_returned"] / total, 3) if total else 0.0,
+            }
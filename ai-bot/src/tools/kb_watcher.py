@@ -0,0 +1,313 @@
+"""
+Knowledge Base Watcher - Live incremental updates for the KB index
+
+The knowledge base changes through several paths: store_knowledge_document,
+daily briefings written into briefings/, and the deploy script copying
+documents in bulk. This watcher keeps KnowledgeBaseIndex current without
+searches ever re-scanning the tree:
+
+- inotify (via watchdog) when available, otherwise a stat-only polling loop
+- Events are debounced per path: a burst (e.g. a bulk copy) is applied once
+  it has been quiet for debounce_seconds, and never later than
+  max_delay_seconds after the first event, so new documents are searchable
+  within a second
+- Directory moves/deletes are reconciled by prefix
+- The index snapshot is persisted at most every save_interval_seconds
+- Listeners are notified per applied path (for metadata caches built on top
+  of the index)
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .kb_index import KnowledgeBaseIndex
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+    WATCHDOG_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Forward watchdog events into the watcher's pending queue"""
+
+    def __init__(self, watcher: "KnowledgeBaseWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        self.watcher.notify(event.src_path)
+        dest_path = getattr(event, "dest_path", None)
+        if dest_path:
+            self.watcher.notify(dest_path)
+
+
+class KnowledgeBaseWatcher:
+    """
+    Apply filesystem changes under the KB root to a KnowledgeBaseIndex.
+
+    Changed paths are collected by notify() (from inotify events, the polling
+    loop, or callers) and applied by a single background thread.
+    """
+
+    def __init__(
+        self,
+        kb_index: KnowledgeBaseIndex,
+        debounce_seconds: float = 0.25,
+        max_delay_seconds: float = 0.8,
+        poll_interval_seconds: float = 0.5,
+        save_interval_seconds: float = 5.0,
+        use_inotify: Optional[bool] = None,
+    ):
+        """
+        Initialize knowledge base watcher.
+
+        Args:
+            kb_index: Index to keep up to date
+            debounce_seconds: Quiet period before a burst of events is applied
+            max_delay_seconds: Upper bound between first event and apply
+            poll_interval_seconds: Scan interval when inotify is unavailable
+            save_interval_seconds: Minimum time between snapshot writes
+            use_inotify: Force (True) or disable (False) inotify; None = auto
+        """
+        self.kb_index = kb_index
+        self.kb_dir = kb_index.kb_dir
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.save_interval_seconds = save_interval_seconds
+        self.use_inotify = WATCHDOG_AVAILABLE if use_inotify is None else use_inotify and WATCHDOG_AVAILABLE
+
+        self._pending: Dict[str, float] = {}
+        self._first_pending_at: Optional[float] = None
+        self._last_event_at = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+        self._listeners: List[Callable[[str, bool], None]] = []
+        self._savers: List[Callable[[], bool]] = []
+        self._last_save = 0.0
+        self._last_poll = 0.0
+        self.mode: Optional[str] = None
+
+        self._stats = {
+            "events": 0,
+            "batches": 0,
+            "files_updated": 0,
+            "files_removed": 0,
+            "snapshots_saved": 0,
+            "last_apply_lag_ms": 0.0,
+            "max_apply_lag_ms": 0.0,
+        }
+
+    def add_listener(self, listener: Callable[[str, bool], None], save: Optional[Callable[[], bool]] = None):
+        """
+        Register a callback run after each applied path.
+
+        Args:
+            listener: Called with (relative path, exists) for every document
+                      the watcher updated or removed
+            save: Optional snapshot writer, called on the same throttled
+                  schedule as the index snapshot
+        """
+        self._listeners.append(listener)
+        if save is not None:
+            self._savers.append(save)
+
+    def _save(self):
+        for save in [self.kb_index.save] + self._savers:
+            try:
+                if save():
+                    self._stats["snapshots_saved"] += 1
+            except Exception as e:
+                logger.warning(f"[KB Watcher] Snapshot save failed: {e}")
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> str:
+        """
+        Start watching the KB root.
+
+        Returns:
+            'inotify' or 'polling'
+        """
+        if self._thread and self._thread.is_alive():
+            return self.mode
+
+        self._stop.clear()
+        self.mode = "polling"
+        if self.use_inotify and self.kb_dir.exists():
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_EventHandler(self), str(self.kb_dir), recursive=True)
+                self._observer.start()
+                self.mode = "inotify"
+            except Exception as e:
+                logger.warning(f"[KB Watcher] inotify unavailable, falling back to polling: {e}")
+                self._observer = None
+
+        self._thread = threading.Thread(target=self._run, name="kb-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"[KB Watcher] Watching {self.kb_dir} ({self.mode})")
+        return self.mode
+
+    def stop(self):
+        """Stop watching, apply anything pending and persist the snapshot"""
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+        self._save()
+
+    # ---------- event intake ----------
+
+    def notify(self, path):
+        """
+        Queue a changed file or directory for re-indexing.
+
+        Args:
+            path: Absolute path (or path relative to the KB root)
+        """
+        path = Path(path)
+        if not path.is_absolute():
+            path = self.kb_dir / path
+        now = time.monotonic()
+        with self._lock:
+            self._pending[str(path)] = now
+            self._last_event_at = now
+            if self._first_pending_at is None:
+                self._first_pending_at = now
+            self._stats["events"] += 1
+        self._wake.set()
+
+    def _poll(self):
+        """Queue files whose stat() no longer matches the index"""
+        changed, stale = self.kb_index.scan_changes()
+        with self._lock:
+            queued = set(self._pending)
+        for rel in changed + stale:
+            # Re-queuing an already pending file would keep resetting its debounce
+            if str(self.kb_dir / rel) not in queued:
+                self.notify(rel)
+
+    # ---------- apply ----------
+
+    def _due(self, now: float) -> bool:
+        with self._lock:
+            if not self._pending:
+                return False
+            quiet_for = now - self._last_event_at
+            waited = now - self._first_pending_at
+        return quiet_for >= self.debounce_seconds or waited >= self.max_delay_seconds
+
+    def flush(self) -> int:
+        """
+        Apply all pending paths to the index now.
+
+        Returns:
+            Number of documents updated or removed
+        """
+        with self._lock:
+            pending = self._pending
+            first_pending_at = self._first_pending_at
+            self._pending = {}
+            self._first_pending_at = None
+        if not pending:
+            return 0
+
+        applied = 0
+        for path_str in sorted(pending):
+            applied += self._apply(Path(path_str))
+
+        lag_ms = (time.monotonic() - first_pending_at) * 1000
+        self._stats["batches"] += 1
+        self._stats["last_apply_lag_ms"] = round(lag_ms, 1)
+        self._stats["max_apply_lag_ms"] = max(self._stats["max_apply_lag_ms"], round(lag_ms, 1))
+        return applied
+
+    def _apply(self, path: Path) -> int:
+        try:
+            rel = path.relative_to(self.kb_dir).as_posix()
+        except ValueError:
+            return 0
+
+        if path.is_dir() or (path.suffix != ".md" and not path.exists()):
+            # Directory created, moved or deleted: reconcile everything under it
+            applied = 0
+            if path.is_dir():
+                for md_file in path.rglob("*.md"):
+                    applied += self._apply(md_file)
+            prefix = "" if rel == "." else rel.rstrip("/") + "/"
+            for doc_rel in self.kb_index.documents():
+                if doc_rel.startswith(prefix) and not (self.kb_dir / doc_rel).exists():
+                    applied += self._apply(self.kb_dir / doc_rel)
+            return applied
+
+        if path.suffix != ".md":
+            return 0
+
+        exists = path.exists()
+        changed = self.kb_index.update_file(path) if exists else self.kb_index.remove_file(rel)
+        if not changed:
+            return 0
+
+        self._stats["files_updated" if exists else "files_removed"] += 1
+        for listener in self._listeners:
+            try:
+                listener(rel, exists)
+            except Exception as e:
+                logger.warning(f"[KB Watcher] Listener failed for {rel}: {e}")
+        return 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if self.mode == "polling" and now - self._last_poll >= self.poll_interval_seconds:
+                self._last_poll = now
+                try:
+                    self._poll()
+                except Exception as e:
+                    logger.warning(f"[KB Watcher] Poll failed: {e}")
+
+            if self._due(time.monotonic()):
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"[KB Watcher] Apply failed: {e}")
+
+            if time.monotonic() - self._last_save >= self.save_interval_seconds:
+                self._last_save = time.monotonic()
+                self._save()
+
+            self._wake.wait(timeout=min(self.debounce_seconds, self.poll_interval_seconds) / 2)
+            self._wake.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get watcher statistics.
+
+        Returns:
+            Dict with mode, pending count, event/apply counters and apply lag
+        """
+        with self._lock:
+            pending = len(self._pending)
+        return {"mode": self.mode, "pending": pending, **self._stats}
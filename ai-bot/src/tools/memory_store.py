@@ -0,0 +1,308 @@
+"""
+Memory Store - Bounded, compacted conversation_memory for user context files
+
+save_user_context used to append to conversation_memory forever and
+get_user_context handed the whole list to the agent, so long-tenured users'
+context files (and every prompt built from them) kept growing. This module
+keeps the list bounded:
+
+- Near-identical memories are merged (Jaccard similarity over character
+  bigrams, so it works for Chinese and English alike, and only when both
+  mention the same numbers); the merged entry keeps a hit count and the
+  latest time it was seen
+- Once the list exceeds the cap (CONVERSATION_MEMORY_CAP, default 50), the
+  oldest entries are folded into a single extractive summary entry
+- select() returns a recency- and relevance-ranked subset that fits a
+  character budget, in chronological order
+
+Entries are dicts {text, created_at, last_seen, count, kind, covers}; legacy
+plain-string entries are upgraded when the file is next written.
+"""
+
+import math
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional
+
+CONVERSATION_MEMORY_CAP = int(os.getenv("CONVERSATION_MEMORY_CAP", "50"))
+
+# Default character budget for the memories returned by get_user_context
+MEMORY_BUDGET_CHARS = 800
+
+_NORMALIZE_RE = re.compile(r"[\W_]+", re.UNICODE)
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _shingles(text: str) -> FrozenSet[str]:
+    """Character bigrams of the normalized text (lowercase, no punctuation/whitespace)"""
+    normalized = _NORMALIZE_RE.sub("", text.lower())
+    if len(normalized) < 2:
+        return frozenset([normalized]) if normalized else frozenset()
+    return frozenset(normalized[i:i + 2] for i in range(len(normalized) - 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _coverage(query: FrozenSet[str], text: FrozenSet[str]) -> float:
+    """Share of the query's shingles found in the text (unlike Jaccard, not penalized by text length)"""
+    if not query or not text:
+        return 0.0
+    return len(query & text) / len(query)
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+class MemoryStore:
+    """
+    Dedupe, compaction and ranked selection for conversation_memory lists.
+
+    Stateless with respect to storage (callers load and save the context
+    file); thread-safe counters are exposed through stats().
+    """
+
+    def __init__(
+        self,
+        cap: int = CONVERSATION_MEMORY_CAP,
+        similarity_threshold: float = 0.8,
+        compact_batch: int = 10,
+        summary_max_chars: int = 400,
+        half_life_days: float = 14.0
+    ):
+        """
+        Initialize memory store.
+
+        Args:
+            cap: Maximum entries kept per user (summaries included)
+            similarity_threshold: Jaccard similarity at which two memories are merged
+            compact_batch: Oldest entries folded into one summary per compaction step
+            summary_max_chars: Maximum length of a summary entry's text
+            half_life_days: Age at which an entry's recency score halves
+        """
+        self.cap = max(cap, 2)
+        self.similarity_threshold = similarity_threshold
+        self.compact_batch = max(2, min(compact_batch, self.cap))
+        self.summary_max_chars = summary_max_chars
+        self.half_life_days = half_life_days
+        self._lock = threading.Lock()
+        self._stats = {"added": 0, "merged": 0, "compactions": 0, "selections": 0, "selected": 0, "dropped": 0}
+
+    def normalize(self, raw: Optional[List[Any]], default_time: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Convert a stored conversation_memory list to entry dicts.
+
+        Args:
+            raw: List of strings (legacy) and/or entry dicts
+            default_time: Timestamp for legacy strings (e.g. the file's last_updated)
+
+        Returns:
+            List of entry dicts, oldest first
+        """
+        entries = []
+        for item in raw or []:
+            if isinstance(item, str):
+                if item.strip():
+                    entries.append(self._entry(item.strip(), default_time or ""))
+            elif isinstance(item, dict) and str(item.get("text", "")).strip():
+                entry = self._entry(str(item["text"]).strip(), item.get("created_at") or default_time or "")
+                entry.update({
+                    "last_seen": item.get("last_seen") or entry["created_at"],
+                    "count": int(item.get("count") or 1),
+                    "kind": item.get("kind") or "memory",
+                    "covers": int(item.get("covers") or 1),
+                })
+                entries.append(entry)
+        return entries
+
+    @staticmethod
+    def _entry(text: str, created_at: str) -> Dict[str, Any]:
+        return {"text": text, "created_at": created_at, "last_seen": created_at, "count": 1,
+                "kind": "memory", "covers": 1}
+
+    def add(self, entries: List[Dict[str, Any]], texts: List[str], now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Add memories, merging near-duplicates and compacting past the cap.
+
+        Args:
+            entries: Existing entries (from normalize())
+            texts: New memory strings
+            now: Time to record (default: now)
+
+        Returns:
+            New entry list, oldest first, at most cap entries
+        """
+        timestamp = (now or datetime.now()).isoformat()
+        entries = list(entries)
+        shingles = [_shingles(e["text"]) for e in entries]
+        numbers = [_NUMBER_RE.findall(e["text"]) for e in entries]
+        added = merged = 0
+
+        for text in texts:
+            text = (text or "").strip()
+            if not text:
+                continue
+            new_shingles = _shingles(text)
+            new_numbers = _NUMBER_RE.findall(text)
+            match = None
+            for i in range(len(entries) - 1, -1, -1):
+                # Amounts, dates and IDs matter: "order #12" is not a duplicate of "order #13"
+                if (entries[i]["kind"] == "memory" and numbers[i] == new_numbers
+                        and jaccard(new_shingles, shingles[i]) >= self.similarity_threshold):
+                    match = i
+                    break
+
+            if match is None:
+                entries.append(self._entry(text, timestamp))
+                shingles.append(new_shingles)
+                numbers.append(new_numbers)
+                added += 1
+                continue
+
+            # Seen again: move to the end as the freshest entry, keeping the longer wording
+            entry = entries.pop(match)
+            shingles.pop(match)
+            numbers.pop(match)
+            if len(text) > len(entry["text"]):
+                entry["text"] = text
+            entry["count"] += 1
+            entry["last_seen"] = timestamp
+            entries.append(entry)
+            shingles.append(_shingles(entry["text"]))
+            numbers.append(new_numbers)
+            merged += 1
+
+        entries = self.compact(entries)
+        with self._lock:
+            self._stats["added"] += added
+            self._stats["merged"] += merged
+        return entries
+
+    def compact(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Fold the oldest entries into summaries until at most cap entries remain.
+
+        Args:
+            entries: Entries, oldest first
+
+        Returns:
+            Compacted entries, oldest first (a summary takes its batch's place)
+        """
+        entries = list(entries)
+        compactions = 0
+        while len(entries) > self.cap:
+            batch_size = min(self.compact_batch, len(entries) - self.cap + 1)
+            batch_size = max(batch_size, 2)
+            batch, entries = entries[:batch_size], entries[batch_size:]
+            entries.insert(0, self._summarize(batch))
+            compactions += 1
+        if compactions:
+            with self._lock:
+                self._stats["compactions"] += compactions
+        return entries
+
+    def _summarize(self, batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Extractive summary: the batch's texts, most-repeated first, within summary_max_chars"""
+        first = min((e["created_at"] for e in batch if e["created_at"]), default="")
+        last = max((e["last_seen"] for e in batch if e["last_seen"]), default="")
+        header = f"[{first[:10]}~{last[:10]}] " if first else ""
+
+        parts = []
+        length = len(header)
+        dropped = 0
+        # Previous summaries are already condensed: keep them first, then the most repeated memories
+        ranked = sorted(batch, key=lambda e: (e["kind"] != "summary", -e["count"], e["created_at"]))
+        for entry in ranked:
+            text = re.sub(r"^\[[^\]]*\]\s*", "", entry["text"]) if entry["kind"] == "summary" else entry["text"]
+            if length + len(text) + 2 > self.summary_max_chars:
+                room = self.summary_max_chars - length - 3
+                if not parts and room > 0:
+                    parts.append(text[:room] + "…")
+                    length = self.summary_max_chars
+                dropped += 1
+                continue
+            parts.append(text)
+            length += len(text) + 2
+
+        if dropped:
+            with self._lock:
+                self._stats["dropped"] += dropped
+        return {
+            "text": header + "; ".join(parts),
+            "created_at": first,
+            "last_seen": last,
+            "count": sum(e["count"] for e in batch),
+            "kind": "summary",
+            "covers": sum(e["covers"] for e in batch),
+        }
+
+    def select(
+        self,
+        entries: List[Dict[str, Any]],
+        query: Optional[str] = None,
+        budget_chars: int = MEMORY_BUDGET_CHARS,
+        now: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Pick the most useful entries that fit a character budget.
+
+        Score = recency (halves every half_life_days since last_seen)
+        + 2 x share of the query found in the memory (when a query is given)
+        + a small repeat bonus.
+
+        Args:
+            entries: Entries (from normalize())
+            query: Text to rank relevance against (e.g. the user's message)
+            budget_chars: Maximum total characters of selected texts
+            now: Reference time for recency (default: now)
+
+        Returns:
+            Selected entries in chronological order
+        """
+        now = now or datetime.now()
+        query_shingles = _shingles(query) if query else frozenset()
+
+        scored = []
+        for index, entry in enumerate(entries):
+            seen = _parse_time(entry.get("last_seen"))
+            age_days = max((now - seen).total_seconds() / 86400, 0.0) if seen else self.half_life_days * 4
+            score = 0.5 ** (age_days / self.half_life_days)
+            if query_shingles:
+                score += 2.0 * _coverage(query_shingles, _shingles(entry["text"]))
+            score += 0.1 * math.log1p(entry.get("count", 1) - 1)
+            scored.append((score, index))
+
+        chosen = []
+        used = 0
+        # Ties go to the newer entry
+        for score, index in sorted(scored, key=lambda s: (-s[0], -s[1])):
+            size = len(entries[index]["text"])
+            if used + size > budget_chars:
+                continue
+            chosen.append(index)
+            used += size
+
+        with self._lock:
+            self._stats["selections"] += 1
+            self._stats["selected"] += len(chosen)
+        return [entries[i] for i in sorted(chosen)]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get memory store statistics.
+
+        Returns:
+            Dict with cap, added/merged counts, compactions, selections
+        """
+        with self._lock:
+            return {"cap": self.cap, **self._stats}
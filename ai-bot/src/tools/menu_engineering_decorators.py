@@ -63,7 +63,7 @@ async def get_menu_profitability_tool(args):
         end_date = args.get("end_date")
         min_quantity = args.get("min_quantity", 5)
 
-        result = _supabase_tools.get_menu_profitability(
+        result = await _supabase_tools.get_menu_profitability(
             start_date=start_date,
             end_date=end_date,
             min_quantity=min_quantity
@@ -142,7 +142,7 @@ async def get_top_profitable_dishes_tool(args):
         end_date = args.get("end_date")
         top_n = args.get("top_n", 10)
 
-        result = _supabase_tools.get_top_profitable_dishes(
+        result = await _supabase_tools.get_top_profitable_dishes(
             start_date=start_date,
             end_date=end_date,
             top_n=top_n
@@ -228,7 +228,7 @@ async def get_low_profit_dishes_tool(args):
         end_date = args.get("end_date")
         bottom_n = args.get("bottom_n", 10)
 
-        result = _supabase_tools.get_low_profit_dishes(
+        result = await _supabase_tools.get_low_profit_dishes(
             start_date=start_date,
             end_date=end_date,
             bottom_n=bottom_n
@@ -313,7 +313,7 @@ async def get_cost_coverage_rate_tool(args):
         start_date = args.get("start_date")
         end_date = args.get("end_date")
 
-        result = _supabase_tools.get_cost_coverage_rate(
+        result = await _supabase_tools.get_cost_coverage_rate(
             start_date=start_date,
             end_date=end_date
         )
@@ -406,7 +406,7 @@ async def get_dishes_missing_cost_tool(args):
         end_date = args.get("end_date")
         top_n = args.get("top_n", 20)
 
-        result = _supabase_tools.get_dishes_missing_cost(
+        result = await _supabase_tools.get_dishes_missing_cost(
             start_date=start_date,
             end_date=end_date,
             top_n=top_n
@@ -6,6 +6,8 @@ Agent SDK Tool Decorators
 from claude_agent_sdk import tool
 from typing import Optional
 
+from src.tools.result_encoding import DEFAULT_MAX_CHARS
+
 # Global instances (will be initialized by app)
 _campfire_tools: Optional = None
 _supabase_tools: Optional = None
@@ -28,15 +30,20 @@ Use this tool when:
 - User wants to see task status or progress
 - Looking up specific records in operations database
 
-Supports filtering, sorting, and limiting results.
+Supports filtering, sorting, column selection and paging.
 
-Returns: List of records matching query criteria with metadata.""",
+Returns: One page of records as CSV (header line, then one line per record).
+If more records exist, the result ends with a cursor: call this tool again
+with only that cursor to get the next page. Select only the columns you need
+to fit more records per page.""",
     input_schema={
         "table": str,  # Required: table name (e.g., 'projects', 'tasks', 'operations_metrics')
         "filters": dict,  # Optional: column-value pairs to filter by
         "columns": str,  # Optional: columns to select (default "*")
-        "limit": int,  # Optional: max records to return (default 100)
-        "order_by": str  # Optional: column to order by (prefix '-' for descending)
+        "limit": int,  # Optional: max records per page (default 100; a cursor keeps its page size)
+        "order_by": str,  # Optional: column to order by (prefix '-' for descending)
+        "cursor": str,  # Optional: cursor from a previous page (other parameters are then ignored)
+        "max_chars": int  # Optional: size budget for the page's CSV (default 4000)
     }
 )
 async def query_operations_data_tool(args):
@@ -54,38 +61,37 @@ async def query_operations_data_tool(args):
         table = args.get('table', '')
         filters = args.get('filters', {})
         columns = args.get('columns', '*')
-        limit = args.get('limit', 100)
+        limit = args.get('limit')
         order_by = args.get('order_by')
+        cursor = args.get('cursor')
+        max_chars = args.get('max_chars', DEFAULT_MAX_CHARS)
 
         # Call underlying implementation
-        result = _supabase_tools.query_operations_data(
+        result = await _supabase_tools.query_operations_data(
             table=table,
             filters=filters,
             columns=columns,
             limit=limit,
-            order_by=order_by
+            order_by=order_by,
+            cursor=cursor,
+            max_chars=max_chars
         )
 
         # Format response
         if result.get('success') and result.get('data'):
-            records = result['data']
-            response_text = f"**{table}** 表查询结果 ({len(records)} 条记录):\n\n"
-
-            # Format records as a table
-            for i, record in enumerate(records[:10], 1):  # Show first 10
-                response_text += f"{i}. "
-                for key, value in record.items():
-                    response_text += f"{key}: {value}, "
-                response_text = response_text.rstrip(', ') + "\n"
+            label = f"续页（游标 {cursor}）" if cursor else f"**{table}** 表查询结果"
+            response_text = f"{label}：本页 {result['count']} 条记录\n\n{result['csv']}\n"
 
-            if len(records) > 10:
-                response_text += f"\n...还有 {len(records) - 10} 条记录\n"
+            if result.get('has_more'):
+                response_text += f"\n还有更多记录。下一页：cursor=\"{result['next_cursor']}\"\n"
+            else:
+                response_text += "\n（已是最后一页）\n"
 
         elif result.get('success') and not result.get('data'):
             response_text = f"未找到符合条件的记录（表：{table}）"
 
         else:
-            response_text = f"查询失败：{result.get('error', '未知错误')}"
+            response_text = f"查询失败：{result.get('message', '未知错误')}"
 
         return {
             "content": [{
@@ -139,7 +145,7 @@ async def update_operations_data_tool(args):
         id_column = args.get('id_column', 'id')
 
         # Call underlying implementation
-        result = _supabase_tools.update_operations_data(
+        result = await _supabase_tools.update_operations_data(
             table=table,
             record_id=record_id,
             data=data,
@@ -211,7 +217,7 @@ async def get_operations_summary_tool(args):
         metrics = args.get('metrics')
 
         # Call underlying implementation
-        result = _supabase_tools.get_operations_summary(
+        result = await _supabase_tools.get_operations_summary(
             date_range=date_range,
             metrics=metrics
         )
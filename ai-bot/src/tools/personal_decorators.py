@@ -3,6 +3,7 @@ Personal task and note management tools
 Agent SDK Tool Decorators
 """
 
+import asyncio
 from claude_agent_sdk import tool
 from typing import Optional
 
@@ -83,13 +84,18 @@ async def manage_personal_tasks_tool(args):
                         response_text += f"   📅 到期: {task.get('due_date')}\n"
                     response_text += "\n"
 
+        elif not result.get('success'):
+            response_text = f"管理任务失败：{result.get('message', '未知错误')}"
+
         elif action == 'create':
-            response_text = f"✅ 任务已创建：{result.get('title', 'Untitled')}"
-            if result.get('due_date'):
-                response_text += f"\n📅 到期时间：{result.get('due_date')}"
+            task = result.get('task', {})
+            response_text = f"✅ 任务已创建：#{task.get('id')} {task.get('title', 'Untitled')}"
+            if task.get('due_date'):
+                response_text += f"\n📅 到期时间：{task.get('due_date')}"
 
         elif action == 'complete':
-            response_text = f"✅ 任务已完成：{result.get('title', 'Task')}"
+            task = result.get('task', {})
+            response_text = f"✅ 任务已完成：#{task.get('id')} {task.get('title', 'Task')}"
 
         elif action == 'delete':
             response_text = f"🗑️ 任务已删除"
@@ -129,7 +135,8 @@ Returns: Confirmation that reminder was saved and will be delivered automaticall
     input_schema={
         "user_id": int,
         "reminder_text": str,
-        "remind_at": str  # Natural language or YYYY-MM-DD HH:MM format
+        "remind_at": str,  # Natural language or YYYY-MM-DD HH:MM format
+        "room_id": int  # Optional: room to deliver the reminder in (defaults to room 1)
     }
 )
 async def set_reminder_tool(args):
@@ -152,15 +159,16 @@ async def set_reminder_tool(args):
         result = _campfire_tools.set_reminder(
             user_id=user_id,
             reminder_text=reminder_text,
-            remind_at=remind_at
+            remind_at=remind_at,
+            room_id=args.get('room_id')
         )
 
         # Format response
         if result.get('success'):
-            response_text = f"⏰ 提醒已设置\n\n"
+            response_text = f"⏰ 提醒已设置 (#{result['reminder']['id']})\n\n"
             response_text += f"内容: {reminder_text}\n"
-            response_text += f"时间: {remind_at}\n\n"
-            response_text += "注意：提醒已保存，但自动通知功能尚未实现。您可以通过查看任务列表查看提醒。"
+            response_text += f"时间: {remind_at} ({result['reminder']['due_at'].replace('T', ' ')})\n\n"
+            response_text += "到时间后会自动发送提醒通知。"
         else:
             response_text = f"设置提醒失败：{result.get('error', '未知错误')}"
 
@@ -189,9 +197,9 @@ Use this tool when:
 - User wants to document something for later reference
 - User says "take a note" or "save this"
 
-Notes are stored as Markdown files with timestamps and searchable.
+Notes are stored with timestamps and indexed for full-text search.
 
-Returns: Confirmation that note was saved with path.""",
+Returns: Confirmation that note was saved with its note number.""",
     input_schema={
         "user_id": int,
         "title": str,
@@ -225,9 +233,9 @@ async def save_personal_note_tool(args):
         if result.get('success'):
             response_text = f"📝 笔记已保存\n\n"
             response_text += f"标题: {title}\n"
-            response_text += f"路径: {result.get('path', 'N/A')}\n"
-            if result.get('timestamp'):
-                response_text += f"时间: {result.get('timestamp')}\n"
+            response_text += f"编号: #{result.get('note_id')}\n"
+            if result.get('created_at'):
+                response_text += f"时间: {result.get('created_at')}\n"
         else:
             response_text = f"保存笔记失败：{result.get('error', '未知错误')}"
 
@@ -282,8 +290,10 @@ async def search_personal_notes_tool(args):
         query = args.get('query', '')
         max_results = args.get('max_results', 10)
 
-        # Call underlying implementation
-        notes = _campfire_tools.search_personal_notes(
+        # Call underlying implementation in a worker thread; identical
+        # concurrent searches share one execution (CampfireTools.single_flight)
+        notes = await asyncio.to_thread(
+            _campfire_tools.search_personal_notes,
             user_id=user_id,
             query=query,
             max_results=max_results
@@ -303,14 +313,14 @@ async def search_personal_notes_tool(args):
 
             for i, note in enumerate(notes, 1):
                 response_text += f"**{i}. {note.get('title', 'Untitled')}**\n"
-                response_text += f"📅 {note.get('timestamp', 'Unknown date')}\n"
+                response_text += f"📅 {note.get('created_at') or 'Unknown date'}\n"
 
                 # Add excerpt if available
                 excerpt = note.get('excerpt', note.get('content', ''))
                 if excerpt:
                     response_text += f"{excerpt[:200]}...\n"
 
-                response_text += f"路径: {note.get('path', 'N/A')}\n\n"
+                response_text += f"编号: #{note.get('note_id')}\n\n"
 
         return {
             "content": [{
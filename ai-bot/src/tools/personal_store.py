@@ -0,0 +1,820 @@
+"""
+Personal Store - Embedded SQLite store for personal tasks, reminders and notes
+
+The personal assistant tools used to read and rewrite whole per-user JSON
+files (user_contexts/user_N/tasks.json, reminders.json) on every call and
+glob every Markdown note on search, with no locking between concurrent agent
+runs. This store keeps the same data in one SQLite database:
+
+- WAL journal + busy timeout, so readers never block and concurrent writers
+  (agent runs, the reminder scheduler) queue instead of losing updates
+- Every write is a single BEGIN IMMEDIATE transaction; per-user task and
+  reminder numbers are assigned inside it
+- Indexes on (user_id, status), task due dates and note creation time;
+  note bodies are indexed with FTS5 (trigram tokenizer, so Chinese
+  substrings match), with a LIKE fallback for queries shorter than 3
+  characters or SQLite builds without FTS5
+- migrate_user()/migrate_context_dir() import the legacy JSON/Markdown
+  layout once per user (legacy files are left in place)
+- Reminder times are normalized to an absolute due_at when the reminder is
+  created (parse_remind_time), so "2小时后" means two hours after it was set;
+  the (status, due_at) index lets the scheduler fetch only due reminders and
+  find the next wake-up time, and listeners are told when one is added
+- Delivery is claimed with a conditional update (pending -> sending, tagged
+  with a delivery_id) and confirmed, released or parked as 'ambiguous'
+  against that id, so two schedulers can never send the same reminder
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from dateutil import parser as dateutil_parser
+
+logger = logging.getLogger(__name__)
+
+STORE_FILENAME = "personal.db"
+SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    task_no INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    priority TEXT NOT NULL DEFAULT 'medium',
+    due_date TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    created_at TEXT NOT NULL,
+    completed_at TEXT,
+    UNIQUE (user_id, task_no)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_status ON tasks (user_id, status, task_no);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_due ON tasks (status, due_date);
+
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    reminder_no INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    remind_at TEXT NOT NULL,
+    room_id INTEGER,
+    status TEXT NOT NULL DEFAULT 'pending',
+    created_at TEXT NOT NULL,
+    triggered_at TEXT,
+    due_at TEXT,
+    delivery_id TEXT,
+    claimed_at TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (user_id, reminder_no)
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_user_status ON reminders (user_id, status, reminder_no);
+CREATE INDEX IF NOT EXISTS idx_reminders_status ON reminders (status, id);
+
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    legacy_path TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_user_created ON notes (user_id, created_at DESC, id DESC);
+
+-- Last per-user task/reminder number handed out (numbers are never reused, as with next_id)
+CREATE TABLE IF NOT EXISTS user_counters (
+    user_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    last_no INTEGER NOT NULL,
+    PRIMARY KEY (user_id, kind)
+);
+
+CREATE TABLE IF NOT EXISTS migrations (
+    user_id INTEGER PRIMARY KEY,
+    migrated_at TEXT NOT NULL,
+    tasks INTEGER NOT NULL DEFAULT 0,
+    reminders INTEGER NOT NULL DEFAULT 0,
+    notes INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# The owner column ("u<user_id>u") lets a search intersect with one user's notes
+# inside FTS instead of ranking every user's matches and filtering afterwards
+_FTS_SCHEMA = """
+CREATE VIEW IF NOT EXISTS notes_fts_source AS
+    SELECT id, 'u' || user_id || 'u' AS owner, title, content FROM notes;
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    owner, title, content, content='notes_fts_source', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts (rowid, owner, title, content)
+    VALUES (new.id, 'u' || new.user_id || 'u', new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, owner, title, content)
+    VALUES ('delete', old.id, 'u' || old.user_id || 'u', old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, owner, title, content)
+    VALUES ('delete', old.id, 'u' || old.user_id || 'u', old.title, old.content);
+    INSERT INTO notes_fts (rowid, owner, title, content)
+    VALUES (new.id, 'u' || new.user_id || 'u', new.title, new.content);
+END;
+"""
+
+# Trigram FTS needs at least 3 characters per term
+_MIN_FTS_TERM = 3
+
+_TASK_COLUMNS = "task_no, title, description, priority, due_date, status, created_at, completed_at"
+_REMINDER_COLUMNS = ("id, user_id, reminder_no, text, remind_at, due_at, room_id, status, created_at, triggered_at,"
+                     " attempts")
+
+# Reminder columns added after v1 (CREATE TABLE IF NOT EXISTS leaves old tables alone)
+_REMINDER_UPGRADES = {
+    "due_at": "TEXT",
+    "delivery_id": "TEXT",
+    "claimed_at": "TEXT",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+}
+_DUE_INDEX = "CREATE INDEX IF NOT EXISTS idx_reminders_due ON reminders (status, due_at)"
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _task_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    task = dict(row)
+    task["id"] = task.pop("task_no")
+    return task
+
+
+def _reminder_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    reminder = dict(row)
+    reminder["store_id"] = reminder.pop("id")
+    reminder["id"] = reminder.pop("reminder_no")
+    return reminder
+
+
+def _next_number(conn: sqlite3.Connection, user_id: int, kind: str) -> int:
+    """Next per-user task/reminder number (call inside a write transaction)"""
+    row = conn.execute(
+        "SELECT last_no FROM user_counters WHERE user_id = ? AND kind = ?", (user_id, kind)
+    ).fetchone()
+    if row is None:
+        table, column = ("tasks", "task_no") if kind == "task" else ("reminders", "reminder_no")
+        number = conn.execute(
+            f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table} WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+        conn.execute("INSERT INTO user_counters (user_id, kind, last_no) VALUES (?, ?, ?)", (user_id, kind, number))
+        return number
+    conn.execute("UPDATE user_counters SET last_no = last_no + 1 WHERE user_id = ? AND kind = ?", (user_id, kind))
+    return row[0] + 1
+
+
+def format_due_at(value: datetime) -> str:
+    """Store format for due_at (local time, second precision, sorts as text)"""
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value.replace(microsecond=0).isoformat()
+
+
+def parse_remind_time(remind_at: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Parse a remind_at string to an absolute datetime.
+
+    Supports:
+    - ISO 8601: "2025-11-02T14:30:00"
+    - Standard formats: "2025-11-02 14:30", "2025-11-02 14:30:00"
+    - Natural language: "明天上午10点", "2小时后", "下周一" (basic support)
+
+    Args:
+        remind_at: Time string
+        now: Reference time for relative phrases (default: now)
+
+    Returns:
+        datetime object or None if parsing fails
+    """
+    if not remind_at:
+        return None
+
+    now = now or datetime.now()
+    default = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    try:
+        # Try ISO 8601 / standard datetime formats first
+        return dateutil_parser.parse(remind_at, default=default)
+    except (ValueError, OverflowError):
+        pass
+
+    # Try natural language parsing (basic Chinese support)
+    try:
+        remind_at_lower = remind_at.lower()
+
+        # "X小时后" / "X hours later"
+        if "小时后" in remind_at or "hours later" in remind_at_lower:
+            hours = int(''.join(filter(str.isdigit, remind_at)))
+            return now + timedelta(hours=hours)
+
+        # "X分钟后" / "X minutes later"
+        if "分钟后" in remind_at or "minutes later" in remind_at_lower:
+            minutes = int(''.join(filter(str.isdigit, remind_at)))
+            return now + timedelta(minutes=minutes)
+
+        # "明天" / "tomorrow"
+        if "明天" in remind_at or "tomorrow" in remind_at_lower:
+            tomorrow = now + timedelta(days=1)
+            # Default to 9:00 AM tomorrow if no time specified
+            return tomorrow.replace(hour=9, minute=0, second=0, microsecond=0)
+
+        # "下周" / "next week"
+        if "下周" in remind_at or "next week" in remind_at_lower:
+            next_week = now + timedelta(days=7)
+            return next_week.replace(hour=9, minute=0, second=0, microsecond=0)
+
+        # If all else fails, try dateutil's fuzzy parsing
+        return dateutil_parser.parse(remind_at, fuzzy=True, default=default)
+
+    except (ValueError, OverflowError) as e:
+        logger.warning(f"[Personal Store] Failed to parse remind_at '{remind_at}': {e}")
+        return None
+
+
+def _legacy_due_at(remind_at: str, created_at: Optional[str]) -> Optional[str]:
+    """due_at for a reminder stored before normalization (relative to its creation time)"""
+    try:
+        reference = datetime.fromisoformat(created_at) if created_at else None
+    except ValueError:
+        reference = None
+    due = parse_remind_time(remind_at, now=reference)
+    return format_due_at(due) if due else None
+
+
+def _excerpt(content: str) -> str:
+    for line in content.split("\n"):
+        line = line.strip()
+        if line and not line.startswith("#") and not line.startswith("**"):
+            return line[:200]
+    return ""
+
+
+def parse_legacy_note(text: str) -> Dict[str, str]:
+    """
+    Parse a note written by the file-based save_personal_note.
+
+    Args:
+        text: Markdown note ("# title", "**Created:** ...", body between "---" rules)
+
+    Returns:
+        Dict with title, created_at and content
+    """
+    title_match = re.search(r"^# (.+)$", text, re.MULTILINE)
+    created_match = re.search(r"^\*\*Created:\*\*\s*(.+)$", text, re.MULTILINE)
+    parts = text.split("\n---\n")
+    content = parts[1].strip() if len(parts) >= 3 else text.strip()
+    created_at = created_match.group(1).strip() if created_match else ""
+    try:
+        created_at = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S").isoformat()
+    except ValueError:
+        pass
+    return {
+        "title": title_match.group(1).strip() if title_match else "Untitled",
+        "created_at": created_at,
+        "content": content,
+    }
+
+
+class PersonalStore:
+    """
+    Thread-safe SQLite store for personal tasks, reminders and notes.
+
+    Each thread gets its own connection; all connections share the WAL
+    database, so the store can be used from request handlers, the reminder
+    scheduler and other processes at the same time.
+    """
+
+    def __init__(self, db_path, busy_timeout_ms: int = 5000):
+        """
+        Initialize personal store (creates the schema if needed).
+
+        Args:
+            db_path: SQLite database file (e.g. user_contexts/personal.db)
+            busy_timeout_ms: How long a writer waits for the write lock
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._migrated: set = set()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[], None]] = []
+
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        self._upgrade_reminders()
+        try:
+            conn.executescript(_FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            # SQLite without FTS5 / trigram tokenizer (< 3.34): fall back to LIKE
+            logger.warning(f"[Personal Store] Full-text search unavailable, using LIKE: {e}")
+            self.fts_enabled = False
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _upgrade_reminders(self):
+        """Add columns missing from older databases and backfill due_at for pending reminders"""
+        with self.transaction() as conn:
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(reminders)")}
+            for column, definition in _REMINDER_UPGRADES.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE reminders ADD COLUMN {column} {definition}")
+            conn.execute(_DUE_INDEX)
+            updates = [
+                (_legacy_due_at(row["remind_at"], row["created_at"]), row["id"])
+                for row in conn.execute(
+                    "SELECT id, remind_at, created_at FROM reminders WHERE status = 'pending' AND due_at IS NULL"
+                )
+            ]
+            conn.executemany("UPDATE reminders SET due_at = ? WHERE id = ?", updates)
+        unparsed = sum(1 for due_at, _ in updates if due_at is None)
+        if unparsed:
+            logger.warning(f"[Personal Store] {unparsed} pending reminders have an unparseable remind_at")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction (BEGIN IMMEDIATE ... COMMIT, rolled back on error)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---------- tasks ----------
+
+    def create_task(self, user_id: int, title: str, description: str = "", priority: str = "medium",
+                    due_date: Optional[str] = None) -> Dict[str, Any]:
+        """Create a task; returns it with its per-user number as "id" """
+        with self.transaction() as conn:
+            task_no = _next_number(conn, user_id, "task")
+            conn.execute(
+                "INSERT INTO tasks (user_id, task_no, title, description, priority, due_date, status, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
+                (user_id, task_no, title, description or "", priority or "medium", due_date, _now())
+            )
+            row = conn.execute(
+                f"SELECT {_TASK_COLUMNS} FROM tasks WHERE user_id = ? AND task_no = ?", (user_id, task_no)
+            ).fetchone()
+        return _task_dict(row)
+
+    def list_tasks(self, user_id: int, status: str = "pending") -> List[Dict[str, Any]]:
+        """List a user's tasks ('pending', 'completed' or 'all'), oldest first"""
+        conn = self._connection()
+        if status == "all":
+            rows = conn.execute(
+                f"SELECT {_TASK_COLUMNS} FROM tasks WHERE user_id = ? ORDER BY task_no", (user_id,)
+            )
+        else:
+            rows = conn.execute(
+                f"SELECT {_TASK_COLUMNS} FROM tasks WHERE user_id = ? AND status = ? ORDER BY task_no",
+                (user_id, status)
+            )
+        return [_task_dict(row) for row in rows]
+
+    def complete_task(self, user_id: int, task_no: int) -> Optional[Dict[str, Any]]:
+        """Mark a task completed; returns the task or None if it does not exist"""
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = 'completed', completed_at = ? WHERE user_id = ? AND task_no = ?",
+                (_now(), user_id, task_no)
+            )
+            row = conn.execute(
+                f"SELECT {_TASK_COLUMNS} FROM tasks WHERE user_id = ? AND task_no = ?", (user_id, task_no)
+            ).fetchone()
+        return _task_dict(row) if row else None
+
+    def delete_task(self, user_id: int, task_no: int) -> bool:
+        """Delete a task; returns False if it does not exist"""
+        with self.transaction() as conn:
+            cursor = conn.execute("DELETE FROM tasks WHERE user_id = ? AND task_no = ?", (user_id, task_no))
+        return cursor.rowcount > 0
+
+    # ---------- reminders ----------
+
+    def create_reminder(self, user_id: int, text: str, remind_at: str,
+                        room_id: Optional[int] = None,
+                        due_at: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Create a pending reminder; returns it with its per-user number as "id".
+
+        Args:
+            due_at: Absolute due time (default: parse_remind_time(remind_at) now);
+                reminders whose time cannot be parsed are stored with due_at NULL
+                and never delivered
+        """
+        created = datetime.now()
+        due = due_at or parse_remind_time(remind_at, now=created)
+        with self.transaction() as conn:
+            reminder_no = _next_number(conn, user_id, "reminder")
+            cursor = conn.execute(
+                "INSERT INTO reminders (user_id, reminder_no, text, remind_at, due_at, room_id, status, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
+                (user_id, reminder_no, text, remind_at, format_due_at(due) if due else None, room_id,
+                 created.isoformat())
+            )
+            row = conn.execute(
+                f"SELECT {_REMINDER_COLUMNS} FROM reminders WHERE id = ?", (cursor.lastrowid,)
+            ).fetchone()
+        self._notify()
+        return _reminder_dict(row)
+
+    def list_reminders(self, user_id: int, status: str = "pending") -> List[Dict[str, Any]]:
+        """List a user's reminders ('pending', 'triggered' or 'all')"""
+        conn = self._connection()
+        if status == "all":
+            rows = conn.execute(
+                f"SELECT {_REMINDER_COLUMNS} FROM reminders WHERE user_id = ? ORDER BY reminder_no", (user_id,)
+            )
+        else:
+            rows = conn.execute(
+                f"SELECT {_REMINDER_COLUMNS} FROM reminders WHERE user_id = ? AND status = ? ORDER BY reminder_no",
+                (user_id, status)
+            )
+        return [_reminder_dict(row) for row in rows]
+
+    def pending_reminders(self) -> List[Dict[str, Any]]:
+        """All pending reminders across users (each with user_id and store_id)"""
+        rows = self._connection().execute(
+            f"SELECT {_REMINDER_COLUMNS} FROM reminders WHERE status = 'pending' ORDER BY id"
+        )
+        return [_reminder_dict(row) for row in rows]
+
+    def due_reminders(self, now: Optional[datetime] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """Pending reminders with due_at <= now, oldest first (range scan on the due index)"""
+        rows = self._connection().execute(
+            f"SELECT {_REMINDER_COLUMNS} FROM reminders"
+            " WHERE status = 'pending' AND due_at <= ? ORDER BY due_at, id LIMIT ?",
+            (format_due_at(now or datetime.now()), limit)
+        )
+        return [_reminder_dict(row) for row in rows]
+
+    def next_due_at(self) -> Optional[datetime]:
+        """Earliest due_at among pending reminders (None if there are none)"""
+        row = self._connection().execute(
+            "SELECT MIN(due_at) FROM reminders WHERE status = 'pending' AND due_at IS NOT NULL"
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row[0] else None
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Call callback (no arguments) whenever reminders are added in this process"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def _notify(self):
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"[Personal Store] Reminder listener failed: {e}")
+
+    def claim_reminder(self, store_id: int, delivery_id: str) -> bool:
+        """
+        Claim a pending reminder for delivery (pending -> sending).
+
+        Returns:
+            False if it was no longer pending (another scheduler claimed it)
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE reminders SET status = 'sending', delivery_id = ?, claimed_at = ?"
+                " WHERE id = ? AND status = 'pending'",
+                (delivery_id, _now(), store_id)
+            )
+        return cursor.rowcount > 0
+
+    def complete_delivery(self, store_id: int, delivery_id: str) -> bool:
+        """Mark a claimed reminder as triggered (only by the claim's owner)"""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE reminders SET status = 'triggered', triggered_at = ?"
+                " WHERE id = ? AND status = 'sending' AND delivery_id = ?",
+                (_now(), store_id, delivery_id)
+            )
+        return cursor.rowcount > 0
+
+    def release_reminder(self, store_id: int, delivery_id: str, max_attempts: int = 5) -> Optional[str]:
+        """
+        Give back a claim after a delivery that certainly did not arrive.
+
+        Returns:
+            New status ('pending', or 'failed' once max_attempts is reached),
+            None if the claim was not held
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE reminders SET attempts = attempts + 1,"
+                " status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END,"
+                " delivery_id = NULL, claimed_at = NULL"
+                " WHERE id = ? AND status = 'sending' AND delivery_id = ?",
+                (max_attempts, store_id, delivery_id)
+            )
+            if cursor.rowcount == 0:
+                return None
+            return conn.execute("SELECT status FROM reminders WHERE id = ?", (store_id,)).fetchone()[0]
+
+    def mark_delivery_ambiguous(self, store_id: int, delivery_id: str) -> bool:
+        """
+        Park a claimed reminder whose delivery may or may not have arrived.
+
+        'ambiguous' is terminal: neither due_reminders() nor
+        release_stale_claims() will pick it up again.
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE reminders SET status = 'ambiguous', triggered_at = ?"
+                " WHERE id = ? AND status = 'sending' AND delivery_id = ?",
+                (_now(), store_id, delivery_id)
+            )
+        return cursor.rowcount > 0
+
+    def release_stale_claims(self, older_than: timedelta) -> int:
+        """Return claims left in 'sending' by a crashed scheduler to 'pending'"""
+        cutoff = (datetime.now() - older_than).isoformat()
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE reminders SET status = 'pending', delivery_id = NULL, claimed_at = NULL"
+                " WHERE status = 'sending' AND claimed_at < ?",
+                (cutoff,)
+            )
+        return cursor.rowcount
+
+    def mark_reminder_triggered(self, store_id: int) -> bool:
+        """
+        Mark a pending reminder as triggered.
+
+        Returns:
+            False if it was no longer pending (another scheduler got it first)
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE reminders SET status = 'triggered', triggered_at = ? WHERE id = ? AND status = 'pending'",
+                (_now(), store_id)
+            )
+        return cursor.rowcount > 0
+
+    # ---------- notes ----------
+
+    def add_note(self, user_id: int, title: str, content: str,
+                 created_at: Optional[str] = None, legacy_path: Optional[str] = None) -> Dict[str, Any]:
+        """Store a note; returns note_id, title and created_at"""
+        created_at = created_at or _now()
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO notes (user_id, title, content, legacy_path, created_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id, title, content, legacy_path, created_at)
+            )
+        return {"note_id": cursor.lastrowid, "title": title, "created_at": created_at}
+
+    def search_notes(self, user_id: int, query: Optional[str] = None, max_results: int = 10) -> List[Dict[str, Any]]:
+        """
+        Search a user's notes.
+
+        Every whitespace-separated query term must appear in the title or
+        body (case-insensitive substring match). FTS results are ordered by
+        BM25 rank, LIKE/no-query results by creation time (newest first).
+
+        Args:
+            user_id: User ID
+            query: Optional search keywords (None lists the most recent notes)
+            max_results: Maximum results to return
+
+        Returns:
+            List of dicts with note_id, title, excerpt, created_at, path
+        """
+        conn = self._connection()
+        terms = query.split() if query else []
+        columns = "n.id, n.title, n.content, n.legacy_path, n.created_at"
+
+        if not terms:
+            rows = conn.execute(
+                f"SELECT {columns} FROM notes n WHERE n.user_id = ? ORDER BY n.created_at DESC, n.id DESC LIMIT ?",
+                (user_id, max_results)
+            ).fetchall()
+        elif self.fts_enabled and all(len(term) >= _MIN_FTS_TERM for term in terms):
+            phrases = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+            match = f'owner:"u{int(user_id)}u" AND {{title content}}:({phrases})'
+            rows = conn.execute(
+                f"SELECT {columns} FROM notes_fts f JOIN notes n ON n.id = f.rowid"
+                " WHERE notes_fts MATCH ? AND n.user_id = ? ORDER BY f.rank LIMIT ?",
+                (match, user_id, max_results)
+            ).fetchall()
+        else:
+            like = " AND ".join("(n.title LIKE ? ESCAPE '\\' OR n.content LIKE ? ESCAPE '\\')" for _ in terms)
+            params: List[Any] = [user_id]
+            for term in terms:
+                pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                params.extend([pattern, pattern])
+            rows = conn.execute(
+                f"SELECT {columns} FROM notes n WHERE n.user_id = ? AND {like}"
+                " ORDER BY n.created_at DESC, n.id DESC LIMIT ?",
+                (*params, max_results)
+            ).fetchall()
+
+        return [
+            {
+                "note_id": row["id"],
+                "title": row["title"],
+                "excerpt": _excerpt(row["content"]),
+                "created_at": row["created_at"],
+                "path": row["legacy_path"] or f"note#{row['id']}",
+            }
+            for row in rows
+        ]
+
+    # ---------- legacy migration ----------
+
+    def migrate_user(self, user_id: int, user_dir) -> Optional[Dict[str, int]]:
+        """
+        Import a user's legacy tasks.json, reminders.json and notes/*.md once.
+
+        Args:
+            user_id: User ID
+            user_dir: Legacy directory (user_contexts/user_N)
+
+        Returns:
+            Counts of imported tasks/reminders/notes, or None if the user was
+            already migrated
+        """
+        if user_id in self._migrated:
+            return None
+        user_dir = Path(user_dir)
+        conn = self._connection()
+        if conn.execute("SELECT 1 FROM migrations WHERE user_id = ?", (user_id,)).fetchone():
+            with self._lock:
+                self._migrated.add(user_id)
+            return None
+
+        tasks, next_task = self._read_legacy_json(user_dir / "tasks.json", "tasks")
+        reminders, next_reminder = self._read_legacy_json(user_dir / "reminders.json", "reminders")
+        notes = []
+        notes_dir = user_dir / "notes"
+        if notes_dir.is_dir():
+            for note_file in sorted(notes_dir.glob("*.md")):
+                try:
+                    notes.append((note_file, parse_legacy_note(note_file.read_text(encoding="utf-8"))))
+                except (OSError, UnicodeDecodeError) as e:
+                    logger.warning(f"[Personal Store] Skipping unreadable note {note_file}: {e}")
+
+        with self.transaction() as conn:
+            # Re-check inside the write lock: another process may have migrated meanwhile
+            if conn.execute("SELECT 1 FROM migrations WHERE user_id = ?", (user_id,)).fetchone():
+                counts = None
+            else:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO tasks (user_id, task_no, title, description, priority, due_date,"
+                    " status, created_at, completed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (user_id, t["id"], t.get("title", ""), t.get("description") or "",
+                         t.get("priority") or "medium", t.get("due_date"), t.get("status", "pending"),
+                         t.get("created_at") or _now(), t.get("completed_at"))
+                        for t in tasks if "id" in t
+                    ]
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO reminders (user_id, reminder_no, text, remind_at, due_at, room_id,"
+                    " status, created_at, triggered_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (user_id, r["id"], r.get("text", ""), r.get("remind_at", ""),
+                         _legacy_due_at(r.get("remind_at", ""), r.get("created_at")), r.get("room_id"),
+                         r.get("status", "pending"), r.get("created_at") or _now(), r.get("triggered_at"))
+                        for r in reminders if "id" in r
+                    ]
+                )
+                conn.executemany(
+                    "INSERT INTO notes (user_id, title, content, legacy_path, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (user_id, note["title"], note["content"], f"{user_dir.name}/notes/{path.name}",
+                         note["created_at"] or _now())
+                        for path, note in notes
+                    ]
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO user_counters (user_id, kind, last_no) VALUES (?, ?, ?)",
+                    [
+                        (user_id, kind, max([next_no - 1] + [item["id"] for item in items if "id" in item]))
+                        for kind, items, next_no in (("task", tasks, next_task), ("reminder", reminders, next_reminder))
+                        if items or next_no > 1
+                    ]
+                )
+                counts = {"tasks": len(tasks), "reminders": len(reminders), "notes": len(notes)}
+                conn.execute(
+                    "INSERT INTO migrations (user_id, migrated_at, tasks, reminders, notes) VALUES (?, ?, ?, ?, ?)",
+                    (user_id, _now(), counts["tasks"], counts["reminders"], counts["notes"])
+                )
+
+        with self._lock:
+            self._migrated.add(user_id)
+        if counts and any(counts.values()):
+            logger.info(f"[Personal Store] Migrated user {user_id}: {counts}")
+        if counts and counts["reminders"]:
+            self._notify()
+        return counts
+
+    @staticmethod
+    def _read_legacy_json(path: Path, key: str) -> Tuple[List[Dict[str, Any]], int]:
+        """Items and next_id of a legacy tasks.json/reminders.json"""
+        if not path.exists():
+            return [], 1
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data.get(key, []), int(data.get("next_id", 1))
+        except (OSError, ValueError) as e:
+            logger.warning(f"[Personal Store] Skipping unreadable {path}: {e}")
+            return [], 1
+
+    def migrate_context_dir(self, context_dir) -> Dict[str, int]:
+        """
+        Import every legacy user_N directory under context_dir (once per user).
+
+        Args:
+            context_dir: user_contexts directory
+
+        Returns:
+            Dict with users migrated and totals of tasks, reminders and notes
+        """
+        totals = {"users": 0, "tasks": 0, "reminders": 0, "notes": 0}
+        context_dir = Path(context_dir)
+        if not context_dir.is_dir():
+            return totals
+        for user_dir in context_dir.iterdir():
+            match = re.fullmatch(r"user_(\d+)", user_dir.name)
+            if not match or not user_dir.is_dir():
+                continue
+            counts = self.migrate_user(int(match.group(1)), user_dir)
+            if counts:
+                totals["users"] += 1
+                for key, value in counts.items():
+                    totals[key] += value
+        return totals
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dict with row counts, migrated users and whether FTS is enabled
+        """
+        conn = self._connection()
+        next_due = self.next_due_at()
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("tasks", "reminders", "notes", "migrations")
+        }
+        return {
+            "db_path": str(self.db_path),
+            "fts_enabled": self.fts_enabled,
+            "tasks": counts["tasks"],
+            "reminders": counts["reminders"],
+            "pending_reminders": conn.execute(
+                "SELECT COUNT(*) FROM reminders WHERE status = 'pending'"
+            ).fetchone()[0],
+            "failed_reminders": conn.execute(
+                "SELECT COUNT(*) FROM reminders WHERE status = 'failed'"
+            ).fetchone()[0],
+            "ambiguous_reminders": conn.execute(
+                "SELECT COUNT(*) FROM reminders WHERE status = 'ambiguous'"
+            ).fetchone()[0],
+            "next_due_at": next_due.isoformat() if next_due else None,
+            "notes": counts["notes"],
+            "migrated_users": counts["migrations"],
+        }
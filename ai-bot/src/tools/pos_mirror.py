@@ -0,0 +1,659 @@
+"""
+POS Mirror - Local SQLite copy of the POS tables behind the analytics RPCs
+
+Every analytics/menu answer used to be a round-trip to Supabase, although
+the data it reads (rsp_orders, rsp_order_items, rsp_tables, rsp_stations and
+the product_cost_analysis view) only grows by appending. PosMirror keeps a
+local copy of exactly the columns those functions read and answers the same
+16 RPC contracts (supabase/migrations/*.sql: same parameters and defaults,
+same output columns, filters and ordering) with local SQL:
+
+- sync() pulls order and order item rows past a per-table id watermark, in
+  keyset pages; the small dimension tables are replaced in full each sync
+- Order timestamps are converted once at sync time to the Asia/Shanghai date
+  and hour the RPCs group by (local_date / local_hour, indexed)
+- The mirror is fresh when every table synced within max_age seconds; sync
+  state lives in the database, so `scripts/sync_pos_mirror.py` (cron or
+  --loop) can keep it current for the app process
+- rpc_handlers() plugs the local engine into scripts/postgrest_stub.py as a
+  network-free stand-in that computes real aggregates
+
+SupabaseTools answers an RPC from the mirror when it is configured
+(POS_MIRROR_PATH) and fresh, and from Supabase otherwise.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Asia/Shanghai has no DST, so a fixed offset matches AT TIME ZONE 'Asia/Shanghai'
+SHANGHAI = timezone(timedelta(hours=8), "Asia/Shanghai")
+PAGE_SIZE = 1000  # PostgREST's default max-rows
+MAX_AGE_SECONDS = 900.0
+
+
+@dataclass(frozen=True)
+class MirrorTable:
+    """A mirrored table: the columns the RPCs read and how it is synced"""
+    name: str
+    columns: Tuple[str, ...]
+    key: str = "id"  # keyset paging column (and watermark when incremental)
+    incremental: bool = True  # append-only: fetch rows past the watermark; else replace in full
+
+
+MIRROR_TABLES: Tuple[MirrorTable, ...] = (
+    MirrorTable("rsp_orders", ("id", "order_type", "status", "total", "table_id", "ordered_at")),
+    MirrorTable("rsp_order_items", ("id", "order_id", "item_name", "quantity", "unit_price", "total_price",
+                                    "station_id", "is_return")),
+    MirrorTable("rsp_tables", ("id", "zone", "table_no", "capacity", "active"), incremental=False),
+    MirrorTable("rsp_stations", ("id", "name", "name_english"), incremental=False),
+    MirrorTable("product_cost_analysis", ("product_name", "total_ingredient_cost", "margin_percentage"),
+                key="product_name", incremental=False),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rsp_orders (
+    id PRIMARY KEY, order_type TEXT, status TEXT, total REAL, table_id, ordered_at TEXT,
+    local_date TEXT, local_hour INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_orders_local_date ON rsp_orders(local_date);
+CREATE TABLE IF NOT EXISTS rsp_order_items (
+    id PRIMARY KEY, order_id, item_name TEXT, quantity INTEGER, unit_price REAL, total_price REAL,
+    station_id, is_return INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_order_items_order ON rsp_order_items(order_id);
+CREATE TABLE IF NOT EXISTS rsp_tables (id PRIMARY KEY, zone TEXT, table_no TEXT, capacity INTEGER, active INTEGER);
+CREATE TABLE IF NOT EXISTS rsp_stations (id PRIMARY KEY, name TEXT, name_english TEXT);
+CREATE TABLE IF NOT EXISTS product_cost_analysis (
+    product_name TEXT, total_ingredient_cost REAL, margin_percentage REAL
+);
+CREATE TABLE IF NOT EXISTS mirror_state (
+    table_name TEXT PRIMARY KEY, watermark TEXT, row_count INTEGER, synced_at REAL
+);
+"""
+
+# Parameter defaults per RPC, as declared in the migrations ("today" =
+# CURRENT_DATE, "month_ago" = CURRENT_DATE - 30 days, None = required)
+RPC_PARAMS: Dict[str, Dict[str, Any]] = {
+    "get_daily_revenue": {"target_date": "today"},
+    "get_revenue_by_zone": {"start_date": "today", "end_date": "today"},
+    "get_top_dishes": {"start_date": "today", "end_date": "today", "top_n": 10},
+    "get_station_performance": {"start_date": "today", "end_date": "today"},
+    "get_hourly_revenue": {"target_date": "today"},
+    "get_table_turnover": {"start_date": "today", "end_date": "today"},
+    "get_return_analysis": {"start_date": "today", "end_date": "today"},
+    "get_order_type_distribution": {"start_date": "today", "end_date": "today"},
+    "get_revenue_trend": {"start_date": None, "end_date": None},
+    "get_quick_stats": {"target_date": "today"},
+    "get_menu_profitability": {"start_date": "month_ago", "end_date": "today", "min_quantity": 10},
+    "get_top_profitable_dishes": {"start_date": "month_ago", "end_date": "today", "top_n": 10},
+    "get_low_profit_dishes": {"start_date": "month_ago", "end_date": "today", "bottom_n": 10},
+    "get_dish_profit": {"start_date": "month_ago", "end_date": "today"},
+    "get_cost_coverage_rate": {"start_date": "month_ago", "end_date": "today"},
+    "get_dishes_missing_cost": {"start_date": "month_ago", "end_date": "today", "top_n": 20},
+}
+
+_IN_RANGE = "o.local_date BETWEEN :start_date AND :end_date"
+_SOLD_ITEMS = f"""
+    FROM rsp_order_items oi
+    JOIN rsp_orders o ON oi.order_id = o.id
+    LEFT JOIN product_cost_analysis pc ON TRIM(LOWER(oi.item_name)) = TRIM(LOWER(pc.product_name))
+    WHERE {_IN_RANGE}
+        AND oi.total_price > 0
+        AND oi.is_return IS NOT 1"""
+_ITEM_COST = "COALESCE(SUM(oi.quantity * pc.total_ingredient_cost), 0)"
+_DISH_PROFIT = f"""
+        TRIM(oi.item_name) AS product_name,
+        SUM(oi.quantity) AS quantity_sold,
+        SUM(oi.total_price) AS total_revenue,
+        {_ITEM_COST} AS total_cost,
+        SUM(oi.total_price) - {_ITEM_COST} AS gross_profit,
+        CASE WHEN SUM(oi.total_price) > 0
+            THEN (SUM(oi.total_price) - {_ITEM_COST}) / SUM(oi.total_price) * 100
+            ELSE 0 END AS profit_margin"""
+
+# Local SQL per RPC (get_quick_stats is assembled in Python)
+QUERIES: Dict[str, str] = {
+    "get_daily_revenue": """
+        SELECT COALESCE(SUM(total), 0) AS total_revenue,
+               COUNT(*) AS order_count,
+               COALESCE(AVG(NULLIF(total, 0)), 0) AS avg_order_value,
+               COUNT(*) FILTER (WHERE status = 'completed') AS completed_orders,
+               COUNT(*) FILTER (WHERE status = 'pending') AS pending_orders,
+               COUNT(*) FILTER (WHERE status = 'cancelled') AS cancelled_orders
+        FROM rsp_orders
+        WHERE local_date = :target_date AND total > 0""",
+    "get_revenue_by_zone": f"""
+        SELECT COALESCE(t.zone, '未知区域') AS zone,
+               SUM(o.total) AS total_revenue,
+               COUNT(o.id) AS order_count,
+               AVG(o.total) AS avg_order_value
+        FROM rsp_orders o
+        LEFT JOIN rsp_tables t ON o.table_id = t.id
+        WHERE {_IN_RANGE} AND o.total > 0
+        GROUP BY t.zone
+        ORDER BY total_revenue DESC""",
+    "get_top_dishes": f"""
+        SELECT oi.item_name AS item_name,
+               SUM(oi.quantity) AS total_quantity,
+               SUM(oi.total_price) AS total_revenue,
+               COUNT(DISTINCT oi.order_id) AS order_count,
+               AVG(oi.unit_price) AS avg_price
+        FROM rsp_order_items oi
+        JOIN rsp_orders o ON oi.order_id = o.id
+        WHERE {_IN_RANGE} AND oi.total_price > 0 AND oi.is_return = 0
+        GROUP BY oi.item_name
+        ORDER BY total_quantity DESC
+        LIMIT :top_n""",
+    "get_station_performance": f"""
+        SELECT COALESCE(s.name, '未分配') AS station_name,
+               COALESCE(s.name_english, 'unassigned') AS station_name_english,
+               SUM(oi.quantity) AS total_items,
+               SUM(oi.total_price) AS total_revenue,
+               AVG(oi.unit_price) AS avg_item_price,
+               COUNT(DISTINCT oi.order_id) AS order_count
+        FROM rsp_order_items oi
+        LEFT JOIN rsp_stations s ON oi.station_id = s.id
+        JOIN rsp_orders o ON oi.order_id = o.id
+        WHERE {_IN_RANGE} AND oi.total_price > 0 AND oi.is_return = 0
+        GROUP BY s.name, s.name_english
+        ORDER BY total_revenue DESC""",
+    "get_hourly_revenue": """
+        SELECT local_hour AS hour_of_day,
+               COUNT(*) AS order_count,
+               SUM(total) AS total_revenue,
+               AVG(total) AS avg_order_value
+        FROM rsp_orders
+        WHERE local_date = :target_date AND total > 0
+        GROUP BY local_hour
+        ORDER BY hour_of_day""",
+    "get_table_turnover": """
+        SELECT t.zone AS zone,
+               t.table_no AS table_no,
+               COUNT(o.id) AS order_count,
+               COALESCE(SUM(o.total), 0) AS total_revenue,
+               COALESCE(AVG(o.total), 0) AS avg_order_value,
+               t.capacity AS capacity
+        FROM rsp_tables t
+        LEFT JOIN rsp_orders o ON t.id = o.table_id
+            AND o.local_date BETWEEN :start_date AND :end_date
+            AND o.total > 0
+        WHERE t.active = 1
+        GROUP BY t.zone, t.table_no, t.capacity
+        ORDER BY order_count DESC""",
+    "get_return_analysis": f"""
+        WITH return_items AS (
+            SELECT oi.item_name, COUNT(*) AS return_count, SUM(oi.quantity) AS return_quantity,
+                   SUM(oi.total_price) AS return_revenue_loss
+            FROM rsp_order_items oi
+            JOIN rsp_orders o ON oi.order_id = o.id
+            WHERE {_IN_RANGE} AND oi.is_return = 1
+            GROUP BY oi.item_name
+        ),
+        total_items AS (
+            SELECT oi.item_name, COUNT(DISTINCT oi.order_id) AS total_orders
+            FROM rsp_order_items oi
+            JOIN rsp_orders o ON oi.order_id = o.id
+            WHERE {_IN_RANGE}
+            GROUP BY oi.item_name
+        )
+        SELECT r.item_name AS item_name,
+               r.return_count AS return_count,
+               r.return_quantity AS return_quantity,
+               r.return_revenue_loss AS return_revenue_loss,
+               t.total_orders AS total_orders_with_item,
+               ROUND(r.return_count * 1.0 / NULLIF(t.total_orders, 0) * 100, 2) AS return_rate
+        FROM return_items r
+        JOIN total_items t ON r.item_name = t.item_name
+        ORDER BY return_rate DESC""",
+    "get_order_type_distribution": f"""
+        WITH order_stats AS (
+            SELECT o.order_type, COUNT(*) AS order_count, SUM(o.total) AS total_revenue,
+                   AVG(o.total) AS avg_order_value
+            FROM rsp_orders o
+            WHERE {_IN_RANGE} AND o.total > 0
+            GROUP BY o.order_type
+        ),
+        total_orders AS (SELECT SUM(order_count) AS total_count FROM order_stats)
+        SELECT os.order_type AS order_type,
+               os.order_count AS order_count,
+               os.total_revenue AS total_revenue,
+               os.avg_order_value AS avg_order_value,
+               ROUND(os.order_count * 1.0 / NULLIF(t.total_count, 0) * 100, 2) AS percentage_of_total
+        FROM order_stats os, total_orders t
+        ORDER BY os.order_count DESC""",
+    "get_revenue_trend": """
+        SELECT local_date AS date,
+               SUM(total) AS total_revenue,
+               COUNT(*) AS order_count,
+               AVG(total) AS avg_order_value,
+               COUNT(*) FILTER (WHERE status = 'completed') AS completed_orders
+        FROM rsp_orders
+        WHERE local_date BETWEEN :start_date AND :end_date AND total > 0
+        GROUP BY local_date
+        ORDER BY date""",
+    "get_menu_profitability": f"""
+        WITH menu_sales AS (
+            SELECT TRIM(oi.item_name) AS dish_name,
+                   SUM(oi.quantity) AS total_quantity,
+                   SUM(oi.total_price) AS total_revenue,
+                   AVG(oi.unit_price) AS avg_price,
+                   COALESCE(pc.total_ingredient_cost, 0) AS unit_cost
+            {_SOLD_ITEMS}
+            GROUP BY TRIM(oi.item_name), pc.total_ingredient_cost, pc.margin_percentage
+            HAVING SUM(oi.quantity) >= :min_quantity
+        ),
+        averages AS (
+            SELECT AVG(total_quantity) AS avg_quantity,
+                   AVG((total_revenue - unit_cost * total_quantity) / NULLIF(total_revenue, 0) * 100)
+                       AS avg_profit_margin
+            FROM menu_sales
+        ),
+        ranked_dishes AS (
+            SELECT dish_name, total_quantity, total_revenue, avg_price,
+                   unit_cost * total_quantity AS estimated_total_cost,
+                   total_revenue - unit_cost * total_quantity AS gross_profit_calc,
+                   CASE WHEN total_revenue > 0
+                       THEN (total_revenue - unit_cost * total_quantity) / total_revenue * 100
+                       ELSE 0 END AS profit_margin_calc,
+                   total_quantity * 1.0 / NULLIF(avg_quantity, 0) * 100 AS popularity_pct,
+                   CASE WHEN total_revenue > 0
+                       THEN (total_revenue - unit_cost * total_quantity) / total_revenue * 100
+                            / NULLIF(avg_profit_margin, 0) * 100
+                       ELSE 0 END AS profitability_pct,
+                   RANK() OVER (ORDER BY total_revenue - unit_cost * total_quantity DESC) AS profit_rank,
+                   RANK() OVER (ORDER BY total_quantity DESC) AS quantity_rank
+            FROM menu_sales, averages
+        )
+        SELECT dish_name AS product_name,
+               total_quantity AS quantity_sold,
+               total_revenue,
+               avg_price AS avg_selling_price,
+               estimated_total_cost AS estimated_cost,
+               gross_profit_calc AS gross_profit,
+               profit_margin_calc AS profit_margin,
+               popularity_pct AS popularity_score,
+               profitability_pct AS profitability_score,
+               CASE
+                   WHEN popularity_pct >= 100 AND profitability_pct >= 100 THEN '⭐ Stars'
+                   WHEN popularity_pct < 100 AND profitability_pct >= 100 THEN '🧩 Puzzles'
+                   WHEN popularity_pct >= 100 AND profitability_pct < 100 THEN '🐴 Plowhorses'
+                   ELSE '🐕 Dogs'
+               END AS category,
+               profit_rank AS rank_by_profit,
+               quantity_rank AS rank_by_quantity
+        FROM ranked_dishes
+        ORDER BY gross_profit_calc DESC""",
+    "get_top_profitable_dishes": f"""
+        SELECT {_DISH_PROFIT}
+        {_SOLD_ITEMS}
+        GROUP BY TRIM(oi.item_name)
+        ORDER BY gross_profit DESC
+        LIMIT :top_n""",
+    "get_low_profit_dishes": f"""
+        SELECT {_DISH_PROFIT},
+               CASE
+                   WHEN SUM(oi.quantity) < 10 THEN '考虑下架（销量过低）'
+                   WHEN SUM(oi.total_price) - {_ITEM_COST} < 0 THEN '亏损菜品！立即调价或下架'
+                   WHEN (SUM(oi.total_price) - {_ITEM_COST}) / SUM(oi.total_price) < 0.2
+                       THEN '利润率过低，建议提价或降成本'
+                   ELSE '关注并优化'
+               END AS recommendation
+        {_SOLD_ITEMS}
+        GROUP BY TRIM(oi.item_name)
+        HAVING SUM(oi.quantity) >= 5
+        ORDER BY gross_profit ASC
+        LIMIT :bottom_n""",
+    "get_dish_profit": f"""
+        SELECT {_DISH_PROFIT},
+               AVG(oi.unit_price) AS avg_selling_price,
+               COALESCE(MAX(pc.total_ingredient_cost), 0) AS unit_cost
+        {_SOLD_ITEMS}
+        GROUP BY TRIM(oi.item_name)
+        ORDER BY gross_profit DESC""",
+    "get_cost_coverage_rate": f"""
+        WITH sales_data AS (
+            SELECT TRIM(oi.item_name) AS dish_name,
+                   SUM(oi.total_price) AS revenue,
+                   CASE WHEN pc.product_name IS NOT NULL THEN 1 ELSE 0 END AS has_cost
+            {_SOLD_ITEMS}
+            GROUP BY TRIM(oi.item_name), pc.product_name
+        )
+        SELECT COUNT(*) AS total_dishes,
+               SUM(has_cost) AS dishes_with_cost_data,
+               ROUND(SUM(has_cost) * 1.0 / NULLIF(COUNT(*), 0) * 100, 2) AS coverage_rate,
+               SUM(CASE WHEN has_cost = 1 THEN revenue ELSE 0 END) AS total_revenue_covered,
+               SUM(CASE WHEN has_cost = 0 THEN revenue ELSE 0 END) AS total_revenue_uncovered,
+               ROUND(SUM(CASE WHEN has_cost = 1 THEN revenue ELSE 0 END) / NULLIF(SUM(revenue), 0) * 100, 2)
+                   AS revenue_coverage_rate
+        FROM sales_data""",
+    "get_dishes_missing_cost": f"""
+        SELECT TRIM(oi.item_name) AS product_name,
+               SUM(oi.quantity) AS quantity_sold,
+               SUM(oi.total_price) AS total_revenue,
+               AVG(oi.unit_price) AS avg_selling_price,
+               COUNT(DISTINCT oi.order_id) AS order_count
+        {_SOLD_ITEMS}
+            AND pc.product_name IS NULL
+        GROUP BY TRIM(oi.item_name)
+        ORDER BY total_revenue DESC
+        LIMIT :top_n""",
+}
+
+
+def local_time(ordered_at: Any) -> Tuple[Optional[str], Optional[int]]:
+    """Asia/Shanghai (date, hour) of a timestamptz value (naive values are taken as UTC)"""
+    if not ordered_at:
+        return None, None
+    moment = datetime.fromisoformat(str(ordered_at).replace("Z", "+00:00").replace(" ", "T"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(SHANGHAI)
+    return moment.date().isoformat(), moment.hour
+
+
+class PosMirror:
+    """
+    Local mirror of the POS tables with a SQL engine for the analytics RPCs (see module docstring).
+
+    Thread-safe: one connection, serialized by a lock.
+    """
+
+    def __init__(
+        self,
+        db_path: str = ":memory:",
+        max_age: float = MAX_AGE_SECONDS,
+        page_size: int = PAGE_SIZE,
+        today: Optional[Callable[[], date]] = None
+    ):
+        """
+        Initialize the mirror.
+
+        Args:
+            db_path: SQLite database file (":memory:" for tests and the stand-in)
+            max_age: Seconds after the last complete sync during which the mirror counts as fresh
+            page_size: Rows per request while syncing
+            today: Callable returning CURRENT_DATE for parameter defaults (tests)
+        """
+        self.db_path = db_path
+        self.max_age = max_age
+        self.page_size = page_size
+        self._today = today or date.today
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._stats = {"queries": 0, "query_errors": 0, "query_ms": 0.0, "stale": 0,
+                       "syncs": 0, "sync_errors": 0, "rows_synced": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["PosMirror"]:
+        """Mirror at POS_MIRROR_PATH (max age from POS_MIRROR_MAX_AGE_SECONDS), or None if unset"""
+        path = os.environ.get("POS_MIRROR_PATH")
+        if not path:
+            return None
+        return cls(path, max_age=float(os.environ.get("POS_MIRROR_MAX_AGE_SECONDS", MAX_AGE_SECONDS)))
+
+    # ----------------------------------------------------------------- sync
+
+    async def sync(self, client) -> Dict[str, Any]:
+        """
+        Pull new rows from Supabase.
+
+        Args:
+            client: AsyncPostgrestClient
+
+        Returns:
+            Dict with per-table fetched row counts and elapsed_ms
+        """
+        started = time.perf_counter()
+        fetched = {}
+        try:
+            for table in MIRROR_TABLES:
+                fetched[table.name] = await self._sync_table(client, table)
+        except Exception:
+            with self._lock:
+                self._stats["sync_errors"] += 1
+            raise
+        with self._lock:
+            self._stats["syncs"] += 1
+            self._stats["rows_synced"] += sum(fetched.values())
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"[POS Mirror] Synced {sum(fetched.values())} rows in {elapsed_ms}ms: {fetched}")
+        return {"fetched": fetched, "elapsed_ms": elapsed_ms}
+
+    async def _sync_table(self, client, table: MirrorTable) -> int:
+        """Keyset-page one table; incremental tables resume after the stored watermark"""
+        watermark = self._watermark(table.name) if table.incremental else None
+        collected: List[Dict[str, Any]] = []
+        fetched = 0
+        while True:
+            query = client.table(table.name).select(",".join(table.columns)).order(table.key).limit(self.page_size)
+            if watermark is not None:
+                query = query.gt(table.key, watermark)
+            rows = (await query.execute()).data or []
+            fetched += len(rows)
+            if rows:
+                watermark = rows[-1][table.key]
+                if table.incremental:
+                    # Each page is committed with its watermark, so an interrupted sync resumes there
+                    await asyncio.to_thread(self._apply, table, rows, watermark, False, False)
+                else:
+                    collected.extend(rows)
+            if len(rows) < self.page_size:
+                break
+        if table.incremental:
+            await asyncio.to_thread(self._apply, table, [], watermark, False)
+        else:
+            await asyncio.to_thread(self._apply, table, collected, None, True)
+        return fetched
+
+    def load(self, tables: Dict[str, List[Dict[str, Any]]]):
+        """Replace the mirrored tables with in-memory rows (stand-in and tests) and mark them synced"""
+        for table in MIRROR_TABLES:
+            rows = tables.get(table.name, [])
+            watermark = max((row[table.key] for row in rows), default=None) if table.incremental else None
+            self._apply(table, rows, watermark, True)
+
+    def _apply(self, table: MirrorTable, rows: List[Dict[str, Any]], watermark: Any, replace: bool,
+               synced: bool = True):
+        """
+        Write one page (upsert) or a whole table (replace) and its sync state in one transaction.
+
+        synced=False keeps the table's previous synced_at (a page of an unfinished sync).
+        """
+        columns = list(table.columns)
+        values = []
+        for row in rows:
+            value = [row.get(column) for column in columns]
+            if table.name == "rsp_orders":
+                value.extend(local_time(row.get("ordered_at")))
+            values.append(value)
+        if table.name == "rsp_orders":
+            columns += ["local_date", "local_hour"]
+
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute(f"DELETE FROM {table.name}")
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {table.name} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                values
+            )
+            count = self._conn.execute(f"SELECT COUNT(*) FROM {table.name}").fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO mirror_state (table_name, watermark, row_count, synced_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(table_name) DO UPDATE SET watermark = excluded.watermark, "
+                "row_count = excluded.row_count, synced_at = COALESCE(excluded.synced_at, mirror_state.synced_at)",
+                (table.name, None if watermark is None else str(watermark), count, time.time() if synced else None)
+            )
+
+    def _watermark(self, table_name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT watermark FROM mirror_state WHERE table_name = ?", (table_name,)
+            ).fetchone()
+        return row["watermark"] if row else None
+
+    # ------------------------------------------------------------ freshness
+
+    def last_synced_at(self) -> Optional[float]:
+        """Time of the oldest table sync (None until every table synced once)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT table_name, synced_at FROM mirror_state").fetchall()
+        synced = {row["table_name"]: row["synced_at"] for row in rows}
+        if any(table.name not in synced for table in MIRROR_TABLES):
+            return None
+        return min(synced[table.name] for table in MIRROR_TABLES)
+
+    def is_fresh(self) -> bool:
+        """True if every table synced within max_age seconds"""
+        synced_at = self.last_synced_at()
+        return synced_at is not None and time.time() - synced_at <= self.max_age
+
+    def can_answer(self, function: str) -> bool:
+        """True if the function is implemented locally and the mirror is fresh (stale checks are counted)"""
+        if function not in RPC_PARAMS:
+            return False
+        if self.is_fresh():
+            return True
+        with self._lock:
+            self._stats["stale"] += 1
+        return False
+
+    # ---------------------------------------------------------------- query
+
+    def _params(self, function: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply the function's declared defaults; dates become YYYY-MM-DD strings"""
+        declared = RPC_PARAMS[function]
+        unknown = set(params or {}) - set(declared)
+        if unknown:
+            raise ValueError(f"{function} has no parameter {sorted(unknown)[0]}")
+        today = self._today()
+        resolved = {}
+        for name, default in declared.items():
+            value = (params or {}).get(name)
+            if value is None:
+                if default is None:
+                    raise ValueError(f"{function} requires {name}")
+                value = {"today": today, "month_ago": today - timedelta(days=30)}.get(default, default)
+            if name.endswith("_date"):
+                value = date.fromisoformat(str(value)[:10]).isoformat()
+            else:
+                value = int(value)
+            resolved[name] = value
+        return resolved
+
+    def call(self, function: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Run an analytics RPC locally.
+
+        Args:
+            function: RPC name (one of the 16 in RPC_PARAMS)
+            params: RPC parameters as sent to PostgREST
+
+        Returns:
+            Rows with the function's output columns, in its order
+
+        Raises:
+            KeyError: Unknown function
+            ValueError: Unknown or missing parameter, malformed date
+        """
+        if function not in RPC_PARAMS:
+            raise KeyError(f"{function} is not implemented by the POS mirror")
+        started = time.perf_counter()
+        try:
+            resolved = self._params(function, params)
+            with self._lock:
+                if function == "get_quick_stats":
+                    rows = self._quick_stats(resolved["target_date"])
+                else:
+                    rows = [dict(row) for row in self._conn.execute(QUERIES[function], resolved)]
+        except Exception as e:
+            with self._lock:
+                self._stats["query_errors"] += 1
+            logger.warning(f"[POS Mirror] {function} failed: {e}")
+            raise
+        with self._lock:
+            self._stats["queries"] += 1
+            self._stats["query_ms"] += (time.perf_counter() - started) * 1000
+        return rows
+
+    def _quick_stats(self, target_date: str) -> List[Dict[str, Any]]:
+        """get_quick_stats: six formatted metric rows (caller holds the lock)"""
+        revenue, orders, average = self._conn.execute(
+            "SELECT COALESCE(SUM(total), 0), COUNT(*), COALESCE(AVG(total), 0) FROM rsp_orders "
+            "WHERE local_date = ? AND total > 0", (target_date,)
+        ).fetchone()
+        top_dish = self._conn.execute(
+            "SELECT item_name FROM rsp_order_items oi JOIN rsp_orders o ON oi.order_id = o.id "
+            "WHERE o.local_date = ? AND o.total > 0 AND oi.is_return = 0 "
+            "GROUP BY item_name ORDER BY SUM(quantity) DESC LIMIT 1", (target_date,)
+        ).fetchone()
+        busiest = self._conn.execute(
+            "SELECT local_hour FROM rsp_orders WHERE local_date = ? AND total > 0 "
+            "GROUP BY local_hour ORDER BY COUNT(*) DESC LIMIT 1", (target_date,)
+        ).fetchone()
+        total_tables, active_tables = self._conn.execute(
+            "SELECT COUNT(*), COUNT(*) FILTER (WHERE active = 1) FROM rsp_tables"
+        ).fetchone()
+        values = [
+            ("今日营业额", f"¥{revenue:.2f}", "所有订单的总金额"),
+            ("订单数量", str(orders), "今日总订单数"),
+            ("平均订单金额", f"¥{average:.2f}", "平均每单金额"),
+            ("最畅销菜品", top_dish[0] if top_dish else "暂无数据", "销量最高的菜品"),
+            ("最忙时段", f"{busiest[0]}:00" if busiest else "暂无数据", "订单最多的小时"),
+            ("餐桌数量", f"{active_tables}/{total_tables}", "活跃餐桌/总餐桌"),
+        ]
+        return [{"metric": metric, "value": value, "description": description}
+                for metric, value, description in values]
+
+    def rpc_handlers(self) -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+        """Handlers for scripts/postgrest_stub.py computing every RPC from the mirrored rows"""
+        return {name: (lambda params, name=name: self.call(name, params)) for name in RPC_PARAMS}
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get mirror statistics.
+
+        Returns:
+            Dict with path, max_age, fresh, age_seconds, per-table rows /
+            watermark / synced_at, queries, query_errors, avg_query_ms,
+            stale (fresh checks that fell back to Supabase), syncs,
+            sync_errors and rows_synced
+        """
+        synced_at = self.last_synced_at()
+        with self._lock:
+            tables = {
+                row["table_name"]: {"rows": row["row_count"], "watermark": row["watermark"],
+                                    "synced_at": row["synced_at"]}
+                for row in self._conn.execute("SELECT * FROM mirror_state ORDER BY table_name")
+            }
+            counters = dict(self._stats)
+        query_ms = counters.pop("query_ms")
+        return {
+            "path": self.db_path,
+            "max_age": self.max_age,
+            "fresh": synced_at is not None and time.time() - synced_at <= self.max_age,
+            "age_seconds": None if synced_at is None else round(time.time() - synced_at, 1),
+            "tables": tables,
+            **counters,
+            "avg_query_ms": round(query_ms / counters["queries"], 3) if counters["queries"] else 0.0,
+        }
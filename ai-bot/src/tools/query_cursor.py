@@ -0,0 +1,163 @@
+"""
+Query Cursor - Keyset pagination handles for operations table queries
+
+query_operations_data used to return at most `limit` rows and nothing past
+them. Follow-up pages are now fetched by keyset ("rows after the last one
+seen") instead of OFFSET, so every page costs the same and rows inserted
+meanwhile do not shift the pages:
+
+- Rows are ordered by (order column, key column) with NULLs last; the key
+  column (default id) breaks ties, so the position is always exact
+- A QueryCursor remembers the query and the position after the last row
+  handed out; it is kept server-side in a CursorStore and the agent only
+  sees its short handle (e.g. "c3f9a1b2"), which it passes back for the
+  next page
+- Only rows actually handed out advance the position, so a page cut short
+  (e.g. by a tool output's size budget) resumes at the first row not shown
+
+Handles expire after ttl seconds; the least recently used are evicted
+beyond max_cursors.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_TTL_SECONDS = 1800.0
+
+
+def _quote(value: Any) -> str:
+    """Value inside a PostgREST logic tree (quoted: timestamps contain reserved characters)"""
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+@dataclass
+class QueryCursor:
+    """A paged operations query and its position"""
+    table: str
+    columns: str
+    filters: Dict[str, Any]
+    order_column: str
+    descending: bool = False
+    key_column: str = "id"
+    page_size: int = 100
+    after: Optional[Tuple[Any, Any]] = None  # (order value, key value) of the last row handed out
+    pages: int = 0
+    rows: int = 0
+
+    def _names(self) -> List[str]:
+        return [name.strip() for name in self.columns.split(",") if name.strip()]
+
+    def select(self) -> str:
+        """Select list including the columns the position is read from"""
+        if self.columns.strip() == "*":
+            return "*"
+        names = self._names()
+        return ",".join(names + [c for c in (self.order_column, self.key_column) if c not in names])
+
+    def project(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rows with only the requested columns"""
+        if self.columns.strip() == "*":
+            return rows
+        names = self._names()
+        return [{name: row.get(name) for name in names} for row in rows]
+
+    def apply(self, query):
+        """Add ordering and the keyset condition to an AsyncQuery"""
+        if self.order_column != self.key_column:
+            query = query.order(self.order_column, desc=self.descending, nullslast=True)
+        query = query.order(self.key_column, desc=self.descending if self.order_column == self.key_column else False)
+        if self.after is None:
+            return query
+
+        value, key = self.after
+        if self.order_column == self.key_column:
+            return query.filter(self.key_column, "lt" if self.descending else "gt", key)
+        if value is None:
+            # NULLs sort last: only NULL rows with a larger key remain
+            return query.eq(self.order_column, None).filter(self.key_column, "gt", key)
+        step = "lt" if self.descending else "gt"
+        return query.or_(
+            f"{self.order_column}.{step}.{_quote(value)},"
+            f"and({self.order_column}.eq.{_quote(value)},{self.key_column}.gt.{_quote(key)}),"
+            f"{self.order_column}.is.null"
+        )
+
+    def advance(self, rows: List[Dict[str, Any]]):
+        """Record the rows handed out; the position moves past the last one"""
+        if rows:
+            self.after = (rows[-1].get(self.order_column), rows[-1].get(self.key_column))
+        self.pages += 1
+        self.rows += len(rows)
+
+
+class CursorStore:
+    """
+    Thread-safe store of cursor handles (see module docstring).
+    """
+
+    def __init__(self, max_cursors: int = 256, ttl: float = DEFAULT_TTL_SECONDS):
+        """
+        Initialize cursor store.
+
+        Args:
+            max_cursors: Maximum open cursors (least recently used evicted)
+            ttl: Seconds a cursor stays valid after its last use
+        """
+        self.max_cursors = max_cursors
+        self.ttl = ttl
+        self._cursors: "OrderedDict[str, Tuple[float, QueryCursor]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "resumed": 0, "expired": 0, "evicted": 0, "closed": 0}
+
+    def open(self, cursor: QueryCursor) -> str:
+        """Store a cursor and return its handle"""
+        handle = "c" + secrets.token_hex(4)
+        with self._lock:
+            self._cursors[handle] = (time.time() + self.ttl, cursor)
+            self._stats["opened"] += 1
+            while len(self._cursors) > self.max_cursors:
+                self._cursors.popitem(last=False)
+                self._stats["evicted"] += 1
+        return handle
+
+    def get(self, handle: str) -> Optional[QueryCursor]:
+        """Cursor for a handle (refreshing its expiry), or None if unknown or expired"""
+        with self._lock:
+            entry = self._cursors.get(handle)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._cursors[handle]
+                self._stats["expired"] += 1
+                return None
+            self._cursors[handle] = (time.time() + self.ttl, entry[1])
+            self._cursors.move_to_end(handle)
+            self._stats["resumed"] += 1
+            return entry[1]
+
+    def close(self, handle: str) -> bool:
+        """Drop a cursor (e.g. after its last page)"""
+        with self._lock:
+            if self._cursors.pop(handle, None) is None:
+                return False
+            self._stats["closed"] += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cursor store statistics.
+
+        Returns:
+            Dict with open cursors, max_cursors, ttl and opened, resumed,
+            expired, evicted and closed counts
+        """
+        with self._lock:
+            return {"open": len(self._cursors), "max_cursors": self.max_cursors, "ttl": self.ttl, **self._stats}
@@ -0,0 +1,339 @@
+"""
+Range Cache - Per-day partial aggregates for range analytics RPCs
+
+get_revenue_trend, get_revenue_by_zone and get_table_turnover recompute the
+whole date range server-side on every call, so "last 30 days" and "last 7
+days" share no work and a rolling 90-day trend re-reads 90 days each time.
+RangeCache stores each function's result per DAY and answers a range by
+combining the cached days locally, fetching only the missing days:
+
+- Revenue trend rows are already one per day: each contiguous run of
+  missing days is one RPC, split by date
+- Grouped functions (by zone / table) are fetched one missing day per RPC
+  (concurrently, bounded) and combined per group: sums and counts are
+  added, averages recomputed from them (avg_order_value = revenue / orders)
+- Per-day TTLs follow rpc_cache: closed days are kept until invalidated,
+  yesterday for recent_ttl, today for open_ttl
+
+Functions whose metrics do not decompose into per-day sums are never served
+from per-day partials (fetch() returns None and the caller runs the plain
+range RPC): get_station_performance (avg_item_price is AVG(unit_price) over
+order item rows) and get_top_dishes (each day's top_n is truncated). A
+function returning a column its RangeSpec does not describe is disabled the
+same way at runtime rather than combined incorrectly.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.tools.rpc_cache import day_ttl
+
+logger = logging.getLogger(__name__)
+
+# Longest range assembled from days; longer ranges run as one RPC
+MAX_RANGE_DAYS = 400
+
+
+@dataclass(frozen=True)
+class RangeSpec:
+    """How a range RPC's rows decompose into per-day partials"""
+    keys: Tuple[str, ...]  # group-by columns
+    sums: Tuple[str, ...]  # additive columns (SUM / COUNT)
+    ratios: Dict[str, Tuple[str, str]] = field(default_factory=dict)  # column -> (numerator, denominator)
+    attributes: Tuple[str, ...] = ()  # constant per group (e.g. table capacity)
+    sort_by: str = "total_revenue"
+    descending: bool = True
+    per_day_rows: bool = False  # rows are already one per day (keys[0] is the date)
+
+
+RANGE_SPECS: Dict[str, RangeSpec] = {
+    "get_revenue_trend": RangeSpec(
+        keys=("date",),
+        sums=("total_revenue", "order_count", "completed_orders"),
+        ratios={"avg_order_value": ("total_revenue", "order_count")},
+        sort_by="date",
+        descending=False,
+        per_day_rows=True,
+    ),
+    "get_revenue_by_zone": RangeSpec(
+        keys=("zone",),
+        sums=("total_revenue", "order_count"),
+        ratios={"avg_order_value": ("total_revenue", "order_count")},
+    ),
+    "get_table_turnover": RangeSpec(
+        keys=("zone", "table_no"),
+        sums=("order_count", "total_revenue"),
+        ratios={"avg_order_value": ("total_revenue", "order_count")},
+        attributes=("capacity",),
+        sort_by="order_count",
+    ),
+}
+
+# Range RPCs that must not be combined from per-day results
+NON_DECOMPOSABLE: Dict[str, str] = {
+    "get_station_performance": "avg_item_price is AVG(unit_price) over order items, not derivable from daily totals",
+    "get_top_dishes": "each day's ranking is truncated to top_n",
+}
+
+
+def _number(value: Any) -> Any:
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def combine(spec: RangeSpec, day_rows: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Combine per-day rows into range rows (sums added, ratios recomputed)"""
+    groups: Dict[Tuple, Dict[str, Any]] = {}
+    for rows in day_rows:
+        for row in rows:
+            key = tuple(row.get(column) for column in spec.keys)
+            combined = groups.get(key)
+            if combined is None:
+                combined = groups[key] = {column: row.get(column) for column in spec.keys + spec.attributes}
+                for column in spec.sums:
+                    combined[column] = 0
+            for column in spec.sums:
+                combined[column] += _number(row.get(column))
+    for combined in groups.values():
+        for column, (numerator, denominator) in spec.ratios.items():
+            combined[column] = combined[numerator] / combined[denominator] if combined[denominator] else 0
+    return sorted(
+        groups.values(),
+        key=lambda row: (row.get(spec.sort_by) is None, row.get(spec.sort_by) or 0),
+        reverse=spec.descending
+    )
+
+
+class RangeCache:
+    """
+    Per-day partial cache for range RPCs (see module docstring).
+
+    The day store is thread-safe; fetch() runs on the event loop.
+    """
+
+    def __init__(
+        self,
+        max_days: int = 4096,
+        open_ttl: Optional[float] = 300.0,
+        recent_ttl: Optional[float] = 3600.0,
+        closed_ttl: Optional[float] = None,
+        max_concurrency: int = 8,
+        max_range_days: int = MAX_RANGE_DAYS,
+        today: Optional[Callable[[], date]] = None
+    ):
+        """
+        Initialize range cache.
+
+        Args:
+            max_days: Maximum cached (function, day) entries (least recently used evicted)
+            open_ttl: Seconds for today (and later)
+            recent_ttl: Seconds for yesterday
+            closed_ttl: Seconds for older days (None = until invalidated)
+            max_concurrency: Concurrent per-day RPCs while filling a range
+            max_range_days: Longer ranges are not decomposed
+            today: Callable returning today's date (tests)
+        """
+        self.max_days = max_days
+        self.open_ttl = open_ttl
+        self.recent_ttl = recent_ttl
+        self.closed_ttl = closed_ttl
+        self.max_concurrency = max_concurrency
+        self.max_range_days = max_range_days
+        self._today = today or date.today
+        self._days: "OrderedDict[Tuple[str, str], Tuple[Optional[float], List[Dict[str, Any]]]]" = OrderedDict()
+        self._disabled: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, function: str, counter: str, amount: int = 1):
+        entry = self._stats.setdefault(function, {
+            "calls": 0, "day_hits": 0, "day_misses": 0, "rpc_calls": 0, "bypassed": 0, "evictions": 0
+        })
+        entry[counter] += amount
+
+    def decomposable(self, function: str) -> bool:
+        """True if the function's range results can be assembled from per-day partials"""
+        return function in RANGE_SPECS and function not in self._disabled
+
+    def _days_in(self, start_date: Optional[str], end_date: Optional[str]) -> Optional[List[str]]:
+        today = self._today()
+        try:
+            start = date.fromisoformat(start_date[:10]) if start_date else today
+            end = date.fromisoformat(end_date[:10]) if end_date else today
+        except ValueError:
+            return None
+        span = (end - start).days + 1
+        if span < 1 or span > self.max_range_days:
+            return None
+        return [(start + timedelta(days=n)).isoformat() for n in range(span)]
+
+    async def fetch(
+        self,
+        function: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        fetch_rpc: Callable[[str, Dict[str, Any]], Awaitable[List[Dict[str, Any]]]]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answer a range call from per-day partials, fetching missing days.
+
+        Args:
+            function: RPC name
+            start_date: Range start YYYY-MM-DD (default: today)
+            end_date: Range end YYYY-MM-DD (default: today)
+            fetch_rpc: async (function, params) -> rows, used for missing days
+
+        Returns:
+            Combined rows, or None if the call cannot be decomposed (the caller
+            should run the plain range RPC)
+        """
+        days = self._days_in(start_date, end_date) if self.decomposable(function) else None
+        with self._lock:
+            self._count(function, "calls")
+            if days is None:
+                self._count(function, "bypassed")
+                return None
+            cached, missing = self._lookup(function, days)
+
+        spec = RANGE_SPECS[function]
+        fetched = await self._fetch_missing(function, spec, missing, fetch_rpc)
+
+        problem = self._unexpected_column(spec, fetched)
+        if problem:
+            with self._lock:
+                self._disabled[function] = problem
+                self._count(function, "bypassed")
+            logger.warning(f"[Range Cache] {function} no longer decomposable ({problem}); using range RPCs")
+            return None
+
+        self._store(function, fetched)
+        cached.update(fetched)
+        return combine(spec, (cached[day] for day in days))
+
+    def _lookup(self, function: str, days: List[str]):
+        """Split days into cached rows and missing days (caller holds the lock)"""
+        now = time.time()
+        cached, missing = {}, []
+        for day in days:
+            entry = self._days.get((function, day))
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                self._days.move_to_end((function, day))
+                cached[day] = entry[1]
+            else:
+                missing.append(day)
+        self._count(function, "day_hits", len(cached))
+        self._count(function, "day_misses", len(missing))
+        return cached, missing
+
+    async def _fetch_missing(self, function: str, spec: RangeSpec, missing: List[str], fetch_rpc):
+        if not missing:
+            return {}
+
+        if spec.per_day_rows:
+            # One RPC per contiguous run of missing days, rows split by date
+            runs: List[List[str]] = []
+            for day in missing:
+                previous = runs[-1][-1] if runs else None
+                if previous and date.fromisoformat(day) - date.fromisoformat(previous) == timedelta(days=1):
+                    runs[-1].append(day)
+                else:
+                    runs.append([day])
+            requests = [(run, {"start_date": run[0], "end_date": run[-1]}) for run in runs]
+        else:
+            requests = [([day], {"start_date": day, "end_date": day}) for day in missing]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_one(run_days, params):
+            async with semaphore:
+                rows = await fetch_rpc(function, params)
+            with self._lock:
+                self._count(function, "rpc_calls")
+            if not spec.per_day_rows:
+                return {run_days[0]: rows or []}
+            by_day = {day: [] for day in run_days}
+            for row in rows or []:
+                by_day.setdefault(str(row.get(spec.keys[0]))[:10], []).append(row)
+            return by_day
+
+        fetched: Dict[str, List[Dict[str, Any]]] = {}
+        for result in await asyncio.gather(*(run_one(run_days, params) for run_days, params in requests)):
+            fetched.update(result)
+        return fetched
+
+    @staticmethod
+    def _unexpected_column(spec: RangeSpec, fetched: Dict[str, List[Dict[str, Any]]]) -> Optional[str]:
+        known = set(spec.keys) | set(spec.sums) | set(spec.attributes) | set(spec.ratios)
+        for rows in fetched.values():
+            for row in rows:
+                unknown = set(row) - known
+                if unknown:
+                    return f"unexpected column {sorted(unknown)[0]}"
+        return None
+
+    def _store(self, function: str, fetched: Dict[str, List[Dict[str, Any]]]):
+        today = self._today()
+        now = time.time()
+        with self._lock:
+            for day, rows in fetched.items():
+                ttl, _ = day_ttl(day, today, self.open_ttl, self.recent_ttl, self.closed_ttl)
+                self._days[(function, day)] = (None if ttl is None else now + ttl, rows)
+                self._days.move_to_end((function, day))
+            while len(self._days) > self.max_days:
+                (evicted_function, _), _ = self._days.popitem(last=False)
+                self._count(evicted_function, "evictions")
+
+    def invalidate(self, function: Optional[str] = None, day: Optional[str] = None) -> int:
+        """
+        Drop cached days.
+
+        Args:
+            function: Only this RPC (default: all)
+            day: Only this YYYY-MM-DD day (default: all)
+
+        Returns:
+            Number of (function, day) entries removed
+        """
+        with self._lock:
+            keys = [
+                key for key in self._days
+                if (function is None or key[0] == function) and (day is None or key[1] == day[:10])
+            ]
+            for key in keys:
+                del self._days[key]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with cached days, max_days, disabled functions (with reason)
+            and per-function calls, day_hits, day_misses, rpc_calls, bypassed,
+            evictions and day_hit_rate
+        """
+        with self._lock:
+            functions = {}
+            for function, counters in self._stats.items():
+                lookups = counters["day_hits"] + counters["day_misses"]
+                functions[function] = {
+                    **counters,
+                    "day_hit_rate": round(counters["day_hits"] / lookups, 3) if lookups else 0.0,
+                }
+            return {
+                "days": len(self._days),
+                "max_days": self.max_days,
+                "disabled": {**{name: f"not decomposable: {why}" for name, why in NON_DECOMPOSABLE.items()},
+                             **self._disabled},
+                "functions": functions,
+            }
@@ -0,0 +1,76 @@
+"""
+Result Encoding - Compact CSV rendering of table rows for tool output
+
+Tool results used to print every record as "key: value" lines, repeating
+each column name once per row. Rows are now rendered as CSV: the header
+once, then one line per row, so the column names cost tokens only once:
+
+- columns projects (and orders) the output; by default the first row's
+  keys are used
+- Cells longer than max_cell characters are cut with "…"; dicts and lists
+  are written as compact JSON, None as an empty cell
+- Rows are added only while the text stays within max_chars; the caller
+  learns how many fitted, so a paging cursor can resume after the last row
+  actually shown
+"""
+
+import csv
+import io
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MAX_CHARS = 4000
+DEFAULT_MAX_CELL = 80
+
+
+def _cell(value: Any, max_cell: int) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        text = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+    elif isinstance(value, float) and value.is_integer():
+        text = str(int(value))
+    else:
+        text = str(value)
+    return text if len(text) <= max_cell else text[:max_cell - 1] + "…"
+
+
+def _line(cells: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(cells)
+    return buffer.getvalue()
+
+
+def encode_rows(
+    rows: List[Dict[str, Any]],
+    columns: Optional[Sequence[str]] = None,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    max_cell: int = DEFAULT_MAX_CELL
+) -> Tuple[str, int]:
+    """
+    Render rows as CSV within a size budget.
+
+    Args:
+        rows: Row dicts
+        columns: Columns to output in this order (default: keys of the first row)
+        max_chars: Budget for the whole text (the header and first row always
+                   fit, so paging always makes progress)
+        max_cell: Longest cell before it is cut
+
+    Returns:
+        (CSV text, number of rows included)
+    """
+    if not rows:
+        return "", 0
+    columns = list(columns) if columns else list(rows[0])
+    lines = [_line(columns)]
+    size = len(lines[0])
+    for row in rows:
+        line = _line([_cell(row.get(column), max_cell) for column in columns])
+        if size + 1 + len(line) > max_chars and len(lines) > 1:
+            break
+        lines.append(line)
+        size += 1 + len(line)
+    return "\n".join(lines), len(lines) - 1
@@ -0,0 +1,288 @@
+"""
+RPC Cache - Date-aware result cache for Supabase analytics RPCs
+
+The operations and menu bots (and their subagents, when a parent bot
+delegates) call the same RPCs with the same parameters over and over:
+get_daily_revenue(yesterday), get_top_dishes for last month,
+get_menu_profitability. This cache sits in front of SupabaseTools._rpc:
+
+- Key: function name + normalized params (None dropped, keys sorted, dates
+  as YYYY-MM-DD). Calls that rely on the functions' CURRENT_DATE defaults
+  are keyed with today's date, so they roll over at midnight.
+- TTL by the newest date the call covers:
+    closed ranges (ending before yesterday): closed_ttl (default: permanent)
+    ranges ending yesterday (late orders may still settle): recent_ttl
+    ranges touching today or the future: open_ttl
+- Bounded in-memory LRU, plus an optional disk tier (one JSON file per key)
+  for closed results so they survive restarts
+- invalidate(function=..., day=...) for explicit invalidation (e.g. after a
+  data correction); per-function hit/miss counters via stats()
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DATE_RE = re.compile(r"^\d{4}-\d{1,2}-\d{1,2}")
+
+# Sentinel: entry never expires
+PERMANENT = None
+
+
+def day_ttl(
+    last_day: str,
+    today: date,
+    open_ttl: Optional[float],
+    recent_ttl: Optional[float],
+    closed_ttl: Optional[float]
+) -> Tuple[Optional[float], str]:
+    """TTL and class ('open', 'recent' or 'closed') for data whose newest day is last_day (YYYY-MM-DD)"""
+    if last_day >= today.isoformat():
+        return open_ttl, "open"
+    if last_day >= (today - timedelta(days=1)).isoformat():
+        return recent_ttl, "recent"
+    return closed_ttl, "closed"
+
+
+def _normalize_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str) and _DATE_RE.match(value.strip()):
+        try:
+            return date.fromisoformat(value.strip()[:10]).isoformat()
+        except ValueError:
+            return value.strip()
+    return value
+
+
+class RpcCache:
+    """
+    Thread-safe LRU cache for RPC results with date-aware TTLs.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        open_ttl: float = 300.0,
+        recent_ttl: float = 3600.0,
+        closed_ttl: Optional[float] = PERMANENT,
+        disk_dir: Optional[str] = None,
+        today: Optional[Callable[[], date]] = None
+    ):
+        """
+        Initialize RPC cache.
+
+        Args:
+            max_entries: Maximum in-memory entries (least recently used evicted)
+            open_ttl: Seconds for results covering today or later
+            recent_ttl: Seconds for results whose newest date is yesterday
+            closed_ttl: Seconds for older closed ranges (None = until invalidated)
+            disk_dir: Directory for the disk tier (closed results only); None disables it
+            today: Callable returning today's date (tests)
+        """
+        self.max_entries = max_entries
+        self.open_ttl = open_ttl
+        self.recent_ttl = recent_ttl
+        self.closed_ttl = closed_ttl
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._today = today or date.today
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str, Tuple[str, str], Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    # ---------- keys and TTLs ----------
+
+    def _key(self, function: str, params: Optional[Dict[str, Any]]) -> Tuple[str, Dict[str, Any], Tuple[str, str]]:
+        """Cache key, normalized params and the (first, last) day the call covers"""
+        normalized = {k: _normalize_value(v) for k, v in (params or {}).items() if v is not None}
+        if "target_date" in normalized:
+            days = (normalized["target_date"], normalized["target_date"])
+        elif "start_date" in normalized and "end_date" in normalized:
+            days = (normalized["start_date"], normalized["end_date"])
+        else:
+            # Missing dates default to CURRENT_DATE (or CURRENT_DATE - 30 days)
+            # inside the function: the result depends on today, and an unknown
+            # start covers any earlier day
+            today = self._today().isoformat()
+            normalized["@today"] = today
+            days = (normalized.get("start_date", ""), max(normalized.get("end_date", today), today))
+        key = function + ":" + json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+        return key, normalized, days
+
+    def ttl_for(self, last_day: str) -> Tuple[Optional[float], str]:
+        """TTL and class ('open', 'recent' or 'closed') for a call whose newest date is last_day"""
+        return day_ttl(last_day, self._today(), self.open_ttl, self.recent_ttl, self.closed_ttl)
+
+    # ---------- lookups ----------
+
+    def get(self, function: str, params: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
+        """
+        Look up a cached result.
+
+        Returns:
+            (hit, data)
+        """
+        key, _, _ = self._key(function, params)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, _, _, data = entry
+                if expires is None or expires > now:
+                    self._entries.move_to_end(key)
+                    self._count(function, "hits")
+                    return True, data
+                del self._entries[key]
+                self._count(function, "expired")
+
+        if self.disk_dir:
+            entry = self._read_disk(key)
+            if entry is not None:
+                with self._lock:
+                    self._insert(key, entry)
+                    self._count(function, "disk_hits")
+                return True, entry[3]
+
+        with self._lock:
+            self._count(function, "misses")
+        return False, None
+
+    def put(self, function: str, params: Optional[Dict[str, Any]], data: Any):
+        """Store a result with the TTL its date range calls for"""
+        key, _, days = self._key(function, params)
+        ttl, kind = self.ttl_for(days[1])
+        expires = None if ttl is None else time.time() + ttl
+        entry = (expires, function, days, data)
+        with self._lock:
+            self._insert(key, entry)
+            self._count(function, "stores")
+        if self.disk_dir and kind == "closed":
+            self._write_disk(key, entry)
+
+    def _insert(self, key: str, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            _, (_, function, _, _) = self._entries.popitem(last=False)
+            self._count(function, "evictions")
+
+    def invalidate(self, function: Optional[str] = None, day: Optional[str] = None) -> int:
+        """
+        Drop cached results (memory and disk).
+
+        Args:
+            function: Only this RPC (default: all)
+            day: Only results whose date range includes this YYYY-MM-DD day (default: all)
+
+        Returns:
+            Number of entries removed
+        """
+        day = _normalize_value(day) if day else None
+
+        def matches(entry_function: str, days: Tuple[str, str]) -> bool:
+            return (function is None or entry_function == function) and \
+                   (day is None or days[0] <= day <= days[1])
+
+        with self._lock:
+            keys = [k for k, (_, f, d, _) in self._entries.items() if matches(f, d)]
+            for key in keys:
+                _, entry_function, _, _ = self._entries.pop(key)
+                self._count(entry_function, "invalidations")
+        removed = len(keys)
+
+        if self.disk_dir:
+            for path in self.disk_dir.glob("*.json"):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        stored = json.load(f)
+                    if matches(stored["function"], tuple(stored["days"])):
+                        path.unlink()
+                        if stored["key"] not in keys:
+                            removed += 1
+                except (OSError, ValueError, KeyError):
+                    continue
+        return removed
+
+    # ---------- disk tier ----------
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / (hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _read_disk(self, key: str):
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"[RPC Cache] Unreadable cache file {path.name}: {e}")
+            return None
+        if stored.get("key") != key:
+            return None
+        if stored["expires"] is not None and stored["expires"] <= time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return stored["expires"], stored["function"], tuple(stored["days"]), stored["data"]
+
+    def _write_disk(self, key: str, entry):
+        expires, function, days, data = entry
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "function": function, "days": list(days), "expires": expires, "data": data},
+                          f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"[RPC Cache] Could not write {path.name}: {e}")
+
+    # ---------- stats ----------
+
+    def _count(self, function: str, counter: str):
+        entry = self._stats.setdefault(function, {
+            "hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0, "invalidations": 0
+        })
+        entry[counter] += 1
+
+    def clear(self):
+        """Drop all in-memory entries (disk tier is kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with entries, max_entries, disk tier, and per-function
+            hits/disk_hits/misses/expired/stores/evictions/invalidations and hit_rate
+        """
+        with self._lock:
+            functions = {}
+            for function, counters in self._stats.items():
+                lookups = counters["hits"] + counters["disk_hits"] + counters["misses"]
+                functions[function] = {
+                    **counters,
+                    "hit_rate": round((counters["hits"] + counters["disk_hits"]) / lookups, 3) if lookups else 0.0,
+                }
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+                "functions": functions,
+            }
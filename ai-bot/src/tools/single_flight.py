@@ -0,0 +1,169 @@
+"""
+Single Flight - Coalesce identical concurrent data tool calls
+
+When a bot and the subagents it spawns, or several rooms at shift change,
+ask for the same metric at once, each used to issue its own identical
+Supabase RPC or SQLite query. SingleFlight lets the first caller (the
+leader) run the call while identical callers arriving before it finishes
+wait for, and share, its result (or its exception):
+
+- call(key, fn): synchronous calls from worker threads (CampfireTools searches)
+- await run(key, factory): coroutines on an event loop (SupabaseTools RPCs);
+  a waiter that is cancelled does not cancel the shared call for the others
+- @coalesce("label") wraps a method of an object with a `single_flight`
+  attribute, keyed by the label and the bound arguments
+
+Shared results are the same object for every caller, so callers must treat
+them as read-only. Executions and coalesced calls are counted per label.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def make_key(label: str, *args: Any, **kwargs: Any) -> Tuple[str, str]:
+    """Key for a call: the label plus its arguments, JSON-normalized (sorted keys)"""
+    return label, json.dumps([args, kwargs], sort_keys=True, ensure_ascii=False, default=str)
+
+
+class _Call:
+    """An in-flight synchronous call"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Duplicate call suppression for sync (threaded) and async callers.
+
+    Thread-safe; async calls are coalesced per event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def _label(key: Hashable) -> str:
+        return str(key[0]) if isinstance(key, tuple) and key else str(key)
+
+    def _count(self, key: Hashable, counter: str):
+        entry = self._stats.setdefault(self._label(key), {"executions": 0, "coalesced": 0, "errors": 0})
+        entry[counter] += 1
+
+    def call(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn(), or wait for the identical call already in flight.
+
+        Args:
+            key: Call identity (see make_key); its first element labels the stats
+            fn: Zero-argument callable
+
+        Returns:
+            fn's result (shared with coalesced callers)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._count(key, "executions")
+            else:
+                self._count(key, "coalesced")
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._count(key, "errors")
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await factory(), or the identical call already in flight on this loop.
+
+        Args:
+            key: Call identity (see make_key); its first element labels the stats
+            factory: Zero-argument callable returning a coroutine
+
+        Returns:
+            The coroutine's result (shared with coalesced callers)
+        """
+        task_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = asyncio.ensure_future(factory())
+                self._tasks[task_key] = task
+                self._count(key, "executions")
+                task.add_done_callback(functools.partial(self._task_done, task_key, key))
+            else:
+                self._count(key, "coalesced")
+
+        # shield: one waiter being cancelled must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _task_done(self, task_key: Tuple[int, Hashable], key: Hashable, task: asyncio.Task):
+        with self._lock:
+            if self._tasks.get(task_key) is task:
+                del self._tasks[task_key]
+            # Retrieve the exception so a call whose waiters all went away is not reported as unhandled
+            if not task.cancelled() and task.exception() is not None:
+                self._count(key, "errors")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics.
+
+        Returns:
+            Dict with inflight calls and per-label executions, coalesced
+            (calls that shared another call's result), errors and coalesce_rate
+        """
+        with self._lock:
+            calls = {}
+            for label, entry in self._stats.items():
+                total = entry["executions"] + entry["coalesced"]
+                calls[label] = {**entry, "coalesce_rate": round(entry["coalesced"] / total, 3) if total else 0.0}
+            return {"inflight": len(self._calls) + len(self._tasks), "calls": calls}
+
+
+def coalesce(label: str):
+    """
+    Method decorator: route the call through self.single_flight, keyed by
+    label and the method's bound arguments (defaults applied, so positional
+    and keyword spellings of the same call coalesce).
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(list(bound.arguments.items())[1:])
+            return self.single_flight.call(make_key(label, **arguments), lambda: method(self, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
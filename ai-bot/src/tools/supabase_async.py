@@ -0,0 +1,312 @@
+"""
+Async Supabase Access - PostgREST/RPC client for the event loop
+
+SupabaseTools used the synchronous supabase client, but every analytics,
+menu engineering and operations @tool is async, so a slow RPC blocked the
+event loop (and every other session in the process) until it returned.
+This client talks to PostgREST directly over httpx.AsyncClient:
+
+- One pooled AsyncClient per event loop (keep-alive connections shared by
+  all tools; recreated if the loop changes, e.g. between test loops)
+- Per-call timeout covering the whole request; cancelling the awaiting task
+  (e.g. a session that is torn down) aborts the HTTP request
+- Query builder mirroring the supabase-py calls the tools use
+  (table().select().eq().gte().lte().order().limit() / update(), rpc()),
+  plus lt()/filter()/or_() and multi-column order() for keyset paging
+- Call counts, errors, timeouts and latency per RPC/table via stats()
+
+transport= accepts any httpx transport, e.g. httpx.ASGITransport over the
+local PostgREST stand-in (scripts/postgrest_stub.py) for tests and benchmarks.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_SECONDS = 10.0
+DEFAULT_MAX_CONNECTIONS = 20
+
+
+class PostgrestError(Exception):
+    """Error response from PostgREST (or a transport failure)"""
+
+    def __init__(self, message: str, status: Optional[int] = None, code: Optional[str] = None,
+                 details: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.code = code
+        self.details = details
+
+
+class PostgrestTimeout(PostgrestError):
+    """Call did not finish within its timeout"""
+
+
+@dataclass
+class APIResponse:
+    """Response of a PostgREST call (data is the decoded JSON body)"""
+    data: Any
+
+
+def _filter_value(value: Any) -> str:
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    return str(value)
+
+
+class AsyncQuery:
+    """Table query builder; finish with `await query.execute()`"""
+
+    def __init__(self, client: "AsyncPostgrestClient", table: str):
+        self._client = client
+        self._table = table
+        self._method = "GET"
+        self._params: List[Tuple[str, str]] = []
+        self._body: Optional[Dict[str, Any]] = None
+
+    def select(self, columns: str = "*") -> "AsyncQuery":
+        self._params.append(("select", columns))
+        return self
+
+    def update(self, data: Dict[str, Any]) -> "AsyncQuery":
+        self._method = "PATCH"
+        self._body = data
+        return self
+
+    def eq(self, column: str, value: Any) -> "AsyncQuery":
+        self._params.append((column, "is.null" if value is None else f"eq.{_filter_value(value)}"))
+        return self
+
+    def gt(self, column: str, value: Any) -> "AsyncQuery":
+        self._params.append((column, f"gt.{_filter_value(value)}"))
+        return self
+
+    def gte(self, column: str, value: Any) -> "AsyncQuery":
+        self._params.append((column, f"gte.{_filter_value(value)}"))
+        return self
+
+    def lt(self, column: str, value: Any) -> "AsyncQuery":
+        self._params.append((column, f"lt.{_filter_value(value)}"))
+        return self
+
+    def lte(self, column: str, value: Any) -> "AsyncQuery":
+        self._params.append((column, f"lte.{_filter_value(value)}"))
+        return self
+
+    def filter(self, column: str, operator: str, value: Any) -> "AsyncQuery":
+        self._params.append((column, f"{operator}.{_filter_value(value)}"))
+        return self
+
+    def or_(self, conditions: str) -> "AsyncQuery":
+        """Logic tree, e.g. `a.gt.1,and(a.eq.1,id.gt.5)`"""
+        self._params.append(("or", f"({conditions})"))
+        return self
+
+    def order(self, column: str, desc: bool = False, nullslast: bool = False) -> "AsyncQuery":
+        """Sort by column; repeated calls add tie-breaking columns"""
+        term = f"{column}.{'desc' if desc else 'asc'}{'.nullslast' if nullslast else ''}"
+        for i, (key, value) in enumerate(self._params):
+            if key == "order":
+                self._params[i] = ("order", f"{value},{term}")
+                return self
+        self._params.append(("order", term))
+        return self
+
+    def limit(self, count: int) -> "AsyncQuery":
+        self._params.append(("limit", str(int(count))))
+        return self
+
+    async def execute(self, timeout: Optional[float] = None) -> APIResponse:
+        """
+        Run the query.
+
+        Args:
+            timeout: Seconds for the whole call (default: the client's timeout)
+        """
+        headers = {"Prefer": "return=representation"} if self._method == "PATCH" else None
+        data = await self._client.request(
+            self._method, self._table, params=self._params, json=self._body,
+            headers=headers, timeout=timeout, label=f"table:{self._table}"
+        )
+        return APIResponse(data=data)
+
+
+class AsyncPostgrestClient:
+    """
+    Async PostgREST client with a shared connection pool.
+
+    Safe to share between tasks; stats are thread-safe.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        Initialize client.
+
+        Args:
+            url: Supabase project URL (e.g. https://xyz.supabase.co)
+            key: Supabase API key
+            timeout: Default per-call timeout in seconds
+            max_connections: Connection pool size
+            transport: Custom httpx transport (tests, local stand-in)
+        """
+        self.base_url = url.rstrip("/") + "/rest/v1"
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._transport = transport
+        self._headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._inflight = 0
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http_loop is not loop or self._http.is_closed:
+            # Connections belong to the loop that opened them
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers,
+                timeout=None,  # enforced per call below
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                transport=self._transport,
+            )
+            self._http_loop = loop
+        return self._http
+
+    def table(self, name: str) -> AsyncQuery:
+        """Start a query on a table"""
+        return AsyncQuery(self, name)
+
+    async def rpc(self, name: str, params: Optional[Dict[str, Any]] = None,
+                  timeout: Optional[float] = None) -> APIResponse:
+        """
+        Call a Postgres function through /rpc.
+
+        Args:
+            name: Function name
+            params: Named arguments
+            timeout: Seconds for the whole call (default: the client's timeout)
+        """
+        data = await self.request("POST", f"rpc/{name}", json=params or {}, timeout=timeout, label=f"rpc:{name}")
+        return APIResponse(data=data)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[List[Tuple[str, str]]] = None,
+        json: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        label: Optional[str] = None
+    ) -> Any:
+        """
+        Send one PostgREST request and decode the JSON body.
+
+        Raises:
+            PostgrestTimeout: The call exceeded its timeout
+            PostgrestError: Error status or transport failure
+        """
+        label = label or path
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        outcome = "ok"
+        with self._lock:
+            self._inflight += 1
+        try:
+            response = await asyncio.wait_for(
+                self._client().request(method, f"/{path}", params=params, json=json, headers=headers),
+                timeout
+            )
+            if response.status_code >= 400:
+                outcome = "error"
+                raise self._error(response, label)
+            return response.json() if response.content else None
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise PostgrestTimeout(f"{label} timed out after {timeout:g}s") from None
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except httpx.HTTPError as e:
+            outcome = "error"
+            raise PostgrestError(f"{label} failed: {e}") from e
+        finally:
+            self._record(label, outcome, (time.perf_counter() - started) * 1000)
+
+    @staticmethod
+    def _error(response: httpx.Response, label: str) -> PostgrestError:
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if not isinstance(body, dict):
+            body = {}
+        message = body.get("message") or response.text or f"HTTP {response.status_code}"
+        return PostgrestError(f"{label}: {message}", status=response.status_code,
+                              code=body.get("code"), details=body.get("details"))
+
+    def _record(self, label: str, outcome: str, elapsed_ms: float):
+        with self._lock:
+            self._inflight -= 1
+            entry = self._stats.setdefault(label, {
+                "calls": 0, "errors": 0, "timeouts": 0, "cancelled": 0, "total_ms": 0.0, "max_ms": 0.0
+            })
+            entry["calls"] += 1
+            if outcome == "error":
+                entry["errors"] += 1
+            elif outcome == "timeout":
+                entry["timeouts"] += 1
+            elif outcome == "cancelled":
+                entry["cancelled"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+
+    async def aclose(self):
+        """Close the connection pool"""
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get client statistics.
+
+        Returns:
+            Dict with in-flight calls and per-RPC/table calls, errors,
+            timeouts, cancellations, avg_ms and max_ms
+        """
+        with self._lock:
+            calls = {
+                label: {
+                    **{k: v for k, v in entry.items() if k != "total_ms"},
+                    "avg_ms": round(entry["total_ms"] / entry["calls"], 2) if entry["calls"] else 0.0,
+                    "max_ms": round(entry["max_ms"], 2),
+                }
+                for label, entry in self._stats.items()
+            }
+            return {"inflight": self._inflight, "timeout_seconds": self.timeout, "calls": calls}
@@ -1,11 +1,67 @@
 """
 Supabase Tools for Operations Data Management
 Provides tools for the Operations Assistant bot to query and update operations data
+
+All methods are coroutines on top of AsyncPostgrestClient (pooled httpx,
+per-call timeouts), so a slow query no longer blocks the event loop.
+Analytics/menu RPC results are cached by date range (see rpc_cache.py), range
+RPCs that decompose by day are assembled from per-day partials (range_cache.py),
+and identical concurrent RPCs on a cache miss share one request (single_flight.py).
+The top / low profit dish lists are cut from one cached get_dish_profit result
+per range, whatever top_n / bottom_n is asked for.
+With a fresh local POS mirror (pos_mirror.py) RPCs are answered without Supabase.
+Table queries page by keyset behind cursor handles (query_cursor.py) and can
+be rendered as budgeted CSV (result_encoding.py).
 """
 
+import asyncio
 import os
-from typing import Optional, Dict, List, Any
-from supabase import create_client, Client
+import time
+from typing import Optional, Dict, List, Any, AsyncIterator, Sequence
+
+from src.tools.pos_mirror import PosMirror
+from src.tools.query_cursor import CursorStore, QueryCursor
+from src.tools.range_cache import RangeCache
+from src.tools.result_encoding import encode_rows
+from src.tools.rpc_cache import RpcCache
+from src.tools.single_flight import SingleFlight, make_key
+from src.tools.supabase_async import DEFAULT_TIMEOUT_SECONDS, APIResponse, AsyncPostgrestClient, PostgrestError
+
+# Sections of get_operations_snapshot, in report order
+SNAPSHOT_SECTIONS = (
+    "quick_stats", "daily_revenue", "hourly_revenue", "top_dishes", "station_performance",
+    "revenue_by_zone", "order_type_distribution", "table_turnover", "return_analysis", "revenue_trend"
+)
+DEFAULT_SNAPSHOT_SECTIONS = ("quick_stats", "daily_revenue", "hourly_revenue", "top_dishes", "station_performance")
+# Sections whose RPC takes a single target_date (skipped for multi-day ranges)
+SINGLE_DAY_SECTIONS = ("quick_stats", "daily_revenue", "hourly_revenue")
+SNAPSHOT_TIMEOUT_SECONDS = 8.0
+
+# How group_count() counts, in order of preference: the group_count RPC
+# (supabase/migrations/20261019_create_group_count_rpc.sql), a PostgREST
+# aggregate select (needs db-aggregates-enabled), or downloading the column
+GROUP_COUNT_PATHS = ("rpc", "aggregate", "rows")
+
+# get_dish_profit columns returned by get_top_profitable_dishes / get_low_profit_dishes
+DISH_PROFIT_COLUMNS = ("product_name", "quantity_sold", "total_revenue", "total_cost", "gross_profit", "profit_margin")
+# get_low_profit_dishes only considers dishes sold at least this many times
+LOW_PROFIT_MIN_QUANTITY = 5
+
+
+def _gross_profit(row: Dict[str, Any]) -> float:
+    return float(row.get("gross_profit") or 0)
+
+
+def _low_profit_recommendation(row: Dict[str, Any]) -> str:
+    """Advice for a low profit dish (same rules as get_low_profit_dishes in SQL)"""
+    revenue = float(row.get("total_revenue") or 0)
+    if (row.get("quantity_sold") or 0) < 10:
+        return "考虑下架（销量过低）"
+    if _gross_profit(row) < 0:
+        return "亏损菜品！立即调价或下架"
+    if revenue and _gross_profit(row) / revenue < 0.2:
+        return "利润率过低，建议提价或降成本"
+    return "关注并优化"
 
 
 class SupabaseTools:
@@ -18,43 +74,150 @@ class SupabaseTools:
     - Generate summary reports from operations data
     """
 
-    def __init__(self):
-        """Initialize Supabase client from environment variables"""
+    def __init__(
+        self,
+        client: Optional[AsyncPostgrestClient] = None,
+        rpc_cache: Optional[RpcCache] = None,
+        range_cache: Optional[RangeCache] = None,
+        mirror: Optional[PosMirror] = None
+    ):
+        """
+        Initialize Supabase client from environment variables
+
+        Args:
+            client: Preconfigured AsyncPostgrestClient (tests, local stand-in);
+                    default: built from SUPABASE_URL / SUPABASE_KEY, with the
+                    per-call timeout from SUPABASE_TIMEOUT_SECONDS (default 10)
+            rpc_cache: RPC result cache; default: in-memory, with a disk tier
+                       for closed date ranges if SUPABASE_RPC_CACHE_DIR is set
+            range_cache: Per-day partial cache for range RPCs (default: in-memory)
+            mirror: Local POS mirror that answers RPCs while fresh; default:
+                    the mirror at POS_MIRROR_PATH, if set (see PosMirror.from_env)
+        """
         self.supabase_url = os.environ.get("SUPABASE_URL")
         self.supabase_key = os.environ.get("SUPABASE_KEY")
 
-        if not self.supabase_url or not self.supabase_key:
-            raise ValueError(
-                "Supabase credentials not found. Please set SUPABASE_URL and SUPABASE_KEY environment variables."
+        if client is None:
+            if not self.supabase_url or not self.supabase_key:
+                raise ValueError(
+                    "Supabase credentials not found. Please set SUPABASE_URL and SUPABASE_KEY environment variables."
+                )
+            client = AsyncPostgrestClient(
+                self.supabase_url,
+                self.supabase_key,
+                timeout=float(os.environ.get("SUPABASE_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS))
             )
 
-        self.client: Client = create_client(self.supabase_url, self.supabase_key)
+        self.client: AsyncPostgrestClient = client
+        self.rpc_cache = rpc_cache or RpcCache(disk_dir=os.environ.get("SUPABASE_RPC_CACHE_DIR"))
+        self.range_cache = range_cache or RangeCache()
+        self.mirror = mirror if mirror is not None else PosMirror.from_env()
+        self.single_flight = SingleFlight()
+        self._group_count_paths = list(GROUP_COUNT_PATHS)
+        self.query_cursors = CursorStore()
+
+    async def _rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> APIResponse:
+        """
+        Call a Postgres function (single choke point for all analytics/menu RPCs).
+
+        Served from the cache when possible; on a miss, identical concurrent
+        calls (a bot and its subagents, several rooms at once) share one request.
+        """
+        hit, data = self.rpc_cache.get(name, params)
+        if hit:
+            return APIResponse(data=data)
+        return await self.single_flight.run(make_key(name, params), lambda: self._fetch_rpc(name, params))
+
+    async def _fetch_rpc(self, name: str, params: Optional[Dict[str, Any]]) -> APIResponse:
+        response = await self._call_rpc(name, params)
+        self.rpc_cache.put(name, params, response.data)
+        return response
+
+    async def _call_rpc(self, name: str, params: Optional[Dict[str, Any]]) -> APIResponse:
+        """Run an RPC on the local POS mirror when it is fresh, otherwise (or if it fails there) on Supabase"""
+        if self.mirror is not None and self.mirror.can_answer(name):
+            try:
+                return APIResponse(data=await asyncio.to_thread(self.mirror.call, name, params))
+            except Exception:
+                pass  # counted and logged by the mirror; Supabase gives the authoritative answer or error
+        return await self.client.rpc(name, params)
+
+    async def _range_rpc(self, name: str, params: Dict[str, Any]) -> APIResponse:
+        """
+        Call a start_date/end_date range function.
+
+        Functions that decompose by day are combined from cached per-day
+        partials, fetching only the missing days; the others (and ranges
+        the range cache declines) run as one cached RPC.
+        """
+        start_date, end_date = params.get('start_date'), params.get('end_date')
+        rows = await self.single_flight.run(
+            make_key(f"range:{name}", start_date, end_date),
+            lambda: self.range_cache.fetch(name, start_date, end_date, self._fetch_day_rows)
+        )
+        if rows is None:
+            return await self._rpc(name, params)
+        return APIResponse(data=rows)
+
+    async def _fetch_day_rows(self, name: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return (await self._call_rpc(name, params)).data or []
+
+    def invalidate_rpc_cache(self, function: Optional[str] = None, day: Optional[str] = None) -> int:
+        """
+        Drop cached RPC results and per-day partials, e.g. after POS data for a day was corrected or re-imported.
+
+        Args:
+            function: Only this RPC (default: all)
+            day: Only results whose date range includes this day, YYYY-MM-DD (default: all)
 
-    def query_operations_data(
+        Returns:
+            Number of cached results removed
+        """
+        return self.rpc_cache.invalidate(function=function, day=day) + \
+            self.range_cache.invalidate(function=function, day=day)
+
+    async def aclose(self):
+        """Close the connection pool"""
+        await self.client.aclose()
+
+    async def query_operations_data(
         self,
         table: str,
         filters: Optional[Dict[str, Any]] = None,
         columns: Optional[str] = "*",
-        limit: int = 100,
-        order_by: Optional[str] = None
+        limit: Optional[int] = None,
+        order_by: Optional[str] = None,
+        cursor: Optional[str] = None,
+        max_chars: Optional[int] = None
     ) -> Dict[str, Any]:
         """
-        Query operations data from a Supabase table.
+        Query operations data from a Supabase table, one page at a time.
+
+        Rows are ordered by order_by with the id column breaking ties, so the
+        next page continues exactly after the last row returned (keyset, see
+        query_cursor.py). Tables without an id column get a single unpaged page.
 
         Args:
             table: Table name to query (e.g., 'operations_metrics', 'projects', 'tasks')
             filters: Optional dict of column-value pairs to filter by
-                    Example: {'status': 'active', 'priority': 'high'}
             columns: Columns to select (default "*" for all)
-            limit: Maximum number of records to return (default 100)
+            limit: Maximum number of records per page (default 100, or the
+                   cursor's page size)
             order_by: Column name to order by (prefix with '-' for descending)
                      Example: '-created_at' for newest first
+            cursor: next_cursor of a previous call; continues that query (its
+                    table, filters, columns and order_by are used)
+            max_chars: Render the page as CSV within this many characters;
+                       rows that do not fit are left for the next page
 
         Returns:
             Dict with keys:
                 - success: bool
                 - data: List of records
                 - count: Number of records returned
+                - has_more: Whether rows follow this page
+                - next_cursor: Handle for the next page (None on the last page)
+                - csv: The page as CSV (only with max_chars)
                 - message: Status message
 
         Example:
@@ -66,35 +229,65 @@ class SupabaseTools:
                 order_by='-updated_at'
             )
         """
-        try:
-            # Start query
-            query = self.client.table(table).select(columns)
+        if cursor:
+            state = self.query_cursors.get(cursor)
+            if state is None:
+                return {
+                    "success": False,
+                    "data": [],
+                    "count": 0,
+                    "message": f"Cursor {cursor} is unknown or expired; run the query again"
+                }
+            table = state.table
+            limit = limit or state.page_size
+        else:
+            limit = limit or 100
+            state = QueryCursor(
+                table=table,
+                columns=columns or "*",
+                filters=dict(filters or {}),
+                order_column=(order_by or "id").lstrip('-'),
+                descending=bool(order_by and order_by.startswith('-')),
+                page_size=limit
+            )
 
-            # Apply filters if provided
-            if filters:
-                for column, value in filters.items():
+        try:
+            try:
+                rows = await self._fetch_page(state, limit + 1)
+                has_more = len(rows) > limit
+                rows = rows[:limit]
+            except PostgrestError as e:
+                if cursor or e.code != "42703":
+                    raise
+                # No id column to page by: one page in the requested order
+                query = self.client.table(table).select(state.columns)
+                for column, value in state.filters.items():
                     query = query.eq(column, value)
-
-            # Apply ordering if provided
-            if order_by:
-                if order_by.startswith('-'):
-                    # Descending order
-                    query = query.order(order_by[1:], desc=True)
-                else:
-                    # Ascending order
-                    query = query.order(order_by)
-
-            # Apply limit
-            query = query.limit(limit)
-
-            # Execute query
-            response = query.execute()
+                if order_by:
+                    query = query.order(state.order_column, desc=state.descending)
+                rows, has_more = (await query.limit(limit).execute()).data, False
+
+            data = state.project(rows)
+            result = {"success": True}
+            if max_chars is not None:
+                result["csv"], shown = encode_rows(data, max_chars=max_chars)
+                has_more = has_more or shown < len(data)
+                data, rows = data[:shown], rows[:shown]
+            state.advance(rows)
+
+            next_cursor = None
+            if has_more:
+                next_cursor = cursor or self.query_cursors.open(state)
+            elif cursor:
+                self.query_cursors.close(cursor)
 
             return {
-                "success": True,
-                "data": response.data,
-                "count": len(response.data),
-                "message": f"Retrieved {len(response.data)} record(s) from {table}"
+                **result,
+                "data": data,
+                "count": len(data),
+                "has_more": has_more,
+                "next_cursor": next_cursor,
+                "message": f"Retrieved {len(data)} record(s) from {table}" + (" (more available)" if has_more else "")
             }
 
         except Exception as e:
@@ -105,7 +298,47 @@ class SupabaseTools:
                 "message": f"Error querying {table}: {str(e)}"
             }
 
-    def update_operations_data(
+    async def iter_operations_data(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: Optional[str] = "*",
+        order_by: Optional[str] = None,
+        page_size: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream a whole table (or filtered part of it) page by page.
+
+        Same keyset ordering as query_operations_data, without a cursor handle:
+        only one page is held in memory at a time. Errors are raised.
+
+        Yields:
+            Lists of up to page_size records
+        """
+        state = QueryCursor(
+            table=table,
+            columns=columns or "*",
+            filters=dict(filters or {}),
+            order_column=(order_by or "id").lstrip('-'),
+            descending=bool(order_by and order_by.startswith('-'))
+        )
+        while True:
+            rows = await self._fetch_page(state, page_size)
+            state.advance(rows)
+            if rows:
+                yield state.project(rows)
+            if len(rows) < page_size:
+                return
+
+    async def _fetch_page(self, state: QueryCursor, limit: int) -> List[Dict[str, Any]]:
+        """Rows after the cursor's position (including the columns it is read from)"""
+        query = self.client.table(state.table).select(state.select())
+        for column, value in state.filters.items():
+            query = query.eq(column, value)
+        response = await state.apply(query).limit(limit).execute()
+        return response.data
+
+    async def update_operations_data(
         self,
         table: str,
         record_id: Any,
@@ -138,7 +371,7 @@ class SupabaseTools:
         """
         try:
             # Update record
-            response = self.client.table(table).update(data).eq(id_column, record_id).execute()
+            response = await self.client.table(table).update(data).eq(id_column, record_id).execute()
 
             if response.data:
                 return {
@@ -160,7 +393,7 @@ class SupabaseTools:
                 "message": f"Error updating {table}: {str(e)}"
             }
 
-    def get_operations_summary(
+    async def get_operations_summary(
         self,
         date_range: Optional[Dict[str, str]] = None,
         metrics: Optional[List[str]] = None
@@ -201,31 +434,17 @@ class SupabaseTools:
                     'end_date': end_date.strftime('%Y-%m-%d')
                 }
 
-            # Query different metrics based on requested metrics
-            # This is a template - actual implementation depends on your Supabase schema
-
-            if not metrics or 'tasks' in metrics:
-                # Example: Get task summary
-                tasks_response = self.client.table('tasks').select('status').gte(
-                    'created_at', date_range['start_date']
-                ).lte('created_at', date_range['end_date']).execute()
-
-                tasks_data = tasks_response.data
-                summary['tasks'] = {
-                    'total': len(tasks_data),
-                    'by_status': self._group_by_field(tasks_data, 'status')
-                }
-
-            if not metrics or 'projects' in metrics:
-                # Example: Get project summary
-                projects_response = self.client.table('projects').select('status').gte(
-                    'created_at', date_range['start_date']
-                ).lte('created_at', date_range['end_date']).execute()
-
-                projects_data = projects_response.data
-                summary['projects'] = {
-                    'total': len(projects_data),
-                    'by_status': self._group_by_field(projects_data, 'status')
+            # Count statuses server-side (one row per status comes back, not one per record)
+            tables = [name for name in ('tasks', 'projects') if not metrics or name in metrics]
+            counts = await asyncio.gather(*(
+                self.group_count(name, 'status', date_field='created_at',
+                                 start_date=date_range['start_date'], end_date=date_range['end_date'])
+                for name in tables
+            ))
+            for name, by_status in zip(tables, counts):
+                summary[name] = {
+                    'total': sum(by_status.values()),
+                    'by_status': by_status
                 }
 
             return {
@@ -243,6 +462,65 @@ class SupabaseTools:
                 "message": f"Error generating summary: {str(e)}"
             }
 
+    async def group_count(
+        self,
+        table: str,
+        field: str,
+        date_field: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Dict[Any, int]:
+        """
+        Count rows per value of a column, computed by the database.
+
+        Uses the first path in GROUP_COUNT_PATHS the project supports and
+        remembers it: the group_count RPC, a PostgREST aggregate select
+        (`field,count()`), or, without either, selecting only the column
+        and counting here.
+
+        Args:
+            table: Table name (e.g. 'tasks', 'projects')
+            field: Column to group by (e.g. 'status')
+            date_field: Optional column the date range applies to (e.g. 'created_at')
+            start_date: Inclusive lower bound for date_field
+            end_date: Inclusive upper bound for date_field
+
+        Returns:
+            Dict of {value: row count}, largest first (values are text on the RPC path)
+
+        Raises:
+            PostgrestError: The query failed for a reason other than a missing feature
+        """
+        while True:
+            path = self._group_count_paths[0]
+            try:
+                if path == "rpc":
+                    response = await self.client.rpc('group_count', {
+                        'table_name': table, 'group_field': field, 'date_field': date_field,
+                        'start_date': start_date, 'end_date': end_date
+                    })
+                    return {row['group_value']: row['row_count'] for row in response.data or []}
+
+                query = self.client.table(table).select(f"{field},count()" if path == "aggregate" else field)
+                if date_field and start_date:
+                    query = query.gte(date_field, start_date)
+                if date_field and end_date:
+                    query = query.lte(date_field, end_date)
+                response = await query.execute()
+            except PostgrestError as e:
+                # Function not deployed (PGRST202) / aggregates disabled (PGRST123): try the next path
+                if e.code != {"rpc": "PGRST202", "aggregate": "PGRST123"}.get(path):
+                    raise
+                if self._group_count_paths[0] == path:  # a concurrent call may have moved on already
+                    self._group_count_paths.pop(0)
+                continue
+
+            if path == "aggregate":
+                counts = {row.get(field): row['count'] for row in response.data or []}
+            else:
+                counts = self._group_by_field(response.data or [], field)
+            return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
     def _group_by_field(self, records: List[Dict], field: str) -> Dict[str, int]:
         """Helper method to group records by a field and count occurrences"""
         groups = {}
@@ -251,7 +529,7 @@ class SupabaseTools:
             groups[value] = groups.get(value, 0) + 1
         return groups
 
-    def aggregate_operations_data(
+    async def aggregate_operations_data(
         self,
         table: str,
         aggregations: Dict[str, str],
@@ -342,7 +620,7 @@ class SupabaseTools:
             query = query.limit(limit)
 
             # Execute query
-            response = query.execute()
+            response = await query.execute()
 
             return {
                 "success": True,
@@ -363,7 +641,7 @@ class SupabaseTools:
     # Restaurant Analytics RPC Functions
     # ========================================================================
 
-    def get_daily_revenue(self, target_date: Optional[str] = None) -> Dict[str, Any]:
+    async def get_daily_revenue(self, target_date: Optional[str] = None) -> Dict[str, Any]:
         """
         Get daily revenue summary for a specific date.
 
@@ -384,7 +662,7 @@ class SupabaseTools:
             if target_date:
                 params['target_date'] = target_date
 
-            response = self.client.rpc('get_daily_revenue', params).execute()
+            response = await self._rpc('get_daily_revenue', params)
 
             if response.data:
                 return {
@@ -406,7 +684,7 @@ class SupabaseTools:
                 "message": f"Error getting daily revenue: {str(e)}"
             }
 
-    def get_revenue_by_zone(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    async def get_revenue_by_zone(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
         """
         Get revenue breakdown by dining zone.
 
@@ -424,7 +702,7 @@ class SupabaseTools:
             if end_date:
                 params['end_date'] = end_date
 
-            response = self.client.rpc('get_revenue_by_zone', params).execute()
+            response = await self._range_rpc('get_revenue_by_zone', params)
 
             return {
                 "success": True,
@@ -441,7 +719,7 @@ class SupabaseTools:
                 "message": f"Error getting revenue by zone: {str(e)}"
             }
 
-    def get_top_dishes(self, start_date: Optional[str] = None, end_date: Optional[str] = None, top_n: int = 10) -> Dict[str, Any]:
+    async def get_top_dishes(self, start_date: Optional[str] = None, end_date: Optional[str] = None, top_n: int = 10) -> Dict[str, Any]:
         """
         Get top selling dishes by quantity.
 
@@ -460,7 +738,7 @@ class SupabaseTools:
             if end_date:
                 params['end_date'] = end_date
 
-            response = self.client.rpc('get_top_dishes', params).execute()
+            response = await self._rpc('get_top_dishes', params)
 
             return {
                 "success": True,
@@ -477,7 +755,7 @@ class SupabaseTools:
                 "message": f"Error getting top dishes: {str(e)}"
             }
 
-    def get_station_performance(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    async def get_station_performance(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
         """
         Get kitchen station performance metrics.
 
@@ -495,7 +773,7 @@ class SupabaseTools:
             if end_date:
                 params['end_date'] = end_date
 
-            response = self.client.rpc('get_station_performance', params).execute()
+            response = await self._range_rpc('get_station_performance', params)
 
             return {
                 "success": True,
@@ -512,7 +790,7 @@ class SupabaseTools:
                 "message": f"Error getting station performance: {str(e)}"
             }
 
-    def get_hourly_revenue(self, target_date: Optional[str] = None) -> Dict[str, Any]:
+    async def get_hourly_revenue(self, target_date: Optional[str] = None) -> Dict[str, Any]:
         """
         Get revenue pattern by hour of day.
 
@@ -527,7 +805,7 @@ class SupabaseTools:
             if target_date:
                 params['target_date'] = target_date
 
-            response = self.client.rpc('get_hourly_revenue', params).execute()
+            response = await self._rpc('get_hourly_revenue', params)
 
             return {
                 "success": True,
@@ -544,7 +822,7 @@ class SupabaseTools:
                 "message": f"Error getting hourly revenue: {str(e)}"
             }
 
-    def get_table_turnover(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    async def get_table_turnover(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
         """
         Get table turnover rate (orders per table).
 
@@ -562,7 +840,7 @@ class SupabaseTools:
             if end_date:
                 params['end_date'] = end_date
 
-            response = self.client.rpc('get_table_turnover', params).execute()
+            response = await self._range_rpc('get_table_turnover', params)
 
             return {
                 "success": True,
@@ -579,7 +857,7 @@ class SupabaseTools:
                 "message": f"Error getting table turnover: {str(e)}"
             }
 
-    def get_return_analysis(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    async def get_return_analysis(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
         """
         Get return/refund analysis by dish.
 
@@ -597,7 +875,7 @@ class SupabaseTools:
             if end_date:
                 params['end_date'] = end_date
 
-            response = self.client.rpc('get_return_analysis', params).execute()
+            response = await self._rpc('get_return_analysis', params)
 
             return {
                 "success": True,
@@ -614,7 +892,7 @@ class SupabaseTools:
                 "message": f"Error getting return analysis: {str(e)}"
             }
 
-    def get_order_type_distribution(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    async def get_order_type_distribution(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
         """
         Get order type distribution (dine_in, takeout, delivery).
 
@@ -632,7 +910,7 @@ class SupabaseTools:
             if end_date:
                 params['end_date'] = end_date
 
-            response = self.client.rpc('get_order_type_distribution', params).execute()
+            response = await self._rpc('get_order_type_distribution', params)
 
             return {
                 "success": True,
@@ -649,7 +927,7 @@ class SupabaseTools:
                 "message": f"Error getting order type distribution: {str(e)}"
             }
 
-    def get_revenue_trend(self, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_revenue_trend(self, start_date: str, end_date: str) -> Dict[str, Any]:
         """
         Get revenue trend over a date range (day-by-day breakdown).
 
@@ -666,7 +944,7 @@ class SupabaseTools:
                 'end_date': end_date
             }
 
-            response = self.client.rpc('get_revenue_trend', params).execute()
+            response = await self._range_rpc('get_revenue_trend', params)
 
             return {
                 "success": True,
@@ -683,7 +961,7 @@ class SupabaseTools:
                 "message": f"Error getting revenue trend: {str(e)}"
             }
 
-    def get_quick_stats(self, target_date: Optional[str] = None) -> Dict[str, Any]:
+    async def get_quick_stats(self, target_date: Optional[str] = None) -> Dict[str, Any]:
         """
         Get quick dashboard summary (today's key metrics).
 
@@ -698,7 +976,7 @@ class SupabaseTools:
             if target_date:
                 params['target_date'] = target_date
 
-            response = self.client.rpc('get_quick_stats', params).execute()
+            response = await self._rpc('get_quick_stats', params)
 
             return {
                 "success": True,
@@ -715,11 +993,102 @@ class SupabaseTools:
                 "message": f"Error getting quick stats: {str(e)}"
             }
 
+    async def get_operations_snapshot(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        sections: Optional[Sequence[str]] = None,
+        top_n: int = 5,
+        timeout: float = SNAPSHOT_TIMEOUT_SECONDS
+    ) -> Dict[str, Any]:
+        """
+        Run several analytics RPCs concurrently for one date or range.
+
+        Replaces a sequence of single-metric tool calls ("今天怎么样" used to
+        take get_quick_stats, get_daily_revenue, get_hourly_revenue,
+        get_top_dishes and get_station_performance one after another).
+        Sections still running when the deadline passes are cancelled and
+        reported in timed_out; the others are returned as partial results.
+
+        Args:
+            start_date: Start date in YYYY-MM-DD format (default: today)
+            end_date: End date in YYYY-MM-DD format (default: start_date)
+            sections: Section names from SNAPSHOT_SECTIONS (default: DEFAULT_SNAPSHOT_SECTIONS)
+            top_n: Number of dishes in top_dishes (default: 5)
+            timeout: Seconds for the whole snapshot (default: 8)
+
+        Returns:
+            Dict with:
+                - success: True if at least one section returned data
+                - data: Section name -> the section method's data
+                - errors: Section name -> error message (failed or unknown sections)
+                - timed_out: Sections cancelled at the deadline
+                - skipped: Single-day sections skipped for a multi-day range
+                - elapsed_ms: Wall time of the fan-out
+        """
+        start_date = start_date or end_date
+        end_date = end_date or start_date
+        multi_day = start_date is not None and end_date != start_date
+        calls = {
+            "quick_stats": lambda: self.get_quick_stats(start_date),
+            "daily_revenue": lambda: self.get_daily_revenue(start_date),
+            "hourly_revenue": lambda: self.get_hourly_revenue(start_date),
+            "top_dishes": lambda: self.get_top_dishes(start_date, end_date, top_n),
+            "station_performance": lambda: self.get_station_performance(start_date, end_date),
+            "revenue_by_zone": lambda: self.get_revenue_by_zone(start_date, end_date),
+            "order_type_distribution": lambda: self.get_order_type_distribution(start_date, end_date),
+            "table_turnover": lambda: self.get_table_turnover(start_date, end_date),
+            "return_analysis": lambda: self.get_return_analysis(start_date, end_date),
+            "revenue_trend": lambda: self.get_revenue_trend(start_date, end_date),
+        }
+
+        requested = list(dict.fromkeys(sections or DEFAULT_SNAPSHOT_SECTIONS))
+        errors = {name: "Unknown section" for name in requested if name not in calls}
+        skipped = [name for name in requested if multi_day and name in SINGLE_DAY_SECTIONS]
+        if skipped and "revenue_trend" not in requested:
+            # Daily figures for a range come from the trend instead
+            requested.append("revenue_trend")
+        runnable = [name for name in requested if name in calls and name not in skipped]
+        if "revenue_trend" in runnable and start_date is None:
+            # get_revenue_trend needs explicit dates
+            runnable.remove("revenue_trend")
+            skipped.append("revenue_trend")
+
+        started = time.perf_counter()
+        tasks = {asyncio.ensure_future(calls[name]()): name for name in runnable}
+        done, pending = await asyncio.wait(tasks, timeout=timeout) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        data = {}
+        for task in done:
+            name = tasks[task]
+            result = task.result()
+            if result.get("success"):
+                data[name] = result.get("data")
+            else:
+                errors[name] = result.get("message", "No data returned")
+
+        data = {name: data[name] for name in SNAPSHOT_SECTIONS if name in data}
+        timed_out = [tasks[task] for task in tasks if task in pending]
+        return {
+            "success": bool(data),
+            "data": data,
+            "errors": errors,
+            "timed_out": timed_out,
+            "skipped": skipped,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "message": f"Retrieved {len(data)}/{len(runnable)} sections for "
+                       f"{start_date or 'today'}" + (f" to {end_date}" if multi_day else "")
+        }
+
     # ============================================================================
     # Menu Engineering Analytics (Boston Matrix Analysis)
     # ============================================================================
 
-    def get_menu_profitability(
+    async def get_menu_profitability(
         self,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
@@ -743,7 +1112,7 @@ class SupabaseTools:
             if end_date:
                 params['end_date'] = end_date
 
-            response = self.client.rpc('get_menu_profitability', params).execute()
+            response = await self._rpc('get_menu_profitability', params)
 
             return {
                 "success": True,
@@ -760,7 +1129,21 @@ class SupabaseTools:
                 "message": f"Error getting menu profitability: {str(e)}"
             }
 
-    def get_top_profitable_dishes(
+    async def _dish_profit(self, start_date: Optional[str], end_date: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Every sold dish in a range with its profit (get_dish_profit RPC).
+
+        One cached result per range serves get_top_profitable_dishes and
+        get_low_profit_dishes for any top_n / bottom_n.
+        """
+        params = {}
+        if start_date:
+            params['start_date'] = start_date
+        if end_date:
+            params['end_date'] = end_date
+        return (await self._rpc('get_dish_profit', params)).data or []
+
+    async def get_top_profitable_dishes(
         self,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
@@ -778,19 +1161,14 @@ class SupabaseTools:
             List of top profitable dishes with revenue, cost, and profit
         """
         try:
-            params = {'top_n': top_n}
-            if start_date:
-                params['start_date'] = start_date
-            if end_date:
-                params['end_date'] = end_date
-
-            response = self.client.rpc('get_top_profitable_dishes', params).execute()
+            rows = sorted(await self._dish_profit(start_date, end_date), key=_gross_profit, reverse=True)
+            data = [{column: row.get(column) for column in DISH_PROFIT_COLUMNS} for row in rows[:top_n]]
 
             return {
                 "success": True,
-                "data": response.data,
-                "count": len(response.data),
-                "message": f"Retrieved top {len(response.data)} profitable dishes"
+                "data": data,
+                "count": len(data),
+                "message": f"Retrieved top {len(data)} profitable dishes"
             }
 
         except Exception as e:
@@ -801,7 +1179,7 @@ class SupabaseTools:
                 "message": f"Error getting top profitable dishes: {str(e)}"
             }
 
-    def get_low_profit_dishes(
+    async def get_low_profit_dishes(
         self,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
@@ -819,19 +1197,22 @@ class SupabaseTools:
             List of low profit dishes with recommendations
         """
         try:
-            params = {'bottom_n': bottom_n}
-            if start_date:
-                params['start_date'] = start_date
-            if end_date:
-                params['end_date'] = end_date
-
-            response = self.client.rpc('get_low_profit_dishes', params).execute()
+            rows = sorted(
+                (row for row in await self._dish_profit(start_date, end_date)
+                 if (row.get("quantity_sold") or 0) >= LOW_PROFIT_MIN_QUANTITY),
+                key=_gross_profit
+            )
+            data = [
+                {**{column: row.get(column) for column in DISH_PROFIT_COLUMNS},
+                 "recommendation": _low_profit_recommendation(row)}
+                for row in rows[:bottom_n]
+            ]
 
             return {
                 "success": True,
-                "data": response.data,
-                "count": len(response.data),
-                "message": f"Retrieved {len(response.data)} low profit dishes"
+                "data": data,
+                "count": len(data),
+                "message": f"Retrieved {len(data)} low profit dishes"
             }
 
         except Exception as e:
@@ -842,7 +1223,7 @@ class SupabaseTools:
                 "message": f"Error getting low profit dishes: {str(e)}"
             }
 
-    def get_cost_coverage_rate(
+    async def get_cost_coverage_rate(
         self,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None
@@ -864,7 +1245,7 @@ class SupabaseTools:
             if end_date:
                 params['end_date'] = end_date
 
-            response = self.client.rpc('get_cost_coverage_rate', params).execute()
+            response = await self._rpc('get_cost_coverage_rate', params)
 
             return {
                 "success": True,
@@ -879,7 +1260,7 @@ class SupabaseTools:
                 "message": f"Error getting cost coverage rate: {str(e)}"
             }
 
-    def get_dishes_missing_cost(
+    async def get_dishes_missing_cost(
         self,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
@@ -903,7 +1284,7 @@ class SupabaseTools:
             if end_date:
                 params['end_date'] = end_date
 
-            response = self.client.rpc('get_dishes_missing_cost', params).execute()
+            response = await self._rpc('get_dishes_missing_cost', params)
 
             return {
                 "success": True,
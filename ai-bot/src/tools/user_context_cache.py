@@ -0,0 +1,215 @@
+"""
+User Context Cache - In-memory cache for get_user_context lookups
+
+get_user_context runs two SQL queries and reads a JSON file on every call,
+although the user/room directory changes rarely. This module keeps the
+assembled pieces in a bounded LRU and revalidates them cheaply:
+
+- DB part (user row + room memberships): tagged with a directory version
+  obtained from a single probe query (MAX(updated_at) / COUNT(*) over users,
+  rooms and memberships). Any insert/update/delete changes the version.
+- JSON part (preferences, expertise, conversation_memory): tagged with the
+  file's (mtime_ns, size). A rewritten file is picked up on the next call.
+
+Hit/miss counters are exposed through stats() for the /cache/stats endpoint.
+"""
+
+import copy
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+# Single probe query: any change to the user/room directory changes its result
+DIRECTORY_VERSION_SQL = """
+    SELECT
+        (SELECT MAX(updated_at) FROM users),
+        (SELECT COUNT(*) FROM users),
+        (SELECT MAX(updated_at) FROM rooms),
+        (SELECT COUNT(*) FROM rooms),
+        (SELECT MAX(updated_at) FROM memberships),
+        (SELECT COUNT(*) FROM memberships)
+"""
+
+
+class UserContextCache:
+    """
+    Thread-safe bounded LRU cache for user context fragments.
+
+    Entries are stored as (tag, value) where tag is the directory version for
+    DB entries and (mtime_ns, size) for JSON entries. A lookup whose tag does
+    not match the current one counts as a stale miss and is replaced.
+    """
+
+    def __init__(self, max_entries: int = 512, probe_interval_seconds: float = 1.0):
+        """
+        Initialize user context cache.
+
+        Args:
+            max_entries: Maximum cached entries per part before LRU eviction (default: 512)
+            probe_interval_seconds: Reuse the directory version probe for this long (default: 1.0)
+        """
+        self.max_entries = max_entries
+        self.probe_interval_seconds = probe_interval_seconds
+
+        self._db_entries: "OrderedDict[Hashable, Tuple[Any, Any]]" = OrderedDict()
+        self._json_entries: "OrderedDict[Hashable, Tuple[Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._directory_version: Optional[Tuple] = None
+        self._probed_at = 0.0
+
+        self._stats = {
+            "db_hits": 0,
+            "db_misses": 0,
+            "json_hits": 0,
+            "json_misses": 0,
+            "stale": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "probes": 0,
+        }
+
+    # ---------- version probes ----------
+
+    def directory_version(self, conn: sqlite3.Connection) -> Tuple:
+        """
+        Return the current user/room directory version.
+
+        The probe result is reused for probe_interval_seconds so bursts of
+        lookups cost at most one probe query.
+
+        Args:
+            conn: Campfire database connection
+
+        Returns:
+            Tuple identifying the current directory state
+        """
+        now = time.monotonic()
+        with self._lock:
+            if (self._directory_version is not None
+                    and now - self._probed_at < self.probe_interval_seconds):
+                return self._directory_version
+
+        row = conn.execute(DIRECTORY_VERSION_SQL).fetchone()
+        version = tuple(row)
+
+        with self._lock:
+            self._directory_version = version
+            self._probed_at = now
+            self._stats["probes"] += 1
+        return version
+
+    @staticmethod
+    def file_version(path) -> Optional[Tuple[int, int]]:
+        """
+        Return (mtime_ns, size) for a file, or None if it does not exist.
+
+        Args:
+            path: File path
+
+        Returns:
+            Version tuple or None
+        """
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    # ---------- lookups ----------
+
+    def get_db_part(self, key: Hashable, version: Tuple, loader: Callable[[], Any]) -> Any:
+        """
+        Return the DB part for key, loading it if missing or stale.
+
+        Args:
+            key: Cache key (user_id)
+            version: Current directory version
+            loader: Callable producing the value on a miss
+
+        Returns:
+            Deep copy of the cached value
+        """
+        return self._get(self._db_entries, "db", key, version, loader)
+
+    def get_json_part(self, key: Hashable, version: Optional[Tuple], loader: Callable[[], Any]) -> Any:
+        """
+        Return the JSON part for key, loading it if missing or stale.
+
+        Args:
+            key: Cache key (user_id)
+            version: Current file version (None when the file does not exist)
+            loader: Callable producing the value on a miss
+
+        Returns:
+            Deep copy of the cached value
+        """
+        return self._get(self._json_entries, "json", key, version, loader)
+
+    def _get(self, entries: OrderedDict, part: str, key: Hashable, tag: Any, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            cached = entries.get(key)
+            if cached is not None and cached[0] == tag:
+                entries.move_to_end(key)
+                self._stats[f"{part}_hits"] += 1
+                return copy.deepcopy(cached[1])
+            self._stats[f"{part}_misses"] += 1
+            if cached is not None:
+                self._stats["stale"] += 1
+
+        # Load outside the lock so slow I/O does not block other users
+        value = loader()
+
+        with self._lock:
+            entries[key] = (tag, value)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return copy.deepcopy(value)
+
+    # ---------- invalidation ----------
+
+    def invalidate_user(self, user_id: int):
+        """
+        Drop cached JSON context for a user (called after save_user_context).
+
+        Args:
+            user_id: User ID
+        """
+        with self._lock:
+            if self._json_entries.pop(user_id, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        """Drop all cached entries and force a fresh directory probe."""
+        with self._lock:
+            self._stats["invalidations"] += len(self._db_entries) + len(self._json_entries)
+            self._db_entries.clear()
+            self._json_entries.clear()
+            self._directory_version = None
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with entry counts, hit/miss counters and hit rates
+        """
+        with self._lock:
+            s = dict(self._stats)
+            db_total = s["db_hits"] + s["db_misses"]
+            json_total = s["json_hits"] + s["json_misses"]
+            lookups = db_total + json_total
+            return {
+                "db_entries": len(self._db_entries),
+                "json_entries": len(self._json_entries),
+                "max_entries": self.max_entries,
+                **s,
+                "db_hit_rate": round(s["db_hits"] / db_total, 4) if db_total else 0.0,
+                "json_hit_rate": round(s["json_hits"] / json_total, 4) if json_total else 0.0,
+                "hit_rate": round((s["db_hits"] + s["json_hits"]) / lookups, 4) if lookups else 0.0,
+            }
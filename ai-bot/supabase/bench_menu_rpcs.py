@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Concurrency Benchmark for the Menu Engineering RPCs
+
+Several clients (one connection each, like several bots and subagents
+behind PostgREST) call get_menu_profitability, get_top_profitable_dishes
+and get_low_profit_dishes in a loop with varying ranges and limits for a
+fixed time. Reports per RPC:
+
+    - calls/s over all clients, p50 / p95 latency and errors
+    - catalog churn: rows inserted into pg_class / pg_attribute during the run
+      (a temp table per call shows up here; a set-based query adds none)
+
+Compare before and after the set-based rewrite on the same generated data:
+
+    python supabase/bench_menu_rpcs.py --setup --until 20261019_use   # temp-table version
+    python supabase/bench_menu_rpcs.py --setup                        # all migrations
+
+Needs a local Postgres (see explain_rpc_plans.py, whose --setup and generated
+tables it reuses) and psycopg2. Never point --setup at a production database.
+
+Usage:
+    python supabase/bench_menu_rpcs.py [--dsn postgresql://...] [--clients 8] [--seconds 10]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from explain_rpc_plans import DEFAULT_DSN, HAS_PSYCOPG2, setup  # noqa: E402
+
+if HAS_PSYCOPG2:
+    import psycopg2
+
+# Ranges inside the generated data (2025-09-01 .. 2025-10-30)
+RANGES = [("2025-10-01", "2025-10-07"), ("2025-09-01", "2025-09-30"), ("2025-09-15", "2025-10-14")]
+
+# RPC -> extra arguments per call number
+CALLS = {
+    "get_menu_profitability": lambda n: {"min_quantity": 1 + n % 10},
+    "get_top_profitable_dishes": lambda n: {"top_n": 3 + n % 8},
+    "get_low_profit_dishes": lambda n: {"bottom_n": 3 + n % 8},
+}
+
+CATALOG_INSERTS = """
+SELECT COALESCE(SUM(n_tup_ins), 0) FROM pg_stat_sys_tables WHERE relname IN ('pg_class', 'pg_attribute')
+"""
+
+
+def catalog_inserts(conn) -> int:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_stat_clear_snapshot()")
+        cursor.execute(CATALOG_INSERTS)
+        return int(cursor.fetchone()[0])
+
+
+def client(dsn: str, worker: int, deadline: float, results: dict, lock: threading.Lock):
+    """Call the menu RPCs round-robin until the deadline; record (function, seconds, error)"""
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    n, local = worker, []
+    with conn.cursor() as cursor:
+        while time.perf_counter() < deadline:
+            function = list(CALLS)[n % len(CALLS)]
+            start_date, end_date = RANGES[n % len(RANGES)]
+            params = {"start_date": start_date, "end_date": end_date, **CALLS[function](n)}
+            arguments = ", ".join(f"{name} => %({name})s" for name in params)
+            started = time.perf_counter()
+            try:
+                cursor.execute(f"SELECT * FROM {function}({arguments})", params)
+                cursor.fetchall()
+                local.append((function, time.perf_counter() - started, None))
+            except psycopg2.Error as e:
+                local.append((function, time.perf_counter() - started, str(e).strip().splitlines()[0]))
+            n += 1
+    conn.close()
+    with lock:
+        for function, seconds, error in local:
+            results.setdefault(function, []).append((seconds, error))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent menu engineering RPC calls")
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL", DEFAULT_DSN))
+    parser.add_argument("--setup", action="store_true", help="Create and fill tables, apply migrations")
+    parser.add_argument("--orders", type=int, default=20000, help="Generated orders for --setup (default: 20000)")
+    parser.add_argument("--until", help="With --setup, last migration file name prefix to apply")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent connections (default: 8)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Run time (default: 10)")
+    args = parser.parse_args()
+
+    if not HAS_PSYCOPG2:
+        print("❌ psycopg2 is required: pip install psycopg2-binary")
+        sys.exit(1)
+
+    conn = psycopg2.connect(args.dsn)
+    conn.autocommit = True
+
+    print("=" * 80)
+    print(f"⏱️  Menu RPCs: {args.clients} concurrent clients for {args.seconds:.0f}s")
+    print("=" * 80)
+    if args.setup:
+        print(f"📦 Setting up {args.orders} orders")
+        setup(conn, args.orders, args.until)
+
+    results, lock = {}, threading.Lock()
+    inserts_before = catalog_inserts(conn)
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=client, args=(args.dsn, worker, deadline, results, lock))
+               for worker in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    time.sleep(1.0)  # table statistics are flushed asynchronously
+    churn = catalog_inserts(conn) - inserts_before
+    conn.close()
+
+    total = 0
+    for function in CALLS:
+        calls = results.get(function, [])
+        times = sorted(seconds for seconds, _ in calls)
+        errors = [error for _, error in calls if error]
+        total += len(calls)
+        if not times:
+            print(f"   {function:28s} no calls")
+            continue
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        print(f"   {function:28s} {len(calls) / args.seconds:8.1f} calls/s   "
+              f"p50 {statistics.median(times) * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms   errors {len(errors)}")
+        if errors:
+            print(f"      first error: {errors[0]}")
+    print("=" * 80)
+    print(f"{total / args.seconds:.1f} calls/s in total, {churn} catalog rows inserted during the run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+-- Generic group-count for operations tables
+-- Created: 2026-10-19
+-- Purpose: Let summaries count rows per status (or any column) in the database
+--          instead of downloading every row and counting in the bot
+
+-- ============================================================================
+-- group_count: rows per value of one column, optionally within a date range
+-- ============================================================================
+CREATE OR REPLACE FUNCTION group_count(
+  table_name TEXT,
+  group_field TEXT,
+  date_field TEXT DEFAULT NULL,
+  start_date TEXT DEFAULT NULL,
+  end_date TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+  group_value TEXT,
+  row_count BIGINT
+) AS $$
+DECLARE
+  relation REGCLASS;
+  date_type TEXT;
+  query_text TEXT;
+BEGIN
+  -- Identifiers are quoted with %I; row level security of the caller still applies
+  relation := to_regclass(format('public.%I', table_name));
+  IF relation IS NULL THEN
+    RAISE EXCEPTION 'relation "public.%" does not exist', table_name USING ERRCODE = '42P01';
+  END IF;
+
+  query_text := format('SELECT %I::TEXT, COUNT(*) FROM %s', group_field, relation);
+
+  IF date_field IS NOT NULL THEN
+    SELECT format_type(a.atttypid, a.atttypmod) INTO date_type
+    FROM pg_attribute a
+    WHERE a.attrelid = relation AND a.attname = date_field AND NOT a.attisdropped;
+
+    IF date_type IS NULL THEN
+      RAISE EXCEPTION 'column "%" does not exist in %', date_field, table_name USING ERRCODE = '42703';
+    END IF;
+
+    -- Same bounds as created_at=gte.<start>&created_at=lte.<end>, cast to the
+    -- column's own type so an index on it stays usable
+    query_text := query_text || format(
+      ' WHERE ($1 IS NULL OR %1$I >= CAST($1 AS %2$s)) AND ($2 IS NULL OR %1$I <= CAST($2 AS %2$s))',
+      date_field, date_type
+    );
+  END IF;
+
+  RETURN QUERY EXECUTE query_text || ' GROUP BY 1 ORDER BY 2 DESC' USING start_date, end_date;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION group_count IS '按字段分组计数 (Row count per value of a column, optionally within a date range)';
@@ -0,0 +1,770 @@
+-- Sargable date predicates for the analytics and menu engineering RPCs
+-- Created: 2026-10-19
+-- Purpose: Filter orders by a half-open ordered_at range instead of
+--          DATE(ordered_at AT TIME ZONE 'Asia/Shanghai') so the ordered_at
+--          index can be used, and index the joins the RPCs depend on
+--
+-- Every function keeps its parameters, result columns and results; only the
+-- predicate changes. A Shanghai calendar day D is
+--   ordered_at >= D::TIMESTAMP AT TIME ZONE 'Asia/Shanghai'
+--   AND ordered_at < (D + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai'
+-- which selects the same rows as DATE(ordered_at AT TIME ZONE 'Asia/Shanghai') = D
+-- (and BETWEEN start_date AND end_date becomes [start_date, end_date + 1)).
+-- The bounds are computed once per call in DECLARE, so the planner sees a
+-- range on the bare column.
+--
+-- Check the plans with supabase/explain_rpc_plans.py against a local Postgres.
+
+-- ============================================================================
+-- Indexes
+-- ============================================================================
+-- Date range scans on orders
+CREATE INDEX IF NOT EXISTS idx_rsp_orders_ordered_at ON rsp_orders (ordered_at);
+
+-- Order lines of the orders in range (every RPC joins rsp_order_items to rsp_orders)
+CREATE INDEX IF NOT EXISTS idx_rsp_order_items_order_id ON rsp_order_items (order_id);
+
+-- Normalized dish name, the menu RPCs' join key to product_cost_analysis
+CREATE INDEX IF NOT EXISTS idx_rsp_order_items_normalized_name ON rsp_order_items ((TRIM(LOWER(item_name))));
+
+-- product_cost_analysis is a view; if it is ever a table or materialized
+-- view, index its side of the join as well
+DO $$
+BEGIN
+  IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('public.product_cost_analysis')) IN ('r', 'm') THEN
+    CREATE INDEX IF NOT EXISTS idx_product_cost_analysis_normalized_name
+      ON product_cost_analysis ((TRIM(LOWER(product_name))));
+  END IF;
+END;
+$$;
+
+
+-- ============================================================================
+-- 1. Daily Revenue Summary
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_daily_revenue(target_date DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+  total_revenue DECIMAL,
+  order_count BIGINT,
+  avg_order_value DECIMAL,
+  completed_orders BIGINT,
+  pending_orders BIGINT,
+  cancelled_orders BIGINT
+) AS $$
+DECLARE
+  day_start TIMESTAMPTZ := target_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+  day_end TIMESTAMPTZ := (target_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+  RETURN QUERY
+  SELECT
+    -- Count ALL orders with total > 0 (not just completed)
+    COALESCE(SUM(total), 0) as total_revenue,
+    COUNT(*) as order_count,
+    COALESCE(AVG(NULLIF(total, 0)), 0) as avg_order_value,
+    COUNT(*) FILTER (WHERE status = 'completed') as completed_orders,
+    COUNT(*) FILTER (WHERE status = 'pending') as pending_orders,
+    COUNT(*) FILTER (WHERE status = 'cancelled') as cancelled_orders
+  FROM rsp_orders
+  WHERE ordered_at >= day_start AND ordered_at < day_end
+    AND total > 0;  -- Only count orders with actual revenue
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_daily_revenue IS '获取指定日期的营业额汇总 (Daily revenue summary - counts all orders with revenue)';
+
+
+-- ============================================================================
+-- 2. Revenue by Zone
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_revenue_by_zone(
+  start_date DATE DEFAULT CURRENT_DATE,
+  end_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+  zone TEXT,
+  total_revenue DECIMAL,
+  order_count BIGINT,
+  avg_order_value DECIMAL
+) AS $$
+DECLARE
+  range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+  range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+  RETURN QUERY
+  SELECT
+    COALESCE(t.zone, '未知区域') as zone,
+    SUM(o.total) as total_revenue,
+    COUNT(o.id) as order_count,
+    AVG(o.total) as avg_order_value
+  FROM rsp_orders o
+  LEFT JOIN rsp_tables t ON o.table_id = t.id
+  WHERE o.ordered_at >= range_start AND o.ordered_at < range_end
+    AND o.total > 0  -- Changed from status = 'completed'
+  GROUP BY t.zone
+  ORDER BY total_revenue DESC;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_revenue_by_zone IS '按区域统计营业额 (Revenue by dining zone - all orders)';
+
+
+-- ============================================================================
+-- 3. Top Selling Dishes
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_top_dishes(
+  start_date DATE DEFAULT CURRENT_DATE,
+  end_date DATE DEFAULT CURRENT_DATE,
+  top_n INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+  item_name TEXT,
+  total_quantity BIGINT,
+  total_revenue DECIMAL,
+  order_count BIGINT,
+  avg_price DECIMAL
+) AS $$
+DECLARE
+  range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+  range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+  RETURN QUERY
+  SELECT
+    oi.item_name,
+    SUM(oi.quantity) as total_quantity,
+    SUM(oi.total_price) as total_revenue,
+    COUNT(DISTINCT oi.order_id) as order_count,
+    AVG(oi.unit_price) as avg_price
+  FROM rsp_order_items oi
+  JOIN rsp_orders o ON oi.order_id = o.id
+  WHERE o.ordered_at >= range_start AND o.ordered_at < range_end
+    AND oi.total_price > 0  -- Changed from status = 'completed'
+    AND oi.is_return = false
+  GROUP BY oi.item_name
+  ORDER BY total_quantity DESC
+  LIMIT top_n;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_top_dishes IS '获取最畅销菜品 (Top selling dishes - all orders)';
+
+
+-- ============================================================================
+-- 4. Station Performance
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_station_performance(
+  start_date DATE DEFAULT CURRENT_DATE,
+  end_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+  station_name TEXT,
+  station_name_english TEXT,
+  total_items BIGINT,
+  total_revenue DECIMAL,
+  avg_item_price DECIMAL,
+  order_count BIGINT
+) AS $$
+DECLARE
+  range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+  range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+  RETURN QUERY
+  SELECT
+    COALESCE(s.name, '未分配') as station_name,
+    COALESCE(s.name_english, 'unassigned') as station_name_english,
+    SUM(oi.quantity) as total_items,
+    SUM(oi.total_price) as total_revenue,
+    AVG(oi.unit_price) as avg_item_price,
+    COUNT(DISTINCT oi.order_id) as order_count
+  FROM rsp_order_items oi
+  LEFT JOIN rsp_stations s ON oi.station_id = s.id
+  JOIN rsp_orders o ON oi.order_id = o.id
+  WHERE o.ordered_at >= range_start AND o.ordered_at < range_end
+    AND oi.total_price > 0  -- Changed from status = 'completed'
+    AND oi.is_return = false
+  GROUP BY s.name, s.name_english
+  ORDER BY total_revenue DESC;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_station_performance IS '按厨房工作站统计业绩 (Kitchen station performance - all orders)';
+
+
+-- ============================================================================
+-- 5. Hourly Revenue
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_hourly_revenue(target_date DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+  hour_of_day INTEGER,
+  order_count BIGINT,
+  total_revenue DECIMAL,
+  avg_order_value DECIMAL
+) AS $$
+DECLARE
+  day_start TIMESTAMPTZ := target_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+  day_end TIMESTAMPTZ := (target_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+  RETURN QUERY
+  SELECT
+    EXTRACT(HOUR FROM ordered_at AT TIME ZONE 'Asia/Shanghai')::INTEGER as hour_of_day,
+    COUNT(*) as order_count,
+    SUM(total) as total_revenue,
+    AVG(total) as avg_order_value
+  FROM rsp_orders
+  WHERE ordered_at >= day_start AND ordered_at < day_end
+    AND total > 0  -- Changed from status = 'completed'
+  GROUP BY EXTRACT(HOUR FROM ordered_at AT TIME ZONE 'Asia/Shanghai')
+  ORDER BY hour_of_day;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_hourly_revenue IS '按小时统计营业额 (Revenue by hour - all orders)';
+
+
+-- ============================================================================
+-- 6. Table Turnover
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_table_turnover(
+  start_date DATE DEFAULT CURRENT_DATE,
+  end_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+  zone TEXT,
+  table_no TEXT,
+  order_count BIGINT,
+  total_revenue DECIMAL,
+  avg_order_value DECIMAL,
+  capacity INTEGER
+) AS $$
+DECLARE
+  range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+  range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+  RETURN QUERY
+  SELECT
+    t.zone,
+    t.table_no,
+    COUNT(o.id) as order_count,
+    COALESCE(SUM(o.total), 0) as total_revenue,
+    COALESCE(AVG(o.total), 0) as avg_order_value,
+    t.capacity
+  FROM rsp_tables t
+  LEFT JOIN rsp_orders o ON t.id = o.table_id
+    AND o.ordered_at >= range_start AND o.ordered_at < range_end
+    AND o.total > 0  -- Changed from status = 'completed'
+  WHERE t.active = true
+  GROUP BY t.zone, t.table_no, t.capacity
+  ORDER BY order_count DESC;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_table_turnover IS '按餐桌统计翻台率 (Table turnover - all orders)';
+
+
+-- ============================================================================
+-- 7. Return Analysis
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_return_analysis(
+  start_date DATE DEFAULT CURRENT_DATE,
+  end_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+  item_name TEXT,
+  return_count BIGINT,
+  return_quantity BIGINT,
+  return_revenue_loss DECIMAL,
+  total_orders_with_item BIGINT,
+  return_rate DECIMAL
+) AS $$
+DECLARE
+  range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+  range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+  RETURN QUERY
+  WITH return_items AS (
+    SELECT
+      oi.item_name,
+      COUNT(*) as return_count,
+      SUM(oi.quantity) as return_quantity,
+      SUM(oi.total_price) as return_revenue_loss
+    FROM rsp_order_items oi
+    JOIN rsp_orders o ON oi.order_id = o.id
+    WHERE o.ordered_at >= range_start AND o.ordered_at < range_end
+      AND oi.is_return = true
+    GROUP BY oi.item_name
+  ),
+  total_items AS (
+    SELECT
+      oi.item_name,
+      COUNT(DISTINCT oi.order_id) as total_orders
+    FROM rsp_order_items oi
+    JOIN rsp_orders o ON oi.order_id = o.id
+    WHERE o.ordered_at >= range_start AND o.ordered_at < range_end
+    GROUP BY oi.item_name
+  )
+  SELECT
+    r.item_name,
+    r.return_count,
+    r.return_quantity,
+    r.return_revenue_loss,
+    t.total_orders,
+    ROUND((r.return_count::DECIMAL / NULLIF(t.total_orders, 0) * 100), 2) as return_rate
+  FROM return_items r
+  JOIN total_items t ON r.item_name = t.item_name
+  ORDER BY return_rate DESC;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_return_analysis IS '退菜分析 (Return/refund analysis by dish)';
+
+
+-- ============================================================================
+-- 8. Order Type Distribution
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_order_type_distribution(
+  start_date DATE DEFAULT CURRENT_DATE,
+  end_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+  order_type TEXT,
+  order_count BIGINT,
+  total_revenue DECIMAL,
+  avg_order_value DECIMAL,
+  percentage_of_total DECIMAL
+) AS $$
+DECLARE
+  range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+  range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+  RETURN QUERY
+  WITH order_stats AS (
+    SELECT
+      o.order_type,
+      COUNT(*) as order_count,
+      SUM(o.total) as total_revenue,
+      AVG(o.total) as avg_order_value
+    FROM rsp_orders o
+    WHERE o.ordered_at >= range_start AND o.ordered_at < range_end
+      AND o.total > 0  -- Changed from status = 'completed'
+    GROUP BY o.order_type
+  ),
+  total_orders AS (
+    SELECT SUM(order_count) as total_count
+    FROM order_stats
+  )
+  SELECT
+    os.order_type,
+    os.order_count,
+    os.total_revenue,
+    os.avg_order_value,
+    ROUND((os.order_count::DECIMAL / NULLIF(t.total_count, 0) * 100), 2) as percentage_of_total
+  FROM order_stats os, total_orders t
+  ORDER BY os.order_count DESC;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_order_type_distribution IS '订单类型分布 (Order type distribution - all orders)';
+
+
+-- ============================================================================
+-- 9. Revenue Trend
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_revenue_trend(
+  start_date DATE,
+  end_date DATE
+)
+RETURNS TABLE (
+  date DATE,
+  total_revenue DECIMAL,
+  order_count BIGINT,
+  avg_order_value DECIMAL,
+  completed_orders BIGINT
+) AS $$
+DECLARE
+  range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+  range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+  RETURN QUERY
+  SELECT
+    DATE(ordered_at AT TIME ZONE 'Asia/Shanghai') as date,
+    SUM(total) as total_revenue,
+    COUNT(*) as order_count,
+    AVG(total) as avg_order_value,
+    COUNT(*) FILTER (WHERE status = 'completed') as completed_orders
+  FROM rsp_orders
+  WHERE ordered_at >= range_start AND ordered_at < range_end
+    AND total > 0  -- Only count orders with revenue
+  GROUP BY DATE(ordered_at AT TIME ZONE 'Asia/Shanghai')
+  ORDER BY date;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_revenue_trend IS '营业额趋势 (Revenue trend - all orders)';
+
+
+-- ============================================================================
+-- 10. Quick Stats
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_quick_stats(target_date DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+  metric TEXT,
+  value TEXT,
+  description TEXT
+) AS $$
+DECLARE
+  day_start TIMESTAMPTZ := target_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+  day_end TIMESTAMPTZ := (target_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+  v_total_revenue DECIMAL;
+  v_order_count BIGINT;
+  v_avg_order DECIMAL;
+  v_top_dish TEXT;
+  v_busiest_hour INTEGER;
+  v_total_tables BIGINT;
+  v_active_tables BIGINT;
+BEGIN
+  -- Get revenue stats (all orders with revenue)
+  SELECT
+    COALESCE(SUM(total), 0),
+    COUNT(*),
+    COALESCE(AVG(total), 0)
+  INTO v_total_revenue, v_order_count, v_avg_order
+  FROM rsp_orders
+  WHERE ordered_at >= day_start AND ordered_at < day_end
+    AND total > 0;
+
+  -- Get top dish
+  SELECT item_name INTO v_top_dish
+  FROM rsp_order_items oi
+  JOIN rsp_orders o ON oi.order_id = o.id
+  WHERE o.ordered_at >= day_start AND o.ordered_at < day_end
+    AND o.total > 0
+    AND oi.is_return = false
+  GROUP BY item_name
+  ORDER BY SUM(quantity) DESC
+  LIMIT 1;
+
+  -- Get busiest hour
+  SELECT EXTRACT(HOUR FROM ordered_at AT TIME ZONE 'Asia/Shanghai')::INTEGER INTO v_busiest_hour
+  FROM rsp_orders
+  WHERE ordered_at >= day_start AND ordered_at < day_end
+    AND total > 0
+  GROUP BY EXTRACT(HOUR FROM ordered_at AT TIME ZONE 'Asia/Shanghai')
+  ORDER BY COUNT(*) DESC
+  LIMIT 1;
+
+  -- Get table stats
+  SELECT COUNT(*), COUNT(*) FILTER (WHERE active = true)
+  INTO v_total_tables, v_active_tables
+  FROM rsp_tables;
+
+  -- Return results
+  RETURN QUERY VALUES
+    ('今日营业额', '¥' || ROUND(v_total_revenue, 2)::TEXT, '所有订单的总金额'),
+    ('订单数量', v_order_count::TEXT, '今日总订单数'),
+    ('平均订单金额', '¥' || ROUND(v_avg_order, 2)::TEXT, '平均每单金额'),
+    ('最畅销菜品', COALESCE(v_top_dish, '暂无数据'), '销量最高的菜品'),
+    ('最忙时段', COALESCE(v_busiest_hour::TEXT || ':00', '暂无数据'), '订单最多的小时'),
+    ('餐桌数量', v_active_tables::TEXT || '/' || v_total_tables::TEXT, '活跃餐桌/总餐桌');
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_quick_stats IS '快速统计摘要 (Quick dashboard summary - all orders with revenue)';
+
+
+-- ============================================================================
+-- 11. Menu Profitability Analysis (Boston Matrix)
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_menu_profitability(
+    start_date DATE DEFAULT CURRENT_DATE - INTERVAL '30 days',
+    end_date DATE DEFAULT CURRENT_DATE,
+    min_quantity INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+    product_name TEXT,
+    quantity_sold BIGINT,
+    total_revenue DECIMAL,
+    avg_selling_price DECIMAL,
+    estimated_cost DECIMAL,
+    gross_profit DECIMAL,
+    profit_margin DECIMAL,
+    popularity_score DECIMAL,
+    profitability_score DECIMAL,
+    category TEXT,
+    rank_by_profit INTEGER,
+    rank_by_quantity INTEGER
+) AS $$
+DECLARE
+    range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+    range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+    avg_quantity DECIMAL;
+    avg_profit_margin DECIMAL;
+BEGIN
+    -- Create temp table with sales + cost data
+    DROP TABLE IF EXISTS temp_menu_sales;
+    CREATE TEMP TABLE temp_menu_sales AS
+    SELECT
+        TRIM(oi.item_name) as dish_name,
+        COUNT(DISTINCT oi.order_id) as order_count,
+        SUM(oi.quantity) as total_quantity,
+        SUM(oi.total_price) as total_revenue,
+        AVG(oi.unit_price) as avg_price,
+        COALESCE(pc.total_ingredient_cost, 0) as unit_cost,
+        COALESCE(pc.margin_percentage, 0) as cost_margin
+    FROM rsp_order_items oi
+    JOIN rsp_orders o ON oi.order_id = o.id
+    LEFT JOIN product_cost_analysis pc ON TRIM(LOWER(oi.item_name)) = TRIM(LOWER(pc.product_name))
+    WHERE o.ordered_at >= range_start AND o.ordered_at < range_end
+        AND oi.total_price > 0
+        AND oi.is_return IS DISTINCT FROM true
+    GROUP BY TRIM(oi.item_name), pc.total_ingredient_cost, pc.margin_percentage
+    HAVING SUM(oi.quantity) >= min_quantity;
+
+    -- Calculate averages for categorization
+    SELECT
+        AVG(total_quantity),
+        AVG((total_revenue - (unit_cost * total_quantity)) / NULLIF(total_revenue, 0) * 100)
+    INTO avg_quantity, avg_profit_margin
+    FROM temp_menu_sales;
+
+    -- Return categorized results
+    RETURN QUERY
+    WITH ranked_dishes AS (
+        SELECT
+            dish_name,
+            total_quantity,
+            total_revenue,
+            avg_price,
+            unit_cost * total_quantity as estimated_total_cost,
+            total_revenue - (unit_cost * total_quantity) as gross_profit_calc,
+            CASE
+                WHEN total_revenue > 0 THEN
+                    ((total_revenue - (unit_cost * total_quantity)) / total_revenue * 100)
+                ELSE 0
+            END as profit_margin_calc,
+            (total_quantity::DECIMAL / NULLIF(avg_quantity, 0) * 100) as popularity_pct,
+            CASE
+                WHEN total_revenue > 0 THEN
+                    (((total_revenue - (unit_cost * total_quantity)) / total_revenue * 100) / NULLIF(avg_profit_margin, 0) * 100)
+                ELSE 0
+            END as profitability_pct,
+            RANK() OVER (ORDER BY total_revenue - (unit_cost * total_quantity) DESC) as profit_rank,
+            RANK() OVER (ORDER BY total_quantity DESC) as quantity_rank
+        FROM temp_menu_sales
+    )
+    SELECT
+        dish_name,
+        total_quantity,
+        total_revenue,
+        avg_price,
+        estimated_total_cost,
+        gross_profit_calc,
+        profit_margin_calc,
+        popularity_pct,
+        profitability_pct,
+        -- Boston Matrix categorization
+        CASE
+            WHEN popularity_pct >= 100 AND profitability_pct >= 100 THEN '⭐ Stars'
+            WHEN popularity_pct < 100 AND profitability_pct >= 100 THEN '🧩 Puzzles'
+            WHEN popularity_pct >= 100 AND profitability_pct < 100 THEN '🐴 Plowhorses'
+            ELSE '🐕 Dogs'
+        END as category,
+        profit_rank::INTEGER,
+        quantity_rank::INTEGER
+    FROM ranked_dishes
+    ORDER BY gross_profit_calc DESC;
+
+    DROP TABLE IF EXISTS temp_menu_sales;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_menu_profitability IS '菜单工程分析：计算菜品盈利能力并分类 (Menu Engineering: Boston Matrix categorization)';
+
+
+-- ============================================================================
+-- 12. Top Profitable Dishes
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_top_profitable_dishes(
+    start_date DATE DEFAULT CURRENT_DATE - INTERVAL '30 days',
+    end_date DATE DEFAULT CURRENT_DATE,
+    top_n INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+    product_name TEXT,
+    quantity_sold BIGINT,
+    total_revenue DECIMAL,
+    total_cost DECIMAL,
+    gross_profit DECIMAL,
+    profit_margin DECIMAL
+) AS $$
+DECLARE
+    range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+    range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+    RETURN QUERY
+    SELECT
+        TRIM(oi.item_name) as product_name,
+        SUM(oi.quantity) as quantity_sold,
+        SUM(oi.total_price) as total_revenue,
+        COALESCE(SUM(oi.quantity * pc.total_ingredient_cost), 0) as total_cost,
+        SUM(oi.total_price) - COALESCE(SUM(oi.quantity * pc.total_ingredient_cost), 0) as gross_profit,
+        CASE
+            WHEN SUM(oi.total_price) > 0 THEN
+                (SUM(oi.total_price) - COALESCE(SUM(oi.quantity * pc.total_ingredient_cost), 0)) / SUM(oi.total_price) * 100
+            ELSE 0
+        END as profit_margin
+    FROM rsp_order_items oi
+    JOIN rsp_orders o ON oi.order_id = o.id
+    LEFT JOIN product_cost_analysis pc ON TRIM(LOWER(oi.item_name)) = TRIM(LOWER(pc.product_name))
+    WHERE o.ordered_at >= range_start AND o.ordered_at < range_end
+        AND oi.total_price > 0
+        AND oi.is_return IS DISTINCT FROM true
+    GROUP BY TRIM(oi.item_name)
+    ORDER BY gross_profit DESC
+    LIMIT top_n;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_top_profitable_dishes IS '最赚钱的菜品排行 (Top dishes by gross profit)';
+
+
+-- ============================================================================
+-- 13. Low Profit Dishes (Dogs)
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_low_profit_dishes(
+    start_date DATE DEFAULT CURRENT_DATE - INTERVAL '30 days',
+    end_date DATE DEFAULT CURRENT_DATE,
+    bottom_n INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+    product_name TEXT,
+    quantity_sold BIGINT,
+    total_revenue DECIMAL,
+    total_cost DECIMAL,
+    gross_profit DECIMAL,
+    profit_margin DECIMAL,
+    recommendation TEXT
+) AS $$
+DECLARE
+    range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+    range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+    RETURN QUERY
+    SELECT
+        TRIM(oi.item_name) as product_name,
+        SUM(oi.quantity) as quantity_sold,
+        SUM(oi.total_price) as total_revenue,
+        COALESCE(SUM(oi.quantity * pc.total_ingredient_cost), 0) as total_cost,
+        SUM(oi.total_price) - COALESCE(SUM(oi.quantity * pc.total_ingredient_cost), 0) as gross_profit,
+        CASE
+            WHEN SUM(oi.total_price) > 0 THEN
+                (SUM(oi.total_price) - COALESCE(SUM(oi.quantity * pc.total_ingredient_cost), 0)) / SUM(oi.total_price) * 100
+            ELSE 0
+        END as profit_margin,
+        CASE
+            WHEN SUM(oi.quantity) < 10 THEN '考虑下架（销量过低）'
+            WHEN SUM(oi.total_price) - COALESCE(SUM(oi.quantity * pc.total_ingredient_cost), 0) < 0 THEN '亏损菜品！立即调价或下架'
+            WHEN (SUM(oi.total_price) - COALESCE(SUM(oi.quantity * pc.total_ingredient_cost), 0)) / SUM(oi.total_price) < 0.2 THEN '利润率过低，建议提价或降成本'
+            ELSE '关注并优化'
+        END as recommendation
+    FROM rsp_order_items oi
+    JOIN rsp_orders o ON oi.order_id = o.id
+    LEFT JOIN product_cost_analysis pc ON TRIM(LOWER(oi.item_name)) = TRIM(LOWER(pc.product_name))
+    WHERE o.ordered_at >= range_start AND o.ordered_at < range_end
+        AND oi.total_price > 0
+        AND oi.is_return IS DISTINCT FROM true
+    GROUP BY TRIM(oi.item_name)
+    HAVING SUM(oi.quantity) >= 5  -- Only dishes sold at least 5 times
+    ORDER BY gross_profit ASC
+    LIMIT bottom_n;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_low_profit_dishes IS '低盈利菜品分析 (Low profit dishes with recommendations)';
+
+
+-- ============================================================================
+-- 14. Cost Coverage Analysis
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_cost_coverage_rate(
+    start_date DATE DEFAULT CURRENT_DATE - INTERVAL '30 days',
+    end_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+    total_dishes BIGINT,
+    dishes_with_cost_data BIGINT,
+    coverage_rate DECIMAL,
+    total_revenue_covered DECIMAL,
+    total_revenue_uncovered DECIMAL,
+    revenue_coverage_rate DECIMAL
+) AS $$
+DECLARE
+    range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+    range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+    RETURN QUERY
+    WITH sales_data AS (
+        SELECT
+            TRIM(oi.item_name) as dish_name,
+            SUM(oi.total_price) as revenue,
+            CASE WHEN pc.product_name IS NOT NULL THEN 1 ELSE 0 END as has_cost
+        FROM rsp_order_items oi
+        JOIN rsp_orders o ON oi.order_id = o.id
+        LEFT JOIN product_cost_analysis pc ON TRIM(LOWER(oi.item_name)) = TRIM(LOWER(pc.product_name))
+        WHERE o.ordered_at >= range_start AND o.ordered_at < range_end
+            AND oi.total_price > 0
+            AND oi.is_return IS DISTINCT FROM true
+        GROUP BY TRIM(oi.item_name), pc.product_name
+    )
+    SELECT
+        COUNT(*)::BIGINT as total_dishes,
+        SUM(has_cost)::BIGINT as dishes_with_cost_data,
+        ROUND(SUM(has_cost)::DECIMAL / NULLIF(COUNT(*), 0) * 100, 2) as coverage_rate,
+        SUM(CASE WHEN has_cost = 1 THEN revenue ELSE 0 END) as total_revenue_covered,
+        SUM(CASE WHEN has_cost = 0 THEN revenue ELSE 0 END) as total_revenue_uncovered,
+        ROUND(SUM(CASE WHEN has_cost = 1 THEN revenue ELSE 0 END) / NULLIF(SUM(revenue), 0) * 100, 2) as revenue_coverage_rate
+    FROM sales_data;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_cost_coverage_rate IS '成本数据覆盖率分析 (Cost data coverage analysis)';
+
+
+-- ============================================================================
+-- 15. Dishes Missing Cost Data
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_dishes_missing_cost(
+    start_date DATE DEFAULT CURRENT_DATE - INTERVAL '30 days',
+    end_date DATE DEFAULT CURRENT_DATE,
+    top_n INTEGER DEFAULT 20
+)
+RETURNS TABLE (
+    product_name TEXT,
+    quantity_sold BIGINT,
+    total_revenue DECIMAL,
+    avg_selling_price DECIMAL,
+    order_count BIGINT
+) AS $$
+DECLARE
+    range_start TIMESTAMPTZ := start_date::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+    range_end TIMESTAMPTZ := (end_date + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai';
+BEGIN
+    RETURN QUERY
+    SELECT
+        TRIM(oi.item_name) as product_name,
+        SUM(oi.quantity) as quantity_sold,
+        SUM(oi.total_price) as total_revenue,
+        AVG(oi.unit_price) as avg_selling_price,
+        COUNT(DISTINCT oi.order_id) as order_count
+    FROM rsp_order_items oi
+    JOIN rsp_orders o ON oi.order_id = o.id
+    LEFT JOIN product_cost_analysis pc ON TRIM(LOWER(oi.item_name)) = TRIM(LOWER(pc.product_name))
+    WHERE o.ordered_at >= range_start AND o.ordered_at < range_end
+        AND oi.total_price > 0
+        AND oi.is_return IS DISTINCT FROM true
+        AND pc.product_name IS NULL  -- Missing cost data
+    GROUP BY TRIM(oi.item_name)
+    ORDER BY total_revenue DESC
+    LIMIT top_n;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_dishes_missing_cost IS '缺少成本数据的菜品 (Dishes missing cost data, ordered by revenue)';
@@ -0,0 +1,610 @@
+-- Daily sales rollups for the analytics RPCs
+-- Created: 2026-10-19
+-- Purpose: Stop re-aggregating raw order lines on every call. Daily totals,
+--          hourly totals and per-dish daily sales/returns are kept in rollup
+--          tables; get_daily_revenue, get_hourly_revenue, get_top_dishes,
+--          get_quick_stats, get_revenue_trend and get_menu_profitability
+--          read them, so a multi-month question reads one row per day (per
+--          hour / dish) instead of every order line
+--
+-- Freshness:
+--   - Triggers on rsp_orders / rsp_order_items add the Shanghai day of every
+--     changed row to sales_rollup_dirty_days
+--   - refresh_sales_rollups() recomputes the dirty days (scheduled every
+--     5 minutes with pg_cron when the extension is installed; otherwise call
+--     `SELECT refresh_sales_rollups();` from any scheduler)
+--   - Readers (sales_*_between) take clean days from the rollups and compute
+--     dirty days from the raw tables, so results are exact even between
+--     refreshes; usually only today is dirty
+--
+-- Backfill or repair a range: SELECT refresh_sales_rollups('2025-10-01', '2025-10-31');
+-- All RPCs keep their parameters, result columns and results.
+
+-- ============================================================================
+-- Rollup tables
+-- ============================================================================
+-- Orders with total > 0 per Shanghai day (days without such orders have no row)
+CREATE TABLE IF NOT EXISTS sales_daily (
+  sales_date DATE PRIMARY KEY,
+  total_revenue DECIMAL NOT NULL,
+  order_count BIGINT NOT NULL,
+  completed_orders BIGINT NOT NULL,
+  pending_orders BIGINT NOT NULL,
+  cancelled_orders BIGINT NOT NULL
+);
+
+-- Orders with total > 0 per Shanghai day and hour
+CREATE TABLE IF NOT EXISTS sales_hourly (
+  sales_date DATE NOT NULL,
+  hour_of_day INTEGER NOT NULL,
+  order_count BIGINT NOT NULL,
+  total_revenue DECIMAL NOT NULL,
+  PRIMARY KEY (sales_date, hour_of_day)
+);
+
+-- Order lines per day and dish, split by the attributes the RPCs filter on:
+-- is_return (NULL kept: menu RPCs count it as sold, get_top_dishes does not),
+-- priced (total_price > 0) and paid_order (order total > 0)
+CREATE TABLE IF NOT EXISTS sales_dish_daily (
+  sales_date DATE NOT NULL,
+  item_name TEXT,
+  is_return BOOLEAN,
+  priced BOOLEAN NOT NULL,
+  paid_order BOOLEAN NOT NULL,
+  quantity BIGINT,
+  revenue DECIMAL,
+  unit_price_sum DECIMAL,
+  unit_price_count BIGINT NOT NULL,
+  order_count BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_sales_dish_daily_date ON sales_dish_daily (sales_date);
+
+-- Days whose rollup rows are missing or out of date
+CREATE TABLE IF NOT EXISTS sales_rollup_dirty_days (
+  sales_date DATE PRIMARY KEY,
+  marked_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+
+-- ============================================================================
+-- Aggregation of raw rows for a set of days (refresh and dirty-day reads)
+-- ============================================================================
+CREATE OR REPLACE FUNCTION sales_daily_compute(days DATE[])
+RETURNS TABLE (
+  sales_date DATE,
+  total_revenue DECIMAL,
+  order_count BIGINT,
+  completed_orders BIGINT,
+  pending_orders BIGINT,
+  cancelled_orders BIGINT
+) AS $$
+  SELECT
+    d.day,
+    SUM(o.total),
+    COUNT(*),
+    COUNT(*) FILTER (WHERE o.status = 'completed'),
+    COUNT(*) FILTER (WHERE o.status = 'pending'),
+    COUNT(*) FILTER (WHERE o.status = 'cancelled')
+  FROM unnest(days) AS d(day)
+  JOIN rsp_orders o
+    ON o.ordered_at >= d.day::TIMESTAMP AT TIME ZONE 'Asia/Shanghai'
+   AND o.ordered_at < (d.day + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai'
+  WHERE o.total > 0
+  GROUP BY d.day;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION sales_hourly_compute(days DATE[])
+RETURNS TABLE (
+  sales_date DATE,
+  hour_of_day INTEGER,
+  order_count BIGINT,
+  total_revenue DECIMAL
+) AS $$
+  SELECT
+    d.day,
+    EXTRACT(HOUR FROM o.ordered_at AT TIME ZONE 'Asia/Shanghai')::INTEGER,
+    COUNT(*),
+    SUM(o.total)
+  FROM unnest(days) AS d(day)
+  JOIN rsp_orders o
+    ON o.ordered_at >= d.day::TIMESTAMP AT TIME ZONE 'Asia/Shanghai'
+   AND o.ordered_at < (d.day + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai'
+  WHERE o.total > 0
+  GROUP BY 1, 2;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION sales_dish_daily_compute(days DATE[])
+RETURNS TABLE (
+  sales_date DATE,
+  item_name TEXT,
+  is_return BOOLEAN,
+  priced BOOLEAN,
+  paid_order BOOLEAN,
+  quantity BIGINT,
+  revenue DECIMAL,
+  unit_price_sum DECIMAL,
+  unit_price_count BIGINT,
+  order_count BIGINT
+) AS $$
+  SELECT
+    d.day,
+    oi.item_name,
+    oi.is_return,
+    COALESCE(oi.total_price > 0, false),
+    COALESCE(o.total > 0, false),
+    SUM(oi.quantity),
+    SUM(oi.total_price),
+    SUM(oi.unit_price),
+    COUNT(oi.unit_price),
+    COUNT(DISTINCT oi.order_id)
+  FROM unnest(days) AS d(day)
+  JOIN rsp_orders o
+    ON o.ordered_at >= d.day::TIMESTAMP AT TIME ZONE 'Asia/Shanghai'
+   AND o.ordered_at < (d.day + 1)::TIMESTAMP AT TIME ZONE 'Asia/Shanghai'
+  JOIN rsp_order_items oi ON oi.order_id = o.id
+  GROUP BY 1, 2, 3, 4, 5;
+$$ LANGUAGE sql STABLE;
+
+
+-- ============================================================================
+-- Readers: rollup rows for clean days, raw aggregation for dirty days
+-- ============================================================================
+CREATE OR REPLACE FUNCTION sales_daily_between(start_date DATE, end_date DATE)
+RETURNS TABLE (
+  sales_date DATE,
+  total_revenue DECIMAL,
+  order_count BIGINT,
+  completed_orders BIGINT,
+  pending_orders BIGINT,
+  cancelled_orders BIGINT
+) AS $$
+  SELECT s.sales_date, s.total_revenue, s.order_count, s.completed_orders, s.pending_orders, s.cancelled_orders
+  FROM sales_daily s
+  WHERE s.sales_date BETWEEN start_date AND end_date
+    AND NOT EXISTS (SELECT 1 FROM sales_rollup_dirty_days d WHERE d.sales_date = s.sales_date)
+  UNION ALL
+  SELECT * FROM sales_daily_compute(ARRAY(
+    SELECT d.sales_date FROM sales_rollup_dirty_days d WHERE d.sales_date BETWEEN start_date AND end_date
+  ));
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION sales_hourly_between(start_date DATE, end_date DATE)
+RETURNS TABLE (
+  sales_date DATE,
+  hour_of_day INTEGER,
+  order_count BIGINT,
+  total_revenue DECIMAL
+) AS $$
+  SELECT h.sales_date, h.hour_of_day, h.order_count, h.total_revenue
+  FROM sales_hourly h
+  WHERE h.sales_date BETWEEN start_date AND end_date
+    AND NOT EXISTS (SELECT 1 FROM sales_rollup_dirty_days d WHERE d.sales_date = h.sales_date)
+  UNION ALL
+  SELECT * FROM sales_hourly_compute(ARRAY(
+    SELECT d.sales_date FROM sales_rollup_dirty_days d WHERE d.sales_date BETWEEN start_date AND end_date
+  ));
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION sales_dish_daily_between(start_date DATE, end_date DATE)
+RETURNS TABLE (
+  sales_date DATE,
+  item_name TEXT,
+  is_return BOOLEAN,
+  priced BOOLEAN,
+  paid_order BOOLEAN,
+  quantity BIGINT,
+  revenue DECIMAL,
+  unit_price_sum DECIMAL,
+  unit_price_count BIGINT,
+  order_count BIGINT
+) AS $$
+  SELECT s.sales_date, s.item_name, s.is_return, s.priced, s.paid_order,
+         s.quantity, s.revenue, s.unit_price_sum, s.unit_price_count, s.order_count
+  FROM sales_dish_daily s
+  WHERE s.sales_date BETWEEN start_date AND end_date
+    AND NOT EXISTS (SELECT 1 FROM sales_rollup_dirty_days d WHERE d.sales_date = s.sales_date)
+  UNION ALL
+  SELECT * FROM sales_dish_daily_compute(ARRAY(
+    SELECT d.sales_date FROM sales_rollup_dirty_days d WHERE d.sales_date BETWEEN start_date AND end_date
+  ));
+$$ LANGUAGE sql STABLE;
+
+
+-- ============================================================================
+-- 1. Daily Revenue Summary
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_daily_revenue(target_date DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+  total_revenue DECIMAL,
+  order_count BIGINT,
+  avg_order_value DECIMAL,
+  completed_orders BIGINT,
+  pending_orders BIGINT,
+  cancelled_orders BIGINT
+) AS $$
+BEGIN
+  RETURN QUERY
+  SELECT
+    COALESCE(SUM(s.total_revenue), 0) as total_revenue,
+    COALESCE(SUM(s.order_count), 0)::BIGINT as order_count,
+    COALESCE(SUM(s.total_revenue) / NULLIF(SUM(s.order_count), 0), 0) as avg_order_value,
+    COALESCE(SUM(s.completed_orders), 0)::BIGINT as completed_orders,
+    COALESCE(SUM(s.pending_orders), 0)::BIGINT as pending_orders,
+    COALESCE(SUM(s.cancelled_orders), 0)::BIGINT as cancelled_orders
+  FROM sales_daily_between(target_date, target_date) s;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_daily_revenue IS '获取指定日期的营业额汇总 (Daily revenue summary - counts all orders with revenue)';
+
+
+-- ============================================================================
+-- 2. Top Selling Dishes
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_top_dishes(
+  start_date DATE DEFAULT CURRENT_DATE,
+  end_date DATE DEFAULT CURRENT_DATE,
+  top_n INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+  item_name TEXT,
+  total_quantity BIGINT,
+  total_revenue DECIMAL,
+  order_count BIGINT,
+  avg_price DECIMAL
+) AS $$
+BEGIN
+  RETURN QUERY
+  SELECT
+    d.item_name,
+    SUM(d.quantity)::BIGINT as total_quantity,
+    SUM(d.revenue) as total_revenue,
+    SUM(d.order_count)::BIGINT as order_count,  -- an order belongs to one day
+    SUM(d.unit_price_sum) / NULLIF(SUM(d.unit_price_count), 0) as avg_price
+  FROM sales_dish_daily_between(start_date, end_date) d
+  WHERE d.priced
+    AND d.is_return = false
+  GROUP BY d.item_name
+  ORDER BY total_quantity DESC
+  LIMIT top_n;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_top_dishes IS '获取最畅销菜品 (Top selling dishes - all orders)';
+
+
+-- ============================================================================
+-- 3. Hourly Revenue
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_hourly_revenue(target_date DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+  hour_of_day INTEGER,
+  order_count BIGINT,
+  total_revenue DECIMAL,
+  avg_order_value DECIMAL
+) AS $$
+BEGIN
+  RETURN QUERY
+  SELECT
+    h.hour_of_day,
+    h.order_count,
+    h.total_revenue,
+    h.total_revenue / NULLIF(h.order_count, 0) as avg_order_value
+  FROM sales_hourly_between(target_date, target_date) h
+  ORDER BY h.hour_of_day;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_hourly_revenue IS '按小时统计营业额 (Revenue by hour - all orders)';
+
+
+-- ============================================================================
+-- 4. Revenue Trend
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_revenue_trend(
+  start_date DATE,
+  end_date DATE
+)
+RETURNS TABLE (
+  date DATE,
+  total_revenue DECIMAL,
+  order_count BIGINT,
+  avg_order_value DECIMAL,
+  completed_orders BIGINT
+) AS $$
+BEGIN
+  RETURN QUERY
+  SELECT
+    s.sales_date as date,
+    s.total_revenue,
+    s.order_count,
+    s.total_revenue / NULLIF(s.order_count, 0) as avg_order_value,
+    s.completed_orders
+  FROM sales_daily_between(start_date, end_date) s
+  ORDER BY s.sales_date;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_revenue_trend IS '营业额趋势 (Revenue trend - all orders)';
+
+
+-- ============================================================================
+-- 5. Quick Stats
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_quick_stats(target_date DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+  metric TEXT,
+  value TEXT,
+  description TEXT
+) AS $$
+DECLARE
+  v_total_revenue DECIMAL;
+  v_order_count BIGINT;
+  v_avg_order DECIMAL;
+  v_top_dish TEXT;
+  v_busiest_hour INTEGER;
+  v_total_tables BIGINT;
+  v_active_tables BIGINT;
+BEGIN
+  -- Get revenue stats (all orders with revenue)
+  SELECT
+    COALESCE(SUM(s.total_revenue), 0),
+    COALESCE(SUM(s.order_count), 0),
+    COALESCE(SUM(s.total_revenue) / NULLIF(SUM(s.order_count), 0), 0)
+  INTO v_total_revenue, v_order_count, v_avg_order
+  FROM sales_daily_between(target_date, target_date) s;
+
+  -- Get top dish
+  SELECT d.item_name INTO v_top_dish
+  FROM sales_dish_daily_between(target_date, target_date) d
+  WHERE d.paid_order
+    AND d.is_return = false
+  GROUP BY d.item_name
+  ORDER BY SUM(d.quantity) DESC
+  LIMIT 1;
+
+  -- Get busiest hour
+  SELECT h.hour_of_day INTO v_busiest_hour
+  FROM sales_hourly_between(target_date, target_date) h
+  ORDER BY h.order_count DESC
+  LIMIT 1;
+
+  -- Get table stats
+  SELECT COUNT(*), COUNT(*) FILTER (WHERE active = true)
+  INTO v_total_tables, v_active_tables
+  FROM rsp_tables;
+
+  -- Return results
+  RETURN QUERY VALUES
+    ('今日营业额', '¥' || ROUND(v_total_revenue, 2)::TEXT, '所有订单的总金额'),
+    ('订单数量', v_order_count::TEXT, '今日总订单数'),
+    ('平均订单金额', '¥' || ROUND(v_avg_order, 2)::TEXT, '平均每单金额'),
+    ('最畅销菜品', COALESCE(v_top_dish, '暂无数据'), '销量最高的菜品'),
+    ('最忙时段', COALESCE(v_busiest_hour::TEXT || ':00', '暂无数据'), '订单最多的小时'),
+    ('餐桌数量', v_active_tables::TEXT || '/' || v_total_tables::TEXT, '活跃餐桌/总餐桌');
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_quick_stats IS '快速统计摘要 (Quick dashboard summary - all orders with revenue)';
+
+
+-- ============================================================================
+-- 6. Menu Profitability Analysis (Boston Matrix)
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_menu_profitability(
+    start_date DATE DEFAULT CURRENT_DATE - INTERVAL '30 days',
+    end_date DATE DEFAULT CURRENT_DATE,
+    min_quantity INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+    product_name TEXT,
+    quantity_sold BIGINT,
+    total_revenue DECIMAL,
+    avg_selling_price DECIMAL,
+    estimated_cost DECIMAL,
+    gross_profit DECIMAL,
+    profit_margin DECIMAL,
+    popularity_score DECIMAL,
+    profitability_score DECIMAL,
+    category TEXT,
+    rank_by_profit INTEGER,
+    rank_by_quantity INTEGER
+) AS $$
+DECLARE
+    avg_quantity DECIMAL;
+    avg_profit_margin DECIMAL;
+BEGIN
+    -- Create temp table with sales + cost data
+    DROP TABLE IF EXISTS temp_menu_sales;
+    CREATE TEMP TABLE temp_menu_sales AS
+    WITH dish_sales AS (
+        SELECT
+            TRIM(d.item_name) as dish_name,
+            SUM(d.order_count) as order_count,
+            SUM(d.quantity)::BIGINT as total_quantity,
+            SUM(d.revenue) as total_revenue,
+            SUM(d.unit_price_sum) / NULLIF(SUM(d.unit_price_count), 0) as avg_price
+        FROM sales_dish_daily_between(start_date, end_date) d
+        WHERE d.priced
+            AND d.is_return IS DISTINCT FROM true
+        GROUP BY TRIM(d.item_name)
+    )
+    SELECT
+        s.dish_name,
+        s.order_count,
+        s.total_quantity,
+        s.total_revenue,
+        s.avg_price,
+        COALESCE(pc.total_ingredient_cost, 0) as unit_cost,
+        COALESCE(pc.margin_percentage, 0) as cost_margin
+    FROM dish_sales s
+    LEFT JOIN product_cost_analysis pc ON LOWER(s.dish_name) = TRIM(LOWER(pc.product_name))
+    WHERE s.total_quantity >= min_quantity;
+
+    -- Calculate averages for categorization
+    SELECT
+        AVG(total_quantity),
+        AVG((total_revenue - (unit_cost * total_quantity)) / NULLIF(total_revenue, 0) * 100)
+    INTO avg_quantity, avg_profit_margin
+    FROM temp_menu_sales;
+
+    -- Return categorized results
+    RETURN QUERY
+    WITH ranked_dishes AS (
+        SELECT
+            dish_name,
+            total_quantity,
+            total_revenue,
+            avg_price,
+            unit_cost * total_quantity as estimated_total_cost,
+            total_revenue - (unit_cost * total_quantity) as gross_profit_calc,
+            CASE
+                WHEN total_revenue > 0 THEN
+                    ((total_revenue - (unit_cost * total_quantity)) / total_revenue * 100)
+                ELSE 0
+            END as profit_margin_calc,
+            (total_quantity::DECIMAL / NULLIF(avg_quantity, 0) * 100) as popularity_pct,
+            CASE
+                WHEN total_revenue > 0 THEN
+                    (((total_revenue - (unit_cost * total_quantity)) / total_revenue * 100) / NULLIF(avg_profit_margin, 0) * 100)
+                ELSE 0
+            END as profitability_pct,
+            RANK() OVER (ORDER BY total_revenue - (unit_cost * total_quantity) DESC) as profit_rank,
+            RANK() OVER (ORDER BY total_quantity DESC) as quantity_rank
+        FROM temp_menu_sales
+    )
+    SELECT
+        dish_name,
+        total_quantity,
+        total_revenue,
+        avg_price,
+        estimated_total_cost,
+        gross_profit_calc,
+        profit_margin_calc,
+        popularity_pct,
+        profitability_pct,
+        -- Boston Matrix categorization
+        CASE
+            WHEN popularity_pct >= 100 AND profitability_pct >= 100 THEN '⭐ Stars'
+            WHEN popularity_pct < 100 AND profitability_pct >= 100 THEN '🧩 Puzzles'
+            WHEN popularity_pct >= 100 AND profitability_pct < 100 THEN '🐴 Plowhorses'
+            ELSE '🐕 Dogs'
+        END as category,
+        profit_rank::INTEGER,
+        quantity_rank::INTEGER
+    FROM ranked_dishes
+    ORDER BY gross_profit_calc DESC;
+
+    DROP TABLE IF EXISTS temp_menu_sales;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION get_menu_profitability IS '菜单工程分析：计算菜品盈利能力并分类 (Menu Engineering: Boston Matrix categorization)';
+
+
+-- ============================================================================
+-- Refresh
+-- ============================================================================
+CREATE OR REPLACE FUNCTION refresh_sales_rollups(
+  from_date DATE DEFAULT NULL,
+  to_date DATE DEFAULT NULL
+)
+RETURNS INTEGER AS $$
+DECLARE
+  days DATE[];
+BEGIN
+  -- One refresh at a time (pg_cron and a manual backfill may overlap)
+  PERFORM pg_advisory_xact_lock(hashtext('refresh_sales_rollups'));
+
+  IF from_date IS NOT NULL THEN
+    INSERT INTO sales_rollup_dirty_days (sales_date)
+    SELECT generate_series(from_date, COALESCE(to_date, from_date), INTERVAL '1 day')::DATE
+    ON CONFLICT (sales_date) DO UPDATE SET marked_at = now();
+  END IF;
+
+  -- Claim the dirty days before reading: a write committed later marks its
+  -- day again (the trigger's upsert waits for this transaction)
+  WITH claimed AS (
+    DELETE FROM sales_rollup_dirty_days RETURNING sales_date
+  )
+  SELECT array_agg(sales_date) INTO days FROM claimed;
+
+  IF days IS NULL THEN
+    RETURN 0;
+  END IF;
+
+  DELETE FROM sales_daily WHERE sales_date = ANY(days);
+  DELETE FROM sales_hourly WHERE sales_date = ANY(days);
+  DELETE FROM sales_dish_daily WHERE sales_date = ANY(days);
+
+  INSERT INTO sales_daily SELECT * FROM sales_daily_compute(days);
+  INSERT INTO sales_hourly SELECT * FROM sales_hourly_compute(days);
+  INSERT INTO sales_dish_daily SELECT * FROM sales_dish_daily_compute(days);
+
+  RETURN array_length(days, 1);
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION refresh_sales_rollups IS '刷新销售汇总表 (Recompute sales rollups for dirty days, plus from_date..to_date if given)';
+
+
+-- ============================================================================
+-- Dirty-day triggers
+-- ============================================================================
+CREATE OR REPLACE FUNCTION mark_sales_days_dirty()
+RETURNS TRIGGER AS $$
+BEGIN
+  -- DO UPDATE (not DO NOTHING) locks the day's row, so a refresh claiming it
+  -- waits until this transaction's rows are visible
+  IF TG_TABLE_NAME = 'rsp_orders' THEN
+    INSERT INTO sales_rollup_dirty_days (sales_date)
+    SELECT DISTINCT DATE(changed AT TIME ZONE 'Asia/Shanghai')
+    FROM unnest(ARRAY[
+      CASE WHEN TG_OP <> 'INSERT' THEN OLD.ordered_at END,
+      CASE WHEN TG_OP <> 'DELETE' THEN NEW.ordered_at END
+    ]) AS changed
+    WHERE changed IS NOT NULL
+    ON CONFLICT (sales_date) DO UPDATE SET marked_at = now();
+  ELSE
+    INSERT INTO sales_rollup_dirty_days (sales_date)
+    SELECT DISTINCT DATE(o.ordered_at AT TIME ZONE 'Asia/Shanghai')
+    FROM rsp_orders o
+    WHERE o.id IN (
+        CASE WHEN TG_OP <> 'INSERT' THEN OLD.order_id END,
+        CASE WHEN TG_OP <> 'DELETE' THEN NEW.order_id END
+      )
+      AND o.ordered_at IS NOT NULL
+    ON CONFLICT (sales_date) DO UPDATE SET marked_at = now();
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS rsp_orders_mark_sales_days ON rsp_orders;
+CREATE TRIGGER rsp_orders_mark_sales_days
+  AFTER INSERT OR DELETE OR UPDATE OF ordered_at, total, status ON rsp_orders
+  FOR EACH ROW EXECUTE FUNCTION mark_sales_days_dirty();
+
+DROP TRIGGER IF EXISTS rsp_order_items_mark_sales_days ON rsp_order_items;
+CREATE TRIGGER rsp_order_items_mark_sales_days
+  AFTER INSERT OR DELETE OR UPDATE OF order_id, item_name, quantity, unit_price, total_price, is_return
+  ON rsp_order_items
+  FOR EACH ROW EXECUTE FUNCTION mark_sales_days_dirty();
+
+
+-- ============================================================================
+-- Schedule and backfill
+-- ============================================================================
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+    PERFORM cron.schedule('refresh-sales-rollups', '*/5 * * * *', 'SELECT refresh_sales_rollups()');
+  END IF;
+END;
+$$;
+
+SELECT refresh_sales_rollups(
+  (SELECT MIN(DATE(ordered_at AT TIME ZONE 'Asia/Shanghai')) FROM rsp_orders),
+  (SELECT MAX(DATE(ordered_at AT TIME ZONE 'Asia/Shanghai')) FROM rsp_orders)
+);
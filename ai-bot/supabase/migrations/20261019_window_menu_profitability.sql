@@ -0,0 +1,195 @@
+-- Set-based menu engineering RPCs over one per-range dish profit result
+-- Created: 2026-10-19
+-- Purpose: get_menu_profitability ran DROP TABLE / CREATE TEMP TABLE on every
+--          call: no cached plans, catalog bloat, and concurrent calls from
+--          several bots contended on the catalog (and, being STABLE, the
+--          DDL was not even allowed). It is now a single query: averages
+--          and ranks are window functions over the dish rows
+--
+-- Shared dish profit:
+--   - get_dish_profit(start_date, end_date) returns every sold dish in the
+--     range with quantity, revenue, cost, gross profit and margin (from the
+--     sales_dish_daily rollups)
+--   - get_menu_profitability, get_top_profitable_dishes and
+--     get_low_profit_dishes all read it, so the three agree by construction
+--   - SupabaseTools fetches get_dish_profit once per range (cached) and
+--     derives the top and low profit lists from it for any top_n / bottom_n
+--
+-- All existing RPCs keep their parameters, result columns and results.
+
+-- ============================================================================
+-- 1. Dish Profit per Range
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_dish_profit(
+    start_date DATE DEFAULT CURRENT_DATE - INTERVAL '30 days',
+    end_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+    product_name TEXT,
+    quantity_sold BIGINT,
+    total_revenue DECIMAL,
+    total_cost DECIMAL,
+    gross_profit DECIMAL,
+    profit_margin DECIMAL,
+    avg_selling_price DECIMAL,
+    unit_cost DECIMAL
+) AS $$
+    WITH dish_sales AS (
+        SELECT
+            TRIM(d.item_name) as dish_name,
+            SUM(d.quantity)::BIGINT as quantity,
+            SUM(d.revenue) as revenue,
+            SUM(d.unit_price_sum) / NULLIF(SUM(d.unit_price_count), 0) as avg_price
+        FROM sales_dish_daily_between(start_date, end_date) d
+        WHERE d.priced
+            AND d.is_return IS DISTINCT FROM true
+        GROUP BY TRIM(d.item_name)
+    ),
+    costed AS (
+        SELECT
+            s.*,
+            COALESCE(pc.total_ingredient_cost, 0) as cost_each,
+            COALESCE(s.quantity * pc.total_ingredient_cost, 0) as cost
+        FROM dish_sales s
+        LEFT JOIN product_cost_analysis pc ON LOWER(s.dish_name) = TRIM(LOWER(pc.product_name))
+    )
+    SELECT
+        c.dish_name,
+        c.quantity,
+        c.revenue,
+        c.cost,
+        c.revenue - c.cost,
+        CASE WHEN c.revenue > 0 THEN (c.revenue - c.cost) / c.revenue * 100 ELSE 0 END,
+        c.avg_price,
+        c.cost_each
+    FROM costed c
+    ORDER BY c.revenue - c.cost DESC;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION get_dish_profit IS '菜品盈利明细 (Per-dish quantity, revenue, cost and profit for a date range)';
+
+
+-- ============================================================================
+-- 2. Menu Profitability Analysis (Boston Matrix)
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_menu_profitability(
+    start_date DATE DEFAULT CURRENT_DATE - INTERVAL '30 days',
+    end_date DATE DEFAULT CURRENT_DATE,
+    min_quantity INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+    product_name TEXT,
+    quantity_sold BIGINT,
+    total_revenue DECIMAL,
+    avg_selling_price DECIMAL,
+    estimated_cost DECIMAL,
+    gross_profit DECIMAL,
+    profit_margin DECIMAL,
+    popularity_score DECIMAL,
+    profitability_score DECIMAL,
+    category TEXT,
+    rank_by_profit INTEGER,
+    rank_by_quantity INTEGER
+) AS $$
+    WITH menu_sales AS (
+        SELECT p.*
+        FROM get_dish_profit(start_date, end_date) p
+        WHERE p.quantity_sold >= min_quantity
+    ),
+    scored AS (
+        SELECT
+            m.*,
+            m.quantity_sold::DECIMAL / NULLIF(AVG(m.quantity_sold) OVER (), 0) * 100 as popularity_pct,
+            CASE
+                WHEN m.total_revenue > 0 THEN
+                    m.profit_margin
+                    / NULLIF(AVG(m.gross_profit / NULLIF(m.total_revenue, 0) * 100) OVER (), 0) * 100
+                ELSE 0
+            END as profitability_pct,
+            RANK() OVER (ORDER BY m.gross_profit DESC) as profit_rank,
+            RANK() OVER (ORDER BY m.quantity_sold DESC) as quantity_rank
+        FROM menu_sales m
+    )
+    SELECT
+        s.product_name,
+        s.quantity_sold,
+        s.total_revenue,
+        s.avg_selling_price,
+        s.total_cost,
+        s.gross_profit,
+        s.profit_margin,
+        s.popularity_pct,
+        s.profitability_pct,
+        -- Boston Matrix categorization
+        CASE
+            WHEN s.popularity_pct >= 100 AND s.profitability_pct >= 100 THEN '⭐ Stars'
+            WHEN s.popularity_pct < 100 AND s.profitability_pct >= 100 THEN '🧩 Puzzles'
+            WHEN s.popularity_pct >= 100 AND s.profitability_pct < 100 THEN '🐴 Plowhorses'
+            ELSE '🐕 Dogs'
+        END,
+        s.profit_rank::INTEGER,
+        s.quantity_rank::INTEGER
+    FROM scored s
+    ORDER BY s.gross_profit DESC;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION get_menu_profitability IS '菜单工程分析：计算菜品盈利能力并分类 (Menu Engineering: Boston Matrix categorization)';
+
+
+-- ============================================================================
+-- 3. Top Profitable Dishes
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_top_profitable_dishes(
+    start_date DATE DEFAULT CURRENT_DATE - INTERVAL '30 days',
+    end_date DATE DEFAULT CURRENT_DATE,
+    top_n INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+    product_name TEXT,
+    quantity_sold BIGINT,
+    total_revenue DECIMAL,
+    total_cost DECIMAL,
+    gross_profit DECIMAL,
+    profit_margin DECIMAL
+) AS $$
+    SELECT p.product_name, p.quantity_sold, p.total_revenue, p.total_cost, p.gross_profit, p.profit_margin
+    FROM get_dish_profit(start_date, end_date) p
+    ORDER BY p.gross_profit DESC
+    LIMIT top_n;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION get_top_profitable_dishes IS '最赚钱的菜品排行 (Top dishes by gross profit)';
+
+
+-- ============================================================================
+-- 4. Low Profit Dishes (Dogs)
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_low_profit_dishes(
+    start_date DATE DEFAULT CURRENT_DATE - INTERVAL '30 days',
+    end_date DATE DEFAULT CURRENT_DATE,
+    bottom_n INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+    product_name TEXT,
+    quantity_sold BIGINT,
+    total_revenue DECIMAL,
+    total_cost DECIMAL,
+    gross_profit DECIMAL,
+    profit_margin DECIMAL,
+    recommendation TEXT
+) AS $$
+    SELECT
+        p.product_name, p.quantity_sold, p.total_revenue, p.total_cost, p.gross_profit, p.profit_margin,
+        CASE
+            WHEN p.quantity_sold < 10 THEN '考虑下架（销量过低）'
+            WHEN p.gross_profit < 0 THEN '亏损菜品！立即调价或下架'
+            WHEN p.gross_profit / p.total_revenue < 0.2 THEN '利润率过低，建议提价或降成本'
+            ELSE '关注并优化'
+        END
+    FROM get_dish_profit(start_date, end_date) p
+    WHERE p.quantity_sold >= 5  -- Only dishes sold at least 5 times
+    ORDER BY p.gross_profit ASC
+    LIMIT bottom_n;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION get_low_profit_dishes IS '低盈利菜品分析 (Low profit dishes with recommendations)';
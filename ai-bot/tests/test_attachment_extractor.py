@@ -0,0 +1,135 @@
+"""
+Tests for background attachment pre-extraction
+"""
+
+import zipfile
+
+import pytest
+
+from src.attachment_extractor import AttachmentExtractor, blob_path, detect_kind, extract_document
+
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+A = 'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+P = 'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+S = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+
+def _zip(path, files):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return str(path)
+
+
+@pytest.fixture
+def docx_file(tmp_path):
+    return _zip(tmp_path / "report.docx", {
+        "word/document.xml": f"""<w:document {W}><w:body>
+            <w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr><w:r><w:t>季度总结</w:t></w:r></w:p>
+            <w:p><w:r><w:t>营收增长明显</w:t></w:r></w:p>
+            <w:tbl><w:tr><w:tc><w:p><w:r><w:t>月份</w:t></w:r></w:p></w:tc><w:tc><w:p><w:r><w:t>营收</w:t></w:r></w:p></w:tc></w:tr>
+                   <w:tr><w:tc><w:p><w:r><w:t>7月</w:t></w:r></w:p></w:tc><w:tc><w:p><w:r><w:t>1000</w:t></w:r></w:p></w:tc></w:tr></w:tbl>
+        </w:body></w:document>"""
+    })
+
+
+@pytest.fixture
+def pptx_file(tmp_path):
+    slide = """<p:sld {A} {P}><p:cSld><p:spTree>
+        <p:sp><p:nvSpPr><p:nvPr><p:ph type="title"/></p:nvPr></p:nvSpPr><p:txBody><a:p><a:r><a:t>{title}</a:t></a:r></a:p></p:txBody></p:sp>
+        <p:sp><p:nvSpPr><p:nvPr/></p:nvSpPr><p:txBody><a:p><a:r><a:t>{body}</a:t></a:r></a:p></p:txBody></p:sp>
+    </p:spTree></p:cSld></p:sld>"""
+    return _zip(tmp_path / "deck.pptx", {
+        "ppt/slides/slide1.xml": slide.format(A=A, P=P, title="Overview", body="Key points"),
+        "ppt/slides/slide2.xml": slide.format(A=A, P=P, title="Plan", body="Next steps"),
+    })
+
+
+@pytest.fixture
+def xlsx_file(tmp_path):
+    return _zip(tmp_path / "data.xlsx", {
+        "xl/workbook.xml": f'<workbook {S} {R}><sheets><sheet name="收入" sheetId="1" r:id="rId1"/></sheets></workbook>',
+        "xl/_rels/workbook.xml.rels": '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                                      '<Relationship Id="rId1" Target="worksheets/sheet1.xml"/></Relationships>',
+        "xl/sharedStrings.xml": f"<sst {S}><si><t>门店</t></si><si><t>金额</t></si></sst>",
+        "xl/worksheets/sheet1.xml": f"""<worksheet {S}><sheetData>
+            <row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c></row>
+            <row r="2"><c r="A2" t="inlineStr"><is><t>绵阳店</t></is></c><c r="C2"><v>42</v></c></row>
+        </sheetData></worksheet>""",
+    })
+
+
+class TestExtractDocument:
+    """Test per-format extraction"""
+
+    def test_detect_kind(self):
+        """Should detect kind from content type or extension"""
+        assert detect_kind("a.PDF", None) == "pdf"
+        assert detect_kind("x", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet") == "xlsx"
+        assert detect_kind("notes.txt", "text/plain") is None
+
+    def test_docx(self, docx_file):
+        """Should extract paragraphs, heading outline and tables"""
+        result = extract_document(docx_file, "docx")
+
+        assert "营收增长明显" in result["text"]
+        assert result["outline"] == ["# 季度总结"]
+        assert result["tables"][0]["rows"] == [["月份", "营收"], ["7月", "1000"]]
+
+    def test_pptx(self, pptx_file):
+        """Should extract slide titles as outline in slide order"""
+        result = extract_document(pptx_file, "pptx")
+
+        assert result["outline"] == ["Slide 1: Overview", "Slide 2: Plan"]
+        assert "Next steps" in result["text"]
+
+    def test_xlsx(self, xlsx_file):
+        """Should resolve shared strings and keep column positions"""
+        result = extract_document(xlsx_file, "xlsx")
+
+        assert result["tables"][0]["name"] == "收入"
+        assert result["tables"][0]["rows"] == [["门店", "金额"], ["绵阳店", "", "42"]]
+
+    def test_corrupt_file_reports_error(self, tmp_path):
+        """Should return an error instead of raising"""
+        bad = tmp_path / "bad.docx"
+        bad.write_bytes(b"not a zip")
+
+        assert "error" in extract_document(str(bad), "docx")
+
+
+class TestAttachmentExtractor:
+    """Test scheduling and blob_key cache"""
+
+    def test_extract_then_cache_hit(self, tmp_path, docx_file):
+        """Should extract in the pool once and serve later lookups from cache"""
+        blob_key = "ab12docxkey"
+        target = tmp_path / "files" / blob_path(blob_key, "").lstrip("/")
+        target.parent.mkdir(parents=True)
+        target.write_bytes(open(docx_file, "rb").read())
+
+        extractor = AttachmentExtractor(
+            cache_dir=str(tmp_path / "cache"),
+            files_base_path=str(tmp_path / "files"),
+            max_workers=1
+        )
+        file_info = {"blob_key": blob_key, "filename": "report.docx", "content_type": None}
+        try:
+            result = extractor.extract(file_info, timeout=60)
+            assert "营收增长明显" in result["text"]
+
+            assert extractor.schedule(file_info) is None  # already cached
+            assert extractor.status(blob_key) == "ready"
+            assert extractor.get(blob_key)["filename"] == "report.docx"
+            assert extractor.get_stats()["extracted"] == 1
+        finally:
+            extractor.shutdown()
+
+    def test_unsupported_not_scheduled(self, tmp_path):
+        """Should skip formats without an extractor"""
+        extractor = AttachmentExtractor(cache_dir=str(tmp_path / "cache"))
+
+        assert extractor.schedule({"blob_key": "zz99", "filename": "a.png", "content_type": "image/png"}) is None
+        assert extractor.get_stats()["unsupported"] == 1
@@ -0,0 +1,144 @@
+"""
+Tests for briefing sidecars and the date-indexed briefing catalog
+"""
+
+import json
+
+import pytest
+
+from src.tools.briefing_catalog import BriefingCatalog, parse_briefing_markdown
+from src.tools.campfire_tools import CampfireTools
+
+
+def write_briefing(kb, date, body, sidecar=None):
+    """Write a minimal daily briefing (and optional sidecar) into kb/briefings"""
+    folder = kb / "briefings" / date[:4] / date[5:7]
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"daily-briefing-{date}.md"
+    path.write_text(
+        f"# Daily Briefing - {date}\n\n**Rooms Covered:** 1 room(s)\n**Total Messages:** 12 messages\n"
+        f"**Files Uploaded:** 0 file(s)\n**Active Participants:** 2 user(s)\n\n---\n\n"
+        f"## Executive Summary\n\nModerate activity.\n\n---\n\n## By Room Activity\n\n{body}\n",
+        encoding="utf-8"
+    )
+    if sidecar is not None:
+        path.with_suffix(".json").write_text(json.dumps(sidecar), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def tools(tmp_path):
+    """CampfireTools on the test database with an empty KB"""
+    return CampfireTools(
+        db_path="./tests/fixtures/test.db",
+        context_dir=str(tmp_path / "ctx"),
+        knowledge_base_dir=str(tmp_path / "kb")
+    )
+
+
+class TestBriefingSidecar:
+    """Test the JSON sidecar written by generate_daily_briefing"""
+
+    def test_sidecar_matches_markdown(self, tools):
+        """Should write a sidecar whose counts agree with the markdown briefing"""
+        result = tools.generate_daily_briefing(date="2025-10-04")
+        md_path = tools.knowledge_base_dir / result["briefing_path"]
+        sidecar = json.loads(md_path.with_suffix(".json").read_text(encoding="utf-8"))
+
+        assert sidecar["message_count"] == result["message_count"] == 9
+        assert sidecar["rooms_count"] == result["rooms_covered"]
+        assert sidecar["participants"][0] == {"name": "WU HENG", "message_count": 5}
+
+        legacy = parse_briefing_markdown(result["briefing_content"])
+        for key in ("message_count", "file_count", "rooms_count", "participants_count",
+                    "rooms", "participants", "executive_summary"):
+            assert legacy[key] == sidecar[key]
+
+    def test_generated_briefing_is_searchable(self, tools):
+        """Should catalogue a new briefing without a rescan"""
+        tools.search_briefings()  # builds the (empty) catalog
+        tools.generate_daily_briefing(date="2025-10-04")
+
+        hits = tools.search_briefings(query="revenue")
+        assert [h["date"] for h in hits] == ["2025-10-04"]
+        assert hits[0]["message_count"] == 9
+
+
+class TestBriefingCatalog:
+    """Test date-range and keyword lookups"""
+
+    @pytest.fixture
+    def kb(self, tmp_path):
+        kb = tmp_path / "kb"
+        write_briefing(kb, "2025-10-01", "预算评审会议")
+        write_briefing(kb, "2025-10-02", "Inventory audit")
+        write_briefing(kb, "2025-11-03", "预算执行情况")
+        return kb
+
+    def test_date_range_most_recent_first(self, kb):
+        """Should return briefings within the range, newest first"""
+        catalog = BriefingCatalog(kb)
+        catalog.load_or_build()
+
+        hits = catalog.search(start_date="2025-10-01", end_date="2025-10-31")
+
+        assert [h["date"] for h in hits] == ["2025-10-02", "2025-10-01"]
+        assert hits[0]["message_count"] == 12
+
+    def test_keyword_filter(self, kb):
+        """Should match briefings containing every query term"""
+        catalog = BriefingCatalog(kb)
+        catalog.load_or_build()
+
+        assert [h["date"] for h in catalog.search(query="预算")] == ["2025-11-03", "2025-10-01"]
+        assert [h["date"] for h in catalog.search(query="预算评审")] == ["2025-10-01"]
+        assert catalog.search(query="payroll") == []
+
+    def test_sidecar_preferred_and_snapshot_reused(self, kb):
+        """Should use the sidecar when present and reload without re-reading files"""
+        write_briefing(kb, "2025-10-05", "Daily sync", sidecar={"message_count": 42, "executive_summary": "Busy day."})
+        BriefingCatalog(kb).load_or_build()
+
+        catalog = BriefingCatalog(kb)
+        summary = catalog.load_or_build()
+
+        assert summary["loaded_snapshot"] is True
+        assert summary["parsed"] == 0
+        entry = catalog.get("2025-10-05")
+        assert entry["message_count"] == 42
+        assert entry["has_sidecar"] is True
+        assert catalog.stats()["legacy_parsed"] == 0
+
+    def test_deleted_briefing_dropped(self, kb):
+        """Should drop a briefing whose markdown was removed"""
+        catalog = BriefingCatalog(kb)
+        catalog.load_or_build()
+        path = kb / "briefings" / "2025" / "10" / "daily-briefing-2025-10-02.md"
+        path.unlink()
+
+        catalog.on_change("briefings/2025/10/daily-briefing-2025-10-02.md", False)
+
+        assert catalog.dates_in_range() == ["2025-10-01", "2025-11-03"]
+
+
+class TestUpdateBriefingSummary:
+    """Test replacing a briefing's executive summary"""
+
+    def test_markdown_and_sidecar_updated(self, tools):
+        """Should rewrite the summary section and keep the sidecar in sync"""
+        result = tools.generate_daily_briefing(date="2025-10-04")
+
+        updated = tools.update_briefing_summary("2025-10-04", "财务团队讨论了十月预算。", model="test-model")
+
+        md_path = tools.knowledge_base_dir / result["briefing_path"]
+        content = md_path.read_text(encoding="utf-8")
+        sidecar = json.loads(md_path.with_suffix(".json").read_text(encoding="utf-8"))
+        assert updated["success"] is True
+        assert parse_briefing_markdown(content)["executive_summary"] == "财务团队讨论了十月预算。"
+        assert "## By Room Activity" in content
+        assert sidecar["executive_summary"] == "财务团队讨论了十月预算。"
+        assert sidecar["summary_model"] == "test-model"
+
+    def test_missing_briefing(self, tools):
+        """Should report briefings that do not exist"""
+        assert tools.update_briefing_summary("2025-01-01", "x")["success"] is False
@@ -0,0 +1,127 @@
+"""
+Tests for weekly/monthly briefing rollups built from daily aggregates
+"""
+
+import json
+
+import pytest
+
+from src.tools.briefing_rollups import BriefingRollups, period_bounds
+from src.tools.campfire_tools import CampfireTools
+
+
+@pytest.fixture
+def tools(tmp_path):
+    """CampfireTools on the test database with an empty KB"""
+    return CampfireTools(
+        db_path="./tests/fixtures/test.db",
+        context_dir=str(tmp_path / "ctx"),
+        knowledge_base_dir=str(tmp_path / "kb")
+    )
+
+
+def rollups_for(tools, today="2026-01-01"):
+    """Rollup engine over the tools' catalog with a fixed 'today'"""
+    tools.briefing_catalog.load_or_build()
+    return BriefingRollups(tools.briefing_catalog, tools._get_db_connection, today=lambda: today)
+
+
+class TestPeriodBounds:
+    """Test ISO week and calendar month boundaries"""
+
+    def test_week_and_month(self):
+        """Should return Monday-Sunday weeks and whole months"""
+        assert period_bounds("week", "2025-10-04") == ("2025-W40", "2025-09-29", "2025-10-05")
+        assert period_bounds("month", "2024-02-10") == ("2024-02", "2024-02-01", "2024-02-29")
+        assert period_bounds("day", "2025-10-04") == ("2025-10-04", "2025-10-04", "2025-10-04")
+
+
+class TestBriefingRollups:
+    """Test range summaries over the fixture database (Oct 4: 9, Oct 5: 3, Oct 13: 1 messages)"""
+
+    def test_month_summary_from_database(self, tools):
+        """Should aggregate the range with grouped queries and rank rooms and people"""
+        rollups = rollups_for(tools)
+
+        summary = rollups.summarize("2025-10-01", "2025-10-31", compare=False)
+
+        assert summary["period"] == "week"
+        assert summary["totals"]["message_count"] == 13
+        assert summary["totals"]["active_days"] == 3
+        assert summary["totals"]["busiest_day"] == {"date": "2025-10-04", "message_count": 9}
+        assert summary["top_participants"][0] == {"name": "WU HENG", "message_count": 7}
+        assert [p["message_count"] for p in summary["periods"]] == [12, 0, 1, 0, 0]
+        assert rollups.stats()["db_queries"] == 1
+
+    def test_closed_days_are_not_queried_twice(self, tools):
+        """Should serve closed days from the store on later summaries"""
+        rollups = rollups_for(tools)
+        rollups.summarize("2025-10-01", "2025-10-31", compare=False)
+
+        reloaded = rollups_for(tools)
+        summary = reloaded.summarize("2025-10-01", "2025-10-31", compare=False)
+
+        assert summary["totals"]["message_count"] == 13
+        assert reloaded.stats()["db_queries"] == 0
+        assert reloaded.stats()["days_from_store"] == 31
+
+    def test_sidecar_matches_database(self, tools):
+        """Should give the same totals whether a day comes from its sidecar or the database"""
+        from_db = rollups_for(tools).summarize("2025-10-04", "2025-10-04", compare=False)
+        tools.generate_daily_briefing(date="2025-10-04")
+
+        rollups = rollups_for(tools)
+        from_sidecar = rollups.summarize("2025-10-04", "2025-10-04", compare=False)
+
+        assert rollups.stats()["days_from_sidecar"] == 1
+        assert from_sidecar["totals"] == from_db["totals"]
+        assert from_sidecar["top_rooms"] == from_db["top_rooms"]
+
+    def test_regenerated_day_recomputes_its_periods(self, tools):
+        """Should recompute only the week and month containing a changed day"""
+        tools.generate_daily_briefing(date="2025-10-13")
+        rollups = rollups_for(tools)
+        rollups.summarize("2025-10-06", "2025-10-19", period="week", compare=False)
+
+        sidecar = tools.knowledge_base_dir / "briefings" / "2025" / "10" / "daily-briefing-2025-10-13.json"
+        data = json.loads(sidecar.read_text(encoding="utf-8"))
+        data["message_count"] = 40
+        sidecar.write_text(json.dumps(data), encoding="utf-8")
+        tools.briefing_catalog.update_file(sidecar.with_suffix(".md"))
+
+        before = rollups.stats()
+        summary = rollups.summarize("2025-10-06", "2025-10-19", period="week", compare=False)
+        after = rollups.stats()
+
+        assert [p["message_count"] for p in summary["periods"]] == [0, 40]
+        assert after["period_hits"] - before["period_hits"] == 1
+        assert after["period_recomputes"] - before["period_recomputes"] == 1
+
+    def test_trend_against_previous_range(self, tools):
+        """Should compare with the preceding range of equal length"""
+        summary = rollups_for(tools).summarize("2025-10-05", "2025-10-05")
+
+        assert summary["previous"]["start_date"] == "2025-10-04"
+        assert summary["previous"]["message_count"] == 9
+        assert summary["change_pct"]["message_count"] == pytest.approx(-66.7)
+
+
+class TestSummarizeBriefingRange:
+    """Test the CampfireTools entry point"""
+
+    def test_named_and_invalid_ranges(self, tools):
+        """Should resolve range keywords and reject unknown ones"""
+        result = tools.summarize_briefing_range(range_name="last_7_days")
+        assert result["success"] is True
+        assert result["days"] == 7
+
+        assert tools.summarize_briefing_range(range_name="next_year")["success"] is False
+        assert tools.summarize_briefing_range(start_date="2025/10/01")["success"] is False
+
+    def test_explicit_range(self, tools):
+        """Should summarize an explicit date range"""
+        result = tools.summarize_briefing_range(start_date="2025-10-04", end_date="2025-10-05")
+
+        assert result["success"] is True
+        assert result["totals"]["message_count"] == 12
+        assert result["period"] == "day"
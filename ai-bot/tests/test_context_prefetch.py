@@ -0,0 +1,77 @@
+"""
+Tests for per-request context prefetching
+"""
+
+import pytest
+
+from src.context_prefetch import ContextPrefetcher, PrefetchedContext
+from src.tools.campfire_tools import CampfireTools
+
+
+@pytest.fixture
+def tools(tmp_path):
+    """CampfireTools on the test database"""
+    return CampfireTools(
+        db_path="./tests/fixtures/test.db",
+        context_dir=str(tmp_path / "user_contexts")
+    )
+
+
+class TestContextPrefetcher:
+    """Test concurrent prefetch and re-request tracking"""
+
+    async def test_prefetch_loads_all_items(self, tools):
+        """Should load profile, messages and files for a room"""
+        prefetcher = ContextPrefetcher()
+        result = await prefetcher.prefetch(tools, user_id=1, room_id=1)
+
+        assert result.errors == {}
+        assert result.user_context["user_id"] == 1
+        assert result.recent_messages == tools.search_conversations("", room_id=1, limit=10)
+        assert isinstance(result.room_files, list)
+        assert prefetcher.get_stats()["items"]["user_context"]["served"] == 1
+
+    async def test_failed_lookup_is_isolated(self, tools, monkeypatch):
+        """Should record a failing lookup without losing the others"""
+        def boom(*args, **kwargs):
+            raise RuntimeError("db gone")
+        monkeypatch.setattr(tools, "get_recent_room_files", boom)
+
+        prefetcher = ContextPrefetcher()
+        result = await prefetcher.prefetch(tools, user_id=1, room_id=1)
+
+        assert result.room_files is None
+        assert "room_files" in result.errors
+        assert result.recent_messages is not None
+        assert prefetcher.get_stats()["items"]["room_files"]["errors"] == 1
+
+    def test_re_request_tracking(self):
+        """Should count only calls that duplicate prefetched data"""
+        prefetcher = ContextPrefetcher()
+        prefetched = PrefetchedContext(user_id=1, room_id=2, user_context={"user_id": 1}, recent_messages=[])
+
+        prefetcher.record_tool_call(prefetched, "mcp__campfire__get_user_context", {"user_id": 1})
+        prefetcher.record_tool_call(prefetched, "mcp__campfire__search_conversations", {"room_id": 2})
+        prefetcher.record_tool_call(prefetched, "mcp__campfire__search_conversations", {"query": "预算", "room_id": 2})
+        prefetcher.record_tool_call(None, "mcp__campfire__get_user_context", {"user_id": 1})
+
+        items = prefetcher.get_stats()["items"]
+        assert items["user_context"]["re_requested"] == 1
+        assert items["recent_messages"]["re_requested"] == 1
+
+    def test_profile_block_respects_budget(self):
+        """Should stop adding lines before exceeding max_chars"""
+        prefetched = PrefetchedContext(
+            user_id=1, room_id=1,
+            user_context={
+                "user_name": "WU HENG",
+                "expertise": ["finance"],
+                "conversation_memory": [f"memory entry {i} " * 10 for i in range(100)],
+            }
+        )
+
+        block = prefetched.render_profile_block(max_chars=400)
+
+        assert len(block) <= 400
+        assert "WU HENG" in block
+        assert "memory entry 99" in block  # newest memories first
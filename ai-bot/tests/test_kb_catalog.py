@@ -0,0 +1,146 @@
+"""
+Tests for the knowledge base document catalog
+"""
+
+import os
+
+import pytest
+
+from src.tools.campfire_tools import CampfireTools
+from src.tools.kb_catalog import DocumentCatalog
+from src.tools.kb_index import KnowledgeBaseIndex, parse_document
+
+
+DOC = """# 报销政策
+
+**Last Updated:** 2025-10-01
+
+## 适用范围
+
+```bash
+# not a heading
+```
+
+## 报销流程
+### 提交发票
+"""
+
+
+@pytest.fixture
+def kb_dir(tmp_path):
+    """Small knowledge base with nested categories"""
+    kb = tmp_path / "kb"
+    (kb / "policies").mkdir(parents=True)
+    (kb / "briefings" / "2025" / "10").mkdir(parents=True)
+    (kb / "policies" / "expense.md").write_text(DOC, encoding="utf-8")
+    (kb / "briefings" / "2025" / "10" / "daily-briefing-2025-10-15.md").write_text(
+        "# 日报 2025-10-15\n\nLast updated: 2025-10-16\n", encoding="utf-8"
+    )
+    (kb / "README.md").write_text("# README\n", encoding="utf-8")
+    return kb
+
+
+class TestParseDocument:
+    """Test metadata extraction"""
+
+    def test_title_date_and_outline(self):
+        """Should extract title, bold Last Updated date and headings outside code fences"""
+        parsed = parse_document(DOC)
+
+        assert parsed["title"] == "报销政策"
+        assert parsed["last_updated"] == "2025-10-01"
+        assert [(h["level"], h["title"]) for h in parsed["outline"]] == [
+            (1, "报销政策"), (2, "适用范围"), (2, "报销流程"), (3, "提交发票")
+        ]
+
+    def test_outline_offsets_are_bytes(self):
+        """Should record UTF-8 byte offsets of heading lines"""
+        raw = DOC.encode("utf-8")
+        for heading in parse_document(DOC)["outline"]:
+            assert raw[heading["offset"]:].startswith(("#" * heading["level"]).encode())
+
+
+class TestDocumentCatalog:
+    """Test listing, category filtering and persistence"""
+
+    def test_list_all_sorted(self, kb_dir):
+        """Should list every document except README, sorted by category"""
+        catalog = DocumentCatalog(KnowledgeBaseIndex(kb_dir))
+        catalog.load_or_build()
+
+        docs = catalog.list_documents()
+
+        assert [d["path"] for d in docs] == ["briefings/2025/10/daily-briefing-2025-10-15.md", "policies/expense.md"]
+        assert docs[1]["outline"][1] == "## 适用范围"
+        assert docs[1]["size"] == len(DOC.encode("utf-8"))
+
+    def test_category_includes_subdirectories(self, kb_dir):
+        """Should match a category directory and everything below it"""
+        catalog = DocumentCatalog(KnowledgeBaseIndex(kb_dir))
+        catalog.load_or_build()
+
+        assert [d["category"] for d in catalog.list_documents("briefings")] == ["briefings/2025/10"]
+        assert catalog.list_documents("technical") == []
+
+    def test_listing_memoized_until_change(self, kb_dir):
+        """Should serve repeated listings from memory and invalidate on update"""
+        catalog = DocumentCatalog(KnowledgeBaseIndex(kb_dir))
+        catalog.load_or_build()
+        catalog.list_documents("policies")
+        catalog.list_documents("policies")
+        assert catalog.stats()["listing_cache_hits"] == 1
+
+        (kb_dir / "policies" / "leave.md").write_text("# 请假制度\n", encoding="utf-8")
+        catalog.update_file("policies/leave.md")
+
+        assert len(catalog.list_documents("policies")) == 2
+
+    def test_snapshot_reload_only_parses_changed_files(self, kb_dir):
+        """Should load the index snapshot and re-read only modified documents"""
+        DocumentCatalog(KnowledgeBaseIndex(kb_dir)).load_or_build()
+        assert (kb_dir / ".kb_index.json").exists()
+        assert not (kb_dir / ".kb_catalog.json").exists()
+
+        target = kb_dir / "policies" / "expense.md"
+        target.write_text("# 报销政策 v2\n", encoding="utf-8")
+        st = target.stat()
+        os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        catalog = DocumentCatalog(KnowledgeBaseIndex(kb_dir))
+        summary = catalog.load_or_build()
+
+        assert summary["loaded_snapshot"] is True
+        assert summary["reindexed"] == 1
+        assert catalog.get("policies/expense.md")["title"] == "报销政策 v2"
+        assert catalog.get("policies/expense.md")["outline"] == [{"level": 1, "title": "报销政策 v2", "offset": 0}]
+
+    def test_search_and_listing_share_records(self, kb_dir):
+        """Should list what the index searches, including changes applied to the index directly"""
+        index = KnowledgeBaseIndex(kb_dir)
+        catalog = DocumentCatalog(index)
+        catalog.load_or_build()
+        catalog.list_documents()
+
+        (kb_dir / "policies" / "expense.md").unlink()
+        index.remove_file("policies/expense.md")
+
+        assert [d["path"] for d in catalog.list_documents()] == ["briefings/2025/10/daily-briefing-2025-10-15.md"]
+        assert catalog.get("policies/expense.md") is None
+
+
+class TestCampfireToolsListDocuments:
+    """Test list_knowledge_documents through CampfireTools"""
+
+    def test_stored_document_is_listed(self, kb_dir, tmp_path):
+        """Should list documents written by store_knowledge_document immediately"""
+        tools = CampfireTools(
+            db_path="./tests/fixtures/test.db",
+            context_dir=str(tmp_path / "ctx"),
+            knowledge_base_dir=str(kb_dir)
+        )
+        assert len(tools.list_knowledge_documents()) == 2
+
+        tools.store_knowledge_document(category="financial", title="Budget Guide", content="年度预算编制指南")
+
+        docs = tools.list_knowledge_documents("financial")
+        assert [d["title"] for d in docs] == ["Budget Guide"]
@@ -0,0 +1,128 @@
+"""
+Tests for the knowledge base inverted index
+"""
+
+import os
+
+import pytest
+
+from src.tools.campfire_tools import CampfireTools
+from src.tools.kb_index import KnowledgeBaseIndex, tokenize
+
+
+@pytest.fixture
+def kb_dir(tmp_path):
+    """Small bilingual knowledge base"""
+    kb = tmp_path / "kb"
+    (kb / "policies").mkdir(parents=True)
+    (kb / "procedures").mkdir()
+    (kb / "policies" / "expense.md").write_text(
+        "# 报销政策\n\n**Last Updated:** 2025-10-01\n\n员工报销需要提交发票。\n差旅报销标准见附表。\n",
+        encoding="utf-8"
+    )
+    (kb / "policies" / "security.md").write_text(
+        "# Security Policy\n\nPasswords must be rotated every 90 days.\n",
+        encoding="utf-8"
+    )
+    (kb / "procedures" / "closing.md").write_text(
+        "# 月末结账流程\n\n财务部在每月最后一个工作日完成结账。报销单据须在结账前提交。\n",
+        encoding="utf-8"
+    )
+    (kb / "README.md").write_text("# 报销 README\n", encoding="utf-8")
+    return kb
+
+
+class TestTokenize:
+    """Test CJK bigram + Latin word tokenization"""
+
+    def test_mixed_text(self):
+        """Should produce bigrams for Chinese and lowercase words for Latin"""
+        assert tokenize("财务报表 Q3 Revenue") == ["财务", "务报", "报表", "q3", "revenue"]
+
+    def test_single_cjk_character(self):
+        """Should keep an isolated CJK character as a unigram"""
+        assert tokenize("税") == ["税"]
+
+
+class TestKnowledgeBaseIndex:
+    """Test BM25 search, filtering and persistence"""
+
+    def test_search_ranks_best_match_first(self, kb_dir):
+        """Should rank the document with the most query matches first"""
+        index = KnowledgeBaseIndex(kb_dir)
+        index.load_or_build()
+
+        results = index.search("报销", max_results=5)
+
+        assert [r["path"] for r in results] == ["policies/expense.md", "procedures/closing.md"]
+        assert results[0]["title"] == "报销政策"
+        assert "**报销**" in results[0]["excerpt"]
+
+    def test_readme_skipped(self, kb_dir):
+        """Should not index README.md files"""
+        index = KnowledgeBaseIndex(kb_dir)
+        index.load_or_build()
+
+        assert "README.md" not in index.documents()
+
+    def test_category_filter(self, kb_dir):
+        """Should restrict results to the category directory"""
+        index = KnowledgeBaseIndex(kb_dir)
+        index.load_or_build()
+
+        results = index.search("报销", category="procedures")
+
+        assert [r["path"] for r in results] == ["procedures/closing.md"]
+
+    def test_english_query(self, kb_dir):
+        """Should match Latin words case-insensitively"""
+        index = KnowledgeBaseIndex(kb_dir)
+        index.load_or_build()
+
+        assert index.search("PASSWORDS")[0]["path"] == "policies/security.md"
+
+    def test_single_character_query(self, kb_dir):
+        """Should match a single CJK character inside indexed bigrams"""
+        index = KnowledgeBaseIndex(kb_dir)
+        index.load_or_build()
+
+        assert {r["path"] for r in index.search("账", max_results=5)} == {"procedures/closing.md"}
+
+    def test_snapshot_reload_only_reads_changed_files(self, kb_dir):
+        """Should load the snapshot and re-read only modified documents"""
+        KnowledgeBaseIndex(kb_dir).load_or_build()
+        assert (kb_dir / ".kb_index.json").exists()
+
+        target = kb_dir / "policies" / "security.md"
+        target.write_text("# Security Policy\n\nUse hardware tokens.\n", encoding="utf-8")
+        st = target.stat()
+        os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        (kb_dir / "procedures" / "closing.md").unlink()
+
+        index = KnowledgeBaseIndex(kb_dir)
+        summary = index.load_or_build()
+
+        assert summary["loaded_snapshot"] is True
+        assert summary["reindexed"] == 1
+        assert summary["removed"] == 1
+        assert index.search("hardware")[0]["path"] == "policies/security.md"
+        assert index.search("passwords") == []
+
+
+class TestCampfireToolsKnowledgeSearch:
+    """Test search_knowledge_base through CampfireTools"""
+
+    def test_stored_document_is_searchable(self, kb_dir, tmp_path):
+        """Should index documents written by store_knowledge_document immediately"""
+        tools = CampfireTools(
+            db_path="./tests/fixtures/test.db",
+            context_dir=str(tmp_path / "ctx"),
+            knowledge_base_dir=str(kb_dir)
+        )
+        tools.load_knowledge_index()
+
+        result = tools.store_knowledge_document(category="financial", title="Budget Guide", content="年度预算编制指南")
+        assert result["success"]
+
+        hits = tools.search_knowledge_base("预算编制")
+        assert hits[0]["path"] == "financial/budget-guide.md"
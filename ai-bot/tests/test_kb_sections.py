@@ -0,0 +1,144 @@
+"""
+Tests for section-addressable knowledge base reads
+"""
+
+import pytest
+
+from src.tools.campfire_tools import CampfireTools
+from src.tools.kb_catalog import DocumentCatalog
+from src.tools.kb_index import KnowledgeBaseIndex
+from src.tools.kb_sections import SectionReader, estimate_tokens, read_ranges
+
+
+GUIDE = """# Claude Code 教程
+
+**Last Updated:** 2025-10-01
+
+## 安装
+
+使用 npm 安装命令行工具。
+
+### 系统要求
+
+Node.js 18 或更高版本。
+
+## 配置
+
+在 settings.json 中设置权限和模型。
+
+## 常见问题
+
+报销系统无法登录时请联系管理员。
+"""
+
+
+@pytest.fixture
+def reader(tmp_path):
+    """SectionReader over a KB with one tutorial document"""
+    kb = tmp_path / "kb"
+    (kb / "technical").mkdir(parents=True)
+    (kb / "technical" / "guide.md").write_text(GUIDE, encoding="utf-8")
+    return SectionReader(DocumentCatalog(KnowledgeBaseIndex(kb)))
+
+
+class TestHelpers:
+    """Test token estimate and byte-range reads"""
+
+    def test_estimate_tokens(self):
+        """Should count CJK characters individually and Latin text by ~4 chars"""
+        assert estimate_tokens("报销流程") == 4
+        assert estimate_tokens("abcdefgh") == 2
+
+    def test_read_ranges_with_mmap(self, tmp_path):
+        """Should return the same bytes whether or not the file is memory-mapped"""
+        path = tmp_path / "big.md"
+        path.write_text("前言\n" + "x" * 100 + "\n## 结尾\n", encoding="utf-8")
+        ranges = [(0, 6), (108, 200)]
+
+        assert read_ranges(path, ranges, mmap_threshold=1) == read_ranges(path, ranges, mmap_threshold=10**9)
+        assert read_ranges(path, ranges, mmap_threshold=1)[0] == "前言"
+
+
+class TestSectionReader:
+    """Test full, section, query and outline modes"""
+
+    def test_full_read(self, reader):
+        """Should return the whole document by default"""
+        doc = reader.read("technical/guide.md")
+
+        assert doc["mode"] == "full"
+        assert doc["content"] == GUIDE
+        assert doc["title"] == "Claude Code 教程"
+        assert doc["token_estimate"] == estimate_tokens(GUIDE)
+
+    def test_named_section_includes_subsections(self, reader):
+        """Should return a section up to the next heading of the same level"""
+        doc = reader.read("technical/guide.md", sections=["安装"])
+
+        assert doc["mode"] == "sections"
+        assert doc["content"].startswith("## 安装")
+        assert "Node.js 18" in doc["content"]
+        assert "settings.json" not in doc["content"]
+        assert doc["token_estimate"] < estimate_tokens(GUIDE)
+
+    def test_query_returns_relevant_section(self, reader):
+        """Should return the top-ranked section for a query"""
+        doc = reader.read("technical/guide.md", query="报销登录", max_sections=1)
+
+        assert doc["mode"] == "query"
+        assert doc["sections"] == ["常见问题"]
+        assert "联系管理员" in doc["content"]
+
+    def test_outline_only(self, reader):
+        """Should return the outline without content"""
+        doc = reader.read("technical/guide.md", outline_only=True)
+
+        assert doc["content"] == ""
+        assert doc["outline"] == ["# Claude Code 教程", "## 安装", "### 系统要求", "## 配置", "## 常见问题"]
+
+    def test_unknown_section_falls_back_to_full(self, reader):
+        """Should return the full document when no heading matches"""
+        assert reader.read("technical/guide.md", sections=["不存在"])["mode"] == "full"
+
+    def test_rejects_paths_outside_kb(self, reader, tmp_path):
+        """Should not read files outside the knowledge base, by relative or absolute path"""
+        outside = tmp_path / "outside.md"
+        outside.write_text("# 机密\n", encoding="utf-8")
+
+        assert reader.read("../outside.md") is None
+        assert reader.read("technical/../../outside.md") is None
+        assert reader.read(str(outside)) is None
+        assert reader.read("technical/guide.md") is not None
+
+    def test_crlf_sections(self, reader):
+        """Should slice sections of CRLF documents at their headings"""
+        path = reader.kb_dir / "technical" / "crlf.md"
+        path.write_bytes(b"# One\r\n\r\nbody one\r\n\r\n## Two\r\n\r\nbody two\r\n\r\n## Three\r\n\r\nbody three\r\n")
+
+        doc = reader.read("technical/crlf.md", sections=["Two"])
+
+        assert doc["content"] == "## Two\r\n\r\nbody two"
+        assert doc["outline"] == ["# One", "## Two", "## Three"]
+
+
+class TestCampfireToolsReadDocument:
+    """Test read_knowledge_document through CampfireTools"""
+
+    def test_section_read_and_missing_document(self, tmp_path):
+        """Should read sections by name and report missing documents"""
+        kb = tmp_path / "kb"
+        (kb / "technical").mkdir(parents=True)
+        (kb / "technical" / "guide.md").write_text(GUIDE, encoding="utf-8")
+        tools = CampfireTools(
+            db_path="./tests/fixtures/test.db",
+            context_dir=str(tmp_path / "ctx"),
+            knowledge_base_dir=str(kb)
+        )
+
+        doc = tools.read_knowledge_document("technical/guide.md", sections=["配置"])
+        assert doc["success"] is True
+        assert doc["last_updated"] == "2025-10-01"
+        assert doc["content"].strip() == "## 配置\n\n在 settings.json 中设置权限和模型。"
+
+        missing = tools.read_knowledge_document("technical/missing.md")
+        assert missing["success"] is False
@@ -0,0 +1,102 @@
+"""
+Tests for live knowledge base index updates
+"""
+
+import shutil
+import time
+
+import pytest
+
+from src.tools.kb_index import KnowledgeBaseIndex
+from src.tools.kb_watcher import KnowledgeBaseWatcher
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Loaded index over a one-document KB"""
+    kb = tmp_path / "kb"
+    (kb / "policies").mkdir(parents=True)
+    (kb / "policies" / "expense.md").write_text("# 报销政策\n\n员工报销需要提交发票。\n", encoding="utf-8")
+    kb_index = KnowledgeBaseIndex(kb)
+    kb_index.load_or_build()
+    return kb_index
+
+
+def wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestKnowledgeBaseWatcher:
+    """Test event debouncing, directory handling and polling fallback"""
+
+    def test_notify_and_flush_updates_index(self, index):
+        """Should index new files and drop deleted ones when flushed"""
+        watcher = KnowledgeBaseWatcher(index, use_inotify=False)
+        seen = []
+        watcher.add_listener(lambda rel, exists: seen.append((rel, exists)))
+
+        new_doc = index.kb_dir / "policies" / "travel.md"
+        new_doc.write_text("# 差旅政策\n\n差旅补贴标准。\n", encoding="utf-8")
+        (index.kb_dir / "policies" / "expense.md").unlink()
+        watcher.notify(new_doc)
+        watcher.notify(index.kb_dir / "policies" / "expense.md")
+
+        assert watcher.flush() == 2
+        assert index.search("差旅")[0]["path"] == "policies/travel.md"
+        assert index.search("报销") == []
+        assert sorted(seen) == [("policies/expense.md", False), ("policies/travel.md", True)]
+
+    def test_burst_is_applied_once(self, index):
+        """Should apply a burst of events for the same file in one batch"""
+        watcher = KnowledgeBaseWatcher(index, use_inotify=False)
+        target = index.kb_dir / "policies" / "expense.md"
+        for i in range(20):
+            target.write_text(f"# 报销政策\n\n版本 {i}\n", encoding="utf-8")
+            watcher.notify(target)
+
+        assert watcher.get_stats()["pending"] == 1
+        watcher.flush()
+        assert watcher.get_stats()["batches"] == 1
+
+    def test_directory_removed(self, index):
+        """Should drop every document under a deleted directory"""
+        watcher = KnowledgeBaseWatcher(index, use_inotify=False)
+        shutil.rmtree(index.kb_dir / "policies")
+        watcher.notify(index.kb_dir / "policies")
+
+        watcher.flush()
+
+        assert index.documents() == {}
+
+    def test_directory_copied_in(self, index, tmp_path):
+        """Should index every markdown file of a directory moved into the KB"""
+        staging = tmp_path / "staging" / "technical"
+        staging.mkdir(parents=True)
+        for i in range(3):
+            (staging / f"guide-{i}.md").write_text(f"# Guide {i}\n\ndeployment checklist\n", encoding="utf-8")
+        shutil.move(str(staging), str(index.kb_dir / "technical"))
+
+        watcher = KnowledgeBaseWatcher(index, use_inotify=False)
+        watcher.notify(index.kb_dir / "technical")
+        watcher.flush()
+
+        assert len(index.search("deployment", max_results=10)) == 3
+
+    def test_polling_makes_new_documents_visible(self, index):
+        """Should pick up a new document within a second without explicit notify"""
+        watcher = KnowledgeBaseWatcher(index, poll_interval_seconds=0.2, use_inotify=False)
+        assert watcher.start() == "polling"
+        try:
+            (index.kb_dir / "policies" / "leave.md").write_text("# 请假制度\n\n年假申请流程。\n", encoding="utf-8")
+            started = time.monotonic()
+            assert wait_for(lambda: index.search("年假"))
+            assert time.monotonic() - started < 1.0
+        finally:
+            watcher.stop()
+
+        assert not index._dirty  # snapshot persisted on stop
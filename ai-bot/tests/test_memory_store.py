@@ -0,0 +1,111 @@
+"""
+Tests for bounded, compacted conversation_memory
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.tools.campfire_tools import CampfireTools
+from src.tools.memory_store import MemoryStore
+
+
+NOW = datetime(2025, 11, 1, 12, 0)
+
+
+class TestMemoryStore:
+    """Test dedupe, compaction and ranked selection"""
+
+    def test_merges_near_duplicates(self):
+        """Should merge a reworded memory into the existing entry"""
+        store = MemoryStore()
+        entries = store.add([], ["用户喜欢看同比数据", "Prefers weekly summaries"], now=NOW)
+
+        entries = store.add(entries, ["用户喜欢看同比数据。", "Uses the Shanghai store"], now=NOW + timedelta(days=1))
+
+        assert [e["text"] for e in entries] == ["Prefers weekly summaries", "用户喜欢看同比数据。", "Uses the Shanghai store"]
+        assert entries[1]["count"] == 2
+        assert entries[1]["last_seen"] == (NOW + timedelta(days=1)).isoformat()
+
+    def test_compacts_oldest_into_summary(self):
+        """Should stay at the cap by folding the oldest entries into one summary"""
+        store = MemoryStore(cap=5, summary_max_chars=60)
+        entries = []
+        for n in range(12):
+            entries = store.add(entries, [f"memory number {n} about topic {chr(65 + n) * 3}"], now=NOW + timedelta(hours=n))
+
+        assert len(entries) == 5
+        assert entries[0]["kind"] == "summary"
+        assert entries[0]["covers"] == 8
+        assert len(entries[0]["text"]) <= 60
+        assert entries[0]["text"].startswith("[2025-11-01~2025-11-01] memory number 0")
+        assert [e["text"].split(" about")[0] for e in entries[1:]] == [f"memory number {n}" for n in range(8, 12)]
+
+    def test_select_ranks_recency_and_relevance_within_budget(self):
+        """Should prefer relevant and recent memories, returned oldest first"""
+        store = MemoryStore()
+        entries = store.normalize([
+            {"text": "Asked about Q3 payroll costs", "created_at": (NOW - timedelta(days=60)).isoformat()},
+            {"text": "Likes charts in reports", "created_at": (NOW - timedelta(days=30)).isoformat()},
+            {"text": "Manages the Pudong store", "created_at": (NOW - timedelta(days=1)).isoformat()},
+        ])
+
+        recent = store.select(entries, budget_chars=30, now=NOW)
+        relevant = store.select(entries, query="payroll costs for Q4", budget_chars=30, now=NOW)
+        everything = store.select(entries, budget_chars=1000, now=NOW)
+
+        assert [e["text"] for e in recent] == ["Manages the Pudong store"]
+        assert [e["text"] for e in relevant] == ["Asked about Q3 payroll costs"]
+        assert [e["text"] for e in everything] == [e["text"] for e in entries]
+
+    def test_normalizes_legacy_strings(self):
+        """Should upgrade plain-string memories using the file timestamp"""
+        entries = MemoryStore().normalize(["first", "", {"text": "second", "count": 3}], "2025-10-01T00:00:00")
+
+        assert [(e["text"], e["created_at"], e["count"]) for e in entries] == [
+            ("first", "2025-10-01T00:00:00", 1), ("second", "2025-10-01T00:00:00", 3)
+        ]
+
+
+class TestUserContextMemory:
+    """Test conversation_memory through save_user_context / get_user_context"""
+
+    @pytest.fixture
+    def tools(self, tmp_path):
+        tools = CampfireTools(
+            db_path="./tests/fixtures/test.db",
+            context_dir=str(tmp_path / "ctx"),
+            knowledge_base_dir=str(tmp_path / "kb")
+        )
+        tools.context_dir.mkdir(parents=True, exist_ok=True)
+        return tools
+
+    def test_file_stays_bounded(self, tools):
+        """Should keep at most cap entries on disk and return a budgeted subset"""
+        tools.memory_store = MemoryStore(cap=10)
+        for n in range(40):
+            tools.save_user_context(user_id=1, conversation_memory=[f"Discussed supplier contract #{n:03d} terms"])
+        tools.save_user_context(user_id=1, conversation_memory=["Discussed supplier contract #039 terms"])
+
+        saved = json.loads((tools.context_dir / "user_1.json").read_text(encoding="utf-8"))
+        context = tools.get_user_context(user_id=1, memory_budget_chars=120)
+
+        assert len(saved["conversation_memory"]) == 10
+        assert saved["conversation_memory"][-1]["count"] == 2
+        assert context["memory_total"] == 10
+        assert sum(len(m) for m in context["conversation_memory"]) <= 120
+        assert context["conversation_memory"][-1] == "Discussed supplier contract #039 terms"
+
+    def test_legacy_file_read_and_upgraded(self, tools):
+        """Should read a legacy string list and rewrite it as entries on the next save"""
+        legacy = {"user_id": 2, "preferences": {}, "expertise": [],
+                  "conversation_memory": ["Old note A", "Old note B"], "last_updated": "2025-09-01T08:00:00"}
+        (tools.context_dir / "user_2.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+        assert tools.get_user_context(user_id=2)["conversation_memory"] == ["Old note A", "Old note B"]
+
+        tools.save_user_context(user_id=2, conversation_memory=["新的记忆"])
+        saved = json.loads((tools.context_dir / "user_2.json").read_text(encoding="utf-8"))
+        assert [m["text"] for m in saved["conversation_memory"]] == ["Old note A", "Old note B", "新的记忆"]
+        assert saved["conversation_memory"][0]["created_at"] == "2025-09-01T08:00:00"
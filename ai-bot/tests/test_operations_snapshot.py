@@ -0,0 +1,88 @@
+"""
+Tests for the composite operations snapshot (SupabaseTools.get_operations_snapshot
+and the get_operations_snapshot tool)
+"""
+
+import time
+
+import httpx
+import pytest
+
+from scripts.postgrest_stub import PostgrestStub
+from src.tools import analytics_decorators
+from src.tools.supabase_async import AsyncPostgrestClient
+from src.tools.supabase_tools import DEFAULT_SNAPSHOT_SECTIONS, SupabaseTools
+
+
+@pytest.fixture
+def stub():
+    return PostgrestStub(latency=0.2)
+
+
+@pytest.fixture
+def tools(stub):
+    client = AsyncPostgrestClient("http://stub", "key", transport=httpx.ASGITransport(app=stub))
+    return SupabaseTools(client=client)
+
+
+class TestOperationsSnapshot:
+    """Test fan-out, partial results and range handling"""
+
+    async def test_default_sections_run_concurrently(self, stub, tools):
+        """Should fetch the five default sections in parallel"""
+        started = time.perf_counter()
+        result = await tools.get_operations_snapshot("2025-10-01")
+        elapsed = time.perf_counter() - started
+
+        assert result["success"] is True
+        assert list(result["data"]) == list(DEFAULT_SNAPSHOT_SECTIONS)
+        assert stub.peak_concurrency == 5
+        assert elapsed < 0.2 * 5 / 2
+        assert result["data"]["daily_revenue"]["total_revenue"] == 18650.5
+        assert len(result["data"]["top_dishes"]) == 5
+
+    async def test_partial_results_on_timeout_and_error(self, stub, tools):
+        """Should return finished sections and report timed out and failed ones"""
+        stub.rpc_latency = {"get_hourly_revenue": 5.0}
+        del stub.rpc_handlers["get_station_performance"]
+
+        result = await tools.get_operations_snapshot("2025-10-01", timeout=0.5)
+
+        assert result["timed_out"] == ["hourly_revenue"]
+        assert list(result["errors"]) == ["station_performance"]
+        assert set(result["data"]) == {"quick_stats", "daily_revenue", "top_dishes"}
+        assert result["elapsed_ms"] < 1000
+
+    async def test_range_replaces_single_day_sections(self, tools):
+        """Should skip single-day sections for a range and add the revenue trend"""
+        result = await tools.get_operations_snapshot(
+            "2025-10-01", "2025-10-07", sections=["daily_revenue", "revenue_by_zone", "nonsense"]
+        )
+
+        assert result["skipped"] == ["daily_revenue"]
+        assert list(result["data"]) == ["revenue_by_zone", "revenue_trend"]
+        assert len(result["data"]["revenue_trend"]) == 7
+        assert result["errors"] == {"nonsense": "Unknown section"}
+
+    async def test_tool_report(self, stub, tools):
+        """Should render one compact report with partial-result notes"""
+        stub.rpc_latency = {"get_hourly_revenue": 5.0}
+        snapshot = tools.get_operations_snapshot
+
+        async def short_timeout(**kwargs):
+            return await snapshot(timeout=0.5, **kwargs)
+
+        tools.get_operations_snapshot = short_timeout
+        analytics_decorators.set_tools(None, tools)
+        try:
+            result = await analytics_decorators.get_operations_snapshot_tool.handler(
+                {"target_date": "2025-10-01", "top_n": 3}
+            )
+        finally:
+            analytics_decorators.set_tools(None, None)
+
+        text = result["content"][0]["text"]
+        assert "2025-10-01运营快照" in text
+        assert "¥18,650.50" in text
+        assert text.count("份，") == 2  # top_n=3 dishes
+        assert "超时未返回: hourly_revenue" in text
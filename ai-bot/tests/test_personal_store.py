@@ -0,0 +1,407 @@
+"""
+Tests for the SQLite personal store (tasks, reminders, notes) and its legacy migration
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from src.reminder_scheduler import ReminderScheduler
+from src.tools.campfire_tools import CampfireTools
+from src.tools.personal_store import PersonalStore, parse_legacy_note, parse_remind_time
+
+
+LEGACY_NOTE = """# 供应商会议
+
+**Created:** 2025-10-20 09:30:00
+**User:** user_7
+
+---
+
+与蔬菜供应商确认了十一月的报价。
+
+---
+
+**Tags:** #personal-note #2025-10
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PersonalStore(tmp_path / "personal.db")
+
+
+@pytest.fixture
+def legacy_dir(tmp_path):
+    """user_contexts with one user in the old JSON/Markdown layout"""
+    user_dir = tmp_path / "ctx" / "user_7"
+    (user_dir / "notes").mkdir(parents=True)
+    (user_dir / "tasks.json").write_text(json.dumps({
+        "tasks": [
+            {"id": 1, "title": "Order produce", "status": "completed", "created_at": "2025-10-01T09:00:00"},
+            {"id": 3, "title": "Call landlord", "status": "pending", "created_at": "2025-10-02T09:00:00"},
+        ],
+        "next_id": 4,
+    }), encoding="utf-8")
+    (user_dir / "reminders.json").write_text(json.dumps({
+        "reminders": [{"id": 1, "text": "Pay rent", "remind_at": "2000-01-01 09:00", "status": "pending",
+                       "created_at": "2025-10-01T08:00:00", "triggered_at": None}],
+        "next_id": 2,
+    }), encoding="utf-8")
+    (user_dir / "notes" / "2025-10-20_093000_supplier.md").write_text(LEGACY_NOTE, encoding="utf-8")
+    return tmp_path / "ctx"
+
+
+class TestTasks:
+    """Test task numbering and status updates"""
+
+    def test_numbers_are_not_reused(self, store):
+        """Should keep handing out new numbers after the newest task is deleted"""
+        store.create_task(1, "First")
+        second = store.create_task(1, "Second")
+        store.delete_task(1, second["id"])
+
+        assert store.create_task(1, "Third")["id"] == 3
+        assert store.create_task(2, "Other user")["id"] == 1
+
+    def test_complete_and_filter(self, store):
+        """Should list by status"""
+        store.create_task(1, "A")
+        store.create_task(1, "B")
+        assert store.complete_task(1, 1)["status"] == "completed"
+        assert store.complete_task(1, 99) is None
+
+        assert [t["title"] for t in store.list_tasks(1)] == ["B"]
+        assert [t["title"] for t in store.list_tasks(1, "completed")] == ["A"]
+        assert len(store.list_tasks(1, "all")) == 2
+
+    def test_concurrent_creates_lose_nothing(self, tmp_path):
+        """Should keep every task when several threads (and connections) write at once"""
+        store = PersonalStore(tmp_path / "personal.db")
+        other = PersonalStore(tmp_path / "personal.db")
+
+        def worker(s, prefix):
+            for i in range(20):
+                s.create_task(5, f"{prefix}-{i}")
+
+        threads = [threading.Thread(target=worker, args=(s, n)) for n, s in enumerate([store, other, store, other])]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        numbers = [t["id"] for t in store.list_tasks(5, "all")]
+        assert sorted(numbers) == list(range(1, 81))
+
+
+class TestNotes:
+    """Test full-text and short-query note search"""
+
+    def test_fts_and_like_fallback(self, store):
+        """Should match Chinese substrings, with LIKE for terms under 3 characters"""
+        store.add_note(1, "采购计划", "下周向供应商采购食用油和大米。")
+        store.add_note(1, "Budget", "Q4 marketing budget draft")
+        store.add_note(2, "采购计划", "其他用户的笔记")
+
+        assert [n["title"] for n in store.search_notes(1, "食用油")] == ["采购计划"]
+        assert [n["title"] for n in store.search_notes(1, "大米")] == ["采购计划"]
+        assert [n["title"] for n in store.search_notes(1, "MARKETING budget")] == ["Budget"]
+        assert store.search_notes(1, "payroll") == []
+        assert len(store.search_notes(1)) == 2
+
+    def test_excerpt(self, store):
+        """Should return the first text line as the excerpt"""
+        store.add_note(1, "Title", "# Heading\n\nFirst line.\nSecond line.")
+        assert store.search_notes(1)[0]["excerpt"] == "First line."
+
+
+class TestLegacyMigration:
+    """Test importing user_contexts/user_N files"""
+
+    def test_parse_legacy_note(self):
+        """Should extract title, creation time and body"""
+        note = parse_legacy_note(LEGACY_NOTE)
+        assert note == {
+            "title": "供应商会议",
+            "created_at": "2025-10-20T09:30:00",
+            "content": "与蔬菜供应商确认了十一月的报价。",
+        }
+
+    def test_migrates_once_and_keeps_numbering(self, store, legacy_dir):
+        """Should import tasks, reminders and notes once and continue after next_id"""
+        assert store.migrate_context_dir(legacy_dir) == {"users": 1, "tasks": 2, "reminders": 1, "notes": 1}
+        assert store.migrate_context_dir(legacy_dir)["users"] == 0
+
+        assert [t["id"] for t in store.list_tasks(7, "all")] == [1, 3]
+        assert store.create_task(7, "New")["id"] == 4
+        assert store.create_reminder(7, "Later", "2099-01-01 09:00")["id"] == 2
+        assert store.search_notes(7, "蔬菜供应商")[0]["path"] == "user_7/notes/2025-10-20_093000_supplier.md"
+
+    def test_campfire_tools_migrates_on_first_use(self, legacy_dir, tmp_path):
+        """Should see legacy tasks through manage_personal_tasks"""
+        tools = CampfireTools(
+            db_path="./tests/fixtures/test.db",
+            context_dir=str(legacy_dir),
+            knowledge_base_dir=str(tmp_path / "kb")
+        )
+
+        result = tools.manage_personal_tasks(7, "list")
+
+        assert [t["title"] for t in result["tasks"]] == ["Call landlord"]
+        assert tools.manage_personal_tasks(7, "complete", {"task_id": 3})["task"]["status"] == "completed"
+
+
+class TestReminderTimes:
+    """Test due_at normalization and the due-time index"""
+
+    def test_relative_time_fixed_at_creation(self, store):
+        """Should resolve "2小时后" once, against the creation time"""
+        assert parse_remind_time("2小时后", now=datetime(2025, 11, 2, 8, 0)) == datetime(2025, 11, 2, 10, 0)
+        assert parse_remind_time("14:30", now=datetime(2025, 11, 2, 8, 0)) == datetime(2025, 11, 2, 14, 30)
+
+        reminder = store.create_reminder(1, "Call back", "2小时后")
+        due = datetime.fromisoformat(reminder["due_at"])
+        assert timedelta(hours=1, minutes=59) < due - datetime.now() <= timedelta(hours=2)
+
+    def test_due_reminders_and_next_due(self, store):
+        """Should return only due reminders and the earliest pending due time"""
+        store.create_reminder(1, "Past", "2000-01-01 09:00")
+        store.create_reminder(2, "Soon", "2099-01-01 09:00")
+        store.create_reminder(1, "Later", "2099-06-01 09:00")
+
+        assert [r["text"] for r in store.due_reminders()] == ["Past"]
+        store.mark_reminder_triggered(store.due_reminders()[0]["store_id"])
+        assert store.due_reminders() == []
+        assert store.next_due_at() == datetime(2099, 1, 1, 9, 0)
+
+    def test_upgrades_v1_database(self, tmp_path):
+        """Should add due_at to an existing store, resolving relative times against created_at"""
+        db_path = tmp_path / "personal.db"
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            CREATE TABLE reminders (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, reminder_no INTEGER NOT NULL,
+                text TEXT NOT NULL, remind_at TEXT NOT NULL, room_id INTEGER, status TEXT NOT NULL DEFAULT 'pending',
+                created_at TEXT NOT NULL, triggered_at TEXT, UNIQUE (user_id, reminder_no));
+            INSERT INTO reminders (user_id, reminder_no, text, remind_at, status, created_at)
+                VALUES (3, 1, 'Stand-up', '30分钟后', 'pending', '2025-11-02T09:00:00');
+        """)
+        conn.close()
+
+        store = PersonalStore(db_path)
+
+        assert store.list_reminders(3)[0]["due_at"] == "2025-11-02T09:30:00"
+        assert len(store.due_reminders()) == 1
+
+    def test_unparseable_time_rejected(self, tmp_path):
+        """Should refuse a reminder whose time cannot be understood"""
+        tools = CampfireTools(
+            db_path="./tests/fixtures/test.db",
+            context_dir=str(tmp_path / "ctx"),
+            knowledge_base_dir=str(tmp_path / "kb")
+        )
+
+        result = tools.set_reminder(1, "Something", "whenever")
+
+        assert result["success"] is False
+        assert tools.personal_store.list_reminders(1, "all") == []
+
+
+class TestReminderScheduler:
+    """Test delivery from the store"""
+
+    def test_due_reminder_delivered_once(self, legacy_dir):
+        """Should deliver the migrated due reminder and mark it triggered"""
+        scheduler = ReminderScheduler(str(legacy_dir), "http://campfire.test", "bot-key", testing=True)
+        scheduler.store.create_reminder(7, "Future", "2099-01-01 09:00")
+
+        scheduler.check_and_send_reminders()
+
+        reminders = {r["text"]: r for r in scheduler.store.list_reminders(7, "all")}
+        assert reminders["Pay rent"]["status"] == "triggered"
+        assert reminders["Future"]["status"] == "pending"
+        assert scheduler.store.mark_reminder_triggered(reminders["Pay rent"]["store_id"]) is False
+
+    async def test_task_wakes_for_new_reminder(self, tmp_path):
+        """Should deliver a reminder added while sleeping without waiting for max_sleep_seconds"""
+        scheduler = ReminderScheduler(str(tmp_path / "ctx"), "http://campfire.test", "bot-key",
+                                      testing=True, max_sleep_seconds=60)
+        scheduler.start()
+        try:
+            await asyncio.sleep(0.2)
+            await asyncio.to_thread(
+                scheduler.store.create_reminder, 1, "Now", datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            )
+
+            for _ in range(200):
+                if scheduler.stats()["delivered"]:
+                    break
+                await asyncio.sleep(0.05)
+
+            stats = scheduler.stats()
+            assert stats["delivered"] == 1
+            assert stats["lag_seconds"]["count"] == 1
+            assert scheduler.seconds_until_next() == 60
+        finally:
+            await scheduler.stop()
+
+
+def campfire_mock(handler):
+    """AsyncClient whose requests go to handler(request) -> httpx.Response (sync or async)"""
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def room_of(request):
+    return int(request.url.path.split("/")[2])
+
+
+class TestAsyncDelivery:
+    """Test concurrent delivery, retries and the claim marker"""
+
+    @pytest.fixture
+    def scheduler(self, tmp_path):
+        return ReminderScheduler(str(tmp_path / "ctx"), "http://campfire.test", "bot-key", backoff_seconds=0)
+
+    async def test_rooms_concurrent_and_ordered(self, scheduler):
+        """Should post to rooms in parallel while keeping each room's reminders in due order"""
+        for n in range(3):
+            for room in (10, 20, 30):
+                scheduler.store.create_reminder(1, f"r{room}-{n}", f"2000-01-01 09:0{n}", room_id=room)
+        posted, active, peak = [], [0], [0]
+
+        async def handler(request):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.05)
+            active[0] -= 1
+            posted.append((room_of(request), request.content.decode()))
+            return httpx.Response(201)
+
+        async with campfire_mock(handler) as client:
+            result = await scheduler.deliver_due(client)
+
+        assert result["delivered"] == 9
+        assert peak[0] == 3
+        for room in (10, 20, 30):
+            texts = [body for r, body in posted if r == room]
+            assert [f"r{room}-{n}" in body for n, body in enumerate(texts)] == [True] * 3
+        assert scheduler.store.due_reminders() == []
+
+    async def test_retries_then_delivers(self, scheduler):
+        """Should retry a 503 and a connect error, then mark the reminder triggered"""
+        scheduler.store.create_reminder(1, "Rent", "2000-01-01 09:00")
+        responses = iter(["connect", 503, 201])
+
+        def handler(request):
+            response = next(responses)
+            if response == "connect":
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(response)
+
+        async with campfire_mock(handler) as client:
+            result = await scheduler.deliver_due(client)
+
+        assert result["delivered"] == 1
+        assert scheduler.stats()["retries"] == 2
+        assert scheduler.store.list_reminders(1, "triggered")[0]["text"] == "Rent"
+
+    async def test_failure_releases_then_gives_up(self, scheduler):
+        """Should release a rejected reminder for retry and defer the room's later ones, then mark it failed"""
+        scheduler.max_attempts = 2
+        scheduler.store.create_reminder(1, "First", "2000-01-01 09:00", room_id=5)
+        scheduler.store.create_reminder(1, "Second", "2000-01-01 09:05", room_id=5)
+
+        async with campfire_mock(lambda request: httpx.Response(404)) as client:
+            first = await scheduler.deliver_due(client)
+            assert first["failed"] == 1 and first["deferred"] == 1
+            assert scheduler.store.list_reminders(1)[0]["attempts"] == 1
+
+            await scheduler.deliver_due(client)
+
+        statuses = {r["text"]: r["status"] for r in scheduler.store.list_reminders(1, "all")}
+        assert statuses == {"First": "failed", "Second": "pending"}
+        assert scheduler.stats()["gave_up"] == 1
+
+    async def test_ambiguous_send_not_repeated(self, scheduler):
+        """Should not resend when the request may have reached Campfire"""
+        scheduler.store.create_reminder(1, "Maybe", "2000-01-01 09:00")
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            raise httpx.ReadTimeout("slow", request=request)
+
+        async with campfire_mock(handler) as client:
+            assert (await scheduler.deliver_due(client))["ambiguous"] == 1
+            assert (await scheduler.deliver_due(client))["ambiguous"] == 0
+
+        assert len(calls) == 1
+        assert scheduler.store.list_reminders(1, "triggered")[0]["text"] == "Maybe"
+
+    async def test_error_after_post_parks_reminder(self, scheduler, monkeypatch):
+        """Should park a reminder as ambiguous when the store fails after the POST, and never resend it"""
+        scheduler.store.create_reminder(1, "Posted", "2000-01-01 09:00")
+        calls = []
+
+        def broken_complete(store_id, delivery_id):
+            raise sqlite3.OperationalError("database is locked")
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(201)
+
+        monkeypatch.setattr(scheduler.store, "complete_delivery", broken_complete)
+        async with campfire_mock(handler) as client:
+            assert (await scheduler.deliver_due(client))["ambiguous"] == 1
+            assert scheduler.store.release_stale_claims(timedelta(seconds=-1)) == 0
+            assert (await scheduler.deliver_due(client))["ambiguous"] == 0
+
+        assert len(calls) == 1
+        assert scheduler.store.list_reminders(1, "ambiguous")[0]["text"] == "Posted"
+        assert scheduler.store.stats()["ambiguous_reminders"] == 1
+
+    async def test_error_before_post_releases_claim(self, scheduler, monkeypatch):
+        """Should release the claim when delivery fails before anything was posted"""
+        scheduler.store.create_reminder(1, "Unsent", "2000-01-01 09:00")
+
+        def broken_format(reminder):
+            raise ValueError("bad reminder")
+
+        monkeypatch.setattr(scheduler, "_format_reminder_message", broken_format)
+        async with campfire_mock(lambda request: httpx.Response(201)) as client:
+            assert (await scheduler.deliver_due(client))["failed"] == 1
+
+        assert scheduler.store.due_reminders()[0]["attempts"] == 1
+
+    async def test_two_schedulers_send_once(self, tmp_path, scheduler):
+        """Should post each reminder once when two schedulers share the store"""
+        other = ReminderScheduler(str(tmp_path / "ctx"), "http://campfire.test", "bot-key")
+        for n in range(10):
+            scheduler.store.create_reminder(1, f"r{n}", "2000-01-01 09:00", room_id=n + 1)
+        posted = []
+
+        async def handler(request):
+            posted.append(room_of(request))
+            await asyncio.sleep(0.01)
+            return httpx.Response(200)
+
+        async with campfire_mock(handler) as client:
+            results = await asyncio.gather(scheduler.deliver_due(client), other.deliver_due(client))
+
+        assert sorted(posted) == list(range(1, 11))
+        assert sum(r["delivered"] for r in results) == 10
+        assert sum(r["skipped"] for r in results) == 10
+
+    def test_stale_claims_released(self, store):
+        """Should return claims older than the timeout to pending"""
+        reminder = store.create_reminder(1, "Crash", "2000-01-01 09:00")
+        assert store.claim_reminder(reminder["store_id"], "d1") is True
+        assert store.claim_reminder(reminder["store_id"], "d2") is False
+
+        assert store.release_stale_claims(timedelta(minutes=10)) == 0
+        assert store.release_stale_claims(timedelta(seconds=-1)) == 1
+        assert store.due_reminders()[0]["text"] == "Crash"
@@ -0,0 +1,224 @@
+"""
+Tests for the local POS mirror (PosMirror sync, local RPC engine, SupabaseTools integration)
+"""
+
+import re
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+
+import httpx
+import pytest
+
+from scripts.postgrest_stub import PostgrestStub, demo_pos_tables
+from src.tools.pos_mirror import RPC_PARAMS, PosMirror, local_time
+from src.tools.supabase_async import AsyncPostgrestClient
+from src.tools.supabase_tools import SupabaseTools
+
+MIGRATIONS = Path(__file__).resolve().parent.parent / "supabase" / "migrations"
+START, END = "2025-10-01", "2025-10-07"
+
+
+def migration_contracts():
+    """Latest definition per function: (parameter names, output columns)"""
+    contracts = {}
+    pattern = re.compile(r"CREATE OR REPLACE FUNCTION (\w+)\(([^()]*)\)\s*RETURNS TABLE \((.*?)\) AS", re.S)
+    for path in sorted(MIGRATIONS.glob("*.sql")):
+        for name, params, returns in pattern.findall(path.read_text(encoding="utf-8")):
+            contracts[name] = (
+                [line.split()[0] for line in params.split(",") if line.strip()],
+                [line.split()[0] for line in returns.split(",") if line.strip()],
+            )
+    return contracts
+
+
+@pytest.fixture
+def tables():
+    return demo_pos_tables(start=START, days=7)
+
+
+@pytest.fixture
+def mirror(tables):
+    mirror = PosMirror(today=lambda: date(2025, 10, 7))
+    mirror.load(tables)
+    return mirror
+
+
+class TestContracts:
+    """Test the local engine against the RPC definitions in supabase/migrations"""
+
+    def test_parameters_and_columns_match_migrations(self, mirror):
+        """Should implement all 16 functions with the migrations' parameters and output columns"""
+        contracts = migration_contracts()
+        assert len(RPC_PARAMS) == 16 and set(RPC_PARAMS) <= set(contracts)
+        for name in RPC_PARAMS:
+            params, columns = contracts[name]
+            assert list(RPC_PARAMS[name]) == params, name
+            call = {"target_date": "2025-10-02"} if "target_date" in params else {"start_date": START, "end_date": END}
+            rows = mirror.call(name, call)
+            assert rows, name
+            assert list(rows[0]) == columns, name
+
+
+class TestEngine:
+    """Test local results against the raw rows"""
+
+    def test_daily_revenue_and_zones(self, mirror, tables):
+        """Should aggregate by Asia/Shanghai date, count only orders with revenue and map tableless orders"""
+        zones = {row["id"]: row["zone"] for row in tables["rsp_tables"]}
+        day_orders = [o for o in tables["rsp_orders"] if local_time(o["ordered_at"])[0] == "2025-10-02"
+                      and o["total"] > 0]
+        by_zone = defaultdict(float)
+        for order in [o for o in tables["rsp_orders"] if o["total"] > 0]:
+            by_zone[zones.get(order["table_id"], "未知区域")] += order["total"]
+
+        daily = mirror.call("get_daily_revenue", {"target_date": "2025-10-02"})[0]
+        zone_rows = mirror.call("get_revenue_by_zone", {"start_date": START, "end_date": END})
+
+        assert daily["total_revenue"] == pytest.approx(sum(o["total"] for o in day_orders))
+        assert daily["order_count"] == len(day_orders)
+        assert daily["completed_orders"] == sum(1 for o in day_orders if o["status"] == "completed")
+        assert {row["zone"]: row["total_revenue"] for row in zone_rows} == pytest.approx(dict(by_zone))
+        assert [row["total_revenue"] for row in zone_rows] == sorted(by_zone.values(), reverse=True)
+
+    def test_shanghai_day_boundary(self):
+        """Should put an order at 17:30 UTC on the next local day, hour 1"""
+        assert local_time("2025-10-01T17:30:00+00:00") == ("2025-10-02", 1)
+        assert local_time("2025-10-01T15:59:59Z") == ("2025-10-01", 23)
+
+    def test_quick_stats_formatting(self, mirror):
+        """Should format quick stats like the SQL function"""
+        stats = {row["metric"]: row["value"] for row in mirror.call("get_quick_stats", {"target_date": "2025-10-02"})}
+        empty = {row["metric"]: row["value"] for row in mirror.call("get_quick_stats", {"target_date": "2025-09-01"})}
+
+        assert re.fullmatch(r"¥\d+\.\d\d", stats["今日营业额"])
+        assert re.fullmatch(r"\d{1,2}:00", stats["最忙时段"])
+        assert stats["餐桌数量"] == "11/12"
+        assert (empty["今日营业额"], empty["最畅销菜品"], empty["最忙时段"]) == ("¥0.00", "暂无数据", "暂无数据")
+
+    def test_cost_join_and_defaults(self, mirror):
+        """Should find dishes without cost rows and default menu ranges to the last 30 days"""
+        missing = mirror.call("get_dishes_missing_cost")
+        coverage = mirror.call("get_cost_coverage_rate")[0]
+
+        assert {row["product_name"] for row in missing} == {"米饭", "酸梅汤"}
+        assert (coverage["total_dishes"], coverage["dishes_with_cost_data"]) == (10, 8)
+
+    def test_invalid_parameters(self, mirror):
+        """Should reject missing required, unknown and malformed parameters"""
+        with pytest.raises(ValueError):
+            mirror.call("get_revenue_trend", {"start_date": START})
+        with pytest.raises(ValueError):
+            mirror.call("get_daily_revenue", {"day": START})
+        with pytest.raises(ValueError):
+            mirror.call("get_daily_revenue", {"target_date": "yesterday"})
+        assert mirror.stats()["query_errors"] == 3
+
+
+class TestSync:
+    """Test incremental sync from the PostgREST stand-in"""
+
+    @pytest.fixture
+    def stub(self, tables):
+        return PostgrestStub(tables=tables)
+
+    def make_client(self, stub):
+        return AsyncPostgrestClient("http://stub", "key", transport=httpx.ASGITransport(app=stub))
+
+    async def test_incremental_pages_and_full_refresh(self, stub, tables):
+        """Should page past the watermark, fetch only appended rows and replace dimension tables"""
+        mirror = PosMirror(page_size=100)
+        client = self.make_client(stub)
+
+        first = await mirror.sync(client)
+        assert first["fetched"]["rsp_orders"] == len(tables["rsp_orders"])
+        assert mirror.is_fresh()
+
+        last = tables["rsp_orders"][-1]
+        tables["rsp_orders"].append({**last, "id": last["id"] + 1, "total": 88.0,
+                                     "ordered_at": "2025-10-08T04:00:00+00:00"})
+        tables["rsp_tables"][0]["active"] = False
+        second = await mirror.sync(client)
+
+        assert second["fetched"]["rsp_orders"] == 1
+        assert second["fetched"]["rsp_order_items"] == 0
+        assert mirror.call("get_daily_revenue", {"target_date": "2025-10-08"})[0]["total_revenue"] == 88.0
+        assert mirror.stats()["tables"]["rsp_orders"]["watermark"] == str(last["id"] + 1)
+        assert len(mirror.call("get_table_turnover", {"start_date": START, "end_date": END})) == 10
+        await client.aclose()
+
+    async def test_state_survives_restart(self, stub, tables, tmp_path):
+        """Should resume from the stored watermark after reopening the database"""
+        path = str(tmp_path / "pos.db")
+        client = self.make_client(stub)
+        await PosMirror(path).sync(client)
+
+        reopened = PosMirror(path)
+        result = await reopened.sync(client)
+
+        assert result["fetched"]["rsp_orders"] == 0
+        assert reopened.stats()["tables"]["rsp_orders"]["rows"] == len(tables["rsp_orders"])
+        await client.aclose()
+
+
+class TestSupabaseToolsMirror:
+    """Test answering SupabaseTools RPCs from the mirror"""
+
+    def make_tools(self, stub, mirror):
+        client = AsyncPostgrestClient("http://stub", "key", transport=httpx.ASGITransport(app=stub))
+        return SupabaseTools(client=client, mirror=mirror)
+
+    async def test_fresh_mirror_answers_locally(self, mirror):
+        """Should serve RPCs (including per-day range partials) without a network request"""
+        stub = PostgrestStub()
+        tools = self.make_tools(stub, mirror)
+
+        daily = await tools.get_daily_revenue("2025-10-02")
+        trend = await tools.get_revenue_trend(START, END)
+        menu = await tools.get_menu_profitability(START, END)
+
+        assert stub.requests == 0
+        assert daily["data"] == mirror.call("get_daily_revenue", {"target_date": "2025-10-02"})[0]
+        assert len(trend["data"]) == 7
+        assert menu["success"] is True
+
+    async def test_stale_or_failing_mirror_falls_back(self, mirror):
+        """Should use Supabase when the mirror is stale or cannot answer"""
+        stub = PostgrestStub()
+        tools = self.make_tools(stub, mirror)
+
+        mirror.max_age = 0
+        stale = await tools.get_daily_revenue("2025-10-02")
+        mirror.max_age = 900
+        failing = await tools.get_daily_revenue("not-a-date")
+
+        assert stub.requests == 2
+        assert stale["data"]["total_revenue"] == 18650.5  # stand-in's canned row
+        assert failing["success"] is True
+        assert mirror.stats()["stale"] == 1
+
+    async def test_mirror_backed_stand_in(self, mirror):
+        """Should compute stand-in RPC responses with the local engine"""
+        stub = PostgrestStub(rpc_handlers=mirror.rpc_handlers())
+        tools = self.make_tools(stub, None)
+
+        result = await tools.get_top_dishes(START, END, 3)
+
+        assert stub.requests == 1
+        assert result["data"] == mirror.call("get_top_dishes", {"start_date": START, "end_date": END, "top_n": 3})
+
+    async def test_profit_lists_share_one_dish_profit_call(self, mirror):
+        """Should cut the top and low profit lists from one cached get_dish_profit result per range"""
+        stub = PostgrestStub(rpc_handlers=mirror.rpc_handlers())
+        tools = self.make_tools(stub, None)
+        call = {"start_date": START, "end_date": END}
+
+        top = await tools.get_top_profitable_dishes(START, END, 3)
+        low = await tools.get_low_profit_dishes(START, END, 4)
+        everything = await tools.get_top_profitable_dishes(START, END, 50)
+
+        assert stub.requests == 1
+        assert top["data"] == mirror.call("get_top_profitable_dishes", {**call, "top_n": 3})
+        assert low["data"] == mirror.call("get_low_profit_dishes", {**call, "bottom_n": 4})
+        assert low["count"] == 4
+        assert everything["count"] == len(mirror.call("get_dish_profit", call))
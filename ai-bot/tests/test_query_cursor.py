@@ -0,0 +1,168 @@
+"""
+Tests for keyset-paged operations queries (query_cursor, result_encoding, query_operations_data)
+"""
+
+import csv
+import io
+import re
+
+import httpx
+import pytest
+
+from scripts.postgrest_stub import PostgrestStub
+from src.tools import operations_decorators
+from src.tools.query_cursor import CursorStore, QueryCursor
+from src.tools.result_encoding import encode_rows
+from src.tools.supabase_async import AsyncPostgrestClient
+from src.tools.supabase_tools import SupabaseTools
+
+
+@pytest.fixture
+def orders():
+    # Ten orders per minute (ties in ordered_at), every 7th without a timestamp
+    return [{"id": n, "status": "completed" if n % 3 else "pending", "total": 20 + n % 50,
+             "ordered_at": None if n % 7 == 0 else f"2025-10-01T10:{n // 10 % 60:02d}:00+00:00",
+             "note": "靠窗, \"VIP\"" if n % 11 == 0 else None}
+            for n in range(1, 1201)]
+
+
+@pytest.fixture
+def stub(orders):
+    return PostgrestStub(tables={"rsp_orders": orders})
+
+
+@pytest.fixture
+def tools(stub):
+    client = AsyncPostgrestClient("http://stub", "key", transport=httpx.ASGITransport(app=stub))
+    return SupabaseTools(client=client, mirror=None)
+
+
+async def read_all(tools, **query):
+    """Follow next_cursor until the last page; returns (rows, pages)"""
+    result = await tools.query_operations_data("rsp_orders", **query)
+    rows, pages = list(result["data"]), 1
+    while result["has_more"]:
+        result = await tools.query_operations_data("", cursor=result["next_cursor"], limit=query.get("limit", 100))
+        assert result["success"], result["message"]
+        rows.extend(result["data"])
+        pages += 1
+    return rows, pages
+
+
+class TestKeysetPaging:
+    """Test paging through a table with query_operations_data"""
+
+    @pytest.mark.parametrize("order_by", [None, "ordered_at", "-ordered_at", "-id"])
+    async def test_every_row_exactly_once_in_order(self, tools, orders, order_by):
+        """Should return every row once, in order, across pages with ties and NULLs"""
+        rows, pages = await read_all(tools, limit=250, order_by=order_by)
+
+        column = (order_by or "id").lstrip("-")
+        desc = bool(order_by and order_by.startswith("-"))
+        present = sorted((o for o in orders if o[column] is not None),
+                         key=lambda o: (o[column], -o["id"] if desc and column != "id" else o["id"]), reverse=desc)
+        expected = present + [o for o in orders if o[column] is None]
+        assert [row["id"] for row in rows] == [o["id"] for o in expected]
+        assert pages == 5
+
+    async def test_projection_hides_keyset_columns(self, tools, stub):
+        """Should page by columns that are not selected without returning them"""
+        rows, _ = await read_all(tools, columns="status,total", order_by="-ordered_at", limit=400)
+
+        assert len(rows) == 1200
+        assert set(rows[0]) == {"status", "total"}
+
+    async def test_filters_and_last_page(self, tools):
+        """Should keep filters on follow-up pages and close the cursor after the last page"""
+        rows, pages = await read_all(tools, filters={"status": "pending"}, limit=150)
+
+        assert len(rows) == 400 and pages == 3
+        assert all(row["status"] == "pending" for row in rows)
+        assert tools.query_cursors.stats()["open"] == 0
+
+    async def test_size_budget_resumes_after_last_shown_row(self, tools):
+        """Should cut a page at the CSV budget and continue at the first row not shown"""
+        first = await tools.query_operations_data("rsp_orders", columns="id,total", limit=100, max_chars=200)
+        second = await tools.query_operations_data("", cursor=first["next_cursor"], limit=100, max_chars=200)
+
+        assert len(first["csv"]) <= 200
+        assert first["has_more"] and first["count"] < 100
+        assert second["data"][0]["id"] == first["data"][-1]["id"] + 1
+
+    async def test_unknown_cursor(self, tools):
+        """Should fail with a message asking to run the query again"""
+        result = await tools.query_operations_data("", cursor="cdeadbeef")
+
+        assert result["success"] is False
+        assert "expired" in result["message"]
+
+    async def test_iter_streams_pages(self, tools, stub):
+        """Should stream the whole filtered table one page per request"""
+        before = stub.requests
+        pages = [page async for page in tools.iter_operations_data(
+            "rsp_orders", filters={"status": "completed"}, columns="id", page_size=300)]
+
+        assert [len(page) for page in pages] == [300, 300, 200]
+        assert stub.requests - before == 3
+        assert pages[-1][-1] == {"id": 1199}
+
+
+class TestCursorStore:
+    """Test cursor handle lifetime"""
+
+    def test_expiry_and_eviction(self):
+        """Should expire cursors after ttl and evict the least recently used"""
+        store = CursorStore(max_cursors=2, ttl=60)
+        first = store.open(QueryCursor("t", "*", {}, "id"))
+        second = store.open(QueryCursor("t", "*", {}, "id"))
+        store.get(first)
+        store.open(QueryCursor("t", "*", {}, "id"))
+
+        assert store.get(second) is None
+        assert store.get(first) is not None
+
+        store.ttl = -1
+        store.get(first)
+        assert store.get(first) is None
+        assert store.stats()["evicted"] == 1 and store.stats()["expired"] == 1
+
+
+class TestEncoding:
+    """Test compact CSV rendering"""
+
+    def test_csv_cells(self):
+        """Should quote separators, cut long cells, and write None, floats and JSON compactly"""
+        rows = [{"a": "x, \"y\"", "b": None, "c": 3.0, "d": {"k": [1, 2]}, "e": "长" * 100}]
+
+        text, shown = encode_rows(rows, columns=["a", "b", "c", "d", "e"], max_cell=12)
+        header, line = list(csv.reader(io.StringIO(text)))
+
+        assert shown == 1 and header == ["a", "b", "c", "d", "e"]
+        assert line == ["x, \"y\"", "", "3", '{"k":[1,2]}', "长" * 11 + "…"]
+
+    def test_budget_keeps_at_least_one_row(self):
+        """Should stop before the budget but always include the first row"""
+        rows = [{"n": "x" * 50} for _ in range(10)]
+
+        assert encode_rows(rows, max_chars=10)[1] == 1
+        text, shown = encode_rows(rows, max_chars=160)
+        assert shown == 3 and len(text) <= 160
+
+
+class TestTool:
+    """Test the query_operations_data tool output"""
+
+    async def test_csv_pages_with_cursor(self, tools):
+        """Should print CSV and a cursor that fetches the next page"""
+        operations_decorators.set_tools(None, tools)
+        try:
+            first = (await operations_decorators.query_operations_data_tool.handler(
+                {"table": "rsp_orders", "columns": "id,status", "limit": 50}))["content"][0]["text"]
+            cursor = re.search(r'cursor="(c[0-9a-f]+)"', first).group(1)
+            second = (await operations_decorators.query_operations_data_tool.handler(
+                {"cursor": cursor}))["content"][0]["text"]
+        finally:
+            operations_decorators.set_tools(None, None)
+
+        assert "id,status\n1,completed\n" in first
+        assert "\n51,pending\n" in second and "101," not in second
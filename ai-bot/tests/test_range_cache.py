@@ -0,0 +1,133 @@
+"""
+Tests for the per-day range cache (RangeCache + SupabaseTools range RPCs)
+"""
+
+from datetime import date, timedelta
+
+import httpx
+import pytest
+
+from scripts.postgrest_stub import PostgrestStub, demo_rpc_handlers
+from src.tools.range_cache import RANGE_SPECS, RangeCache, combine
+from src.tools.supabase_async import AsyncPostgrestClient
+from src.tools.supabase_tools import SupabaseTools
+
+TODAY = date(2025, 10, 20)
+
+
+def zone_rows(day):
+    """Deterministic per-day zone rows (revenue varies by day)"""
+    n = date.fromisoformat(day).day
+    return [
+        {"zone": "大厅", "total_revenue": 1000 + n, "order_count": 10, "avg_order_value": (1000 + n) / 10},
+        {"zone": "包间", "total_revenue": 500, "order_count": 2 + n % 2, "avg_order_value": 500 / (2 + n % 2)},
+    ]
+
+
+class TestCombine:
+    """Test combining per-day partials"""
+
+    def test_sums_and_recomputed_ratio(self):
+        """Should add sums per group and recompute averages from them"""
+        rows = combine(RANGE_SPECS["get_revenue_by_zone"], [zone_rows("2025-10-01"), zone_rows("2025-10-02")])
+
+        assert rows[0] == {"zone": "大厅", "total_revenue": 2003, "order_count": 20, "avg_order_value": 100.15}
+        assert rows[1] == {"zone": "包间", "total_revenue": 1000, "order_count": 5, "avg_order_value": 200}
+
+    def test_attributes_kept_per_group(self):
+        """Should keep constant columns such as table capacity and order by the spec"""
+        day = [{"zone": "A区", "table_no": "A1", "order_count": 2, "total_revenue": 300, "avg_order_value": 150,
+                "capacity": 4},
+               {"zone": "A区", "table_no": "A2", "order_count": 0, "total_revenue": 0, "avg_order_value": 0,
+                "capacity": 2}]
+
+        rows = combine(RANGE_SPECS["get_table_turnover"], [day, day, day])
+
+        assert rows[0] == {"zone": "A区", "table_no": "A1", "capacity": 4, "order_count": 6,
+                           "total_revenue": 900, "avg_order_value": 150}
+        assert rows[1]["avg_order_value"] == 0
+
+
+class TestSupabaseRangeRpcs:
+    """Test per-day fetching through SupabaseTools"""
+
+    @pytest.fixture
+    def stub(self):
+        handlers = demo_rpc_handlers()
+        handlers["get_revenue_by_zone"] = lambda p: zone_rows(p["start_date"]) if p["start_date"] == p["end_date"] \
+            else pytest.fail("range RPC called for a decomposable function")
+        return PostgrestStub(rpc_handlers=handlers)
+
+    def make_tools(self, stub, current):
+        client = AsyncPostgrestClient("http://stub", "key", transport=httpx.ASGITransport(app=stub))
+        return SupabaseTools(client=client, range_cache=RangeCache(today=lambda: current[0]))
+
+    async def test_overlapping_ranges_fetch_only_missing_days(self, stub):
+        """Should reuse cached days across overlapping ranges and match the direct aggregate"""
+        tools = self.make_tools(stub, [TODAY])
+
+        week = await tools.get_revenue_by_zone("2025-10-01", "2025-10-07")
+        assert stub.requests == 7
+        month = await tools.get_revenue_by_zone("2025-10-01", "2025-10-10")
+        assert stub.requests == 10
+
+        expected = combine(RANGE_SPECS["get_revenue_by_zone"],
+                           [zone_rows(f"2025-10-{d:02d}") for d in range(1, 11)])
+        assert month["data"] == expected
+        assert week["data"][0]["total_revenue"] == sum(1000 + d for d in range(1, 8))
+        stats = tools.range_cache.stats()["functions"]["get_revenue_by_zone"]
+        assert (stats["day_hits"], stats["day_misses"], stats["rpc_calls"]) == (7, 10, 10)
+
+    async def test_rolling_trend_costs_one_fetch(self, stub):
+        """Should answer the next day's rolling 90-day trend with one RPC for the new days"""
+        current = [TODAY]
+        tools = self.make_tools(stub, current)
+
+        def window():
+            end = current[0] - timedelta(days=1)
+            return (end - timedelta(days=89)).isoformat(), end.isoformat()
+
+        first = await tools.get_revenue_trend(*window())
+        assert (len(first["data"]), stub.requests) == (90, 1)
+
+        current[0] = TODAY + timedelta(days=1)
+        second = await tools.get_revenue_trend(*window())
+
+        assert stub.requests == 2
+        assert len(second["data"]) == 90
+        assert second["data"][-1]["date"] == TODAY.isoformat()
+        assert second["data"][:89] == first["data"][1:]
+
+    async def test_non_decomposable_uses_range_rpc(self, stub):
+        """Should run get_station_performance as one range RPC and count it as bypassed"""
+        tools = self.make_tools(stub, [TODAY])
+
+        result = await tools.get_station_performance("2025-10-01", "2025-10-07")
+
+        assert result["success"] is True
+        assert stub.requests == 1
+        assert tools.range_cache.stats()["functions"]["get_station_performance"]["bypassed"] == 1
+
+    async def test_unexpected_column_disables_decomposition(self, stub):
+        """Should fall back to the range RPC when rows carry a column the spec cannot combine"""
+        stub.rpc_handlers["get_table_turnover"] = lambda p: [
+            {"zone": "A区", "table_no": "A1", "order_count": 3, "total_revenue": 300, "avg_order_value": 100,
+             "capacity": 4, "median_wait_minutes": 12}]
+        tools = self.make_tools(stub, [TODAY])
+
+        result = await tools.get_table_turnover("2025-10-01", "2025-10-02")
+
+        assert result["data"][0]["median_wait_minutes"] == 12
+        assert result["data"][0]["order_count"] == 3
+        assert tools.range_cache.decomposable("get_table_turnover") is False
+        assert "median_wait_minutes" in tools.range_cache.stats()["disabled"]["get_table_turnover"]
+
+    async def test_invalidate_day(self, stub):
+        """Should refetch an invalidated day only"""
+        tools = self.make_tools(stub, [TODAY])
+        await tools.get_revenue_by_zone("2025-10-01", "2025-10-03")
+
+        assert tools.invalidate_rpc_cache(day="2025-10-02") == 1
+        await tools.get_revenue_by_zone("2025-10-01", "2025-10-03")
+
+        assert stub.requests == 4
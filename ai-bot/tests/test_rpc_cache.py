@@ -0,0 +1,150 @@
+"""
+Tests for the date-aware RPC result cache (RpcCache + SupabaseTools._rpc)
+"""
+
+import time
+from datetime import date
+
+import httpx
+import pytest
+
+from scripts.postgrest_stub import PostgrestStub
+from src.tools.rpc_cache import RpcCache
+from src.tools.supabase_async import AsyncPostgrestClient
+from src.tools.supabase_tools import SupabaseTools
+
+TODAY = date(2025, 10, 20)
+
+
+def make_cache(**kwargs):
+    return RpcCache(today=lambda: TODAY, **kwargs)
+
+
+class TestRpcCache:
+    """Test keys, TTL classes, eviction and invalidation"""
+
+    def test_key_normalizes_params(self):
+        """Should treat reordered params, None values and datetime-style dates as the same call"""
+        cache = make_cache()
+        cache.put("get_top_dishes", {"start_date": "2025-10-01", "end_date": "2025-10-07", "top_n": 5}, [1])
+
+        hit, data = cache.get("get_top_dishes", {"top_n": 5, "end_date": "2025-10-07T00:00:00",
+                                                 "start_date": date(2025, 10, 1), "extra": None})
+
+        assert (hit, data) == (True, [1])
+        assert cache.get("get_top_dishes", {"start_date": "2025-10-01", "end_date": "2025-10-07", "top_n": 10})[0] is False
+
+    def test_ttl_classes(self):
+        """Should cache closed ranges permanently, yesterday for recent_ttl and today for open_ttl"""
+        cache = make_cache(open_ttl=60, recent_ttl=600)
+
+        assert cache.ttl_for("2025-10-01") == (None, "closed")
+        assert cache.ttl_for("2025-10-19") == (600, "recent")
+        assert cache.ttl_for("2025-10-20") == (60, "open")
+        assert cache.ttl_for("2025-10-25") == (60, "open")
+
+    def test_open_range_expires(self):
+        """Should expire results for ranges touching today after open_ttl"""
+        cache = make_cache(open_ttl=0.05)
+        cache.put("get_daily_revenue", {"target_date": "2025-10-20"}, [{"total_revenue": 1}])
+        cache.put("get_daily_revenue", {"target_date": "2025-10-01"}, [{"total_revenue": 2}])
+
+        time.sleep(0.1)
+
+        assert cache.get("get_daily_revenue", {"target_date": "2025-10-20"})[0] is False
+        assert cache.get("get_daily_revenue", {"target_date": "2025-10-01"}) == (True, [{"total_revenue": 2}])
+        assert cache.stats()["functions"]["get_daily_revenue"]["expired"] == 1
+
+    def test_defaulted_dates_roll_over_with_today(self):
+        """Should key calls relying on CURRENT_DATE defaults by today's date, with the open TTL"""
+        current = [TODAY]
+        cache = RpcCache(today=lambda: current[0], open_ttl=60)
+        cache.put("get_menu_profitability", {"end_date": "2025-10-10"}, ["today"])
+
+        assert cache.get("get_menu_profitability", {"end_date": "2025-10-10"})[0] is True
+        current[0] = date(2025, 10, 21)
+        assert cache.get("get_menu_profitability", {"end_date": "2025-10-10"})[0] is False
+
+    def test_lru_eviction(self):
+        """Should evict the least recently used entry beyond max_entries"""
+        cache = make_cache(max_entries=2)
+        for day in ("2025-10-01", "2025-10-02"):
+            cache.put("get_quick_stats", {"target_date": day}, day)
+        cache.get("get_quick_stats", {"target_date": "2025-10-01"})
+        cache.put("get_quick_stats", {"target_date": "2025-10-03"}, "2025-10-03")
+
+        assert cache.get("get_quick_stats", {"target_date": "2025-10-01"})[0] is True
+        assert cache.get("get_quick_stats", {"target_date": "2025-10-02"})[0] is False
+        assert cache.stats()["functions"]["get_quick_stats"]["evictions"] == 1
+
+    def test_invalidate_by_function_and_day(self):
+        """Should drop only entries of the function whose range covers the day"""
+        cache = make_cache()
+        cache.put("get_revenue_trend", {"start_date": "2025-10-01", "end_date": "2025-10-07"}, "week1")
+        cache.put("get_revenue_trend", {"start_date": "2025-10-08", "end_date": "2025-10-14"}, "week2")
+        cache.put("get_top_dishes", {"start_date": "2025-10-01", "end_date": "2025-10-07"}, "dishes")
+
+        assert cache.invalidate(function="get_revenue_trend", day="2025-10-05") == 1
+        assert cache.get("get_revenue_trend", {"start_date": "2025-10-01", "end_date": "2025-10-07"})[0] is False
+        assert cache.get("get_revenue_trend", {"start_date": "2025-10-08", "end_date": "2025-10-14"})[0] is True
+        assert cache.get("get_top_dishes", {"start_date": "2025-10-01", "end_date": "2025-10-07"})[0] is True
+
+        assert cache.invalidate() == 2
+        assert cache.stats()["entries"] == 0
+
+    def test_disk_tier(self, tmp_path):
+        """Should persist closed ranges only and serve them to a new cache instance"""
+        first = make_cache(disk_dir=str(tmp_path))
+        first.put("get_top_dishes", {"start_date": "2025-09-01", "end_date": "2025-09-30"}, [{"item_name": "酸菜鱼"}])
+        first.put("get_daily_revenue", {"target_date": "2025-10-20"}, [{"total_revenue": 1}])
+        assert len(list(tmp_path.glob("*.json"))) == 1
+
+        second = make_cache(disk_dir=str(tmp_path))
+        hit, data = second.get("get_top_dishes", {"start_date": "2025-09-01", "end_date": "2025-09-30"})
+
+        assert (hit, data) == (True, [{"item_name": "酸菜鱼"}])
+        assert second.stats()["functions"]["get_top_dishes"]["disk_hits"] == 1
+
+        assert second.invalidate(day="2025-09-15") == 1
+        assert list(tmp_path.glob("*.json")) == []
+
+
+class TestSupabaseToolsCache:
+    """Test the cache in front of SupabaseTools RPCs"""
+
+    @pytest.fixture
+    def stub(self):
+        return PostgrestStub()
+
+    @pytest.fixture
+    def tools(self, stub):
+        client = AsyncPostgrestClient("http://stub", "key", transport=httpx.ASGITransport(app=stub))
+        return SupabaseTools(client=client, rpc_cache=make_cache())
+
+    async def test_repeated_calls_hit_cache(self, stub, tools):
+        """Should answer repeated identical calls without another request"""
+        first = await tools.get_top_dishes("2025-09-01", "2025-09-30", 5)
+        second = await tools.get_top_dishes("2025-09-01", "2025-09-30", 5)
+        await tools.get_top_dishes("2025-09-01", "2025-09-30", 3)
+
+        assert first == second
+        assert stub.requests == 2
+        stats = tools.rpc_cache.stats()["functions"]["get_top_dishes"]
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 2, 0.333)
+
+    async def test_errors_not_cached(self, stub, tools):
+        """Should not cache failed calls"""
+        handler = stub.rpc_handlers.pop("get_quick_stats")
+        assert (await tools.get_quick_stats("2025-10-01"))["success"] is False
+
+        stub.rpc_handlers["get_quick_stats"] = handler
+        assert (await tools.get_quick_stats("2025-10-01"))["success"] is True
+        assert stub.requests == 2
+
+    async def test_invalidate_rpc_cache(self, stub, tools):
+        """Should refetch after explicit invalidation"""
+        await tools.get_daily_revenue("2025-10-01")
+        assert tools.invalidate_rpc_cache(day="2025-10-01") == 1
+
+        await tools.get_daily_revenue("2025-10-01")
+        assert stub.requests == 2
@@ -0,0 +1,129 @@
+"""
+Tests for single-flight coalescing of identical concurrent data tool calls
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from scripts.postgrest_stub import PostgrestStub
+from src.tools.single_flight import SingleFlight, coalesce, make_key
+from src.tools.supabase_async import AsyncPostgrestClient
+from src.tools.supabase_tools import SupabaseTools
+
+
+class Searcher:
+    def __init__(self):
+        self.single_flight = SingleFlight()
+        self.executions = 0
+        self.release = threading.Event()
+
+    @coalesce("search")
+    def search(self, query, limit=10):
+        self.executions += 1
+        self.release.wait(5)
+        return [query] * limit
+
+
+class TestSyncCoalescing:
+    """Test call() and @coalesce across threads"""
+
+    def test_identical_calls_share_one_execution(self):
+        """Should run concurrent identical calls once and give every caller the result"""
+        searcher = Searcher()
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            futures = [pool.submit(searcher.search, "营收", 2) for _ in range(3)]
+            futures += [pool.submit(searcher.search, query="营收", limit=2) for _ in range(2)]
+            futures.append(pool.submit(searcher.search, "菜品", 2))
+            time.sleep(0.2)
+            searcher.release.set()
+            results = [f.result() for f in futures]
+
+        assert results[:5] == [["营收", "营收"]] * 5
+        assert results[5] == ["菜品", "菜品"]
+        assert searcher.executions == 2
+        stats = searcher.single_flight.stats()
+        assert stats["calls"]["search"]["executions"] == 2
+        assert stats["calls"]["search"]["coalesced"] == 4
+        assert stats["inflight"] == 0
+
+    def test_error_shared_and_not_retained(self):
+        """Should raise the leader's error in every waiter and run again afterwards"""
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.2)
+            raise RuntimeError("db locked")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(flight.call, ("q", "x"), failing)
+            started.wait(5)
+            follower = pool.submit(flight.call, ("q", "x"), lambda: "unused")
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError):
+                    future.result()
+
+        assert flight.call(("q", "x"), lambda: "ok") == "ok"
+        assert flight.stats()["calls"]["q"]["errors"] == 1
+
+
+class TestAsyncCoalescing:
+    """Test run() on the event loop"""
+
+    async def test_concurrent_awaits_share_one_task(self):
+        """Should await one execution for identical concurrent coroutines"""
+        flight = SingleFlight()
+        executions = []
+
+        async def fetch():
+            executions.append(1)
+            await asyncio.sleep(0.05)
+            return {"total_revenue": 1}
+
+        results = await asyncio.gather(*(flight.run(make_key("rpc", {"d": 1}), fetch) for _ in range(5)))
+
+        assert results == [{"total_revenue": 1}] * 5
+        assert len(executions) == 1
+        assert flight.stats()["calls"]["rpc"]["coalesced"] == 4
+
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        """Should keep the shared call running when one waiter is cancelled"""
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.1)
+            return "done"
+
+        first = asyncio.create_task(flight.run(("rpc",), fetch))
+        second = asyncio.create_task(flight.run(("rpc",), fetch))
+        await asyncio.sleep(0.02)
+        first.cancel()
+
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+
+class TestSupabaseRpcCoalescing:
+    """Test coalescing in SupabaseTools._rpc"""
+
+    async def test_rush_issues_one_request(self):
+        """Should send one RPC for many concurrent identical tool calls and cache it"""
+        stub = PostgrestStub(latency=0.1)
+        client = AsyncPostgrestClient("http://stub", "key", transport=httpx.ASGITransport(app=stub))
+        tools = SupabaseTools(client=client)
+
+        results = await asyncio.gather(*(tools.get_daily_revenue("2025-10-01") for _ in range(8)))
+        await tools.get_daily_revenue("2025-10-01")
+
+        assert all(r["success"] and r == results[0] for r in results)
+        assert stub.requests == 1
+        assert tools.single_flight.stats()["calls"]["get_daily_revenue"]["coalesced"] == 7
+        assert tools.rpc_cache.stats()["functions"]["get_daily_revenue"]["hits"] == 1
+        await tools.aclose()
@@ -0,0 +1,188 @@
+"""
+Tests for the async Supabase access path (AsyncPostgrestClient + SupabaseTools)
+against the local PostgREST stand-in
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from scripts.postgrest_stub import PostgrestStub
+from src.tools import analytics_decorators, menu_engineering_decorators, operations_decorators
+from src.tools.supabase_async import AsyncPostgrestClient, PostgrestError, PostgrestTimeout
+from src.tools.supabase_tools import SupabaseTools
+
+
+def make_tools(stub, timeout=10.0):
+    client = AsyncPostgrestClient("http://stub", "key", timeout=timeout, transport=httpx.ASGITransport(app=stub))
+    return SupabaseTools(client=client)
+
+
+@pytest.fixture
+def stub():
+    return PostgrestStub(tables={
+        "tasks": [
+            {"id": 1, "title": "Inventory", "status": "pending", "created_at": "2025-10-02"},
+            {"id": 2, "title": "Payroll", "status": "done", "created_at": "2025-10-05"},
+            {"id": 3, "title": "Audit", "status": "pending", "created_at": "2025-11-01"},
+        ],
+        "projects": [],
+    })
+
+
+class TestAsyncPostgrestClient:
+    """Test query encoding, errors, timeouts and cancellation"""
+
+    async def test_table_filters_order_limit(self, stub):
+        """Should send PostgREST filters and return the matching rows"""
+        tools = make_tools(stub)
+
+        response = await tools.client.table("tasks").select("id,title").eq("status", "pending") \
+            .gte("created_at", "2025-10-01").order("id", desc=True).limit(5).execute()
+
+        assert response.data == [{"id": 3, "title": "Audit"}, {"id": 1, "title": "Inventory"}]
+        await tools.aclose()
+
+    async def test_error_status_raises(self, stub):
+        """Should raise PostgrestError with the PostgREST code for a missing function"""
+        tools = make_tools(stub)
+
+        with pytest.raises(PostgrestError) as info:
+            await tools.client.rpc("no_such_function")
+
+        assert info.value.status == 404
+        assert info.value.code == "PGRST202"
+        assert tools.client.stats()["calls"]["rpc:no_such_function"]["errors"] == 1
+
+    async def test_timeout_and_cancellation(self, stub):
+        """Should time out slow calls and release cancelled ones"""
+        stub.rpc_latency = {"get_daily_revenue": 5.0}
+        tools = make_tools(stub, timeout=0.1)
+
+        with pytest.raises(PostgrestTimeout):
+            await tools.client.rpc("get_daily_revenue")
+        assert (await tools.get_daily_revenue("2025-10-01"))["success"] is False
+
+        task = asyncio.create_task(tools.client.rpc("get_daily_revenue", timeout=10))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        calls = tools.client.stats()["calls"]["rpc:get_daily_revenue"]
+        assert (calls["timeouts"], calls["cancelled"]) == (2, 1)
+        assert tools.client.stats()["inflight"] == 0
+
+
+class TestAsyncTools:
+    """Test the ported @tool handlers"""
+
+    @pytest.fixture(autouse=True)
+    def wire(self, stub):
+        tools = make_tools(stub)
+        for module in (analytics_decorators, menu_engineering_decorators, operations_decorators):
+            module.set_tools(None, tools)
+        yield tools
+        for module in (analytics_decorators, menu_engineering_decorators, operations_decorators):
+            module.set_tools(None, None)
+
+    async def test_tools_run_concurrently(self, stub):
+        """Should overlap slow RPCs instead of serializing them on the event loop"""
+        stub.latency = 0.3
+        handlers = [
+            analytics_decorators.get_daily_revenue_tool.handler({"target_date": "2025-10-01"}),
+            analytics_decorators.get_revenue_by_zone_tool.handler({}),
+            analytics_decorators.get_revenue_trend_tool.handler({"start_date": "2025-10-01", "end_date": "2025-10-03"}),
+            menu_engineering_decorators.get_top_profitable_dishes_tool.handler({"top_n": 3}),
+            menu_engineering_decorators.get_cost_coverage_rate_tool.handler({}),
+            operations_decorators.query_operations_data_tool.handler({"table": "tasks"}),
+        ]
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*handlers)
+        elapsed = time.perf_counter() - started
+
+        assert stub.peak_concurrency == len(handlers)
+        assert elapsed < 0.3 * len(handlers) / 2
+        assert all(r["content"][0]["text"] for r in results)
+
+    async def test_update_and_summary(self, stub, wire):
+        """Should patch rows and summarize tables through the async client"""
+        updated = await wire.update_operations_data("tasks", 1, {"status": "done"})
+        summary = await wire.get_operations_summary({"start_date": "2025-10-01", "end_date": "2025-10-31"})
+
+        assert updated["success"] is True
+        assert stub.tables["tasks"][0]["status"] == "done"
+        assert summary["summary"]["tasks"] == {"total": 2, "by_status": {"done": 2}}
+
+
+class TestGroupCount:
+    """Test server-side status counts for get_operations_summary"""
+
+    @pytest.fixture
+    def big_stub(self):
+        statuses = ["pending", "in_progress", "done"]
+        return PostgrestStub(tables={
+            "tasks": [{"id": n, "status": statuses[n % 3], "created_at": f"2025-10-{1 + n % 28:02d}"}
+                      for n in range(3000)],
+            "projects": [{"id": n, "status": "active", "created_at": "2025-10-02"} for n in range(7)],
+        })
+
+    async def test_summary_counts_server_side(self, big_stub):
+        """Should fetch one row per status instead of every record"""
+        tools = make_tools(big_stub)
+
+        summary = await tools.get_operations_summary({"start_date": "2025-10-01", "end_date": "2025-10-14"})
+
+        tasks = summary["summary"]["tasks"]
+        assert tasks["total"] == sum(1 for n in range(3000) if 1 + n % 28 <= 14)
+        assert set(tasks["by_status"]) == {"pending", "in_progress", "done"}
+        assert summary["summary"]["projects"] == {"total": 7, "by_status": {"active": 7}}
+        assert big_stub.requests == 2
+        assert big_stub.bytes_sent < 500
+        await tools.aclose()
+
+    async def test_falls_back_to_aggregate_select_then_rows(self, big_stub):
+        """Should use an aggregate select without the RPC, download the column without either, and remember it"""
+        del big_stub.rpc_handlers["group_count"]
+        big_stub.aggregates = True
+        tools = make_tools(big_stub)
+
+        by_aggregate = await tools.group_count("tasks", "status")
+        assert tools._group_count_paths[0] == "aggregate"
+
+        big_stub.aggregates = False
+        by_rows = await tools.group_count("tasks", "status")
+        requests = big_stub.requests
+        await tools.group_count("tasks", "status")
+
+        assert by_aggregate == by_rows == {"pending": 1000, "in_progress": 1000, "done": 1000}
+        assert tools._group_count_paths == ["rows"]
+        assert big_stub.requests == requests + 1
+        await tools.aclose()
+
+    async def test_concurrent_calls_fall_back_together(self, big_stub):
+        """Should let concurrent summaries all reach the row path when nothing server-side is available"""
+        del big_stub.rpc_handlers["group_count"]
+        tools = make_tools(big_stub)
+
+        summary = await tools.get_operations_summary({"start_date": "2025-10-01", "end_date": "2025-10-31"})
+
+        assert summary["success"] is True
+        assert summary["summary"]["tasks"]["total"] == 3000
+        await tools.aclose()
+
+    async def test_other_errors_are_reported(self, stub):
+        """Should fail the summary, not switch paths, when the table is missing"""
+        del stub.tables["projects"]
+        del stub.rpc_handlers["group_count"]
+        tools = make_tools(stub)
+
+        summary = await tools.get_operations_summary({"start_date": "2025-10-01", "end_date": "2025-10-31"})
+
+        assert summary["success"] is False
+        assert "does not exist" in summary["message"]
+        assert tools._group_count_paths == ["rows"]
+        await tools.aclose()
@@ -0,0 +1,101 @@
+"""
+Tests for the user context cache used by CampfireTools.get_user_context
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from src.tools.campfire_tools import CampfireTools
+from src.tools.user_context_cache import UserContextCache
+
+
+@pytest.fixture
+def db_copy(tmp_path):
+    """Writable copy of the test database"""
+    path = tmp_path / "test.db"
+    shutil.copy("./tests/fixtures/test.db", path)
+    return path
+
+
+@pytest.fixture
+def tools(db_copy, tmp_path):
+    """CampfireTools with probe reuse disabled so every call revalidates"""
+    t = CampfireTools(
+        db_path=str(db_copy),
+        context_dir=str(tmp_path / "user_contexts")
+    )
+    t.user_context_cache.probe_interval_seconds = 0
+    return t
+
+
+class TestUserContextCache:
+    """Test cache hits and invalidation for get_user_context"""
+
+    def test_repeat_lookup_hits_cache(self, tools):
+        """Should serve the second lookup from cache with identical content"""
+        first = tools.get_user_context(user_id=1)
+        second = tools.get_user_context(user_id=1)
+
+        assert first == second
+        stats = tools.get_cache_stats()["user_context"]
+        assert stats["db_hits"] == 1
+        assert stats["json_hits"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_returned_context_is_a_copy(self, tools):
+        """Should not let callers mutate cached entries"""
+        context = tools.get_user_context(user_id=1)
+        context["rooms"].clear()
+
+        assert tools.get_user_context(user_id=1)["rooms"]
+
+    def test_save_invalidates_json_part(self, tools):
+        """Should reflect saved preferences immediately"""
+        tools.get_user_context(user_id=1)
+        tools.save_user_context(user_id=1, preferences={"language": "zh"})
+
+        context = tools.get_user_context(user_id=1)
+        assert context["preferences"]["language"] == "zh"
+
+    def test_external_file_edit_detected(self, tools):
+        """Should pick up a context file rewritten outside CampfireTools"""
+        tools.save_user_context(user_id=1, expertise=["finance"])
+        tools.get_user_context(user_id=1)
+
+        context_file = tools.context_dir / "user_1.json"
+        data = json.loads(context_file.read_text())
+        data["expertise"] = ["operations", "hr"]
+        context_file.write_text(json.dumps(data))
+        st = context_file.stat()
+        os.utime(context_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        assert tools.get_user_context(user_id=1)["expertise"] == ["operations", "hr"]
+
+    def test_directory_change_detected(self, tools, db_copy):
+        """Should reload DB part when the users table changes"""
+        before = tools.get_user_context(user_id=1)
+
+        conn = sqlite3.connect(db_copy)
+        conn.execute(
+            "UPDATE users SET name = 'Renamed', updated_at = '2099-01-01 00:00:00' WHERE id = 1"
+        )
+        conn.commit()
+        conn.close()
+
+        after = tools.get_user_context(user_id=1)
+        assert after["user_name"] == "Renamed"
+        assert after["user_name"] != before["user_name"]
+
+    def test_lru_bound(self):
+        """Should evict least recently used entries beyond max_entries"""
+        cache = UserContextCache(max_entries=2)
+        for user_id in range(3):
+            cache.get_json_part(user_id, None, lambda: {})
+
+        stats = cache.stats()
+        assert stats["json_entries"] == 2
+        assert stats["evictions"] == 1